@@ -110,6 +110,8 @@ async def lifespan(app: FastAPI):
         try:
             await redis.initialize_async()
             logger.debug("Redis connection initialized successfully")
+            from core.agents.pipeline.slot_manager import load_slot_scripts
+            await load_slot_scripts()
             try:
                 tier_keys = await redis.scan_keys("tier_info:*")
                 sub_keys = await redis.scan_keys("subscription_tier:*")
@@ -263,7 +265,15 @@ async def lifespan(app: FastAPI):
         # Stop conversation analytics worker
         from core.analytics.conversation_analytics_worker import stop_analytics_worker
         await stop_analytics_worker()
-        
+
+        # Close pooled MCP client sessions
+        from core.tools.utils.mcp_session_pool import mcp_session_pool
+        await mcp_session_pool.close_all()
+
+        # Stop KB extraction workers
+        from core.knowledge_base.extraction import extraction_service
+        extraction_service.shutdown()
+
         try:
             logger.debug("Closing Redis connection")
             await redis.close()
@@ -3176,66 +3176,39 @@ async def get_tool_adoption(
     admin: dict = Depends(require_admin)
 ) -> ToolAdoptionSummary:
     """
-    Get tool adoption metrics by parsing tool calls from messages.
+    Get tool adoption metrics from the daily tool rollup (UTC days).
     """
     try:
+        from core.services.db import execute_read, execute_scalar_read
+
         db = DBConnection()
         client = await db.client
-        
-        # Parse target date
+
+        # Rollups are bucketed by UTC day, like the engagement and task metrics
+        UTC = ZoneInfo('UTC')
         if date:
-            target_date = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=BERLIN_TZ)
+            target_date = datetime.strptime(date, "%Y-%m-%d").replace(tzinfo=UTC)
         else:
-            target_date = datetime.now(BERLIN_TZ)
-        
+            target_date = datetime.now(UTC)
+
         today_start = target_date.replace(hour=0, minute=0, second=0, microsecond=0)
         today_end = today_start + timedelta(days=1)
-        
-        # Get messages with tool calls (type='tool' or content contains tool_calls)
-        # We look for assistant messages that have tool_calls in their content
-        messages_result = await client.from_('messages').select(
-            'thread_id, content, type'
-        ).gte('created_at', today_start.isoformat()).lt('created_at', today_end.isoformat()).in_('type', ['tool', 'assistant']).limit(5000).execute()
-        
-        messages = messages_result.data or []
-        
-        # Parse tool usage
-        tool_counts: Dict[str, int] = {}
-        tool_threads: Dict[str, set] = {}
-        threads_with_tools: set = set()
-        total_tool_calls = 0
-        
-        for msg in messages:
-            thread_id = msg.get('thread_id')
-            content = msg.get('content', {})
-            msg_type = msg.get('type')
-            
-            # Handle tool type messages
-            if msg_type == 'tool':
-                tool_name = content.get('name') or content.get('tool_name') or 'unknown'
-                tool_counts[tool_name] = tool_counts.get(tool_name, 0) + 1
-                if tool_name not in tool_threads:
-                    tool_threads[tool_name] = set()
-                tool_threads[tool_name].add(thread_id)
-                threads_with_tools.add(thread_id)
-                total_tool_calls += 1
-            
-            # Handle assistant messages with tool_calls
-            elif msg_type == 'assistant' and isinstance(content, dict):
-                tool_calls = content.get('tool_calls', [])
-                if isinstance(tool_calls, list):
-                    for tool_call in tool_calls:
-                        if isinstance(tool_call, dict):
-                            func = tool_call.get('function', {})
-                            tool_name = func.get('name') if isinstance(func, dict) else None
-                            if tool_name:
-                                tool_counts[tool_name] = tool_counts.get(tool_name, 0) + 1
-                                if tool_name not in tool_threads:
-                                    tool_threads[tool_name] = set()
-                                tool_threads[tool_name].add(thread_id)
-                                threads_with_tools.add(thread_id)
-                                total_tool_calls += 1
-        
+
+        tool_rows = await execute_read("""
+            SELECT tool_name, SUM(calls) AS usage_count, COUNT(*) AS unique_threads
+            FROM analytics_daily_tool_rollup
+            WHERE day = CAST(:day AS date)
+            GROUP BY tool_name
+            ORDER BY usage_count DESC
+        """, {"day": today_start.date().isoformat()})
+        threads_with_tools_count = await execute_scalar_read("""
+            SELECT COUNT(DISTINCT thread_id)
+            FROM analytics_daily_tool_rollup
+            WHERE day = CAST(:day AS date)
+        """, {"day": today_start.date().isoformat()}) or 0
+
+        total_tool_calls = sum(int(row['usage_count'] or 0) for row in tool_rows)
+
         # Get total threads for today to calculate adoption rate
         threads_result = await client.from_('threads').select(
             '*', count='exact'
@@ -3244,22 +3217,22 @@ async def get_tool_adoption(
         
         # Build top tools list
         top_tools: List[ToolUsage] = []
-        for tool_name, count in sorted(tool_counts.items(), key=lambda x: x[1], reverse=True)[:10]:
-            unique_threads = len(tool_threads.get(tool_name, set()))
+        for row in tool_rows[:10]:
+            unique_threads = int(row['unique_threads'] or 0)
             percentage = (unique_threads / total_threads * 100) if total_threads > 0 else 0.0
             top_tools.append(ToolUsage(
-                tool_name=tool_name,
-                usage_count=count,
+                tool_name=row['tool_name'],
+                usage_count=int(row['usage_count'] or 0),
                 unique_threads=unique_threads,
                 percentage_of_threads=round(percentage, 1),
             ))
         
         # Tool adoption rate (% of threads using any tool)
-        tool_adoption_rate = (len(threads_with_tools) / total_threads * 100) if total_threads > 0 else 0.0
+        tool_adoption_rate = (threads_with_tools_count / total_threads * 100) if total_threads > 0 else 0.0
 
         return ToolAdoptionSummary(
             total_tool_calls=total_tool_calls,
-            total_threads_with_tools=len(threads_with_tools),
+            total_threads_with_tools=threads_with_tools_count,
             top_tools=top_tools,
             tool_adoption_rate=round(tool_adoption_rate, 1),
         )
@@ -4324,18 +4297,17 @@ async def get_rfm_engagement_summary(
     try:
         from core.services.db import execute
 
-        # All RFM calculation in SQL - returns only segment counts (no Python loops)
+        # All RFM calculation in SQL over the daily account rollup - returns only segment counts
         segment_sql = """
         WITH account_stats AS (
             SELECT
-                t.account_id,
-                MAX(ar.started_at) as last_activity,
-                COUNT(*) FILTER (WHERE ar.started_at > NOW() - MAKE_INTERVAL(days => :days)) as recent_runs,
+                r.account_id,
+                MAX(r.last_run_at) as last_activity,
+                COALESCE(SUM(r.runs) FILTER (WHERE r.day > (NOW() - MAKE_INTERVAL(days => :days))::date), 0) as recent_runs,
                 COALESCE(ca.tier, 'none') as tier
-            FROM agent_runs ar
-            JOIN threads t ON ar.thread_id = t.thread_id
-            LEFT JOIN credit_accounts ca ON ca.account_id = t.account_id
-            GROUP BY t.account_id, ca.tier
+            FROM analytics_daily_account_rollup r
+            LEFT JOIN credit_accounts ca ON ca.account_id = r.account_id
+            GROUP BY r.account_id, ca.tier
         ),
         percentiles AS (
             SELECT
@@ -4416,14 +4388,13 @@ async def get_rfm_engagement_summary(
         at_risk_sql = """
         WITH account_stats AS (
             SELECT
-                t.account_id,
-                MAX(ar.started_at) as last_activity,
-                COUNT(*) FILTER (WHERE ar.started_at > NOW() - MAKE_INTERVAL(days => :days)) as recent_runs,
+                r.account_id,
+                MAX(r.last_run_at) as last_activity,
+                COALESCE(SUM(r.runs) FILTER (WHERE r.day > (NOW() - MAKE_INTERVAL(days => :days))::date), 0) as recent_runs,
                 COALESCE(ca.tier, 'none') as tier
-            FROM agent_runs ar
-            JOIN threads t ON ar.thread_id = t.thread_id
-            LEFT JOIN credit_accounts ca ON ca.account_id = t.account_id
-            GROUP BY t.account_id, ca.tier
+            FROM analytics_daily_account_rollup r
+            LEFT JOIN credit_accounts ca ON ca.account_id = r.account_id
+            GROUP BY r.account_id, ca.tier
         ),
         percentiles AS (
             SELECT
@@ -4570,19 +4541,18 @@ async def get_accounts_by_segment(
 
         offset = (page - 1) * page_size
 
-        # All RFM calculation in SQL - no Python loops
+        # All RFM calculation in SQL over the daily account rollup - no Python loops
         sql = """
         WITH account_stats AS (
             SELECT
-                t.account_id,
-                MAX(ar.started_at) as last_activity,
-                COUNT(*) as total_runs,
-                COUNT(*) FILTER (WHERE ar.started_at > NOW() - MAKE_INTERVAL(days => :days)) as recent_runs,
+                r.account_id,
+                MAX(r.last_run_at) as last_activity,
+                SUM(r.runs) as total_runs,
+                COALESCE(SUM(r.runs) FILTER (WHERE r.day > (NOW() - MAKE_INTERVAL(days => :days))::date), 0) as recent_runs,
                 COALESCE(ca.tier, 'none') as tier
-            FROM agent_runs ar
-            JOIN threads t ON ar.thread_id = t.thread_id
-            LEFT JOIN credit_accounts ca ON ca.account_id = t.account_id
-            GROUP BY t.account_id, ca.tier
+            FROM analytics_daily_account_rollup r
+            LEFT JOIN credit_accounts ca ON ca.account_id = r.account_id
+            GROUP BY r.account_id, ca.tier
         ),
         percentiles AS (
             SELECT
@@ -5307,7 +5277,7 @@ async def get_clustered_use_cases_endpoint(
         logger.error(f"Clustering dependency missing: {e}")
         raise HTTPException(
             status_code=500,
-            detail="Clustering requires scikit-learn. Install with: pip install scikit-learn"
+            detail="Clustering requires numpy. Install with: pip install numpy"
         )
     except Exception as e:
         logger.error(f"Failed to get clustered use cases: {e}", exc_info=True)
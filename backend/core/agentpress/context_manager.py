@@ -16,6 +16,7 @@ from core.services.supabase import DBConnection
 from core.utils.logger import logger
 from core.ai_models import model_manager
 from core.agentpress.prompt_caching import apply_anthropic_caching_strategy, supports_prompt_caching
+from core.agentpress.token_accounting import token_accountant
 
 DEFAULT_TOKEN_THRESHOLD = 120000
 
@@ -105,13 +106,44 @@ class ContextManager:
         """Get the singleton Bedrock client."""
         return _get_bedrock_client_singleton()
 
+    @staticmethod
+    def _has_provider_tokenizer(model: str) -> bool:
+        model_lower = model.lower()
+        return 'claude' in model_lower or 'anthropic' in model_lower or 'bedrock' in model_lower
+
     async def count_tokens(self, model: str, messages: List[Dict[str, Any]], system_prompt: Optional[Dict[str, Any]] = None, apply_caching: bool = True) -> int:
+        """Count tokens incrementally using the per-message token cache.
+        
+        Only new or changed messages are tokenized (locally, off the event loop).
+        For models with a provider tokenizer (Anthropic/Bedrock), the exact count is
+        fetched periodically in the background to calibrate the local estimate.
+        
+        Args:
+            model: Model name
+            messages: List of messages
+            system_prompt: Optional system prompt
+            apply_caching: Whether calibration counts include the caching transformation
+            
+        Returns:
+            Token count
+        """
+        calibrate = None
+        if self._has_provider_tokenizer(model):
+            messages_snapshot = list(messages)
+            calibrate = lambda: self.count_tokens_exact(model, messages_snapshot, system_prompt, apply_caching)
+        
+        return await token_accountant.count(model, messages, system_prompt, calibrate=calibrate)
+
+    async def count_tokens_exact(self, model: str, messages: List[Dict[str, Any]], system_prompt: Optional[Dict[str, Any]] = None, apply_caching: bool = True) -> int:
         """Count tokens using the correct tokenizer for the model.
         
         For Anthropic/Claude models: Uses Anthropic's official tokenizer
         For Bedrock models: Uses Bedrock's count_tokens API
         For other models: Uses LiteLLM's token_counter
         
+        Provider calls are remote round trips; prefer count_tokens, which only uses
+        this for periodic calibration.
+        
         IMPORTANT: By default, applies caching transformation before counting to match
         the actual token count that will be sent to the API.
         
@@ -175,7 +207,7 @@ class ContextManager:
                     if system_content:
                         count_params['system'] = system_content
                     
-                    result = client.messages.count_tokens(**count_params)
+                    result = await asyncio.to_thread(client.messages.count_tokens, **count_params)
                     return result.input_tokens
             except Exception as e:
                 logger.debug(f"Anthropic token counting failed, falling back to LiteLLM: {e}")
@@ -250,7 +282,8 @@ class ContextManager:
                         input_to_count['system'] = clean_content_for_bedrock(system_to_count.get('content'))
                     
                     # Call Bedrock count_tokens API
-                    response = bedrock_client.count_tokens(
+                    response = await asyncio.to_thread(
+                        bedrock_client.count_tokens,
                         modelId=bedrock_model_id,
                         input={'converse': input_to_count}
                     )
@@ -1157,7 +1190,7 @@ class ContextManager:
                     continue  # Skip non-dict messages
                 if self.is_tool_result_message(msg):  # Only compress ToolResult messages
                     _i += 1  # Count the number of ToolResult messages
-                    msg_token_count = token_counter(messages=[msg])  # Count the number of tokens in the message
+                    msg_token_count = token_accountant.message_tokens(llm_model, msg)  # Count the number of tokens in the message (cached)
                     if msg_token_count > token_threshold:  # If the message is too long
                         if _i > self.keep_recent_tool_outputs:  # If this is not one of the most recent N ToolResult messages
                             message_id = msg.get('message_id')  # Get the message_id
@@ -1187,7 +1220,7 @@ class ContextManager:
                     continue  # Skip non-dict messages
                 if msg.get('role') == 'user':  # Only compress User messages
                     _i += 1  # Count the number of User messages
-                    msg_token_count = token_counter(messages=[msg])  # Count the number of tokens in the message
+                    msg_token_count = token_accountant.message_tokens(llm_model, msg)  # Count the number of tokens in the message (cached)
                     if msg_token_count > token_threshold:  # If the message is too long
                         if _i > self.keep_recent_user_messages:  # If this is not one of the most recent N User messages
                             message_id = msg.get('message_id')  # Get the message_id
@@ -1218,7 +1251,7 @@ class ContextManager:
                     continue  # Skip non-dict messages
                 if msg.get('role') == 'assistant':  # Only compress Assistant messages
                     _i += 1  # Count the number of Assistant messages
-                    msg_token_count = token_counter(messages=[msg])  # Count the number of tokens in the message
+                    msg_token_count = token_accountant.message_tokens(llm_model, msg)  # Count the number of tokens in the message (cached)
                     if msg_token_count > token_threshold:  # If the message is too long
                         if _i > self.keep_recent_assistant_messages:  # If this is not one of the most recent N Assistant messages
                             message_id = msg.get('message_id')  # Get the message_id
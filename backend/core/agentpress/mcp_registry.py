@@ -423,62 +423,31 @@ class MCPRegistry:
             logger.error("❌ [MCP REGISTRY] Missing 'url' in SSE MCP config")
             return {}
         
-        from mcp.client.sse import sse_client
-        from mcp import ClientSession
+        from core.tools.utils.mcp_session_pool import mcp_session_pool
         
         headers = config.get('headers', {})
         schemas = {}
         
         try:
-            try:
-                async with sse_client(url, headers=headers) as (read_stream, write_stream):
-                    async with ClientSession(read_stream, write_stream) as session:
-                        await session.initialize()
-                        tools_result = await session.list_tools()
-                        tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
-                        
-                        for tool in tools:
-                            schema = {
-                                "type": "function",
-                                "function": {
-                                    "name": tool.name,
-                                    "description": _enrich_description(tool.name, tool.description or f"Execute {tool.name}"),
-                                    "parameters": tool.inputSchema if hasattr(tool, 'inputSchema') else {
-                                        "type": "object",
-                                        "properties": {},
-                                        "required": []
-                                    }
-                                }
-                            }
-                            schemas[tool.name] = schema
+            tools_result = await mcp_session_pool.list_tools("sse", url, headers=headers)
+            tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
+            
+            for tool in tools:
+                schema = {
+                    "type": "function",
+                    "function": {
+                        "name": tool.name,
+                        "description": _enrich_description(tool.name, tool.description or f"Execute {tool.name}"),
+                        "parameters": tool.inputSchema if hasattr(tool, 'inputSchema') else {
+                            "type": "object",
+                            "properties": {},
+                            "required": []
+                        }
+                    }
+                }
+                schemas[tool.name] = schema
 
-                        logger.debug(f"⚡ [MCP REGISTRY] Discovered {len(schemas)} SSE schemas")
-            except TypeError as e:
-                if "unexpected keyword argument" in str(e):
-                    async with sse_client(url) as (read_stream, write_stream):
-                        async with ClientSession(read_stream, write_stream) as session:
-                            await session.initialize()
-                            tools_result = await session.list_tools()
-                            tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
-                            
-                            for tool in tools:
-                                schema = {
-                                    "type": "function",
-                                    "function": {
-                                        "name": tool.name,
-                                        "description": _enrich_description(tool.name, tool.description or f"Execute {tool.name}"),
-                                        "parameters": tool.inputSchema if hasattr(tool, 'inputSchema') else {
-                                            "type": "object",
-                                            "properties": {},
-                                            "required": []
-                                        }
-                                    }
-                                }
-                                schemas[tool.name] = schema
-                            
-                            logger.debug(f"⚡ [MCP REGISTRY] Discovered {len(schemas)} SSE schemas (no headers)")
-                else:
-                    raise
+            logger.debug(f"⚡ [MCP REGISTRY] Discovered {len(schemas)} SSE schemas")
         except Exception as e:
             logger.error(f"❌ [MCP REGISTRY] Failed to load SSE schemas: {e}")
         
@@ -491,34 +460,30 @@ class MCPRegistry:
             logger.error("❌ [MCP REGISTRY] Missing 'url' in HTTP MCP config")
             return {}
         
-        from mcp.client.streamable_http import streamablehttp_client
-        from mcp import ClientSession
+        from core.tools.utils.mcp_session_pool import mcp_session_pool
         
         schemas = {}
         
         try:
-            async with streamablehttp_client(url) as (read_stream, write_stream, _):
-                async with ClientSession(read_stream, write_stream) as session:
-                    await session.initialize()
-                    tools_result = await session.list_tools()
-                    tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
-                    
-                    for tool in tools:
-                        schema = {
-                            "type": "function",
-                            "function": {
-                                "name": tool.name,
-                                "description": _enrich_description(tool.name, tool.description or f"Execute {tool.name}"),
-                                "parameters": tool.inputSchema if hasattr(tool, 'inputSchema') else {
-                                    "type": "object",
-                                    "properties": {},
-                                    "required": []
-                                }
-                            }
+            tools_result = await mcp_session_pool.list_tools("http", url)
+            tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
+            
+            for tool in tools:
+                schema = {
+                    "type": "function",
+                    "function": {
+                        "name": tool.name,
+                        "description": _enrich_description(tool.name, tool.description or f"Execute {tool.name}"),
+                        "parameters": tool.inputSchema if hasattr(tool, 'inputSchema') else {
+                            "type": "object",
+                            "properties": {},
+                            "required": []
                         }
-                        schemas[tool.name] = schema
+                    }
+                }
+                schemas[tool.name] = schema
 
-                    logger.debug(f"⚡ [MCP REGISTRY] Discovered {len(schemas)} HTTP schemas")
+            logger.debug(f"⚡ [MCP REGISTRY] Discovered {len(schemas)} HTTP schemas")
         except Exception as e:
             logger.error(f"❌ [MCP REGISTRY] Failed to load HTTP schemas: {e}")
         
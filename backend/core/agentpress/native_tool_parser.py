@@ -9,6 +9,8 @@ import uuid
 from typing import Dict, Any, List, Optional
 import logging
 
+from core.agentpress.streaming_json import IncrementalJSONParser
+
 logger = logging.getLogger(__name__)
 
 
@@ -49,12 +51,17 @@ def extract_tool_call_chunk_data(tool_call_chunk: Any) -> Dict[str, Any]:
     return tool_call_data_chunk
 
 
-def is_tool_call_complete(tool_call_buffer_entry: Dict[str, Any]) -> bool:
+def is_tool_call_complete(
+    tool_call_buffer_entry: Dict[str, Any],
+    arguments_parser: Optional[IncrementalJSONParser] = None
+) -> bool:
     """
     Check if a buffered tool call is complete (has all required fields and valid JSON arguments).
     
     Args:
         tool_call_buffer_entry: Dictionary from tool_calls_buffer with 'id', 'function' keys
+        arguments_parser: Optional incremental parser holding the streamed arguments; when
+            given, its cheap `complete` flag is used and the buffer's arguments are not read
         
     Returns:
         True if tool call is complete and ready to execute
@@ -62,11 +69,16 @@ def is_tool_call_complete(tool_call_buffer_entry: Dict[str, Any]) -> bool:
     if not tool_call_buffer_entry:
         return False
     
-    if not (tool_call_buffer_entry.get('id') and 
-            tool_call_buffer_entry.get('function', {}).get('name') and
-            tool_call_buffer_entry.get('function', {}).get('arguments')):
+    if not (tool_call_buffer_entry.get('id') and
+            tool_call_buffer_entry.get('function', {}).get('name')):
         return False
-    
+
+    if arguments_parser is not None:
+        return arguments_parser.complete
+
+    if not tool_call_buffer_entry.get('function', {}).get('arguments'):
+        return False
+
     # Verify JSON arguments are complete and parse to a dict
     try:
         from core.utils.json_helpers import safe_json_parse
@@ -190,6 +190,25 @@ def add_cache_control(message: Dict[str, Any]) -> Dict[str, Any]:
     return cached_msg
 
 
+def add_prefix_cache_control(message: Dict[str, Any], stable_prefix_chars: int) -> Dict[str, Any]:
+    """Cache a string system prompt with an extra breakpoint after its stable prefix.
+
+    The tail (current time etc.) changes every run, so a single breakpoint at the
+    end never hits across runs; the breakpoint at the prefix boundary does.
+    """
+    content = message.get('content', '')
+    if not isinstance(content, str) or not 0 < stable_prefix_chars < len(content):
+        return add_cache_control(message)
+    
+    return {
+        **message,
+        'content': [
+            {"type": "text", "text": content[:stable_prefix_chars], "cache_control": {"type": "ephemeral"}},
+            {"type": "text", "text": content[stable_prefix_chars:], "cache_control": {"type": "ephemeral"}},
+        ],
+    }
+
+
 async def apply_caching_strategy(
     working_system_prompt: Dict[str, Any], 
     conversation_messages: List[Dict[str, Any]], 
@@ -0,0 +1,222 @@
+"""
+Incremental JSON scanner for streamed tool-call arguments.
+
+Native tool-call arguments arrive as thousands of small string deltas. Re-parsing
+the whole accumulated buffer on every delta is quadratic, so each tool-call buffer
+slot gets an IncrementalJSONParser that only scans the newly appended text. It
+tracks nesting and string state, exposes the top-level keys and their raw
+(possibly partial) value text, and flips a cheap `complete` flag once the root
+object closes. The full document is only decoded once, at completion.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+_WHITESPACE = ' \t\n\r'
+
+
+class IncrementalJSONParser:
+    """Consumes a JSON object text delta by delta."""
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._text: Optional[str] = ""
+        self._length = 0
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._started = False
+        self._closed = False
+        self._invalid = False
+
+        # Top-level object bookkeeping
+        self._expect_key = False
+        self._reading_key = False
+        self._key_chars: List[str] = []
+        self._current_key: Optional[str] = None
+        self._pending_value = False
+        self._value_spans: Dict[str, List[Optional[int]]] = {}
+
+        self._parsed: Any = None
+        self._decoded = False
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far (joined lazily)."""
+        if self._text is None:
+            self._text = "".join(self._chunks)
+            self._chunks = [self._text]
+        return self._text
+
+    def text_from(self, offset: int) -> str:
+        """Text fed after `offset`, joining only the trailing chunks it spans."""
+        size = self._length - offset
+        if size <= 0:
+            return ""
+        if self._text is not None:
+            return self._text[offset:]
+        tail: List[str] = []
+        covered = 0
+        for chunk in reversed(self._chunks):
+            tail.append(chunk)
+            covered += len(chunk)
+            if covered >= size:
+                break
+        return "".join(reversed(tail))[covered - size:]
+
+    def __len__(self) -> int:
+        return self._length
+
+    @property
+    def complete(self) -> bool:
+        """True once the root object has closed and decodes to a dict."""
+        if not self._closed or self._invalid:
+            return False
+        if not self._decoded:
+            self._decoded = True
+            try:
+                self._parsed = json.loads(self.text)
+            except (json.JSONDecodeError, TypeError):
+                self._parsed = None
+        return isinstance(self._parsed, dict)
+
+    @property
+    def value(self) -> Optional[Dict[str, Any]]:
+        """The decoded object once complete, else None."""
+        return self._parsed if self.complete else None
+
+    @property
+    def partial_keys(self) -> List[str]:
+        """Top-level keys seen so far, in order."""
+        return list(self._value_spans.keys())
+
+    def value_text(self, key: str) -> Optional[str]:
+        """Raw text of a top-level value, possibly partial while it is still streaming."""
+        span = self._value_spans.get(key)
+        if not span or span[0] is None:
+            return None
+        start, end = span
+        return self.text[start:end].rstrip(_WHITESPACE) if end is not None else self.text[start:]
+
+    def string_value(self, key: str) -> Optional[str]:
+        """Decoded top-level string value, only once that value has fully arrived."""
+        span = self._value_spans.get(key)
+        if not span or span[1] is None:
+            return None
+        raw = self.value_text(key)
+        if not raw or raw[0] != '"':
+            return None
+        try:
+            decoded = json.loads(raw)
+        except (json.JSONDecodeError, TypeError):
+            return None
+        return decoded if isinstance(decoded, str) else None
+
+    def feed(self, delta: str) -> None:
+        if not delta:
+            return
+
+        base = self._length
+        self._chunks.append(delta)
+        self._text = None
+        self._length += len(delta)
+
+        if self._invalid:
+            return
+
+        i = 0
+        n = len(delta)
+        while i < n:
+            if self._in_string:
+                i = self._scan_string(delta, i, n)
+                continue
+
+            ch = delta[i]
+            if ch in _WHITESPACE:
+                i += 1
+                continue
+
+            if self._closed:
+                # Anything but whitespace after the root value is not valid JSON
+                self._invalid = True
+                return
+
+            if not self._started:
+                if ch != '{':
+                    self._invalid = True
+                    return
+                self._started = True
+                self._depth = 1
+                self._expect_key = True
+                i += 1
+                continue
+
+            if self._pending_value and self._depth == 1:
+                self._pending_value = False
+                self._value_spans[self._current_key][0] = base + i
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._expect_key:
+                    self._expect_key = False
+                    self._reading_key = True
+                    self._key_chars = []
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end_value(base + i)
+                    self._closed = True
+            elif ch == ',' and self._depth == 1:
+                self._end_value(base + i)
+                self._expect_key = True
+            elif ch == ':' and self._depth == 1 and self._current_key is not None:
+                self._value_spans[self._current_key] = [None, None]
+                self._pending_value = True
+            i += 1
+
+    def _scan_string(self, delta: str, i: int, n: int) -> int:
+        if self._escape:
+            self._escape = False
+            if self._reading_key:
+                self._key_chars.append(delta[i])
+            return i + 1
+
+        match = _STRING_SPECIAL.search(delta, i)
+        if match is None:
+            if self._reading_key:
+                self._key_chars.append(delta[i:])
+            return n
+
+        j = match.start()
+        if self._reading_key:
+            self._key_chars.append(delta[i:j])
+
+        if delta[j] == '\\':
+            self._escape = True
+            if self._reading_key:
+                self._key_chars.append('\\')
+            return j + 1
+
+        self._in_string = False
+        if self._reading_key:
+            self._reading_key = False
+            raw_key = "".join(self._key_chars)
+            try:
+                self._current_key = json.loads(f'"{raw_key}"')
+            except (json.JSONDecodeError, TypeError):
+                self._current_key = raw_key
+        return j + 1
+
+    def _end_value(self, end: int) -> None:
+        if self._current_key is None:
+            return
+        span = self._value_spans.get(self._current_key)
+        if span is not None and span[0] is not None and span[1] is None:
+            span[1] = end
+        self._current_key = None
+        self._pending_value = False
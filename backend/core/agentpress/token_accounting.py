@@ -0,0 +1,177 @@
+"""
+Incremental token accounting for conversation context.
+
+Token counts are cached per message (keyed by message_id plus a content hash),
+so recounting a conversation only tokenizes messages that are new or changed.
+Counting is done locally with LiteLLM's tokenizer; provider tokenizers
+(Anthropic / Bedrock count_tokens) are only used for periodic background
+calibration of a per-model correction factor.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from litellm.utils import token_counter
+
+from core.utils.logger import logger
+
+# LiteLLM adds a fixed reply-priming overhead to every messages count, so a
+# single message costs token_counter([msg]) - REPLY_PRIMING_TOKENS and a whole
+# conversation costs the sum of its messages + REPLY_PRIMING_TOKENS.
+REPLY_PRIMING_TOKENS = 3
+
+
+class TokenAccountant:
+    """Caches per-message token counts and sums them incrementally."""
+
+    MAX_CACHED_MESSAGES = 50_000
+    CALIBRATION_INTERVAL_SECONDS = 300
+    CALIBRATION_SMOOTHING = 0.5
+    MIN_CALIBRATION_FACTOR = 0.5
+    MAX_CALIBRATION_FACTOR = 2.0
+
+    def __init__(self):
+        self._message_tokens: "OrderedDict[Tuple[str, str, str], int]" = OrderedDict()
+        self._calibration: Dict[str, float] = {}
+        self._last_calibrated_at: Dict[str, float] = {}
+        self._calibration_tasks: Dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _content_hash(message: Dict[str, Any]) -> str:
+        payload = {k: v for k, v in message.items() if k != 'message_id'}
+        serialized = json.dumps(payload, sort_keys=True, default=str)
+        return hashlib.blake2b(serialized.encode('utf-8'), digest_size=16).hexdigest()
+
+    def _cache_key(self, model: str, message: Dict[str, Any]) -> Tuple[str, str, str]:
+        return (model, str(message.get('message_id') or ''), self._content_hash(message))
+
+    @staticmethod
+    def _tokenize_message(model: str, message: Dict[str, Any]) -> int:
+        return max(token_counter(model=model, messages=[message]) - REPLY_PRIMING_TOKENS, 0)
+
+    def _remember(self, key: Tuple[str, str, str], tokens: int) -> None:
+        self._message_tokens[key] = tokens
+        self._message_tokens.move_to_end(key)
+        while len(self._message_tokens) > self.MAX_CACHED_MESSAGES:
+            self._message_tokens.popitem(last=False)
+
+    def message_tokens(self, model: str, message: Dict[str, Any]) -> int:
+        """Token count for a single message (synchronous, cached)."""
+        key = self._cache_key(model, message)
+        cached = self._message_tokens.get(key)
+        if cached is not None:
+            self.hits += 1
+            self._message_tokens.move_to_end(key)
+            return cached
+
+        self.misses += 1
+        tokens = self._tokenize_message(model, message)
+        self._remember(key, tokens)
+        return tokens
+
+    async def count_local(self, model: str, messages: List[Dict[str, Any]]) -> int:
+        """Sum of cached per-message counts; only uncached messages are tokenized (off the event loop)."""
+        keys = [self._cache_key(model, msg) for msg in messages]
+        missing = [(key, msg) for key, msg in zip(keys, messages) if key not in self._message_tokens]
+
+        if missing:
+            def _tokenize_missing() -> List[int]:
+                return [self._tokenize_message(model, msg) for _, msg in missing]
+
+            counts = await asyncio.to_thread(_tokenize_missing)
+            for (key, _), tokens in zip(missing, counts):
+                self._remember(key, tokens)
+
+        self.misses += len(missing)
+        self.hits += len(messages) - len(missing)
+
+        total = REPLY_PRIMING_TOKENS
+        for key, msg in zip(keys, messages):
+            tokens = self._message_tokens.get(key)
+            if tokens is None:
+                # Evicted between tokenizing and summing (conversation larger than the cache)
+                tokens = self._tokenize_message(model, msg)
+            total += tokens
+        return total
+
+    async def count(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        system_prompt: Optional[Dict[str, Any]] = None,
+        calibrate: Optional[Callable[[], Awaitable[Optional[int]]]] = None,
+    ) -> int:
+        """Count conversation tokens incrementally.
+
+        Args:
+            model: Model name
+            messages: Conversation messages
+            system_prompt: Optional system prompt message
+            calibrate: Optional coroutine factory returning the provider's exact count for
+                the same input; scheduled in the background at most once per interval
+
+        Returns:
+            Local token count scaled by the model's calibration factor
+        """
+        to_count = [system_prompt] + messages if system_prompt else messages
+        local_total = await self.count_local(model, to_count)
+
+        if calibrate is not None:
+            self._maybe_schedule_calibration(model, local_total, calibrate)
+
+        factor = self._calibration.get(model, 1.0)
+        return int(round(local_total * factor))
+
+    def _maybe_schedule_calibration(
+        self,
+        model: str,
+        local_total: int,
+        calibrate: Callable[[], Awaitable[Optional[int]]],
+    ) -> None:
+        now = time.time()
+        if now - self._last_calibrated_at.get(model, 0) < self.CALIBRATION_INTERVAL_SECONDS:
+            return
+        running = self._calibration_tasks.get(model)
+        if running and not running.done():
+            return
+
+        self._last_calibrated_at[model] = now
+        self._calibration_tasks[model] = asyncio.create_task(self._calibrate(model, local_total, calibrate))
+
+    async def _calibrate(
+        self,
+        model: str,
+        local_total: int,
+        calibrate: Callable[[], Awaitable[Optional[int]]],
+    ) -> None:
+        try:
+            remote_total = await calibrate()
+        except Exception as e:
+            logger.debug(f"Token count calibration failed for {model}: {e}")
+            return
+
+        if not remote_total or local_total <= 0:
+            return
+
+        observed = min(max(remote_total / local_total, self.MIN_CALIBRATION_FACTOR), self.MAX_CALIBRATION_FACTOR)
+        previous = self._calibration.get(model)
+        factor = observed if previous is None else previous + self.CALIBRATION_SMOOTHING * (observed - previous)
+        self._calibration[model] = factor
+        logger.debug(f"Token count calibration for {model}: local={local_total}, remote={remote_total}, factor={factor:.3f}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "cached_messages": len(self._message_tokens),
+            "hits": self.hits,
+            "misses": self.misses,
+            "calibration": dict(self._calibration),
+        }
+
+
+token_accountant = TokenAccountant()
@@ -195,6 +195,24 @@ def openapi_schema(schema: Dict[str, Any]):
         ))
     return decorator
 
+def parallel_safe(func):
+    """Decorator marking a tool method as safe to run concurrently with other parallel-safe calls.
+    
+    Only use for methods without side effects on shared state (searches, reads).
+    
+    Usage:
+        @parallel_safe
+        @openapi_schema({...})
+        async def web_search(self, ...):
+            ...
+    """
+    func.__parallel_safe__ = True
+    return func
+
+def is_parallel_safe(func) -> bool:
+    """Check whether a (bound) tool method was marked with @parallel_safe."""
+    return bool(getattr(func, '__parallel_safe__', False))
+
 def tool_metadata(
     display_name: str,
     description: str,
@@ -9,6 +9,7 @@ Thin API layer - delegates to core modules:
 import asyncio
 import json
 import os
+import re
 import time
 import traceback
 import uuid
@@ -932,41 +933,82 @@ async def get_agent_run(agent_run_id: str, user_id: str = Depends(verify_and_get
     }
 
 
+# How long a stream handler waits for a run that isn't registered yet
+RUN_DISCOVERY_TIMEOUT = 3.0
+RUN_DISCOVERY_RECHECK_INTERVAL = 1.0
+
+_TERMINAL_STREAM_STATUSES = ('completed', 'failed', 'stopped', 'error')
+# Stream payloads are written with json.dumps, so these appear verbatim in the stored data
+_STATUS_EVENT_MARKER = '"type": "status"'
+_STREAM_BOUNDARY_MARKERS = (_STATUS_EVENT_MARKER, '"llm_response_start"', '"llm_response_end"')
+# Redis stream entry id; anything else from the client is ignored and the stream replays from the start
+_STREAM_ID_RE = re.compile(r"\d+-\d+")
+
+
+def _is_terminal_stream_event(data: str) -> bool:
+    """Whether a stored stream payload is a terminal status event (parses only status events)."""
+    if _STATUS_EVENT_MARKER not in data:
+        return False
+    try:
+        event = json.loads(data)
+    except Exception:
+        return False
+    return event.get('type') == 'status' and event.get('status') in _TERMINAL_STREAM_STATUSES
+
+
 @router.get("/agent-run/{agent_run_id}/stream", summary="Stream Agent Run", operation_id="stream_agent_run")
 async def stream_agent_run(
     agent_run_id: str,
     token: Optional[str] = None,
     last_id: Optional[str] = None,
+    relay: bool = False,
     request: Request = None
 ):
+    """
+    Stream an agent run's responses as SSE.
+
+    Every event read from the run's Redis stream carries the stream entry id in
+    the SSE `id:` field; reconnecting with `Last-Event-ID` (or `last_id`)
+    resumes right after that entry. With `relay=true` the stored payloads are
+    forwarded byte-for-byte instead of being re-serialized with `_event_id`.
+    """
     from core.agents import repo as agents_repo
     from core.cache.runtime_cache import get_agent_run_stream_data
     
     user_id = await get_user_id_from_stream_auth(request, token)
     stream_key = f"agent_run:{agent_run_id}:stream"
+    if not last_id and request is not None:
+        last_id = request.headers.get("last-event-id")
+    if last_id and not _STREAM_ID_RE.fullmatch(last_id):
+        logger.debug(f"[STREAM] Ignoring malformed last event id {last_id!r} for {agent_run_id}")
+        last_id = "0"
     
-    agent_run_data = await get_agent_run_stream_data(agent_run_id)
-    
-    if not agent_run_data:
-        agent_run_data = await agents_repo.get_agent_run_with_thread(agent_run_id)
-    
+    async def lookup_agent_run():
+        return (
+            await get_agent_run_stream_data(agent_run_id)
+            or await agents_repo.get_agent_run_with_thread(agent_run_id)
+        )
+
+    agent_run_data = await lookup_agent_run()
+
     if not agent_run_data:
-        for attempt in range(15):
-            await asyncio.sleep(0.2)
-            agent_run_data = await get_agent_run_stream_data(agent_run_id)
-            if agent_run_data:
-                break
-
-            agent_run_data = await agents_repo.get_agent_run_with_thread(agent_run_id)
-            if agent_run_data:
-                break
-            if attempt >= 5:
+        # The client can attach before the run is registered; wait for the
+        # registration notification, re-checking occasionally in case it was missed
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + RUN_DISCOVERY_TIMEOUT
+        async with redis.redis.run_registrations.waiting(agent_run_id) as registered:
+            # Re-check now that we're subscribed: registration may have landed in between
+            agent_run_data = await lookup_agent_run()
+            while not agent_run_data:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
                 try:
-                    stream_len = await redis.stream_len(stream_key)
-                    if stream_len > 0:
-                        continue
-                except Exception:
+                    await asyncio.wait_for(registered.wait(), timeout=min(remaining, RUN_DISCOVERY_RECHECK_INTERVAL))
+                except asyncio.TimeoutError:
                     pass
+                registered.clear()
+                agent_run_data = await lookup_agent_run()
         
         if not agent_run_data:
             raise HTTPException(status_code=404, detail="Worker run not found")
@@ -995,9 +1037,13 @@ async def stream_agent_run(
         open_responses = 0
 
         for i, (_, fields) in enumerate(entries):
+            data = fields.get('data', '{}')
+            # Only boundary events need parsing; everything else is skipped on a substring check
+            if not any(marker in data for marker in _STREAM_BOUNDARY_MARKERS):
+                continue
             try:
-                data = json.loads(fields.get('data', '{}'))
-                msg_type = data.get('type')
+                parsed = json.loads(data)
+                msg_type = parsed.get('type')
 
                 if msg_type == 'llm_response_start':
                     open_responses += 1
@@ -1005,7 +1051,7 @@ async def stream_agent_run(
                     open_responses = max(0, open_responses - 1)
                     if open_responses == 0:
                         last_safe = i
-                elif msg_type == 'status' and data.get('status') in ['completed', 'failed', 'stopped', 'error']:
+                elif msg_type == 'status' and parsed.get('status') in _TERMINAL_STREAM_STATUSES:
                     last_safe = i
             except Exception:
                 continue
@@ -1014,10 +1060,20 @@ async def stream_agent_run(
             return -1
         return last_safe
 
+    def format_event(entry_id: str, data: str) -> str:
+        if not relay:
+            try:
+                response = json.loads(data)
+                response['_event_id'] = entry_id
+                data = json.dumps(response)
+            except Exception:
+                pass
+        return f"id: {entry_id}\ndata: {data}\n\n"
+
     async def stream_generator(agent_run_data, client_last_id: Optional[str] = None):
         terminate = False
-        last_id = client_last_id if client_last_id and client_last_id != "0" else "0"
-        skip_catchup = client_last_id and client_last_id != "0"
+        resuming = bool(client_last_id and client_last_id != "0")
+        last_id = client_last_id if resuming else "0"
 
         try:
             # CRITICAL FIX: Subscribe FIRST, then catch-up to avoid race condition
@@ -1041,33 +1097,33 @@ async def stream_agent_run(
                 # Subscribe to hub FIRST to capture any new messages
                 logger.debug(f"[STREAM] Subscribing to {stream_key} with last_id={last_id}")
                 async with redis.redis.hub.subscription(stream_key, last_id) as queue:
-                    # NOW do catch-up while subscribed (queue captures concurrent writes)
-                    if not skip_catchup:
-                        entries = await redis.stream_range(stream_key) or []
-                        logger.debug(f"[STREAM] Catch-up found {len(entries)} entries for {stream_key}")
-                        if entries:
-                            for entry_id, fields in entries:
-                                response = json.loads(fields.get('data', '{}'))
-                                response['_event_id'] = entry_id
-                                yield f"data: {json.dumps(response)}\n\n"
-                                last_id = entry_id
-                                catchup_ids.add(entry_id)  # Track for deduplication
-                                received_data = True
-                                if response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']:
-                                    return
-                            
-                            if last_id != "0":
-                                try:
-                                    safe_idx = find_last_safe_boundary(entries)
-                                    if safe_idx >= 0:
-                                        safe_id = entries[safe_idx][0]
-                                        if '-' in safe_id:
-                                            parts = safe_id.split('-')
-                                            if len(parts) == 2:
-                                                next_id = f"{parts[0]}-{int(parts[1]) + 1}"
-                                                await redis.xtrim_minid(stream_key, next_id, approximate=True)
-                                except Exception as e:
-                                    logger.warning(f"Error in stream catch-up: {e}")
+                    # NOW do catch-up while subscribed (queue captures concurrent writes).
+                    # A resuming client only gets the entries after the one it last saw.
+                    start = f"({last_id}" if resuming else "-"
+                    entries = await redis.stream_range(stream_key, start=start) or []
+                    logger.debug(f"[STREAM] Catch-up found {len(entries)} entries for {stream_key}")
+                    if entries:
+                        for entry_id, fields in entries:
+                            data = fields.get('data', '{}')
+                            yield format_event(entry_id, data)
+                            last_id = entry_id
+                            catchup_ids.add(entry_id)  # Track for deduplication
+                            received_data = True
+                            if _is_terminal_stream_event(data):
+                                return
+                        
+                        if not resuming:
+                            try:
+                                safe_idx = find_last_safe_boundary(entries)
+                                if safe_idx >= 0:
+                                    safe_id = entries[safe_idx][0]
+                                    if '-' in safe_id:
+                                        parts = safe_id.split('-')
+                                        if len(parts) == 2:
+                                            next_id = f"{parts[0]}-{int(parts[1]) + 1}"
+                                            await redis.xtrim_minid(stream_key, next_id, approximate=True)
+                            except Exception as e:
+                                logger.warning(f"Error in stream catch-up: {e}")
 
                     if agent_run_data.get('status') != 'running':
                         yield f"data: {json.dumps({'type': 'status', 'status': 'completed'})}\n\n"
@@ -1088,16 +1144,10 @@ async def stream_agent_run(
                             timeout_count = 0
                             ping_count = 0
                             data = fields.get('data', '{}')
-                            # Include event ID in response for client tracking
-                            try:
-                                response = json.loads(data)
-                                response['_event_id'] = entry_id
-                                yield f"data: {json.dumps(response)}\n\n"
-                                if response.get('type') == 'status' and response.get('status') in ['completed', 'failed', 'stopped', 'error']:
-                                    return
-                            except Exception:
-                                yield f"data: {data}\n\n"
+                            yield format_event(entry_id, data)
                             last_id = entry_id
+                            if _is_terminal_stream_event(data):
+                                return
                         else:
                             # Timeout (0.5s) - send ping every ~5 seconds
                             timeout_count += 1
@@ -49,6 +49,8 @@ class PromptResult:
     system_prompt: Dict[str, Any]
     memory_context: Optional[Dict[str, Any]] = None
     build_time_ms: float = 0
+    prefix_hashes: Dict[str, str] = field(default_factory=dict)
+    stable_prefix_chars: int = 0
 
 @dataclass
 class ToolsResult:
@@ -153,7 +153,7 @@ async def prep_prompt(
     try:
         from core.agents.runner.prompt_manager import PromptManager
 
-        system_prompt, memory_context = await PromptManager.build_system_prompt(
+        build = await PromptManager.build_system_prompt_segments(
             model_name=model_name,
             agent_config=agent_config,
             thread_id=thread_id,
@@ -170,9 +170,11 @@ async def prep_prompt(
         logger.debug(f"⏱️ [PREP] Prompt build: {elapsed_ms:.1f}ms")
         
         return PromptResult(
-            system_prompt=system_prompt,
-            memory_context=memory_context,
-            build_time_ms=elapsed_ms
+            system_prompt=build.system_message,
+            memory_context=build.memory_context,
+            build_time_ms=elapsed_ms,
+            prefix_hashes=build.prefix_hashes,
+            stable_prefix_chars=build.stable_prefix_chars,
         )
     except Exception as e:
         logger.error(f"Prompt build failed: {e}", exc_info=True)
@@ -10,6 +10,7 @@ from core.services import redis
 SLOT_KEY_TTL = 7200
 RESOURCE_COUNT_TTL = 3600
 SLOT_OP_TIMEOUT = 2.0
+RECONCILE_BATCH_SIZE = 500
 
 @dataclass
 class SlotReservation:
@@ -103,32 +104,104 @@ async def invalidate_tier_cache(account_id: str) -> None:
         logger.warning(f"[TIER] Failed to invalidate cache for {account_id}: {e}")
 
 
-async def _try_reserve_slot_once(account_id: str, agent_run_id: str, limit: int) -> tuple[bool, int, str]:
-    key = _slot_key(account_id)
-    reservation_key = _slot_reservation_key(agent_run_id)
-    tombstone_key = _slot_release_tombstone_key(agent_run_id)
+# Reservation and release each run as one atomic Lua call (EVALSHA), replacing the
+# SET NX / DEL / INCR / EXPIRE / DECR sequence and its race windows. Both return
+# {acquired_or_released, count, reason}.
+
+_RESERVE_SLOT_SCRIPT = """
+if not redis.call('SET', KEYS[2], ARGV[1], 'NX', 'EX', ARGV[3]) then
+    return {1, tonumber(redis.call('GET', KEYS[1]) or '0'), 'already_reserved'}
+end
+redis.call('DEL', KEYS[3])
+local count = redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+if count <= tonumber(ARGV[2]) then
+    return {1, count, 'ok'}
+end
+redis.call('DECR', KEYS[1])
+redis.call('DEL', KEYS[2])
+return {0, count - 1, 'limit'}
+"""
+
+# KEYS: reservation marker, release tombstone, the account's slot counter. Every key
+# the script touches is declared, so it stays valid under Redis Cluster/script checks.
+_RELEASE_SLOT_SCRIPT = """
+local owner = redis.call('GET', KEYS[1])
+local reason = 'released'
+if owner then
+    if owner ~= ARGV[1] then
+        return {0, -1, 'owner_mismatch'}
+    end
+    redis.call('DEL', KEYS[1])
+elseif redis.call('EXISTS', KEYS[2]) == 1 then
+    return {0, -1, 'already_released'}
+else
+    reason = 'legacy'
+end
+local count = redis.call('DECR', KEYS[3])
+if count < 0 then
+    redis.call('SET', KEYS[3], '0', 'EX', ARGV[2])
+    count = 0
+end
+redis.call('SET', KEYS[2], '1', 'EX', ARGV[2])
+return {1, count, reason}
+"""
+
+# Reconcile writes the DB count only if the counter still holds the value read by
+# MGET ('' for a missing key), so a reserve/release landing in between isn't lost
+_RECONCILE_SLOT_SCRIPT = """
+local current = redis.call('GET', KEYS[1]) or ''
+if current ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+_slot_scripts: Dict[str, Any] = {}
+
+
+def _get_slot_script(client, name: str, source: str):
+    # register_script runs EVALSHA and reloads the script on NOSCRIPT
+    script = _slot_scripts.get(name)
+    if script is None or script.registered_client is not client:
+        script = client.register_script(source)
+        _slot_scripts[name] = script
+    return script
+
+
+async def load_slot_scripts() -> None:
+    """Register the slot scripts and SCRIPT LOAD them so the first EVALSHA doesn't miss."""
+    try:
+        client = await redis.get_client()
+        for name, source in (
+            ("reserve", _RESERVE_SLOT_SCRIPT),
+            ("release", _RELEASE_SLOT_SCRIPT),
+            ("reconcile", _RECONCILE_SLOT_SCRIPT),
+        ):
+            script = _get_slot_script(client, name, source)
+            await client.script_load(source)
+            logger.debug(f"[SLOT] Loaded {name} script {script.sha}")
+    except Exception as e:
+        logger.warning(f"[SLOT] Failed to preload slot scripts: {e}")
 
-    marker_set = await asyncio.wait_for(
-        redis.set(reservation_key, account_id, nx=True, ex=SLOT_KEY_TTL),
+
+async def _try_reserve_slot_once(account_id: str, agent_run_id: str, limit: int) -> tuple[bool, int, str]:
+    client = await redis.get_client()
+    script = _get_slot_script(client, "reserve", _RESERVE_SLOT_SCRIPT)
+
+    acquired, count, reason = await asyncio.wait_for(
+        script(
+            keys=[
+                _slot_key(account_id),
+                _slot_reservation_key(agent_run_id),
+                _slot_release_tombstone_key(agent_run_id),
+            ],
+            args=[account_id, limit, SLOT_KEY_TTL],
+        ),
         timeout=SLOT_OP_TIMEOUT,
     )
-
-    if not marker_set:
-        current_val = await asyncio.wait_for(redis.get(key), timeout=SLOT_OP_TIMEOUT)
-        current_count = int(current_val) if current_val else 0
-        return True, current_count, "already_reserved"
-
-    await asyncio.wait_for(redis.delete(tombstone_key), timeout=SLOT_OP_TIMEOUT)
-
-    count = await asyncio.wait_for(redis.incr(key), timeout=SLOT_OP_TIMEOUT)
-    asyncio.create_task(_set_ttl(key))
-
-    if count <= limit:
-        return True, count, "ok"
-
-    await asyncio.wait_for(redis.decr(key), timeout=SLOT_OP_TIMEOUT)
-    await asyncio.wait_for(redis.delete(reservation_key), timeout=SLOT_OP_TIMEOUT)
-    return False, count - 1, "limit"
+    return bool(int(acquired)), int(count), reason
 
 
 async def reserve_slot(account_id: str, agent_run_id: str, skip: bool = False) -> SlotReservation:
@@ -182,36 +255,39 @@ async def release_slot(account_id: str, agent_run_id: str) -> bool:
         return True
     
     try:
-        reservation_key = _slot_reservation_key(agent_run_id)
-        tombstone_key = _slot_release_tombstone_key(agent_run_id)
-        marker_owner = await asyncio.wait_for(redis.get(reservation_key), timeout=SLOT_OP_TIMEOUT)
-
-        target_account_id = marker_owner or account_id
-        key = _slot_key(target_account_id)
-
-        if marker_owner:
-            removed_marker = await asyncio.wait_for(redis.delete(reservation_key), timeout=SLOT_OP_TIMEOUT)
-            if not removed_marker:
-                logger.debug(f"[SLOT] Release skipped for {agent_run_id}: reservation already removed")
-                return True
-        else:
-            tombstone_exists = await asyncio.wait_for(redis.get(tombstone_key), timeout=SLOT_OP_TIMEOUT)
-            if tombstone_exists:
-                logger.debug(f"[SLOT] Release skipped for {agent_run_id}: already released (tombstone)")
-                return True
+        client = await redis.get_client()
+        script = _get_slot_script(client, "release", _RELEASE_SLOT_SCRIPT)
+
+        released, count, reason = await asyncio.wait_for(
+            script(
+                keys=[
+                    _slot_reservation_key(agent_run_id),
+                    _slot_release_tombstone_key(agent_run_id),
+                    _slot_key(account_id),
+                ],
+                args=[account_id, SLOT_KEY_TTL],
+            ),
+            timeout=SLOT_OP_TIMEOUT,
+        )
 
+        if reason == "owner_mismatch":
             logger.warning(
-                f"[SLOT] Missing reservation marker for {agent_run_id}; "
-                f"using legacy decrement for account {account_id}"
+                f"[SLOT] Reservation for {agent_run_id} belongs to another account, not releasing "
+                f"for {account_id}; left for reconciliation"
             )
+            return False
 
-        count = await asyncio.wait_for(redis.decr(key), timeout=SLOT_OP_TIMEOUT)
-        await asyncio.wait_for(redis.set(tombstone_key, "1", ex=SLOT_KEY_TTL), timeout=SLOT_OP_TIMEOUT)
-        
-        if count < 0:
-            await redis.set(key, "0", ex=SLOT_KEY_TTL)
+        if not int(released):
+            logger.debug(f"[SLOT] Release skipped for {agent_run_id}: already released (tombstone)")
+            return True
+
+        if reason == "legacy":
+            logger.warning(
+                f"[SLOT] Missing reservation marker for {agent_run_id}; "
+                f"used legacy decrement for account {account_id}"
+            )
         
-        logger.debug(f"[SLOT] Released {agent_run_id}: now {max(0, count)}")
+        logger.debug(f"[SLOT] Released {agent_run_id}: now {int(count)}")
         return True
     except Exception as e:
         logger.error(f"[SLOT] Release failed for {agent_run_id}: {e}")
@@ -252,13 +328,6 @@ async def sync_from_db(account_id: str) -> dict:
         return {"synced": False, "error": str(e)}
 
 
-async def _set_ttl(key: str) -> None:
-    try:
-        await redis.expire(key, SLOT_KEY_TTL)
-    except Exception:
-        pass
-
-
 async def check_thread_limit(account_id: str, skip: bool = False) -> ResourceReservation:
     if skip or config.ENV_MODE == EnvMode.LOCAL:
         return ResourceReservation(True, 0, 999, "skipped")
@@ -522,30 +591,27 @@ async def sync_slots_from_db(account_id: str) -> dict:
 
 
 async def reconcile_all_active() -> dict:
+    """Reconcile every active account's slot counter against the DB in one pass.
+    
+    Running-run counts come from a single grouped query; Redis counters are read
+    with SCAN + MGET and corrected in pipelined batches of compare-and-set calls,
+    so a counter that moved since it was read is left for the next pass.
+    """
     if config.ENV_MODE == EnvMode.LOCAL:
         return {"reconciled": 0}
     
+    start = time.time()
     try:
-        from core.services.db import execute
+        from core.utils.limits_repo import count_running_agent_runs_by_account
         client = await redis.get_client()
         
-        sql = """
-        SELECT DISTINCT t.account_id 
-        FROM agent_runs ar
-        JOIN threads t ON ar.thread_id = t.thread_id
-        WHERE ar.status = 'running'
-        """
-        rows = await execute(sql, {})
-
-        account_ids: set[str] = set()
-        for row in rows or []:
-            account_id = row.get('account_id') if isinstance(row, dict) else None
-            if account_id:
-                account_ids.add(str(account_id))
+        db_counts = await count_running_agent_runs_by_account()
 
+        redis_counts: Dict[str, int] = {}
+        observed: Dict[str, str] = {}
         cursor = 0
         while True:
-            cursor, keys = await client.scan(cursor=cursor, match='slots:*', count=500)
+            cursor, keys = await client.scan(cursor=cursor, match='slots:*', count=RECONCILE_BATCH_SIZE)
             if keys:
                 values = await client.mget(keys)
                 for key, value in zip(keys, values):
@@ -555,23 +621,61 @@ async def reconcile_all_active() -> dict:
                         slot_count = int(value_str) if value_str is not None else 0
                     except Exception:
                         continue
-                    if slot_count > 0 and key_str.startswith('slots:'):
-                        account_ids.add(key_str.split(':', 1)[1])
+                    if key_str.startswith('slots:'):
+                        account_id = key_str.split(':', 1)[1]
+                        redis_counts[account_id] = slot_count
+                        observed[account_id] = value_str if value_str is not None else ''
 
             if cursor == 0:
                 break
 
+        # Accounts with running runs, plus accounts whose counter claims slots in use
+        account_ids = set(db_counts) | {a for a, c in redis_counts.items() if c > 0}
         if not account_ids:
             return {"reconciled": 0}
-        
-        reconciled = 0
+
+        corrections = []
+        drift = {"over": 0, "under": 0, "total_abs": 0, "max_abs": 0}
         for account_id in sorted(account_ids):
-            result = await sync_slots_from_db(account_id)
-            if result.get('synced'):
-                reconciled += 1
-        
-        logger.info(f"[SLOT] Reconciled {reconciled}/{len(account_ids)} accounts")
-        return {"reconciled": reconciled, "total": len(account_ids)}
+            db_count = db_counts.get(account_id, 0)
+            redis_count = redis_counts.get(account_id, 0)
+            delta = redis_count - db_count
+            if delta == 0:
+                continue
+            corrections.append((account_id, db_count))
+            drift["over" if delta > 0 else "under"] += 1
+            drift["total_abs"] += abs(delta)
+            drift["max_abs"] = max(drift["max_abs"], abs(delta))
+
+        script = _get_slot_script(client, "reconcile", _RECONCILE_SLOT_SCRIPT)
+        applied = 0
+        for i in range(0, len(corrections), RECONCILE_BATCH_SIZE):
+            pipe = client.pipeline(transaction=False)
+            for account_id, db_count in corrections[i:i + RECONCILE_BATCH_SIZE]:
+                await script(
+                    keys=[_slot_key(account_id)],
+                    args=[observed.get(account_id, ''), str(db_count), SLOT_KEY_TTL],
+                    client=pipe,
+                )
+            applied += sum(int(result) for result in await pipe.execute())
+        changed = len(corrections) - applied
+
+        duration_ms = (time.time() - start) * 1000
+        if corrections:
+            logger.warning(
+                f"[SLOT] Reconciled {applied}/{len(account_ids)} accounts in {duration_ms:.0f}ms "
+                f"(over={drift['over']}, under={drift['under']}, total_abs={drift['total_abs']}, max_abs={drift['max_abs']}"
+                f", changed_during_pass={changed})"
+            )
+        else:
+            logger.info(f"[SLOT] Reconciled 0/{len(account_ids)} accounts in {duration_ms:.0f}ms")
+        return {
+            "reconciled": applied,
+            "skipped_changed": changed,
+            "total": len(account_ids),
+            "drift": drift,
+            "duration_ms": round(duration_ms, 1),
+        }
         
     except Exception as e:
         logger.error(f"[SLOT] Reconcile all failed: {e}")
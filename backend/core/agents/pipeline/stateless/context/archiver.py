@@ -1,9 +1,13 @@
 import asyncio
+import base64
+import gzip
 import json
 import re
+import shlex
+import struct
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 from core.utils.logger import logger
 
@@ -11,6 +15,86 @@ from core.utils.logger import logger
 _TOOL_OUTPUT_MAX_CHARS = 20_000
 # Regex to extract URLs
 _URL_RE = re.compile(r'https?://[^\s"\'>}\]\\]+', re.IGNORECASE)
+# Matches an archived file path: .../messages/batch_NNN/<filename>
+_ARCHIVE_PATH_RE = re.compile(r'\.kortix/context/messages/batch_(\d+)/([^/]+)$')
+
+# Batch pack layout:
+#   magic | gzip member per file ... | gzip(index json) | trailer (index offset, index length)
+# Every file is its own gzip member, so a single file can be decompressed from its
+# (offset, length) slice without touching the rest of the blob.
+_PACK_MAGIC = b"KCTXPACK1\n"
+_PACK_TRAILER = struct.Struct(">QQ")
+_PACK_VERSION = 1
+
+# Runs inside the sandbox to expand a pack into plain files for grep/read_file
+_UNPACK_SCRIPT = (
+    "import gzip,json,os,struct,sys\n"
+    "p,d=sys.argv[1],sys.argv[2]\n"
+    "b=open(p,'rb').read()\n"
+    "o,l=struct.unpack('>QQ',b[-16:])\n"
+    "idx=json.loads(gzip.decompress(b[o:o+l]))\n"
+    "os.makedirs(d,exist_ok=True)\n"
+    "for n,(s,k,_) in idx['members'].items():\n"
+    " open(os.path.join(d,n),'wb').write(gzip.decompress(b[s:s+k]))\n"
+)
+
+# Runs inside the sandbox to print one member (base64) by filename, or by message id
+# when argv[3] is '1'; only the index and that member are read, and only it is returned
+_READ_MEMBER_SCRIPT = (
+    "import base64,gzip,json,struct,sys\n"
+    "p,k,m=sys.argv[1],sys.argv[2],sys.argv[3]=='1'\n"
+    "f=open(p,'rb')\n"
+    "f.seek(-16,2)\n"
+    "o,l=struct.unpack('>QQ',f.read(16))\n"
+    "f.seek(o)\n"
+    "idx=json.loads(gzip.decompress(f.read(l)))\n"
+    "n=idx.get('messages',{}).get(k) if m else k\n"
+    "e=idx['members'].get(n) if n else None\n"
+    "if not e: sys.exit(3)\n"
+    "f.seek(e[0])\n"
+    "sys.stdout.write(base64.b64encode(gzip.decompress(f.read(e[1]))).decode())\n"
+)
+
+
+def pack_batch(files: Dict[str, bytes], message_files: Dict[str, str], batch_number: int) -> bytes:
+    """Pack a batch of archive files into one blob with a trailing offset index."""
+    parts = [_PACK_MAGIC]
+    offset = len(_PACK_MAGIC)
+    members: Dict[str, List[int]] = {}
+
+    for name, data in files.items():
+        member = gzip.compress(data, compresslevel=6, mtime=0)
+        members[name] = [offset, len(member), len(data)]
+        parts.append(member)
+        offset += len(member)
+
+    index = gzip.compress(json.dumps({
+        "version": _PACK_VERSION,
+        "batch": batch_number,
+        "members": members,
+        "messages": message_files,
+    }).encode('utf-8'), mtime=0)
+    parts.append(index)
+    parts.append(_PACK_TRAILER.pack(offset, len(index)))
+    return b"".join(parts)
+
+
+def read_pack_index(blob: bytes) -> Dict[str, Any]:
+    """Decode the index stored at the end of a batch pack."""
+    if not blob.startswith(_PACK_MAGIC) or len(blob) < len(_PACK_MAGIC) + _PACK_TRAILER.size:
+        raise ValueError("Not a context archive pack")
+    offset, length = _PACK_TRAILER.unpack(blob[-_PACK_TRAILER.size:])
+    return json.loads(gzip.decompress(blob[offset:offset + length]).decode('utf-8'))
+
+
+def read_pack_member(blob: bytes, filename: str, index: Optional[Dict[str, Any]] = None) -> Optional[bytes]:
+    """Decompress a single file out of a batch pack, or None if it is not in the pack."""
+    index = index or read_pack_index(blob)
+    entry = index.get("members", {}).get(filename)
+    if not entry:
+        return None
+    offset, length = entry[0], entry[1]
+    return gzip.decompress(blob[offset:offset + length])
 
 
 @dataclass
@@ -39,15 +123,20 @@ class ContextArchiver:
 
     Structure:
     /workspace/.kortix/context/
-      manifest.json
+      manifest.jsonl                    # Append-only, one line per batch
       summaries/
         batch_001.md                    # Small summary (~500 tokens)
       messages/
-        batch_001/
+        batch_001.pack                  # All files of the batch + offset index
+        batch_001/                      # Expanded copy of the pack for grep/read_file
           MSG-001_user.md               # Individual messages
           MSG-002_assistant.md
           MSG-003_tool.md               # Tool results
           ...
+
+    A batch is written with one upload (the pack) and one exec (expanding it in
+    place). Older threads may still have a full manifest.json; it is folded in
+    with the manifest.jsonl deltas on read.
     """
 
     BASE_DIR = ".kortix/context"
@@ -325,19 +414,64 @@ class ContextArchiver:
             except Exception:
                 pass  # May already exist
 
-    async def _get_manifest(self, sandbox) -> Dict[str, Any]:
-        """Get or create manifest.json."""
-        manifest_path = f"{self.WORKSPACE_PATH}/{self.BASE_DIR}/manifest.json"
+    def _empty_manifest(self) -> Dict[str, Any]:
+        return {
+            "thread_id": self.thread_id,
+            "total_archived": 0,
+            "batches": [],
+            "key_facts": {}
+        }
+
+    @staticmethod
+    async def _download_text(sandbox, path: str) -> Optional[str]:
         try:
-            content = await sandbox.fs.download_file(manifest_path)
-            return json.loads(content.decode('utf-8'))
+            return (await sandbox.fs.download_file(path)).decode('utf-8')
         except Exception:
-            return {
-                "thread_id": self.thread_id,
-                "total_archived": 0,
-                "batches": [],
-                "key_facts": {}
-            }
+            return None
+
+    @staticmethod
+    def _apply_manifest_delta(manifest: Dict[str, Any], delta: Dict[str, Any]) -> None:
+        """Fold one batch delta into the manifest."""
+        batch = {k: v for k, v in delta.items() if k != "key_facts"}
+        manifest["batches"].append(batch)
+        manifest["total_archived"] = manifest.get("total_archived", 0) + delta.get("message_count", 0)
+
+        existing_facts = manifest.get("key_facts", {})
+        for key, value in (delta.get("key_facts") or {}).items():
+            if value:
+                existing_facts[key] = value
+        manifest["key_facts"] = existing_facts
+
+    async def _get_manifest(self, sandbox) -> Dict[str, Any]:
+        """Build the manifest from the legacy manifest.json plus manifest.jsonl deltas."""
+        base = f"{self.WORKSPACE_PATH}/{self.BASE_DIR}"
+        legacy, deltas = await asyncio.gather(
+            self._download_text(sandbox, f"{base}/manifest.json"),
+            self._download_text(sandbox, f"{base}/manifest.jsonl"),
+        )
+
+        manifest = self._empty_manifest()
+        if legacy:
+            try:
+                manifest = json.loads(legacy)
+            except json.JSONDecodeError:
+                logger.warning("[ContextArchiver] Ignoring unreadable manifest.json")
+
+        known_batches = {b.get("batch") for b in manifest.get("batches", [])}
+        for line in (deltas or "").splitlines():
+            if not line.strip():
+                continue
+            try:
+                delta = json.loads(line)
+            except json.JSONDecodeError:
+                # A torn last line from an interrupted append; the batch is re-archived next time
+                continue
+            if delta.get("batch") in known_batches:
+                continue
+            known_batches.add(delta.get("batch"))
+            self._apply_manifest_delta(manifest, delta)
+
+        return manifest
 
     async def _update_manifest(
         self,
@@ -350,34 +484,97 @@ class ContextArchiver:
         topics: List[str],
         key_facts: Dict[str, Any]
     ) -> None:
-        """Update manifest with new batch info."""
+        """Append the new batch to manifest.jsonl."""
         total_before = manifest.get("total_archived", 0)
 
-        manifest["batches"].append({
+        delta = {
             "batch": batch_number,
             "messages": f"{total_before + 1}-{total_before + message_count}",
             "message_count": message_count,
             "message_ids": message_ids,
             "tool_results": tool_results,
             "topics": topics,
-            "archived_at": datetime.now(timezone.utc).isoformat()
-        })
-
-        manifest["total_archived"] = total_before + message_count
+            "pack": self._pack_path(batch_number),
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+            "key_facts": {k: v for k, v in key_facts.items() if v},
+        }
+        self._apply_manifest_delta(manifest, delta)
 
-        # Merge key facts
-        existing_facts = manifest.get("key_facts", {})
-        for key, value in key_facts.items():
-            if value:
-                existing_facts[key] = value
-        manifest["key_facts"] = existing_facts
+        base = f"{self.WORKSPACE_PATH}/{self.BASE_DIR}"
+        line = json.dumps(delta, separators=(',', ':'))
+        try:
+            result = await sandbox.process.exec(
+                f"printf '%s\\n' {shlex.quote(line)} >> {shlex.quote(f'{base}/manifest.jsonl')}"
+            )
+            if result.exit_code == 0:
+                return
+            logger.warning(f"[ContextArchiver] manifest.jsonl append failed (exit {result.exit_code})")
+        except Exception as e:
+            logger.warning(f"[ContextArchiver] manifest.jsonl append failed: {e}")
 
-        manifest_path = f"{self.WORKSPACE_PATH}/{self.BASE_DIR}/manifest.json"
+        # Fall back to rewriting the full manifest; _get_manifest skips batches it already has
         await sandbox.fs.upload_file(
             json.dumps(manifest, indent=2).encode('utf-8'),
-            manifest_path
+            f"{base}/manifest.json"
         )
 
+    @classmethod
+    def _pack_path(cls, batch_number: int) -> str:
+        return f"{cls.WORKSPACE_PATH}/{cls.BASE_DIR}/messages/batch_{batch_number:03d}.pack"
+
+    @classmethod
+    def parse_archive_path(cls, path: str) -> Optional[Tuple[int, str]]:
+        """Return (batch_number, filename) if path points into an archived batch directory."""
+        match = _ARCHIVE_PATH_RE.search(path)
+        if not match:
+            return None
+        return int(match.group(1)), match.group(2)
+
+    @classmethod
+    def _batch_dir(cls, batch_number: int) -> str:
+        return f"{cls.WORKSPACE_PATH}/{cls.BASE_DIR}/messages/batch_{batch_number:03d}"
+
+    @classmethod
+    async def _extract_member(cls, sandbox, batch_number: int, key: str, by_message: bool = False) -> Optional[str]:
+        """Extract one member inside the sandbox, so only that file crosses the wire."""
+        try:
+            result = await sandbox.process.exec(
+                f"python3 -c {shlex.quote(_READ_MEMBER_SCRIPT)} {shlex.quote(cls._pack_path(batch_number))} "
+                f"{shlex.quote(key)} {'1' if by_message else '0'}",
+                timeout=30
+            )
+        except Exception as e:
+            logger.warning(f"[ContextArchiver] Reading {key} from batch {batch_number} pack failed: {e}")
+            return None
+        if result.exit_code != 0:
+            logger.debug(f"[ContextArchiver] {key} not readable from batch {batch_number} pack (exit {result.exit_code})")
+            return None
+        try:
+            return base64.b64decode((result.result or "").strip()).decode('utf-8')
+        except ValueError as e:
+            logger.warning(f"[ContextArchiver] Bad member output for {key} in batch {batch_number}: {e}")
+            return None
+
+    @classmethod
+    async def read_archived_file(cls, sandbox, batch_number: int, filename: str) -> Optional[str]:
+        """Read one file of an archived batch: its expanded copy, else straight out of the pack."""
+        try:
+            data = await sandbox.fs.download_file(f"{cls._batch_dir(batch_number)}/{filename}")
+            return data.decode('utf-8') if isinstance(data, bytes) else data
+        except Exception:
+            # Not expanded (or removed by the agent); the pack is the source of truth
+            pass
+        return await cls._extract_member(sandbox, batch_number, filename)
+
+    async def read_archived_message(self, sandbox, message_id: str) -> Optional[str]:
+        """Read the archived file for a message_id, or None if it was never archived."""
+        manifest = await self._get_manifest(sandbox)
+        for batch in manifest.get("batches", []):
+            if message_id not in (batch.get("message_ids") or []):
+                continue
+            return await self._extract_member(sandbox, batch.get("batch"), message_id, by_message=True)
+        return None
+
     @staticmethod
     def _extract_urls_from_content(content) -> List[str]:
         """Extract unique URLs from message content."""
@@ -400,15 +597,12 @@ class ContextArchiver:
         batch_number: int,
         total_before: int = 0
     ) -> Dict[str, str]:
-        """Write individual message files, links.md, and index. Returns tool_call_id -> filename mapping."""
-        batch_dir = f"{self.WORKSPACE_PATH}/{self.BASE_DIR}/messages/batch_{batch_number:03d}"
-        try:
-            await sandbox.fs.create_folder(batch_dir, "755")
-        except Exception:
-            pass
+        """Pack message files, links.md, and index into one upload. Returns tool_call_id -> filename mapping."""
+        batch_dir = self._batch_dir(batch_number)
 
         tool_results_written = {}
-        upload_tasks = []
+        files: Dict[str, bytes] = {}
+        message_files: Dict[str, str] = {}
         # Collect URLs per tool for links.md
         all_links: List[dict] = []  # [{tool_name, msg_num, urls}]
 
@@ -416,8 +610,6 @@ class ContextArchiver:
             global_num = total_before + i
             role = msg.get('role', 'unknown')
             filename = f"MSG-{global_num:03d}_{role}.md"
-            filepath = f"{batch_dir}/{filename}"
-
             msg_content = self._format_message_file(global_num, msg)
 
             # Truncate large tool outputs so MSG files stay readable
@@ -429,7 +621,10 @@ class ContextArchiver:
                     + "Full URLs extracted to links.md in this batch directory.]\n"
                 )
 
-            upload_tasks.append(sandbox.fs.upload_file(msg_content.encode('utf-8'), filepath))
+            files[filename] = msg_content.encode('utf-8')
+            message_id = msg.get('message_id')
+            if isinstance(message_id, str) and message_id:
+                message_files[message_id] = filename
 
             # Extract URLs from tool outputs
             if role == 'tool':
@@ -467,10 +662,7 @@ class ContextArchiver:
                     links_lines.append(f"- {url}")
                 links_lines.append("")
 
-            upload_tasks.append(sandbox.fs.upload_file(
-                "\n".join(links_lines).encode('utf-8'),
-                f"{batch_dir}/links.md"
-            ))
+            files["links.md"] = "\n".join(links_lines).encode('utf-8')
 
         # Write index.md listing all files by role
         index_lines = ["# File Index", f"Batch {batch_number:03d}", ""]
@@ -499,14 +691,22 @@ class ContextArchiver:
         index_lines.append("- links.md  (all URLs extracted from tool outputs)")
         index_lines.append("")
 
-        upload_tasks.append(sandbox.fs.upload_file(
-            "\n".join(index_lines).encode('utf-8'),
-            f"{batch_dir}/index.md"
-        ))
+        files["index.md"] = "\n".join(index_lines).encode('utf-8')
+
+        pack_path = self._pack_path(batch_number)
+        blob = await asyncio.to_thread(pack_batch, files, message_files, batch_number)
+        await sandbox.fs.upload_file(blob, pack_path)
 
-        # Upload all files in parallel
-        if upload_tasks:
-            await asyncio.gather(*upload_tasks)
+        # Expand in place so grep and plain reads keep working; the pack stays the source of truth
+        try:
+            result = await sandbox.process.exec(
+                f"python3 -c {shlex.quote(_UNPACK_SCRIPT)} {shlex.quote(pack_path)} {shlex.quote(batch_dir)}",
+                timeout=60
+            )
+            if result.exit_code != 0:
+                logger.warning(f"[ContextArchiver] Pack expansion failed for batch {batch_number} (exit {result.exit_code})")
+        except Exception as e:
+            logger.warning(f"[ContextArchiver] Pack expansion failed for batch {batch_number}: {e}")
 
         return tool_results_written
 
@@ -5,7 +5,7 @@ from core.utils.config import config
 from core.utils.logger import logger
 from core.agentpress.processor_config import ProcessorConfig
 from core.agentpress.thread_manager.services.execution.llm_executor import LLMExecutor
-from core.agentpress.prompt_caching import add_cache_control
+from core.agentpress.prompt_caching import add_cache_control, add_prefix_cache_control
 from core.agents.pipeline.ux_streaming import stream_context_usage, stream_summarizing
 from core.agents.pipeline.stateless.context.manager import ContextManager
 from core.agents.pipeline.stateless.context.archiver import ContextArchiver, format_archive_summary
@@ -573,6 +573,7 @@ class ExecutionEngine:
         messages = self._state.get_messages()
 
         system = self._state.system_prompt or {"role": "system", "content": "You are a helpful assistant."}
+        stable_chars = self._state.system_prompt_stable_chars if self._state.system_prompt else 0
 
         has_archive = any(m.get('_is_summary_inline') for m in messages)
         if has_archive:
@@ -594,7 +595,12 @@ class ExecutionEngine:
                 "The files are in your sandbox. You have full access. Read them immediately."
             )
             content = system.get("content", "")
-            system = {**system, "content": archive_preamble + content + archive_hint}
+            if stable_chars and isinstance(content, str):
+                # Keep the stable prefix byte-identical so it still hits the prefix cache
+                content = content[:stable_chars] + "\n\n" + archive_preamble + content[stable_chars:]
+            else:
+                content = archive_preamble + content
+            system = {**system, "content": content + archive_hint}
 
         layers = ContextManager.extract_layers(messages)
         processed_messages = layers.to_messages()
@@ -612,7 +618,7 @@ class ExecutionEngine:
         tool_choice = "auto" if processor_config.native_tool_calling else "none"
         tools_for_count = self._state.tool_schemas
 
-        cached_system = add_cache_control(system)
+        cached_system = add_prefix_cache_control(system, stable_chars) if stable_chars else add_cache_control(system)
         prepared = [cached_system] + processed_messages
 
         tokens = await self.fast_token_count(
@@ -132,6 +132,7 @@ class ManagerInitializer:
         )
         if prompt:
             state.system_prompt = prompt.system_prompt
+            state.system_prompt_stable_chars = prompt.stable_prefix_chars
 
         tools = await prep_tasks.prep_tools(tool_registry)
         if tools:
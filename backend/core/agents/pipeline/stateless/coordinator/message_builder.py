@@ -4,6 +4,7 @@ from typing import Dict, Any, Optional, List, Tuple
 from datetime import datetime, timezone
 
 from core.utils.logger import logger
+from core.agentpress.streaming_json import IncrementalJSONParser
 
 def _transform_mcp_tool_call(func_name: str, args: Any) -> Tuple[str, Any]:
     if func_name != 'execute_mcp_tool':
@@ -182,38 +183,45 @@ class MessageBuilder:
         self, 
         tool_call_buffer: Dict[int, Dict], 
         stream_start: str, 
-        sent_lengths: Dict[int, int]
+        sent_lengths: Dict[int, int],
+        arguments_parsers: Optional[Dict[int, IncrementalJSONParser]] = None
     ) -> Optional[Dict[str, Any]]:
         tool_calls_list = []
         for idx in sorted(tool_call_buffer.keys()):
             tc = tool_call_buffer[idx]
             func = tc.get("function", {})
             name = func.get("name", "")
-            args = func.get("arguments", "")
+            parser = arguments_parsers.get(idx) if arguments_parsers else None
+            # Streamed arguments accumulate in the parser; the buffer string is only a fallback
+            args = func.get("arguments", "") if parser is None else None
             
             if not name:
                 continue
             
             prev_length = sent_lengths.get(idx, 0)
-            current_length = len(args)
+            current_length = len(parser) if parser is not None else len(args)
             
             if current_length > prev_length:
-                args_delta = args[prev_length:]
+                args_delta = parser.text_from(prev_length) if parser is not None else args[prev_length:]
                 sent_lengths[idx] = current_length
                 
                 display_name = name
                 display_args_delta = args_delta
                 
-                if name == 'execute_mcp_tool' and args:
-                    try:
-                        full_args = json.loads(args)
-                        if isinstance(full_args, dict) and full_args.get('tool_name'):
-                            display_name = full_args['tool_name']
-                            real_args = full_args.get('args', {})
-                            if real_args:
-                                display_args_delta = json.dumps(real_args)[prev_length:] if prev_length > 0 else json.dumps(real_args)
-                    except json.JSONDecodeError:
-                        pass
+                if name == 'execute_mcp_tool':
+                    if parser is not None:
+                        # Decoded once, when the parser sees the root object close
+                        full_args = parser.value
+                    else:
+                        try:
+                            full_args = json.loads(args)
+                        except json.JSONDecodeError:
+                            full_args = None
+                    if isinstance(full_args, dict) and full_args.get('tool_name'):
+                        display_name = full_args['tool_name']
+                        real_args = full_args.get('args', {})
+                        if real_args:
+                            display_args_delta = json.dumps(real_args)[prev_length:] if prev_length > 0 else json.dumps(real_args)
                 
                 tool_calls_list.append({
                     "tool_call_id": tc.get("id", f"streaming_tool_{idx}"),
@@ -376,10 +384,13 @@ class MessageBuilder:
             "created_by_user_id": None
         }
 
-    def build_finish_message(self, finish_reason: str, tools_executed: bool = False) -> Dict[str, Any]:
+    def build_finish_message(self, finish_reason: str, tools_executed: bool = False, agent_should_terminate: bool = False) -> Dict[str, Any]:
         content = {"status_type": "finish", "finish_reason": finish_reason}
         if tools_executed:
             content["tools_executed"] = True
+        metadata = {"thread_run_id": self._get_thread_run_id()}
+        if agent_should_terminate:
+            metadata["agent_should_terminate"] = True
 
         return {
             "message_id": str(uuid.uuid4()),
@@ -387,7 +398,7 @@ class MessageBuilder:
             "type": "status",
             "is_llm_message": False,
             "content": json.dumps(content),
-            "metadata": json.dumps({"thread_run_id": self._get_thread_run_id()}),
+            "metadata": json.dumps(metadata),
             "created_at": datetime.now(timezone.utc).isoformat(),
             "updated_at": datetime.now(timezone.utc).isoformat(),
             "agent_id": None,
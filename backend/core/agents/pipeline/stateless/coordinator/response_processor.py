@@ -6,9 +6,18 @@ from datetime import datetime, timezone
 from core.utils.logger import logger
 from core.utils.config import config
 from core.agentpress.native_tool_parser import is_tool_call_complete, convert_to_exec_tool_call
+from core.agentpress.streaming_json import IncrementalJSONParser
 from .tool_executor import PendingToolExecution
 
 TERMINATING_TOOLS = {"ask", "complete"}
+LENGTH_LOOP_TAIL_CHARS = 2000
+LENGTH_LOOP_MAX_PERIOD = 200
+
+def _is_looping(tail: str) -> bool:
+    """True if tail is one short unit repeated end to end, i.e. a generation stuck in a loop."""
+    if len(tail) < LENGTH_LOOP_TAIL_CHARS:
+        return False
+    return any(tail[period:] == tail[:-period] for period in range(1, LENGTH_LOOP_MAX_PERIOD + 1))
 
 def _parse_metadata(msg: Dict[str, Any]) -> Dict[str, Any]:
     metadata = msg.get("metadata", {})
@@ -30,6 +39,7 @@ class ResponseProcessor:
         tool_calls = []
         tool_call_buffer: Dict[int, Dict[str, Any]] = {}
         tool_call_sent_lengths: Dict[int, int] = {}
+        tool_call_parsers: Dict[int, IncrementalJSONParser] = {}
         executed_tool_indices: Set[int] = set()
         pending_executions: List[PendingToolExecution] = []
         agent_should_terminate = False
@@ -124,9 +134,9 @@ class ResponseProcessor:
                     yield self._message_builder.build_content_chunk(content, stream_start)
 
             if delta and hasattr(delta, 'tool_calls') and delta.tool_calls:
-                self._process_tool_call_deltas(delta.tool_calls, tool_call_buffer)
+                self._process_tool_call_deltas(delta.tool_calls, tool_call_buffer, tool_call_parsers)
                 tc_chunk = self._message_builder.build_tool_call_chunk(
-                    tool_call_buffer, stream_start, tool_call_sent_lengths
+                    tool_call_buffer, stream_start, tool_call_sent_lengths, tool_call_parsers
                 )
                 if tc_chunk:
                     yield tc_chunk
@@ -137,8 +147,9 @@ class ResponseProcessor:
                         if idx in executed_tool_indices:
                             continue
                         
-                        if is_tool_call_complete(tool_call_buffer[idx]):
+                        if is_tool_call_complete(tool_call_buffer[idx], tool_call_parsers.get(idx)):
                             executed_tool_indices.add(idx)
+                            self._sync_tool_call_arguments(tool_call_buffer, tool_call_parsers, [idx])
                             
                             tc_buf = tool_call_buffer[idx]
                             tool_call_data = {
@@ -180,16 +191,18 @@ class ResponseProcessor:
 
             if finish_reason and not finish_processed:
                 finish_processed = True
+                self._sync_tool_call_arguments(tool_call_buffer, tool_call_parsers)
 
                 has_tool_calls = pending_executions or any(
-                    is_tool_call_complete(tool_call_buffer.get(idx, {})) 
+                    is_tool_call_complete(tool_call_buffer.get(idx, {}), tool_call_parsers.get(idx)) 
                     for idx in tool_call_buffer.keys()
                 )
                 
                 if execute_on_stream and has_tool_calls:
                     async for msg in self._wait_and_process_remaining_executions(
                         pending_executions, stream_start, tool_call_buffer, tool_calls, 
-                        executed_tool_indices, tool_index_counter, assistant_message_id, thread_run_id
+                        executed_tool_indices, tool_index_counter, assistant_message_id, thread_run_id,
+                        tool_call_parsers
                     ):
                         yield msg
                         if msg.get("type") == "status" and _parse_metadata(msg).get("agent_should_terminate"):
@@ -198,8 +211,8 @@ class ResponseProcessor:
                     if assistant_message_id:
                         complete_tool_calls = self._build_complete_tool_calls(tool_call_buffer)
 
-                        accumulated_content = self._state._accumulated_content or ""
-                        accumulated_reasoning = self._state._accumulated_reasoning or ""
+                        accumulated_content = self._state.accumulated_content or ""
+                        accumulated_reasoning = self._state.accumulated_reasoning or ""
 
                         finalized_id = self._state.finalize_assistant_message(
                             tool_calls=complete_tool_calls,
@@ -233,15 +246,16 @@ class ResponseProcessor:
                 tool_calls = []
                 tool_call_buffer = {}
                 tool_call_sent_lengths = {}
+                tool_call_parsers = {}
 
         if finish_processed:
             response_data = self._extract_usage_data(final_llm_response, llm_response_id)
             self._state.add_llm_response_end(llm_response_id, thread_run_id, response_data)
             yield self._message_builder.build_llm_response_end()
         
-        if self._state._accumulated_content and not self._state._terminated and assistant_message_id is None:
-            accumulated_content = self._state._accumulated_content
-            accumulated_reasoning = self._state._accumulated_reasoning or ""
+        if self._state.has_content and not self._state._terminated and assistant_message_id is None:
+            accumulated_content = self._state.accumulated_content
+            accumulated_reasoning = self._state.accumulated_reasoning or ""
             assistant_message_id = self._state.finalize_assistant_message(
                 tool_calls if tool_calls else None,
                 self._message_builder._get_thread_run_id()
@@ -279,13 +293,15 @@ class ResponseProcessor:
         executed_indices: Set[int],
         tool_index_counter: int,
         assistant_message_id: Optional[str],
-        thread_run_id: str
+        thread_run_id: str,
+        tool_call_parsers: Optional[Dict[int, IncrementalJSONParser]] = None
     ) -> AsyncGenerator[Dict[str, Any], None]:
+        tool_call_parsers = tool_call_parsers or {}
         for idx in sorted(tool_call_buffer.keys()):
             if idx in executed_indices:
                 continue
             
-            if is_tool_call_complete(tool_call_buffer[idx]):
+            if is_tool_call_complete(tool_call_buffer[idx], tool_call_parsers.get(idx)):
                 executed_indices.add(idx)
                 tc_buf = tool_call_buffer[idx]
                 tool_call_data = {
@@ -382,7 +398,7 @@ class ResponseProcessor:
         
         return response_data
 
-    def _process_tool_call_deltas(self, tool_calls, tool_call_buffer):
+    def _process_tool_call_deltas(self, tool_calls, tool_call_buffer, tool_call_parsers):
         for tc_delta in tool_calls:
             tc_index = tc_delta.index if hasattr(tc_delta, 'index') else 0
 
@@ -392,6 +408,7 @@ class ResponseProcessor:
                     "type": "function",
                     "function": {"name": "", "arguments": ""}
                 }
+                tool_call_parsers[tc_index] = IncrementalJSONParser()
 
             buf = tool_call_buffer[tc_index]
 
@@ -403,7 +420,15 @@ class ResponseProcessor:
                 if hasattr(fn, 'name') and fn.name:
                     buf["function"]["name"] = fn.name
                 if hasattr(fn, 'arguments') and fn.arguments:
-                    buf["function"]["arguments"] += fn.arguments
+                    tool_call_parsers[tc_index].feed(fn.arguments)
+
+    def _sync_tool_call_arguments(self, tool_call_buffer, tool_call_parsers, indices=None):
+        # Arguments accumulate in the parsers while streaming; the joined string is only
+        # copied into the buffer once a call is handed to execution or persisted.
+        for idx in (indices if indices is not None else list(tool_call_buffer.keys())):
+            parser = tool_call_parsers.get(idx)
+            if parser is not None:
+                tool_call_buffer[idx]["function"]["arguments"] = parser.text
 
     async def _handle_finish_reason(
         self,
@@ -440,8 +465,8 @@ class ResponseProcessor:
             tool_calls.append(tc)
             self._state.queue_tool_call(tc)
 
-        accumulated_content = self._state._accumulated_content or ""
-        accumulated_reasoning = self._state._accumulated_reasoning or ""
+        accumulated_content = self._state.accumulated_content or ""
+        accumulated_reasoning = self._state.accumulated_reasoning or ""
         assistant_message_id = self._state.finalize_assistant_message(
             tool_calls,
             thread_run_id
@@ -478,8 +503,8 @@ class ResponseProcessor:
     ) -> AsyncGenerator[Dict[str, Any], None]:
         thread_run_id = self._message_builder._get_thread_run_id()
 
-        accumulated_content = self._state._accumulated_content or ""
-        accumulated_reasoning = self._state._accumulated_reasoning or ""
+        accumulated_content = self._state.accumulated_content or ""
+        accumulated_reasoning = self._state.accumulated_reasoning or ""
         assistant_message_id = self._state.finalize_assistant_message(
             tool_calls if tool_calls else None,
             thread_run_id
@@ -513,11 +538,16 @@ class ResponseProcessor:
         """Handle finish_reason='length' (max tokens reached). Saves content and emits status for auto-continue."""
         thread_run_id = self._message_builder._get_thread_run_id()
 
-        accumulated_content = self._state._accumulated_content or ""
-        accumulated_reasoning = self._state._accumulated_reasoning or ""
+        accumulated_content = self._state.accumulated_content or ""
+        accumulated_reasoning = self._state.accumulated_reasoning or ""
 
         logger.info(f"[ResponseProcessor] Max tokens reached, saving {len(accumulated_content)} chars of content")
 
+        # Auto-continuing a generation that ran out of tokens mid-loop only repeats the loop
+        looping = _is_looping(self._state.content_tail(LENGTH_LOOP_TAIL_CHARS))
+        if looping:
+            logger.warning("[ResponseProcessor] Max tokens reached on repeating output, stopping auto-continue")
+
         assistant_message_id = self._state.finalize_assistant_message(
             tool_calls if tool_calls else None,
             thread_run_id
@@ -537,7 +567,7 @@ class ResponseProcessor:
 
         self._state.add_status_message(
             {"status_type": "finish", "finish_reason": "length"},
-            {"thread_run_id": thread_run_id}
+            {"thread_run_id": thread_run_id, "agent_should_terminate": looping}
         )
-        yield self._message_builder.build_finish_message("length")
+        yield self._message_builder.build_finish_message("length", agent_should_terminate=looping)
         
\ No newline at end of file
@@ -226,6 +226,25 @@ class StatelessCoordinator(BaseCoordinator):
         except Exception as e:
             logger.warning(f"[Coordinator] Failed to queue analytics: {e}")
 
+        try:
+            from core.analytics.rollups import record_run
+            if self._state.termination_reason == "completed":
+                run_status = "completed"
+            elif self._state._cancelled:
+                run_status = "stopped"
+            else:
+                run_status = "failed"
+            await record_run(
+                run_id=self._state.run_id,
+                account_id=self._state.account_id,
+                thread_id=self._state.thread_id,
+                status=run_status,
+                started_at=self._state.started_at,
+                tool_counts=self._state.tool_call_counts,
+            )
+        except Exception as e:
+            logger.warning(f"[Coordinator] Failed to record analytics rollup: {e}")
+
     async def _cleanup(self, ctx: PipelineContext) -> None:
         cleanup_errors = []
 
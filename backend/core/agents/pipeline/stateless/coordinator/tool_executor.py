@@ -7,6 +7,8 @@ from datetime import datetime, timezone
 from dataclasses import dataclass, field
 
 from core.utils.logger import logger
+from core.utils.config import config
+from core.agentpress.tool import is_parallel_safe
 from core.agents.pipeline.stateless.state import ToolResult
 from core.agents.pipeline.tool_access import check_tool_access_for_account
 from .message_builder import _transform_mcp_tool_call
@@ -31,6 +33,8 @@ class ToolExecutor:
         self._state = state
         self._tool_registry = tool_registry
         self._message_builder = message_builder
+        self._parallel_limit: Optional[asyncio.Semaphore] = None
+
     def _get_available_functions(self) -> Dict:
         return self._tool_registry.get_available_functions()
     
@@ -38,7 +42,8 @@ class ToolExecutor:
         self,
         tool_call: Dict[str, Any],
         tool_index: int,
-        assistant_message_id: Optional[str] = None
+        assistant_message_id: Optional[str] = None,
+        limit: bool = False
     ) -> PendingToolExecution:
         tc_id = tool_call.get("id", str(uuid.uuid4()))
         func = tool_call.get("function", {})
@@ -48,8 +53,9 @@ class ToolExecutor:
         
         available_functions = self._get_available_functions()
         
+        execute = self._execute_limited if limit else self._execute_single_tool
         task = asyncio.create_task(
-            self._execute_single_tool(name, args, available_functions)
+            execute(name, args, available_functions)
         )
         
         return PendingToolExecution(
@@ -183,81 +189,55 @@ class ToolExecutor:
     ) -> AsyncGenerator[Dict[str, Any], None]:
         pending = self._state.take_pending_tools()
         available_functions = self._get_available_functions()
-        thread_run_id = self._message_builder._get_thread_run_id()
+        batches = self._plan_batches(pending, available_functions)
         
-        logger.debug(f"[ToolExecutor] Executing {len(pending)} tools sequentially, assistant_message_id={assistant_message_id}")
+        logger.debug(f"[ToolExecutor] Executing {len(pending)} tools in {len(batches)} batches, assistant_message_id={assistant_message_id}")
 
-        for tool_index, tc in enumerate(pending):
-            tc_id = tc.get("id", "")
-            func = tc.get("function", {})
-            name = func.get("name", "unknown")
-            args = func.get("arguments", "{}")
-            
-            display_name, _ = _transform_mcp_tool_call(name, args)
+        tool_index = 0
+        for batch in batches:
+            executions = []
+            for tc in batch:
+                logger.debug(f"[ToolExecutor] Tool {tool_index}: {tc.get('function', {}).get('name', 'unknown')} (id={tc.get('id', '')})")
+                yield self.yield_tool_started(tc, tool_index, stream_start)
+                executions.append(self.start_tool_execution(tc, tool_index, assistant_message_id, limit=len(batch) > 1))
+                tool_index += 1
             
-            logger.debug(f"[ToolExecutor] Tool {tool_index}: {name} (id={tc_id})")
-
-            is_terminating = name in TERMINATING_TOOLS
-            
-            self._state.add_status_message(
-                {
-                    "tool_index": tool_index,
-                    "status_type": "tool_started",
-                    "tool_call_id": tc_id,
-                    "function_name": display_name
-                },
-                {"thread_run_id": thread_run_id}
-            )
-            yield self._message_builder.build_tool_started(tc_id, display_name, tool_index, stream_start, args)
-
-            start = time.time()
-            output, success, error = await self._execute_single_tool(name, args, available_functions)
-            exec_time = (time.time() - start) * 1000
-            
-            logger.debug(f"[ToolExecutor] Tool {name} completed in {exec_time:.1f}ms, success={success}")
-
-            self._state.record_tool_result(
-                ToolResult(
-                    tool_call_id=tc_id,
-                    tool_name=name,
-                    success=success,
-                    output=output,
-                    error=error,
-                    execution_time_ms=exec_time,
-                ),
-                assistant_message_id
-            )
-
-            tool_result_msg = self._message_builder.build_tool_result(
-                tc_id, display_name, output, success, error, tool_index, stream_start, assistant_message_id
-            )
-            tool_result_message_id = tool_result_msg.get("message_id")
-            logger.debug(f"[ToolExecutor] Yielding tool result: {tc_id}, message_id={tool_result_message_id}")
-            yield tool_result_msg
-
-            status_type = "tool_completed" if success else "tool_failed"
-            status_content = {
-                "tool_index": tool_index,
-                "status_type": status_type,
-                "tool_call_id": tc_id,
-                "function_name": display_name
-            }
-            status_metadata = {"thread_run_id": thread_run_id}
-            if tool_result_message_id:
-                status_metadata["linked_tool_result_message_id"] = tool_result_message_id
-            
-            self._state.add_status_message(status_content, status_metadata)
-            yield self._message_builder.build_tool_completed(
-                tc_id, display_name, success, tool_index, stream_start, tool_result_message_id, is_terminating
-            )
-
-            if success and output:
-                async for msg in self._handle_deferred_image_context(output, stream_start):
+            # Results are emitted in the original index order, whatever order the batch finishes in
+            for execution in executions:
+                await asyncio.wait([execution.task])
+                async for msg in self.process_completed_execution(execution, stream_start):
                     yield msg
 
-            if is_terminating and success:
-                async for msg in self._handle_terminating_tool(tc_id, name):
-                    yield msg
+    def _plan_batches(self, pending: List[Dict[str, Any]], available_functions: Dict) -> List[List[Dict[str, Any]]]:
+        """Group consecutive parallel-safe tool calls; everything else runs on its own, in order."""
+        if config.AGENT_TOOL_EXECUTION_STRATEGY != "parallel":
+            return [[tc] for tc in pending]
+        
+        batches: List[List[Dict[str, Any]]] = []
+        current: List[Dict[str, Any]] = []
+        for tc in pending:
+            name = tc.get("function", {}).get("name", "unknown")
+            if is_parallel_safe(available_functions.get(name)):
+                current.append(tc)
+                continue
+            if current:
+                batches.append(current)
+                current = []
+            batches.append([tc])
+        if current:
+            batches.append(current)
+        return batches
+
+    async def _execute_limited(
+        self,
+        name: str,
+        args: str,
+        available_functions: Dict
+    ) -> tuple[Any, bool, Optional[str]]:
+        if self._parallel_limit is None:
+            self._parallel_limit = asyncio.Semaphore(max(1, config.AGENT_MAX_PARALLEL_TOOLS))
+        async with self._parallel_limit:
+            return await self._execute_single_tool(name, args, available_functions)
 
     async def _execute_single_tool(
         self,
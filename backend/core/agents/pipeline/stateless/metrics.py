@@ -177,6 +177,7 @@ class Metrics:
 
         self.buffered_runs = Gauge("suna_buffered_runs")
         self.buffered_runs_max = Gauge("suna_buffered_runs_max")
+        self.stream_queue_depth = Gauge("suna_stream_queue_depth")
 
         self.runs_started = Counter("suna_runs_started")
         self.runs_completed = Counter("suna_runs_completed")
@@ -190,10 +191,14 @@ class Metrics:
         self.heartbeat_failures = Counter("suna_heartbeat_failures")
         self.runs_evicted = Counter("suna_runs_evicted")
         self.stale_runs_cleaned = Counter("suna_stale_runs_cleaned")
+        self.stream_entries_published = Counter("suna_stream_entries_published")
+        self.stream_entries_failed = Counter("suna_stream_entries_failed")
+        self.stream_flushes = Counter("suna_stream_flushes")
 
         self.run_duration = Histogram("suna_run_duration_seconds", [1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600])
         self.flush_latency = Histogram("suna_flush_latency_seconds", [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0])
         self.step_latency = Histogram("suna_step_latency_seconds", [0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0])
+        self.stream_flush_latency = Histogram("suna_stream_flush_latency_seconds", [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0])
 
         self._async_active_runs = AsyncGauge("suna_active_runs_async")
         self._async_pending_writes = AsyncGauge("suna_pending_writes_async")
@@ -226,6 +231,21 @@ class Metrics:
     def record_step(self, latency: float) -> None:
         self.step_latency.observe(latency)
 
+    def record_stream_flush(
+        self,
+        enqueued: int,
+        published: int,
+        failed: int,
+        latency: Optional[float],
+        dropped: int = 0,
+    ) -> None:
+        self.stream_queue_depth.inc(enqueued - published - dropped)
+        self.stream_entries_published.inc(published - (failed - dropped))
+        self.stream_entries_failed.inc(failed)
+        if latency is not None:
+            self.stream_flushes.inc()
+            self.stream_flush_latency.observe(latency)
+
     def record_wal_append(self) -> None:
         self.wal_appends.inc()
 
@@ -290,12 +310,18 @@ class Metrics:
             "flush_latency_p99": self.flush_latency.percentile(99),
             "step_latency_avg": self.step_latency.avg(),
             "step_latency_p99": self.step_latency.percentile(99),
+            "stream_queue_depth": self.stream_queue_depth.get(),
+            "stream_entries_published": self.stream_entries_published.get(),
+            "stream_entries_failed": self.stream_entries_failed.get(),
+            "stream_flushes": self.stream_flushes.get(),
+            "stream_flush_latency_avg": self.stream_flush_latency.avg(),
+            "stream_flush_latency_p99": self.stream_flush_latency.percentile(99),
         }
 
     def to_prometheus(self) -> str:
         lines = []
 
-        for g in [self.active_runs, self.owned_runs, self.pending_writes]:
+        for g in [self.active_runs, self.owned_runs, self.pending_writes, self.stream_queue_depth]:
             lines.append(f"# TYPE {g.name} gauge")
             lines.append(f"{g.name} {g.get()}")
 
@@ -303,12 +329,13 @@ class Metrics:
             self.runs_started, self.runs_completed, self.runs_failed,
             self.runs_recovered, self.runs_rejected, self.writes_flushed,
             self.writes_dropped, self.wal_appends, self.dlq_entries,
+            self.stream_entries_published, self.stream_entries_failed, self.stream_flushes,
         ]
         for c in counters:
             lines.append(f"# TYPE {c.name} counter")
             lines.append(f"{c.name} {c.get()}")
 
-        for h in [self.run_duration, self.flush_latency, self.step_latency]:
+        for h in [self.run_duration, self.flush_latency, self.step_latency, self.stream_flush_latency]:
             lines.append(f"# TYPE {h.name} histogram")
             lines.append(f"{h.name}_count {h.count()}")
             lines.append(f"{h.name}_sum {h.sum()}")
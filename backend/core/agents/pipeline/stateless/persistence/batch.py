@@ -1,5 +1,6 @@
 import asyncio
 import time
+import uuid
 from dataclasses import dataclass
 from decimal import Decimal
 from typing import Dict, Any, List, Optional, Tuple
@@ -18,7 +19,7 @@ class BatchResult:
 
 class BatchWriter:
     MAX_RETRIES = 3
-    BATCH_SIZE = 50
+    BATCH_SIZE = 200
     MAX_CONCURRENT_PERSISTS = 20
 
     def __init__(self):
@@ -87,71 +88,104 @@ class BatchWriter:
 
         from core.threads import repo as threads_repo
 
+        for entry in entries:
+            if not entry.data.get("message_id"):
+                entry.data["message_id"] = str(uuid.uuid4())
+
+        rows = [self._to_message_row(entry) for entry in entries]
+        try:
+            _, bulk_failed = await threads_repo.insert_messages_batch(rows, batch_size=self.BATCH_SIZE)
+        except Exception as e:
+            logger.error(f"[BatchWriter] Bulk flush error: {e}")
+            bulk_failed = [(row["message_id"], str(e)) for row in rows]
+
+        failed_message_ids = {message_id for message_id, _ in bulk_failed}
+        retry_entries = [e for e in entries if e.data["message_id"] in failed_message_ids]
+        retry_errors: Dict[str, Optional[str]] = {}
+
+        if retry_entries:
+            logger.warning(f"[BatchWriter] Retrying {len(retry_entries)}/{len(entries)} rows individually")
+            semaphore = self._get_semaphore()
+
+            async def bounded_persist(entry: WALEntry) -> Tuple[str, Optional[str]]:
+                async with semaphore:
+                    try:
+                        await self._persist_message(entry, threads_repo)
+                        return entry.entry_id, None
+                    except Exception as e:
+                        return entry.entry_id, str(e)
+
+            results = await asyncio.gather(*[bounded_persist(e) for e in retry_entries])
+            retry_errors = dict(results)
+
         succeeded = []
         failed = []
-        semaphore = self._get_semaphore()
         llm_response_end_entries = []
+        messages_to_cache = []
 
-        async def bounded_persist(entry: WALEntry) -> Tuple[str, bool, Optional[str]]:
-            async with semaphore:
-                try:
-                    result = await self._persist_message(entry, threads_repo)
-                    return entry.entry_id, result, None
-                except Exception as e:
-                    return entry.entry_id, False, str(e)
+        for entry in entries:
+            error = retry_errors.get(entry.entry_id)
+            if error is not None:
+                failed.append((entry.entry_id, error))
+                continue
 
-        for batch_start in range(0, len(entries), self.BATCH_SIZE):
-            batch = entries[batch_start : batch_start + self.BATCH_SIZE]
-            tasks = [bounded_persist(entry) for entry in batch]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+            succeeded.append(entry.entry_id)
 
-            batch_messages_to_cache = []
+            # Track llm_response_end messages for billing
+            if entry.data.get("type") == "llm_response_end":
+                llm_response_end_entries.append(entry)
 
-            for i, result in enumerate(results):
-                entry = batch[i]
-                if isinstance(result, Exception):
-                    logger.error(f"[BatchWriter] Flush error: {result}")
-                    failed.append((entry.entry_id, str(result)))
-                    continue
-                
-                if isinstance(result, tuple) and len(result) == 3:
-                    entry_id, success, error = result
-                    if success:
-                        succeeded.append(entry_id)
-                        
-                        # Track llm_response_end messages for billing
-                        if entry.data.get("type") == "llm_response_end":
-                            llm_response_end_entries.append(entry)
-                        
-                        if entry.data.get("is_llm_message", True):
-                            batch_messages_to_cache.append(entry.data)
-                    else:
-                        failed.append((entry_id, error or "Unknown error"))
-                else:
-                    logger.error(f"[BatchWriter] Unexpected result format: {result}")
-                    failed.append((entry.entry_id, "Unexpected result"))
+            if entry.data.get("is_llm_message", True):
+                messages_to_cache.append(entry.data)
 
-            if batch_messages_to_cache:
-                try:
-                    from core.cache.runtime_cache import append_to_cached_message_history
-                    for data in batch_messages_to_cache:
-                        message_payload = data["content"].copy() if isinstance(data["content"], dict) else {"content": data["content"]}
-                        if "message_id" not in message_payload and "message_id" in data:
-                            message_payload["message_id"] = data["message_id"]
-                        
-                        if "role" not in message_payload and "type" in data:
-                            message_payload["role"] = data["type"]
-
-                        await append_to_cached_message_history(data["thread_id"], message_payload)
-                except Exception as e:
-                    logger.warning(f"Failed to update message cache during flush: {e}")
+        if messages_to_cache:
+            try:
+                from core.cache.runtime_cache import append_many_to_cached_message_history
+                payloads_by_thread: Dict[str, List[Dict[str, Any]]] = {}
+                for data in messages_to_cache:
+                    message_payload = data["content"].copy() if isinstance(data["content"], dict) else {"content": data["content"]}
+                    if "message_id" not in message_payload and "message_id" in data:
+                        message_payload["message_id"] = data["message_id"]
+                    
+                    if "role" not in message_payload and "type" in data:
+                        message_payload["role"] = data["type"]
+
+                    payloads_by_thread.setdefault(data["thread_id"], []).append(message_payload)
+
+                for thread_id, payloads in payloads_by_thread.items():
+                    await append_many_to_cached_message_history(thread_id, payloads)
+            except Exception as e:
+                logger.warning(f"Failed to update message cache during flush: {e}")
         
         # Process billing for llm_response_end messages
         if llm_response_end_entries:
-            await self._process_billing(llm_response_end_entries, account_id)
+            try:
+                await self._process_billing(llm_response_end_entries, account_id)
+            except Exception as e:
+                # Escrow accrual outcome unknown: retry just these entries rather than billing
+                # them directly (accrual is idempotent per message id, rows upsert on it)
+                logger.warning(f"[BatchWriter] Billing for {len(llm_response_end_entries)} responses deferred to retry: {e}")
+                billing_ids = {entry.entry_id for entry in llm_response_end_entries}
+                succeeded = [entry_id for entry_id in succeeded if entry_id not in billing_ids]
+                failed.extend((entry_id, f"Billing deferred: {e}") for entry_id in billing_ids)
 
         return succeeded, failed
 
+    @staticmethod
+    def _to_message_row(entry: WALEntry) -> Dict[str, Any]:
+        data = entry.data
+        return {
+            "thread_id": data["thread_id"],
+            "type": data["type"],
+            "content": data["content"],
+            "is_llm_message": data.get("is_llm_message", True),
+            "metadata": data.get("metadata"),
+            "agent_id": data.get("agent_id"),
+            "agent_version_id": data.get("agent_version_id"),
+            "message_id": data["message_id"],
+            "created_at": entry.created_at,
+        }
+
     async def _persist_message(self, entry: WALEntry, threads_repo) -> bool:
         data = entry.data
 
@@ -176,54 +210,90 @@ class BatchWriter:
             return
         
         from core.billing.credits.integration import billing_integration
+        from core.billing.credits.escrow import credit_escrow
+        from core.utils.config import config, EnvMode
         
-        for entry in entries:
-            try:
-                data = entry.data
-                content = data.get("content", {})
-                
-                usage = content.get("usage", {})
-                if not usage:
-                    logger.warning(f"[BatchWriter] No usage data in llm_response_end message {data.get('message_id')}")
-                    continue
-                
-                prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
-                completion_tokens = int(usage.get("completion_tokens", 0) or 0)
-                
-                if prompt_tokens == 0 and completion_tokens == 0:
-                    logger.warning(f"[BatchWriter] Zero tokens in usage data, skipping billing")
+        usages = [usage for usage in (self._extract_usage(entry) for entry in entries) if usage]
+        if not usages:
+            return
+        
+        # Accrue against the run's escrow; it settles to the ledger in one deduction at run end
+        if config.ENV_MODE != EnvMode.LOCAL:
+            charges = []
+            for usage in usages:
+                try:
+                    cost = billing_integration.calculate_usage_cost(
+                        usage["prompt_tokens"], usage["completion_tokens"], usage["model"],
+                        usage["cache_read_tokens"], usage["cache_creation_tokens"]
+                    )
+                except Exception as e:
+                    logger.error(f"[BatchWriter] Cost calculation failed for message {usage['message_id']}: {e}", exc_info=True)
                     continue
-                
-                cache_read_tokens = int(usage.get("cache_read_input_tokens", 0) or 0)
-                if cache_read_tokens == 0:
-                    cache_read_tokens = int((usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0)
-                
-                cache_creation_tokens = int(usage.get("cache_creation_input_tokens", 0) or 0)
-                
-                model = content.get("model", "unknown")
-                thread_id = data.get("thread_id")
-                message_id = data.get("message_id")
-                
-                logger.debug(f"💰 [BatchWriter] Billing: prompt={prompt_tokens}, completion={completion_tokens}, cache_read={cache_read_tokens}, cache_create={cache_creation_tokens}, model={model}")
-                
+                if cost > 0:
+                    charges.append({"message_id": usage["message_id"], "cost": cost})
+            
+            unsettled = await credit_escrow.accrue(entries[0].run_id, account_id, charges)
+            if unsettled is not None:
+                logger.debug(f"💰 [BatchWriter] Accrued {len(charges)} responses to escrow, unsettled ${unsettled:.6f}")
+                return
+            logger.debug(f"[BatchWriter] No open escrow for run {entries[0].run_id}, billing per response")
+        
+        for usage in usages:
+            try:
                 result = await billing_integration.deduct_usage(
                     account_id=account_id,
-                    prompt_tokens=prompt_tokens,
-                    completion_tokens=completion_tokens,
-                    model=model,
-                    message_id=str(message_id),
-                    thread_id=str(thread_id),
-                    cache_read_tokens=cache_read_tokens,
-                    cache_creation_tokens=cache_creation_tokens
+                    prompt_tokens=usage["prompt_tokens"],
+                    completion_tokens=usage["completion_tokens"],
+                    model=usage["model"],
+                    message_id=usage["message_id"],
+                    thread_id=usage["thread_id"],
+                    cache_read_tokens=usage["cache_read_tokens"],
+                    cache_creation_tokens=usage["cache_creation_tokens"]
                 )
                 
                 if result.get('success'):
-                    logger.info(f"✅ [BatchWriter] Successfully billed ${result.get('cost', 0):.6f} for {prompt_tokens + completion_tokens} tokens")
+                    logger.info(f"✅ [BatchWriter] Successfully billed ${result.get('cost', 0):.6f} for {usage['prompt_tokens'] + usage['completion_tokens']} tokens")
                 else:
                     logger.error(f"❌ [BatchWriter] Billing failed: {result}")
                     
             except Exception as e:
-                logger.error(f"[BatchWriter] Error processing billing for entry {entry.entry_id}: {e}", exc_info=True)
+                logger.error(f"[BatchWriter] Error processing billing for message {usage['message_id']}: {e}", exc_info=True)
+
+    @staticmethod
+    def _extract_usage(entry: WALEntry) -> Optional[Dict[str, Any]]:
+        data = entry.data
+        content = data.get("content", {})
+        
+        usage = content.get("usage", {})
+        if not usage:
+            logger.warning(f"[BatchWriter] No usage data in llm_response_end message {data.get('message_id')}")
+            return None
+        
+        prompt_tokens = int(usage.get("prompt_tokens", 0) or 0)
+        completion_tokens = int(usage.get("completion_tokens", 0) or 0)
+        
+        if prompt_tokens == 0 and completion_tokens == 0:
+            logger.warning(f"[BatchWriter] Zero tokens in usage data, skipping billing")
+            return None
+        
+        cache_read_tokens = int(usage.get("cache_read_input_tokens", 0) or 0)
+        if cache_read_tokens == 0:
+            cache_read_tokens = int((usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0) or 0)
+        
+        cache_creation_tokens = int(usage.get("cache_creation_input_tokens", 0) or 0)
+        model = content.get("model", "unknown")
+        
+        logger.debug(f"💰 [BatchWriter] Billing: prompt={prompt_tokens}, completion={completion_tokens}, cache_read={cache_read_tokens}, cache_create={cache_creation_tokens}, model={model}")
+        
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "cache_read_tokens": cache_read_tokens,
+            "cache_creation_tokens": cache_creation_tokens,
+            "model": model,
+            "thread_id": str(data.get("thread_id")),
+            "message_id": str(data.get("message_id")),
+        }
 
     async def _handle_failure(self, entry: WALEntry, error: str) -> None:
         entry.attempt_count += 1
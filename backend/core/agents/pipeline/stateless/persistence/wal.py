@@ -63,30 +63,47 @@ class WriteAheadLog:
         self._lock = asyncio.Lock()
 
     async def append(self, run_id: str, write_type: WriteType, data: Dict[str, Any]) -> str:
+        entry_ids = await self.append_batch(run_id, [(write_type, data)])
+        return entry_ids[0]
+
+    async def append_batch(self, run_id: str, entries: List[tuple]) -> List[str]:
         from core.services import redis
 
-        entry = WALEntry(
-            entry_id=str(uuid.uuid4()),
-            run_id=run_id,
-            write_type=write_type,
-            data=data,
-        )
+        if not entries:
+            return []
+
+        wal_entries = [
+            WALEntry(
+                entry_id=str(uuid.uuid4()),
+                run_id=run_id,
+                write_type=write_type,
+                data=data,
+            )
+            for write_type, data in entries
+        ]
 
         stream_key = f"{self.STREAM_PREFIX}{run_id}"
-        payload = json.dumps(entry.to_dict())
+        msg_ids: List[Optional[str]] = [None] * len(wal_entries)
 
         try:
-            msg_id = await redis.xadd(
+            msg_ids = await redis.stream_add_batch(
                 stream_key,
-                {"payload": payload},
+                [{"payload": json.dumps(entry.to_dict())} for entry in wal_entries],
                 maxlen=self.STREAM_MAXLEN,
+                expire_seconds=self.ENTRY_TTL_SECONDS,
             )
-            if msg_id:
-                await redis.expire(stream_key, self.ENTRY_TTL_SECONDS)
-                return entry.entry_id
         except Exception as e:
             logger.warning(f"[WAL] Redis append failed, using local buffer: {e}")
 
+        failed = [entry for entry, msg_id in zip(wal_entries, msg_ids) if not msg_id]
+        if failed:
+            if len(failed) < len(wal_entries):
+                logger.warning(f"[WAL] {len(failed)}/{len(wal_entries)} Redis appends failed, using local buffer")
+            await self._buffer_locally(run_id, failed)
+
+        return [entry.entry_id for entry in wal_entries]
+
+    async def _buffer_locally(self, run_id: str, entries: List[WALEntry]) -> None:
         async with self._lock:
             if run_id not in self._local_buffer:
                 while len(self._local_buffer) >= self.MAX_LOCAL_BUFFER_RUNS:
@@ -96,16 +113,7 @@ class WriteAheadLog:
             else:
                 self._local_buffer.move_to_end(run_id)
             
-            self._local_buffer[run_id].append(entry)
-
-        return entry.entry_id
-
-    async def append_batch(self, run_id: str, entries: List[tuple]) -> List[str]:
-        entry_ids = []
-        for write_type, data in entries:
-            entry_id = await self.append(run_id, write_type, data)
-            entry_ids.append(entry_id)
-        return entry_ids
+            self._local_buffer[run_id].extend(entries)
 
     async def get_pending(self, run_id: str) -> List[WALEntry]:
         from core.services import redis
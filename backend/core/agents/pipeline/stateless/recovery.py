@@ -86,7 +86,7 @@ class RunRecovery:
     async def sweep(self) -> Dict[str, Any]:
         from core.agents.pipeline.stateless.ownership import ownership
 
-        result = {"orphaned": 0, "recovered": 0, "stuck": 0, "completed": 0, "zombies_cleaned": 0, "errors": []}
+        result = {"orphaned": 0, "recovered": 0, "stuck": 0, "completed": 0, "zombies_cleaned": 0, "escrows_reconciled": 0, "errors": []}
 
         try:
             if self.is_sharded:
@@ -120,6 +120,8 @@ class RunRecovery:
             zombies_cleaned = await self._cleanup_zombies()
             result["zombies_cleaned"] = zombies_cleaned
 
+            result["escrows_reconciled"] = await self._reconcile_stale_escrows()
+
         except Exception as e:
             logger.error(f"[Recovery] Sweep failed: {e}")
             result["errors"].append(str(e))
@@ -206,8 +208,48 @@ class RunRecovery:
             logger.error(f"[Recovery] Find stuck failed: {e}")
         return stuck
 
+    async def reconcile_credits(self, run_id: str) -> bool:
+        """Bill a dead run's unflushed responses from its WAL and settle its credit escrow."""
+        from core.billing.credits.escrow import credit_escrow
+        from core.agents.pipeline.stateless.persistence.batch import batch_writer
+
+        escrow = await credit_escrow.get_escrow(run_id)
+        if escrow is None:
+            return await credit_escrow.close(run_id)
+
+        # llm_response_end entries still in the WAL were never billed; flushing accrues them
+        flushed = await batch_writer.flush_run(run_id, escrow["account_id"])
+        if flushed.success_count:
+            logger.info(f"[Recovery] Flushed {flushed.success_count} WAL entries for {run_id} before settling")
+
+        settled = await credit_escrow.close(run_id)
+        logger.info(f"[Recovery] Credit escrow for {run_id} {'settled' if settled else 'still has unsettled usage'}")
+        return settled
+
+    async def _reconcile_stale_escrows(self) -> int:
+        from core.billing.credits.escrow import credit_escrow
+        from core.services import redis
+
+        reconciled = 0
+        for run_id in await credit_escrow.find_stale():
+            if self.is_sharded and hash(run_id) % self._total_shards != self._shard_id:
+                continue
+            try:
+                if await redis.get(f"run:{{{run_id}}}:owner"):
+                    continue
+                if await self.reconcile_credits(run_id):
+                    reconciled += 1
+            except Exception as e:
+                logger.warning(f"[Recovery] Escrow reconciliation failed for {run_id}: {e}")
+        return reconciled
+
     async def recover(self, run_id: str) -> RecoveryResult:
         try:
+            try:
+                await self.reconcile_credits(run_id)
+            except Exception as e:
+                logger.warning(f"[Recovery] Escrow reconciliation failed for {run_id}: {e}")
+
             for cb in self._callbacks:
                 try:
                     await cb(run_id)
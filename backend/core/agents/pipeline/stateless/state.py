@@ -2,8 +2,9 @@ import asyncio
 import json
 import time
 import uuid
-from collections import deque, OrderedDict
+from collections import Counter, deque, OrderedDict
 from dataclasses import dataclass, field
+from datetime import datetime, timezone
 from decimal import Decimal
 from typing import Dict, Any, List, Optional, Deque, ClassVar, Tuple, TYPE_CHECKING
 
@@ -28,6 +29,63 @@ class PendingWrite:
     data: Dict[str, Any]
     created_at: float = field(default_factory=time.time)
 
+class ChunkedText:
+    """Append-only text buffer for streamed output.
+
+    Keeps fragments in a list with a running length and only joins them when
+    the full value is read, so streaming a long generation stays linear.
+    """
+
+    __slots__ = ("_chunks", "_length")
+
+    def __init__(self):
+        self._chunks: List[str] = []
+        self._length: int = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __bool__(self) -> bool:
+        return self._length > 0
+
+    def append(self, text: str, max_length: Optional[int] = None) -> bool:
+        """Append text, truncating at max_length. Returns False if anything was cut."""
+        if not text:
+            return True
+        if max_length is not None and self._length + len(text) > max_length:
+            remaining = max_length - self._length
+            if remaining > 0:
+                self._chunks.append(text[:remaining])
+                self._length += remaining
+            return False
+        self._chunks.append(text)
+        self._length += len(text)
+        return True
+
+    def getvalue(self) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0] if self._chunks else ""
+
+    def tail(self, n: int) -> str:
+        """Last n characters, joining only the fragments needed to cover them."""
+        if n <= 0 or not self._chunks:
+            return ""
+        parts: List[str] = []
+        needed = n
+        for chunk in reversed(self._chunks):
+            parts.append(chunk)
+            needed -= len(chunk)
+            if needed <= 0:
+                break
+        joined = "".join(reversed(parts))
+        return joined[-n:]
+
+    def clear(self) -> None:
+        self._chunks = []
+        self._length = 0
+
+
 class RunState:
     MAX_TOOL_RESULTS: ClassVar[int] = stateless_config.MAX_TOOL_RESULTS
     MAX_PENDING_WRITES: ClassVar[int] = stateless_config.MAX_PENDING_WRITES
@@ -56,14 +114,16 @@ class RunState:
         self.agent_id: Optional[str] = None
         self.agent_version_id: Optional[str] = None
         self.system_prompt: Optional[Dict[str, Any]] = None
+        self.system_prompt_stable_chars: int = 0
         self.tool_schemas: Optional[List[Dict[str, Any]]] = None
 
         self._messages: Deque[Dict[str, Any]] = deque()
         self._tool_results: OrderedDict[str, ToolResult] = OrderedDict()
         self._pending_tool_calls: List[Dict[str, Any]] = []
-        self._accumulated_content: str = ""
-        self._accumulated_reasoning: str = ""
+        self._content_buffer: ChunkedText = ChunkedText()
+        self._reasoning_buffer: ChunkedText = ChunkedText()
         self._deferred_tool_results: List[Tuple[ToolResult, Optional[str]]] = []
+        self._tool_call_counts: Counter = Counter()
 
         self._step_counter: int = 0
         self._message_counter: int = 0
@@ -166,6 +226,10 @@ class RunState:
                     error=message,
                     error_code="INSUFFICIENT_CREDITS"
                 )
+                return
+
+            from core.billing.credits.escrow import credit_escrow
+            await credit_escrow.open(self.run_id, self.account_id, self.thread_id)
         except Exception as e:
             logger.warning(f"[RunState] Credit check failed: {e}")
 
@@ -191,6 +255,14 @@ class RunState:
     def duration_seconds(self) -> float:
         return time.time() - self._start_time
 
+    @property
+    def started_at(self) -> datetime:
+        return datetime.fromtimestamp(self._start_time, tz=timezone.utc)
+
+    @property
+    def tool_call_counts(self) -> Dict[str, int]:
+        return dict(self._tool_call_counts)
+
     @property
     def pending_write_count(self) -> int:
         return len(self._pending_writes)
@@ -229,25 +301,30 @@ class RunState:
         self._termination_reason = reason
 
     def append_content(self, content: str) -> None:
-        if len(self._accumulated_content) + len(content) > self.MAX_CONTENT_LENGTH:
+        if not self._content_buffer.append(content, self.MAX_CONTENT_LENGTH):
             logger.warning(f"[RunState] Content length limit reached ({self.MAX_CONTENT_LENGTH}), truncating")
-            remaining = self.MAX_CONTENT_LENGTH - len(self._accumulated_content)
-            if remaining > 0:
-                self._accumulated_content += content[:remaining]
-        else:
-            self._accumulated_content += content
         self._last_activity = time.time()
 
     def append_reasoning(self, reasoning: str) -> None:
-        if len(self._accumulated_reasoning) + len(reasoning) > self.MAX_CONTENT_LENGTH:
+        if not self._reasoning_buffer.append(reasoning, self.MAX_CONTENT_LENGTH):
             logger.warning(f"[RunState] Reasoning length limit reached ({self.MAX_CONTENT_LENGTH}), truncating")
-            remaining = self.MAX_CONTENT_LENGTH - len(self._accumulated_reasoning)
-            if remaining > 0:
-                self._accumulated_reasoning += reasoning[:remaining]
-        else:
-            self._accumulated_reasoning += reasoning
         self._last_activity = time.time()
 
+    @property
+    def accumulated_content(self) -> str:
+        return self._content_buffer.getvalue()
+
+    @property
+    def accumulated_reasoning(self) -> str:
+        return self._reasoning_buffer.getvalue()
+
+    @property
+    def has_content(self) -> bool:
+        return bool(self._content_buffer)
+
+    def content_tail(self, n: int) -> str:
+        return self._content_buffer.tail(n)
+
     def add_message(self, msg: Dict[str, Any], metadata: Optional[Dict[str, Any]] = None) -> str:
         self._message_counter += 1
         message_id = str(uuid.uuid4())
@@ -285,15 +362,15 @@ class RunState:
         thread_run_id: Optional[str] = None,
         message_id: Optional[str] = None
     ) -> str:
-        msg = {"role": "assistant", "content": self._accumulated_content or None}
+        msg = {"role": "assistant", "content": self.accumulated_content or None}
         if tool_calls:
             msg["tool_calls"] = tool_calls
 
         metadata = {}
         if thread_run_id:
             metadata["thread_run_id"] = thread_run_id
-        if self._accumulated_reasoning:
-            metadata["reasoning_content"] = self._accumulated_reasoning
+        if self.accumulated_reasoning:
+            metadata["reasoning_content"] = self.accumulated_reasoning
         if tool_calls:
             unified_tool_calls = []
             for tc in tool_calls:
@@ -318,8 +395,8 @@ class RunState:
         msg_with_id["message_id"] = actual_message_id
         # Include reasoning_content in the message for models that require it
         # (e.g., Kimi K2.5 with thinking mode enabled)
-        if self._accumulated_reasoning and tool_calls:
-            msg_with_id["reasoning_content"] = self._accumulated_reasoning
+        if self.accumulated_reasoning and tool_calls:
+            msg_with_id["reasoning_content"] = self.accumulated_reasoning
 
         self._messages.append(msg_with_id)
 
@@ -340,8 +417,8 @@ class RunState:
         ))
 
         self._check_flush_threshold()
-        self._accumulated_content = ""
-        self._accumulated_reasoning = ""
+        self._content_buffer.clear()
+        self._reasoning_buffer.clear()
         return actual_message_id
 
     def queue_tool_call(self, tool_call: Dict[str, Any]) -> None:
@@ -450,6 +527,7 @@ class RunState:
             self._tool_results.popitem(last=False)
 
         self._tool_results[result.tool_call_id] = result
+        self._tool_call_counts[result.tool_name] += 1
         self._last_activity = time.time()
 
         if defer_message:
@@ -543,9 +621,10 @@ class RunState:
             start_time = time.time()
 
             try:
-                for w in writes:
-                    write_type = WriteType.MESSAGE if w.write_type == "message" else WriteType.CREDIT
-                    await wal.append(self.run_id, write_type, w.data)
+                await wal.append_batch(self.run_id, [
+                    (WriteType.MESSAGE if w.write_type == "message" else WriteType.CREDIT, w.data)
+                    for w in writes
+                ])
 
                 result = await batch_writer.flush_run(self.run_id, self.account_id)
 
@@ -581,6 +660,12 @@ class RunState:
         except Exception as e:
             logger.warning(f"[RunState] Final flush in cleanup failed: {e}")
 
+        try:
+            from core.billing.credits.escrow import credit_escrow
+            await credit_escrow.close(self.run_id)
+        except Exception as e:
+            logger.warning(f"[RunState] Credit settlement failed, left for reconciliation: {e}")
+
         try:
             await wal.cleanup_run(self.run_id)
         except Exception as e:
@@ -588,13 +673,15 @@ class RunState:
 
         self._messages.clear()
         self._tool_results.clear()
+        self._tool_call_counts.clear()
         self._pending_tool_calls.clear()
         self._pending_writes.clear()
         self._deferred_tool_results.clear()
 
-        self._accumulated_content = ""
-        self._accumulated_reasoning = ""
+        self._content_buffer.clear()
+        self._reasoning_buffer.clear()
         self.system_prompt = None
+        self.system_prompt_stable_chars = 0
         self.tool_schemas = None
         self.agent_config = None
 
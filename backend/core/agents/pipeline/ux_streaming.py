@@ -5,12 +5,19 @@ from typing import Optional, Dict, Any, List
 
 from core.utils.logger import logger
 from core.services import redis
+from core.utils.tool_output_streaming import get_tool_output_streaming_context
 
 
 async def _stream_event(stream_key: str, event: Dict[str, Any], timeout: float = 2.0) -> bool:
     if not stream_key:
         return False
     try:
+        # Inside a run, go through its writer so the event stays ordered with the response chunks
+        ctx = get_tool_output_streaming_context()
+        if ctx and ctx.stream_writer and ctx.stream_key == stream_key:
+            await ctx.stream_writer.publish(event, urgent=True)
+            return True
+
         await asyncio.wait_for(
             redis.stream_add(stream_key, {"data": json.dumps(event)}, maxlen=200, approximate=True),
             timeout=timeout
@@ -1,5 +1,4 @@
 import os
-import json
 import asyncio
 import time
 from datetime import datetime, timezone
@@ -24,6 +23,7 @@ from core.agents.runner.services import (
     update_agent_run_status,
     send_completion_notification,
 )
+from core.agents.runner.services.stream_writer import ResponseStreamWriter
 
 async def execute_agent_run(
     agent_run_id: str,
@@ -44,6 +44,7 @@ async def execute_agent_run(
     logger.info(f"🚀 Executing agent run: {agent_run_id}")
 
     stop_checker = None
+    stream_writer = None
     final_status = "failed"
     stream_key = f"agent_run:{agent_run_id}:stream"
 
@@ -53,6 +54,9 @@ async def execute_agent_run(
 
         await stream_status_message("initializing", "Starting execution...", stream_key=stream_key)
         await redis.verify_stream_writable(stream_key)
+        # Runs started outside start_agent_run have no cached stream data; wake any
+        # stream handler already waiting so it re-checks instead of sleeping it out
+        await redis.notify_run_registered(agent_run_id)
 
         try:
             await redis.expire(stream_key, REDIS_STREAM_TTL_SECONDS)
@@ -88,7 +92,13 @@ async def execute_agent_run(
 
         stop_checker = asyncio.create_task(check_stop())
 
-        set_tool_output_streaming_context(agent_run_id=agent_run_id, stream_key=stream_key)
+        # Publishing happens off the generation path; chunks are coalesced into pipelined XADDs
+        stream_writer = ResponseStreamWriter(stream_key).start()
+        set_tool_output_streaming_context(
+            agent_run_id=agent_run_id,
+            stream_key=stream_key,
+            stream_writer=stream_writer,
+        )
 
         from core.agents.pipeline.context import PipelineContext
         from core.agents.pipeline.stateless import StatelessCoordinator
@@ -111,7 +121,6 @@ async def execute_agent_run(
         first_response = False
         complete_tool_called = False
         total_responses = 0
-        stream_ttl_set = False
         error_message = None
 
         async for response in coordinator.execute(ctx):
@@ -126,16 +135,13 @@ async def execute_agent_run(
                 logger.info(f"⏱️ FIRST RESPONSE: {first_response_time_ms:.1f}ms")
                 first_response = True
 
-                try:
-                    timing_msg = {
-                        "type": "timing",
-                        "first_response_ms": round(first_response_time_ms, 1),
-                        "timestamp": datetime.now(timezone.utc).isoformat(),
-                        "pipeline": "stateless"
-                    }
-                    await redis.stream_add(stream_key, {"data": json.dumps(timing_msg)}, maxlen=200, approximate=True)
-                except Exception:
-                    pass
+                timing_msg = {
+                    "type": "timing",
+                    "first_response_ms": round(first_response_time_ms, 1),
+                    "timestamp": datetime.now(timezone.utc).isoformat(),
+                    "pipeline": "stateless"
+                }
+                stream_writer.publish_nowait(timing_msg, urgent=True)
 
             from core.services.db import serialize_row
             if isinstance(response, dict):
@@ -146,14 +152,7 @@ async def execute_agent_run(
                         logger.debug(f"[STREAM] Sending assistant complete: message_id={response.get('message_id')}")
 
             try:
-                await redis.stream_add(stream_key, {"data": json.dumps(response)}, maxlen=200, approximate=True)
-
-                if not stream_ttl_set:
-                    try:
-                        await asyncio.wait_for(redis.expire(stream_key, REDIS_STREAM_TTL_SECONDS), timeout=2.0)
-                        stream_ttl_set = True
-                    except:
-                        pass
+                await stream_writer.publish(response, urgent=response.get('type') in ('status', 'error'))
             except Exception as e:
                 logger.warning(f"Failed to write to stream: {e}")
 
@@ -184,22 +183,24 @@ async def execute_agent_run(
             logger.info(f"Agent run completed (duration: {duration:.2f}s, responses: {total_responses})")
 
             completion_msg = {"type": "status", "status": "completed", "message": "Completed successfully"}
-            try:
-                await redis.stream_add(stream_key, {'data': json.dumps(completion_msg)}, maxlen=200, approximate=True)
-            except:
-                pass
+            stream_writer.publish_nowait(completion_msg, urgent=True)
 
             await send_completion_notification(thread_id, agent_config, complete_tool_called)
 
         if stop_state['reason']:
             final_status = "stopped"
 
+        # Viewers must see the final events before the run is marked finished
+        await stream_writer.flush(timeout=5.0)
+
         await update_agent_run_status(agent_run_id, final_status, error=error_message, account_id=account_id)
 
         logger.info(f"✅ Agent run completed: {agent_run_id} | status={final_status}")
 
     except Exception as e:
         logger.error(f"Error in agent run {agent_run_id}: {e}", exc_info=True)
+        if stream_writer:
+            await stream_writer.flush(timeout=5.0)
         await update_agent_run_status(agent_run_id, "failed", error=str(e), account_id=account_id)
 
     finally:
@@ -212,6 +213,14 @@ async def execute_agent_run(
             log_cleanup_error(agent_run_id, "streaming_context", e)
             cleanup_errors.append(f"streaming_context: {e}")
 
+        if stream_writer:
+            try:
+                await stream_writer.close()
+                logger.debug(f"[STREAM] Writer stats for {agent_run_id}: {stream_writer.get_stats()}")
+            except Exception as e:
+                log_cleanup_error(agent_run_id, "stream_writer", e)
+                cleanup_errors.append(f"stream_writer: {e}")
+
         if stop_checker and not stop_checker.done():
             try:
                 stop_checker.cancel()
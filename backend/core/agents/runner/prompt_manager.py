@@ -2,13 +2,131 @@ import os
 import json
 import asyncio
 import datetime
+import hashlib
 import time
-from typing import Optional, Tuple, List
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional, Tuple, List, Dict
 from core.tools.mcp_tool_wrapper import MCPToolWrapper
 from core.agentpress.tool import SchemaType
 from core.tools.tool_guide_registry import get_minimal_tool_index, get_minimal_tool_index_filtered, get_tool_guide
 from core.utils.logger import logger
 
+# Segments are assembled most-stable first so the provider prompt cache can reuse
+# the longest possible prefix. Everything before VOLATILE_SEGMENTS is identical
+# across runs of the same agent version for the same user.
+SEGMENT_ORDER = ("core", "mcp", "xml", "kb", "user_context", "promo", "datetime")
+VOLATILE_SEGMENTS = ("datetime",)
+
+# Bump when segment rendering changes so Redis entries from older deploys are ignored
+_SEGMENTS_FORMAT = 1
+_SEGMENT_MEMO_MAX = 256
+_SEGMENT_MEMO_TTL = 3600
+
+_segment_memo: "OrderedDict[str, Tuple[float, Dict[str, str]]]" = OrderedDict()
+_static_fingerprint: Optional[str] = None
+
+
+@dataclass
+class SystemPromptBuild:
+    system_message: dict
+    memory_context: Optional[dict] = None
+    segments: List[Tuple[str, str]] = field(default_factory=list)
+    # Cumulative sha256 (12 hex) of the prompt up to and including each segment
+    prefix_hashes: Dict[str, str] = field(default_factory=dict)
+    # Length and hash of the leading run of stable segments; a cache breakpoint belongs here
+    stable_prefix_chars: int = 0
+    stable_prefix_hash: str = ""
+
+
+def _short_hash(value) -> str:
+    if not isinstance(value, str):
+        value = json.dumps(value, sort_keys=True, default=str)
+    return hashlib.sha256(value.encode('utf-8')).hexdigest()[:16]
+
+
+def _get_static_fingerprint() -> str:
+    """Hash of the code-defined prompt pieces, so memoized segments don't survive a deploy that changes them."""
+    global _static_fingerprint
+    if _static_fingerprint is None:
+        from core.jit.loader import JITLoader
+        from core.prompts.core_prompt import get_core_system_prompt
+        _static_fingerprint = _short_hash([
+            _SEGMENTS_FORMAT,
+            get_core_system_prompt(),
+            get_minimal_tool_index(),
+            list(JITLoader.get_core_tools()),
+        ])
+    return _static_fingerprint
+
+
+def _segments_memo_key(agent_config: Optional[dict], disabled_tools: Optional[List[str]],
+                       fresh_mcp_config: Optional[dict]) -> str:
+    agent_config = agent_config or {}
+    mcp_config = None
+    if fresh_mcp_config:
+        # account_id doesn't affect the rendered text; leaving it out lets users of a shared agent share the entry
+        mcp_config = {k: v for k, v in fresh_mcp_config.items() if k != 'account_id'}
+    parts = [
+        agent_config.get('agent_id') or 'default',
+        agent_config.get('current_version_id') or 'none',
+        _short_hash((agent_config.get('system_prompt') or '').strip()),
+        _short_hash(sorted(disabled_tools or [])),
+        _short_hash(mcp_config),
+        _get_static_fingerprint(),
+    ]
+    return ":".join(parts)
+
+
+def _memo_get(key: str) -> Optional[Dict[str, str]]:
+    entry = _segment_memo.get(key)
+    if entry is None:
+        return None
+    stored_at, segments = entry
+    if time.monotonic() - stored_at > _SEGMENT_MEMO_TTL:
+        del _segment_memo[key]
+        return None
+    _segment_memo.move_to_end(key)
+    return segments
+
+
+def _memo_put(key: str, segments: Dict[str, str]) -> None:
+    _segment_memo[key] = (time.monotonic(), segments)
+    _segment_memo.move_to_end(key)
+    while len(_segment_memo) > _SEGMENT_MEMO_MAX:
+        _segment_memo.popitem(last=False)
+
+
+def assemble_segments(segments: List[Tuple[str, str]]) -> SystemPromptBuild:
+    """Join ordered (name, text) segments, recording prefix hashes and the stable prefix length."""
+    digest = hashlib.sha256()
+    parts = []
+    prefix_hashes = {}
+    stable_prefix_chars = 0
+    stable_prefix_hash = digest.hexdigest()[:12]
+    in_stable_prefix = True
+    length = 0
+
+    for name, text in segments:
+        if name in VOLATILE_SEGMENTS:
+            in_stable_prefix = False
+        digest.update(text.encode('utf-8'))
+        parts.append(text)
+        length += len(text)
+        prefix_hashes[name] = digest.hexdigest()[:12]
+        if in_stable_prefix:
+            stable_prefix_chars = length
+            stable_prefix_hash = prefix_hashes[name]
+
+    return SystemPromptBuild(
+        system_message={"role": "system", "content": "".join(parts)},
+        segments=segments,
+        prefix_hashes=prefix_hashes,
+        stable_prefix_chars=stable_prefix_chars,
+        stable_prefix_hash=stable_prefix_hash,
+    )
+
+
 class PromptManager:
     @staticmethod
     async def build_system_prompt(model_name: str, agent_config: Optional[dict],
@@ -20,32 +138,41 @@ class PromptManager:
                                   user_id: Optional[str] = None,
                                   mcp_loader=None,
                                   disabled_tools: Optional[List[str]] = None) -> Tuple[dict, Optional[dict]]:
+        build = await PromptManager.build_system_prompt_segments(
+            model_name, agent_config, thread_id, mcp_wrapper_instance,
+            client=client,
+            tool_registry=tool_registry,
+            xml_tool_calling=xml_tool_calling,
+            user_id=user_id,
+            mcp_loader=mcp_loader,
+            disabled_tools=disabled_tools,
+        )
+        return build.system_message, build.memory_context
+
+    @staticmethod
+    async def build_system_prompt_segments(model_name: str, agent_config: Optional[dict],
+                                           thread_id: str,
+                                           mcp_wrapper_instance: Optional[MCPToolWrapper],
+                                           client=None,
+                                           tool_registry=None,
+                                           xml_tool_calling: bool = False,
+                                           user_id: Optional[str] = None,
+                                           mcp_loader=None,
+                                           disabled_tools: Optional[List[str]] = None) -> SystemPromptBuild:
         
         build_start = time.time()
-        
-        if agent_config and agent_config.get('system_prompt'):
-            system_content = agent_config['system_prompt'].strip()
-        else:
-            from core.prompts.core_prompt import get_core_system_prompt
-            system_content = get_core_system_prompt()
 
         # Note: Tier-based tool filtering removed - tools are now blocked at execution time
         # in tool_executor.py via check_tool_access_for_account(). This allows the agent
         # to see all tools but get a proper upgrade CTA when blocked.
 
-        t1 = time.time()
-        system_content = PromptManager._build_base_prompt(system_content, disabled_tools)
-        logger.debug(f"⏱️ [PROMPT TIMING] _build_base_prompt: {(time.time() - t1) * 1000:.1f}ms")
-        
         # Start parallel fetch tasks
         kb_task = PromptManager._with_timeout(PromptManager._fetch_knowledge_base(agent_config, client), 2.0, "KB fetch")
         user_context_task = PromptManager._with_timeout(PromptManager._fetch_user_context_data(user_id, client), 2.0, "User context")
         memory_task = PromptManager._fetch_user_memories(user_id, thread_id, client)
         file_task = PromptManager._fetch_file_context(thread_id)
+        promo_task = PromptManager._get_free_tier_promo(user_id)
         
-        agent_id = agent_config.get('agent_id') if agent_config else None
-        
-        t_mcp = time.time()
         fresh_mcp_config = None
         if agent_config and (agent_config.get('custom_mcps') or agent_config.get('configured_mcps')):
             fresh_mcp_config = {
@@ -57,37 +184,36 @@ class PromptManager:
         else:
             logger.debug(f"⏱️ [PROMPT TIMING] No MCP config in agent_config: 0.0ms")
         
-        t3 = time.time()
-        system_content = await PromptManager._append_mcp_tools_info(system_content, agent_config, mcp_wrapper_instance, fresh_mcp_config, xml_tool_calling)
-        logger.debug(f"⏱️ [PROMPT TIMING] _append_mcp_tools_info: {(time.time() - t3) * 1000:.1f}ms")
-        
-        t4 = time.time()
-        system_content = await PromptManager._append_jit_mcp_info(system_content, mcp_loader, fresh_mcp_config)
-        logger.debug(f"⏱️ [PROMPT TIMING] _append_jit_mcp_info: {(time.time() - t4) * 1000:.1f}ms")
+        t1 = time.time()
+        static_segments = await PromptManager._get_static_segments(
+            agent_config, mcp_wrapper_instance, mcp_loader, fresh_mcp_config, xml_tool_calling, disabled_tools
+        )
+        logger.debug(f"⏱️ [PROMPT TIMING] static segments: {(time.time() - t1) * 1000:.1f}ms")
         
-        system_content = PromptManager._append_xml_tool_calling_instructions(system_content, xml_tool_calling, tool_registry)
-        system_content = PromptManager._append_datetime_info(system_content)
+        xml_segment = PromptManager._append_xml_tool_calling_instructions("", xml_tool_calling, tool_registry)
         
         t5 = time.time()
-        kb_data, user_context_data, memory_data, file_data = await asyncio.gather(kb_task, user_context_task, memory_task, file_task)
-        logger.debug(f"⏱️ [PROMPT TIMING] parallel fetches (kb/user_context/memory/file): {(time.time() - t5) * 1000:.1f}ms")
+        kb_data, user_context_data, memory_data, file_data, promo_content = await asyncio.gather(
+            kb_task, user_context_task, memory_task, file_task, promo_task
+        )
+        logger.debug(f"⏱️ [PROMPT TIMING] parallel fetches (kb/user_context/memory/file/promo): {(time.time() - t5) * 1000:.1f}ms")
         
-        logger.info(f"⏱️ [PROMPT TIMING] Total build_system_prompt: {(time.time() - build_start) * 1000:.1f}ms")
+        build = assemble_segments([
+            ("core", static_segments["core"]),
+            ("mcp", static_segments["mcp"]),
+            ("xml", xml_segment),
+            ("kb", kb_data or ""),
+            ("user_context", user_context_data or ""),
+            ("promo", promo_content or ""),
+            ("datetime", PromptManager._append_datetime_info("")),
+        ])
         
-        if kb_data:
-            system_content += kb_data
-        
-        if user_context_data:
-            system_content += user_context_data
-
-        # Add promotional messaging for free tier users using MiMo
-        promo_content = await PromptManager._get_free_tier_promo(user_id)
-        if promo_content:
-            system_content += promo_content
-
-        PromptManager._log_prompt_stats(system_content)
-        
-        system_message = {"role": "system", "content": system_content}
+        logger.info(f"⏱️ [PROMPT TIMING] Total build_system_prompt: {(time.time() - build_start) * 1000:.1f}ms")
+        PromptManager._log_prompt_stats(build.system_message["content"])
+        logger.info(
+            f"[PROMPT PREFIX] stable={build.stable_prefix_hash} ({build.stable_prefix_chars:,} chars) "
+            + " ".join(f"{name}={h}" for name, h in build.prefix_hashes.items())
+        )
         
         context_parts = []
         if memory_data:
@@ -96,9 +222,55 @@ class PromptManager:
             context_parts.append(f"[CONTEXT - Attached Files]\n{file_data}\n[END CONTEXT]")
         
         if context_parts:
-            return system_message, {"role": "user", "content": "\n\n".join(context_parts)}
+            build.memory_context = {"role": "user", "content": "\n\n".join(context_parts)}
+        
+        return build
+    
+    @staticmethod
+    async def _get_static_segments(agent_config: Optional[dict], mcp_wrapper_instance: Optional[MCPToolWrapper],
+                                   mcp_loader, fresh_mcp_config: Optional[dict], xml_tool_calling: bool,
+                                   disabled_tools: Optional[List[str]]) -> Dict[str, str]:
+        """The core and MCP segments, memoized in-process and in Redis per agent version / tools / MCP config."""
+        # A live MCP wrapper contributes schemas that aren't captured by the key
+        memoizable = mcp_wrapper_instance is None
+        memo_key = None
+        if memoizable:
+            memo_key = _segments_memo_key(agent_config, disabled_tools, fresh_mcp_config)
+            segments = _memo_get(memo_key)
+            if segments is not None:
+                logger.debug(f"⚡ [PROMPT SEGMENTS] process memo hit: {memo_key}")
+                return segments
+            
+            from core.cache.runtime_cache import get_cached_prompt_segments
+            segments = await get_cached_prompt_segments(memo_key)
+            if segments and "core" in segments and "mcp" in segments:
+                _memo_put(memo_key, segments)
+                return segments
+        
+        if agent_config and agent_config.get('system_prompt'):
+            core_segment = agent_config['system_prompt'].strip()
+        else:
+            from core.prompts.core_prompt import get_core_system_prompt
+            core_segment = get_core_system_prompt()
+        
+        t1 = time.time()
+        core_segment = PromptManager._build_base_prompt(core_segment, disabled_tools)
+        logger.debug(f"⏱️ [PROMPT TIMING] _build_base_prompt: {(time.time() - t1) * 1000:.1f}ms")
+        
+        t3 = time.time()
+        mcp_segment = await PromptManager._append_mcp_tools_info("", agent_config, mcp_wrapper_instance, fresh_mcp_config, xml_tool_calling)
+        logger.debug(f"⏱️ [PROMPT TIMING] _append_mcp_tools_info: {(time.time() - t3) * 1000:.1f}ms")
+        
+        t4 = time.time()
+        mcp_segment = await PromptManager._append_jit_mcp_info(mcp_segment, mcp_loader, fresh_mcp_config)
+        logger.debug(f"⏱️ [PROMPT TIMING] _append_jit_mcp_info: {(time.time() - t4) * 1000:.1f}ms")
         
-        return system_message, None
+        segments = {"core": core_segment, "mcp": mcp_segment}
+        if memoizable:
+            from core.cache.runtime_cache import set_cached_prompt_segments
+            _memo_put(memo_key, segments)
+            await set_cached_prompt_segments(memo_key, segments)
+        return segments
     
     @staticmethod
     async def _with_timeout(coro, timeout_s: float, label: str):
@@ -9,6 +9,12 @@ TIMEOUT_DYNAMIC_TOOLS = 5.0
 TIMEOUT_DB_QUERY = 3.0
 STOP_CHECK_INTERVAL = float(os.getenv("AGENT_STOP_CHECK_INTERVAL", "2.0"))
 
+RESPONSE_STREAM_MAXLEN = 200
+# Chunks queued within this window (or up to the batch size) share one XADD pipeline
+STREAM_FLUSH_INTERVAL = float(os.getenv("AGENT_STREAM_FLUSH_INTERVAL", "0.015"))
+STREAM_FLUSH_MAX_BATCH = 64
+STREAM_WRITER_MAX_PENDING = 1000
+
 
 def _calculate_thread_pool_size() -> int:
     cpu_count = multiprocessing.cpu_count()
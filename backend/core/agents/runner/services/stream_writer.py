@@ -0,0 +1,223 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from core.utils.logger import logger
+from core.services import redis
+from core.agents.runner.services.constants import (
+    REDIS_STREAM_TTL_SECONDS,
+    RESPONSE_STREAM_MAXLEN,
+    STREAM_FLUSH_INTERVAL,
+    STREAM_FLUSH_MAX_BATCH,
+    STREAM_WRITER_MAX_PENDING,
+)
+
+
+class ResponseStreamWriter:
+    """
+    Per-run writer for the agent response stream.
+
+    Producers enqueue entries without waiting on Redis; a background task
+    publishes whatever accumulated within STREAM_FLUSH_INTERVAL (or
+    STREAM_FLUSH_MAX_BATCH entries) as one pipelined XADD batch. Urgent entries
+    (status and terminal events) are flushed without waiting for the window.
+    Entry order is preserved.
+    """
+
+    def __init__(
+        self,
+        stream_key: str,
+        maxlen: int = RESPONSE_STREAM_MAXLEN,
+        flush_interval: float = STREAM_FLUSH_INTERVAL,
+        max_batch: int = STREAM_FLUSH_MAX_BATCH,
+        max_pending: int = STREAM_WRITER_MAX_PENDING,
+        expire_seconds: int = REDIS_STREAM_TTL_SECONDS,
+    ):
+        self.stream_key = stream_key
+        self.maxlen = maxlen
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.expire_seconds = expire_seconds
+
+        self._pending: Deque[Dict[str, str]] = deque()
+        self._enqueued = 0
+        self._published = 0
+        self._flush_upto = 0
+        self._has_data = asyncio.Event()
+        self._flush_now = asyncio.Event()
+        self._waiters: List[Tuple[int, asyncio.Future]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._expire_set = False
+        self._reported = 0
+
+        self._batches = 0
+        self._failed = 0
+        self._max_depth = 0
+        self._flush_seconds_total = 0.0
+        self._flush_seconds_max = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._pending)
+
+    def start(self) -> "ResponseStreamWriter":
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+        return self
+
+    def publish_nowait(self, payload: Any, urgent: bool = False) -> int:
+        """Queue an entry and return its sequence number."""
+        data = payload if isinstance(payload, str) else json.dumps(payload)
+        self._pending.append({"data": data})
+        self._enqueued += 1
+        depth = len(self._pending)
+        if depth > self._max_depth:
+            self._max_depth = depth
+
+        if urgent:
+            self._flush_upto = self._enqueued
+        if urgent or depth >= self.max_batch:
+            self._flush_now.set()
+        self._has_data.set()
+        return self._enqueued
+
+    async def publish(self, payload: Any, urgent: bool = False) -> None:
+        """Queue an entry; only waits when the writer has fallen max_pending entries behind."""
+        self.publish_nowait(payload, urgent=urgent)
+        if len(self._pending) >= self.max_pending:
+            await self.flush()
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued so far is published. Returns False on timeout."""
+        target = self._enqueued
+        if self._published >= target:
+            return True
+        if self._task is None or self._task.done():
+            await self._drain()
+            return self._published >= target
+
+        self._flush_upto = max(self._flush_upto, target)
+        self._flush_now.set()
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append((target, waiter))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout)
+            return True
+        except asyncio.TimeoutError:
+            logger.warning(f"[STREAM] Flush of {self.stream_key} timed out with {self.queue_depth} entries queued")
+            return False
+
+    async def close(self, timeout: Optional[float] = 5.0) -> None:
+        """Flush what is queued and stop the background task."""
+        await self.flush(timeout=timeout)
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        for _, waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(None)
+        self._waiters.clear()
+
+        if self._pending:
+            logger.warning(f"[STREAM] Dropping {len(self._pending)} unpublished entries for {self.stream_key}")
+            self._failed += len(self._pending)
+            dropped = len(self._pending)
+            self._pending.clear()
+            self._report(published=0, failed=dropped, elapsed=None, dropped=dropped)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self._max_depth,
+            "entries_enqueued": self._enqueued,
+            "entries_published": self._published,
+            "entries_failed": self._failed,
+            "batches": self._batches,
+            "avg_batch_size": round(self._published / self._batches, 2) if self._batches else 0.0,
+            "avg_flush_ms": round(self._flush_seconds_total / self._batches * 1000, 2) if self._batches else 0.0,
+            "max_flush_ms": round(self._flush_seconds_max * 1000, 2),
+        }
+
+    def _report(self, published: int, failed: int, elapsed: Optional[float], dropped: int = 0) -> None:
+        from core.agents.pipeline.stateless.metrics import metrics
+
+        # Queue depth is shared across runs: add what was enqueued since the last report
+        enqueued = self._enqueued - self._reported
+        self._reported = self._enqueued
+        metrics.record_stream_flush(
+            enqueued=enqueued,
+            published=published,
+            failed=failed,
+            latency=elapsed,
+            dropped=dropped,
+        )
+
+    async def _run(self) -> None:
+        while True:
+            await self._has_data.wait()
+            if not self._flush_now.is_set() and self.flush_interval > 0:
+                try:
+                    await asyncio.wait_for(self._flush_now.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            try:
+                await self._publish_batch()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[STREAM] Writer error for {self.stream_key}: {e}")
+
+    async def _drain(self) -> None:
+        while self._pending:
+            await self._publish_batch()
+
+    async def _publish_batch(self) -> None:
+        count = min(self.max_batch, len(self._pending))
+        batch = [self._pending.popleft() for _ in range(count)]
+        if not self._pending:
+            self._has_data.clear()
+        if self._published + count >= self._flush_upto and len(self._pending) < self.max_batch:
+            self._flush_now.clear()
+        if not batch:
+            return
+
+        started = time.monotonic()
+        try:
+            ids = await redis.stream_add_batch(
+                self.stream_key,
+                batch,
+                maxlen=self.maxlen,
+                approximate=True,
+                expire_seconds=None if self._expire_set else self.expire_seconds,
+            )
+        except Exception as e:
+            logger.warning(f"Failed to write to stream: {e}")
+            ids = [None] * count
+        elapsed = time.monotonic() - started
+
+        failed = sum(1 for entry_id in ids if not entry_id)
+        if failed < count:
+            self._expire_set = True
+        self._failed += failed
+        self._published += count
+        self._batches += 1
+        self._flush_seconds_total += elapsed
+        self._flush_seconds_max = max(self._flush_seconds_max, elapsed)
+
+        self._report(published=count, failed=failed, elapsed=elapsed)
+
+        if self._waiters:
+            still_waiting = []
+            for target, waiter in self._waiters:
+                if self._published >= target:
+                    if not waiter.done():
+                        waiter.set_result(None)
+                else:
+                    still_waiting.append((target, waiter))
+            self._waiters = still_waiting
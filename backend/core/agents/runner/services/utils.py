@@ -26,8 +26,8 @@ async def stream_status_message(
     metadata: Optional[Dict[str, Any]] = None,
     stream_key: Optional[str] = None
 ) -> None:
+    ctx = get_tool_output_streaming_context()
     if not stream_key:
-        ctx = get_tool_output_streaming_context()
         if ctx:
             stream_key = ctx.stream_key
         else:
@@ -38,6 +38,10 @@ async def stream_status_message(
         if metadata:
             status_msg["metadata"] = metadata
 
+        if ctx and ctx.stream_writer and ctx.stream_key == stream_key:
+            await ctx.stream_writer.publish(status_msg, urgent=True)
+            return
+
         await asyncio.wait_for(
             redis.stream_add(stream_key, {"data": json.dumps(status_msg)}, maxlen=200, approximate=True),
             timeout=2.0
@@ -6,6 +6,7 @@ Runs as an asyncio background task alongside the main API.
 """
 
 import asyncio
+import time
 from typing import Optional, List, Dict, Any
 
 from core.utils.logger import logger
@@ -18,6 +19,7 @@ BATCH_SIZE = 15  # Process up to 15 items per batch
 MAX_CONCURRENT = 5  # Max concurrent LLM calls (avoid rate limits)
 MAX_ATTEMPTS = 3  # Max retries for failed analysis
 INITIAL_DELAY_SECONDS = 15  # Wait before starting (let API settle)
+ROLLUP_BACKFILL_INTERVAL_SECONDS = 60  # Advance the analytics rollup watermark
 
 # Semaphore for limiting concurrent LLM calls
 _concurrency_semaphore: asyncio.Semaphore = None
@@ -189,6 +191,8 @@ async def _analytics_processing_loop() -> None:
     # Initial delay to let the API settle
     await asyncio.sleep(INITIAL_DELAY_SECONDS)
 
+    last_backfill = 0.0
+
     while True:
         try:
             # Atomically claim pending items (prevents race conditions)
@@ -211,6 +215,12 @@ async def _analytics_processing_loop() -> None:
             # Clean up old failed items (mark as failed after max attempts)
             await cleanup_failed_items()
 
+            # Fold runs the pipeline didn't record into the analytics rollups
+            now = time.monotonic()
+            if now - last_backfill >= ROLLUP_BACKFILL_INTERVAL_SECONDS:
+                last_backfill = now
+                await run_rollup_backfill()
+
         except asyncio.CancelledError:
             logger.info("[ANALYTICS] Worker cancelled, shutting down gracefully")
             break
@@ -226,6 +236,15 @@ async def _analytics_processing_loop() -> None:
             break
 
 
+async def run_rollup_backfill() -> None:
+    """Advance the analytics rollup backfill (one instance at a time)."""
+    try:
+        from core.analytics.rollups import backfill_rollups
+        await backfill_rollups()
+    except Exception as e:
+        logger.warning(f"[ANALYTICS] Rollup backfill failed: {e}")
+
+
 async def cleanup_failed_items() -> None:
     """Mark items that have exceeded max attempts as failed."""
     try:
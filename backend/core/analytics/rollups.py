@@ -0,0 +1,277 @@
+"""
+Analytics Rollups
+
+Maintains per-day counters so admin dashboards don't scan agent_runs and
+messages on every request:
+- analytics_daily_account_rollup: runs by outcome and tool calls per account/day
+- analytics_daily_tool_rollup: tool calls per tool/thread/day
+
+Runs are recorded by the stateless pipeline as they finalize (record_run) and by
+a watermark-driven backfill over agent_runs (backfill_rollups), which also picks
+up history and runs that finished outside the pipeline. Both paths claim the run
+in analytics_rollup_runs first, so each run is counted exactly once.
+
+Days are UTC calendar days of the run's start.
+"""
+
+from datetime import datetime, timezone
+from typing import Any, Dict, Mapping, Optional
+
+from core.utils.logger import logger
+
+BACKFILL_WATERMARK = "agent_runs"
+BACKFILL_BATCH_SIZE = 1000
+BACKFILL_MAX_BATCHES = 10  # Per tick; history catches up over several ticks
+# Leave recently finished runs to the pipeline; the backfill only needs stragglers
+BACKFILL_GRACE_MINUTES = 10
+# Keep run claims this long behind the watermark before pruning
+CLAIM_RETENTION_HOURS = 24
+BACKFILL_LOCK_KEY = "analytics_rollup:backfill_lock"
+BACKFILL_LOCK_TTL = 300
+
+STOPPED_STATUSES = ("stopped", "cancelled")
+
+
+def status_bucket(status: Optional[str]) -> str:
+    """Map an agent run status onto the rollup's completed/failed/stopped counters."""
+    if status == "completed":
+        return "completed"
+    if status in STOPPED_STATUSES:
+        return "stopped"
+    return "failed"
+
+
+_RECORD_RUN_SQL = """
+WITH claimed AS (
+    INSERT INTO analytics_rollup_runs (run_id)
+    VALUES (CAST(:run_id AS uuid))
+    ON CONFLICT (run_id) DO NOTHING
+    RETURNING run_id
+),
+account_rollup AS (
+    INSERT INTO analytics_daily_account_rollup AS r
+        (day, account_id, runs, completed_runs, failed_runs, stopped_runs, tool_calls, last_run_at)
+    SELECT CAST(:day AS date), CAST(:account_id AS uuid), 1,
+           :completed, :failed, :stopped, :tool_calls, CAST(:started_at AS timestamptz)
+    FROM claimed
+    ON CONFLICT (day, account_id) DO UPDATE SET
+        runs = r.runs + 1,
+        completed_runs = r.completed_runs + EXCLUDED.completed_runs,
+        failed_runs = r.failed_runs + EXCLUDED.failed_runs,
+        stopped_runs = r.stopped_runs + EXCLUDED.stopped_runs,
+        tool_calls = r.tool_calls + EXCLUDED.tool_calls,
+        last_run_at = GREATEST(r.last_run_at, EXCLUDED.last_run_at)
+),
+tool_rollup AS (
+    INSERT INTO analytics_daily_tool_rollup AS t (day, tool_name, thread_id, account_id, calls)
+    SELECT CAST(:day AS date), tools.key, CAST(:thread_id AS uuid), CAST(:account_id AS uuid), tools.value::int
+    FROM claimed, jsonb_each_text(CAST(:tools AS jsonb)) AS tools
+    ON CONFLICT (day, tool_name, thread_id) DO UPDATE SET
+        calls = t.calls + EXCLUDED.calls
+)
+SELECT COUNT(*) AS claimed FROM claimed
+"""
+
+
+async def record_run(
+    run_id: str,
+    account_id: str,
+    thread_id: str,
+    status: str,
+    started_at: datetime,
+    tool_counts: Optional[Mapping[str, int]] = None,
+) -> bool:
+    """
+    Fold one finished run into the rollups.
+
+    Returns False if the run was already counted (by an earlier call or the backfill).
+    """
+    from core.services.db import execute_mutate
+
+    bucket = status_bucket(status)
+    tools = {name: int(count) for name, count in (tool_counts or {}).items() if name and count}
+    started_at = started_at.astimezone(timezone.utc)
+
+    rows = await execute_mutate(_RECORD_RUN_SQL, {
+        "run_id": run_id,
+        "account_id": account_id,
+        "thread_id": thread_id,
+        "day": started_at.date().isoformat(),
+        "started_at": started_at.isoformat(),
+        "completed": 1 if bucket == "completed" else 0,
+        "failed": 1 if bucket == "failed" else 0,
+        "stopped": 1 if bucket == "stopped" else 0,
+        "tool_calls": sum(tools.values()),
+        "tools": tools,
+    })
+    return bool(rows and rows[0]["claimed"])
+
+
+# One statement per batch: scan past the watermark, claim unseen runs, fold them
+# (and their tool messages) into the rollups, then advance the watermark.
+_BACKFILL_SQL = """
+WITH mark AS (
+    SELECT
+        COALESCE(w.watermark, '-infinity'::timestamptz) AS watermark,
+        COALESCE(w.watermark_id, '00000000-0000-0000-0000-000000000000'::uuid) AS watermark_id
+    FROM (SELECT 1) AS one
+    LEFT JOIN analytics_rollup_watermarks w ON w.name = :name
+),
+batch AS (
+    SELECT
+        ar.id AS run_id,
+        ar.thread_id,
+        t.account_id,
+        ar.status,
+        ar.started_at,
+        ar.completed_at,
+        (ar.started_at AT TIME ZONE 'UTC')::date AS day
+    FROM agent_runs ar
+    JOIN threads t ON t.thread_id = ar.thread_id
+    CROSS JOIN mark
+    WHERE ar.completed_at IS NOT NULL
+      AND (ar.completed_at, ar.id) > (mark.watermark, mark.watermark_id)
+      AND ar.completed_at < NOW() - MAKE_INTERVAL(mins => :grace_minutes)
+    ORDER BY ar.completed_at, ar.id
+    LIMIT :limit
+),
+claimed AS (
+    INSERT INTO analytics_rollup_runs (run_id)
+    SELECT run_id FROM batch WHERE account_id IS NOT NULL AND started_at IS NOT NULL
+    ON CONFLICT (run_id) DO NOTHING
+    RETURNING run_id
+),
+fresh AS (
+    SELECT b.* FROM batch b JOIN claimed c ON c.run_id = b.run_id
+),
+run_tools AS (
+    SELECT f.run_id, f.day, f.thread_id, f.account_id,
+           m.metadata->>'function_name' AS tool_name, COUNT(*) AS calls
+    FROM fresh f
+    JOIN messages m ON m.thread_id = f.thread_id
+     AND m.type = 'tool'
+     AND m.created_at >= f.started_at
+     AND m.created_at <= f.completed_at
+     AND m.metadata->>'function_name' IS NOT NULL
+    GROUP BY f.run_id, f.day, f.thread_id, f.account_id, m.metadata->>'function_name'
+),
+run_totals AS (
+    SELECT run_id, SUM(calls) AS calls FROM run_tools GROUP BY run_id
+),
+account_rollup AS (
+    INSERT INTO analytics_daily_account_rollup AS r
+        (day, account_id, runs, completed_runs, failed_runs, stopped_runs, tool_calls, last_run_at)
+    SELECT
+        f.day,
+        f.account_id,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE f.status = 'completed'),
+        COUNT(*) FILTER (WHERE f.status IS NULL OR f.status NOT IN ('completed', 'stopped', 'cancelled')),
+        COUNT(*) FILTER (WHERE f.status IN ('stopped', 'cancelled')),
+        COALESCE(SUM(rt.calls), 0),
+        MAX(f.started_at)
+    FROM fresh f
+    LEFT JOIN run_totals rt ON rt.run_id = f.run_id
+    GROUP BY f.day, f.account_id
+    ON CONFLICT (day, account_id) DO UPDATE SET
+        runs = r.runs + EXCLUDED.runs,
+        completed_runs = r.completed_runs + EXCLUDED.completed_runs,
+        failed_runs = r.failed_runs + EXCLUDED.failed_runs,
+        stopped_runs = r.stopped_runs + EXCLUDED.stopped_runs,
+        tool_calls = r.tool_calls + EXCLUDED.tool_calls,
+        last_run_at = GREATEST(r.last_run_at, EXCLUDED.last_run_at)
+),
+tool_rollup AS (
+    INSERT INTO analytics_daily_tool_rollup AS t (day, tool_name, thread_id, account_id, calls)
+    SELECT day, tool_name, thread_id, account_id, SUM(calls)
+    FROM run_tools
+    GROUP BY day, tool_name, thread_id, account_id
+    ON CONFLICT (day, tool_name, thread_id) DO UPDATE SET
+        calls = t.calls + EXCLUDED.calls
+),
+last_scanned AS (
+    SELECT completed_at, run_id FROM batch ORDER BY completed_at DESC, run_id DESC LIMIT 1
+),
+advance AS (
+    INSERT INTO analytics_rollup_watermarks (name, watermark, watermark_id, updated_at)
+    SELECT :name, completed_at, run_id, NOW() FROM last_scanned
+    ON CONFLICT (name) DO UPDATE SET
+        watermark = EXCLUDED.watermark,
+        watermark_id = EXCLUDED.watermark_id,
+        updated_at = NOW()
+)
+SELECT
+    (SELECT COUNT(*) FROM batch) AS scanned,
+    (SELECT COUNT(*) FROM claimed) AS rolled_up
+"""
+
+_PRUNE_CLAIMS_SQL = """
+DELETE FROM analytics_rollup_runs
+WHERE recorded_at < (
+    SELECT watermark - MAKE_INTERVAL(hours => :retention_hours)
+    FROM analytics_rollup_watermarks
+    WHERE name = :name
+)
+"""
+
+
+async def backfill_rollups(
+    batch_size: int = BACKFILL_BATCH_SIZE,
+    max_batches: int = BACKFILL_MAX_BATCHES,
+) -> Dict[str, int]:
+    """
+    Advance the backfill watermark over finished agent runs.
+
+    Runs the pipeline already recorded are skipped by their claim. Only one
+    instance backfills at a time; the others return immediately.
+    """
+    from core.services import redis
+    from core.services.db import execute_mutate
+
+    stats = {"scanned": 0, "rolled_up": 0, "batches": 0}
+
+    try:
+        if not await redis.set(BACKFILL_LOCK_KEY, "1", nx=True, ex=BACKFILL_LOCK_TTL):
+            return stats
+    except Exception as e:
+        logger.warning(f"[ROLLUPS] Could not take backfill lock: {e}")
+        return stats
+
+    try:
+        for _ in range(max_batches):
+            rows = await execute_mutate(_BACKFILL_SQL, {
+                "name": BACKFILL_WATERMARK,
+                "limit": batch_size,
+                "grace_minutes": BACKFILL_GRACE_MINUTES,
+            })
+            scanned = rows[0]["scanned"] if rows else 0
+            stats["batches"] += 1
+            stats["scanned"] += scanned
+            stats["rolled_up"] += rows[0]["rolled_up"] if rows else 0
+            if scanned < batch_size:
+                break
+
+        if stats["scanned"]:
+            await execute_mutate(_PRUNE_CLAIMS_SQL, {
+                "name": BACKFILL_WATERMARK,
+                "retention_hours": CLAIM_RETENTION_HOURS,
+            })
+            logger.info(f"[ROLLUPS] Backfill scanned {stats['scanned']} runs, rolled up {stats['rolled_up']}")
+    finally:
+        try:
+            await redis.delete(BACKFILL_LOCK_KEY)
+        except Exception:
+            pass
+
+    return stats
+
+
+async def get_backfill_watermark() -> Optional[Dict[str, Any]]:
+    """Current backfill position, or None before the first backfill."""
+    from core.services.db import execute_one_read, serialize_row
+
+    row = await execute_one_read(
+        "SELECT watermark, watermark_id, updated_at FROM analytics_rollup_watermarks WHERE name = :name",
+        {"name": BACKFILL_WATERMARK},
+    )
+    return serialize_row(row) if row else None
@@ -1,83 +1,310 @@
 """
 Use Case Clustering Service
 
-Groups use cases by category - the LLM already categorizes during analysis,
-so we just need a simple GROUP BY query.
+Groups analyzed conversations by the meaning of their LLM-assigned
+use_case_category, so near-duplicates ("Presentations", "Slide Deck Creation",
+"Create presentations") land in one cluster instead of fragmenting the results.
+
+- Categories are aggregated in SQL; only distinct category strings (usually a
+  few thousand, however many conversations there are) are embedded.
+- Embeddings come from EmbeddingService and are cached in use_case_embeddings,
+  keyed by model and normalized text, so a text is only ever embedded once.
+- Clustering is a count-weighted leader pass followed by a few spherical
+  k-means refinements, all as blocked NumPy matrix products over unit vectors.
+  distance_threshold is the maximum cosine distance from a cluster centroid.
+- Cluster IDs are derived from the cluster label, so they are stable across
+  processes and requests.
 """
 
-from typing import List, Dict, Any, Optional
+import hashlib
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
 
-from core.services.supabase import DBConnection
 from core.utils.logger import logger
 
+EMBED_BATCH_SIZE = 256
+SIMILARITY_BLOCK_SIZE = 2048
+REFINE_ITERATIONS = 3
+MAX_EXAMPLES = 5
+
+
+def normalize_use_case(text: str) -> str:
+    return " ".join(text.split()).casefold()
+
+
+def cluster_id_for(label: str) -> int:
+    """Deterministic ID for a cluster label (unlike hash(), which is salted per process)."""
+    digest = hashlib.sha256(normalize_use_case(label).encode('utf-8')).digest()
+    return int.from_bytes(digest[:4], 'big')
+
+
+def _text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _best_centroid(vectors: np.ndarray, centroids: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Index and cosine similarity of the closest centroid for each row, in blocks."""
+    best = np.empty(len(vectors), dtype=np.int64)
+    best_sim = np.empty(len(vectors), dtype=np.float32)
+    for start in range(0, len(vectors), SIMILARITY_BLOCK_SIZE):
+        sims = vectors[start:start + SIMILARITY_BLOCK_SIZE] @ centroids.T
+        best[start:start + SIMILARITY_BLOCK_SIZE] = sims.argmax(axis=1)
+        best_sim[start:start + SIMILARITY_BLOCK_SIZE] = sims.max(axis=1)
+    return best, best_sim
+
+
+def cluster_vectors(
+    vectors: np.ndarray,
+    weights: np.ndarray,
+    distance_threshold: float,
+    refine_iterations: int = REFINE_ITERATIONS,
+) -> np.ndarray:
+    """
+    Assign each row of `vectors` to a cluster; returns a label per row.
+
+    Rows are visited heaviest first. Each row joins the closest existing
+    centroid within distance_threshold, otherwise it seeds a new cluster. The
+    centroids are then recomputed from the weighted members and rows
+    reassigned; rows that drift beyond the threshold keep their own cluster.
+    """
+    n = len(vectors)
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    min_similarity = 1.0 - distance_threshold
+    vectors = _unit_rows(vectors.astype(np.float32, copy=False))
+    order = np.argsort(-weights, kind='stable')
+
+    labels = np.full(n, -1, dtype=np.int64)
+    centroids = np.empty((0, vectors.shape[1]), dtype=np.float32)
+
+    # Leader pass: assign a block against the centroids found so far in one
+    # product, then seed new clusters from the block's leftovers one by one.
+    for start in range(0, n, SIMILARITY_BLOCK_SIZE):
+        block = order[start:start + SIMILARITY_BLOCK_SIZE]
+        if len(centroids):
+            best, best_sim = _best_centroid(vectors[block], centroids)
+            matched = best_sim >= min_similarity
+            labels[block[matched]] = best[matched]
+            leftovers = block[~matched]
+        else:
+            leftovers = block
+
+        if not len(leftovers):
+            continue
+        pairwise = vectors[leftovers] @ vectors[leftovers].T
+        seeds: List[int] = []
+        for pos, idx in enumerate(leftovers):
+            if seeds:
+                sims = pairwise[pos, seeds]
+                nearest = int(sims.argmax())
+                if sims[nearest] >= min_similarity:
+                    labels[idx] = len(centroids) + nearest
+                    continue
+            labels[idx] = len(centroids) + len(seeds)
+            seeds.append(pos)
+        centroids = np.vstack([centroids, vectors[leftovers[seeds]]])
+
+    # Spherical k-means refinement with count-weighted centroids
+    for _ in range(refine_iterations):
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors * weights[:, None].astype(np.float32))
+        occupied = np.flatnonzero(np.any(sums != 0, axis=1))
+        centroids = _unit_rows(sums[occupied])
+
+        best, best_sim = _best_centroid(vectors, centroids)
+        new_labels = best.copy()
+        strays = np.flatnonzero(best_sim < min_similarity)
+        new_labels[strays] = len(centroids) + np.arange(len(strays))
+        if len(strays):
+            centroids = np.vstack([centroids, vectors[strays]])
+
+        _, new_labels = np.unique(new_labels, return_inverse=True)
+        if np.array_equal(new_labels, labels):
+            break
+        labels = new_labels
+
+    return labels
+
+
+async def _load_category_counts(
+    date_from: Optional[str],
+    date_to: Optional[str],
+) -> List[Dict[str, Any]]:
+    from core.services.db import execute_read
+
+    conditions = ["use_case_category IS NOT NULL", "use_case_category <> ''"]
+    params: Dict[str, Any] = {"max_examples": MAX_EXAMPLES}
+    if date_from:
+        conditions.append("analyzed_at >= CAST(:date_from AS timestamptz)")
+        params["date_from"] = f"{date_from}T00:00:00Z"
+    if date_to:
+        conditions.append("analyzed_at <= CAST(:date_to AS timestamptz)")
+        params["date_to"] = f"{date_to}T23:59:59Z"
+
+    return await execute_read(f"""
+        SELECT
+            use_case_category AS category,
+            COUNT(DISTINCT thread_id) AS thread_count,
+            (ARRAY_AGG(jsonb_build_object('thread_id', thread_id, 'account_id', account_id)
+                       ORDER BY analyzed_at DESC))[1:CAST(:max_examples AS int)] AS examples
+        FROM conversation_analytics
+        WHERE {' AND '.join(conditions)}
+        GROUP BY use_case_category
+    """, params)
+
+
+async def _count_cluster_threads(
+    category_clusters: Dict[str, int],
+    date_from: Optional[str],
+    date_to: Optional[str],
+) -> Dict[int, int]:
+    """Distinct threads per cluster (a thread can carry several merged categories)."""
+    from core.services.db import execute_read
+
+    conditions = ["TRUE"]
+    params: Dict[str, Any] = {"mapping": {k: str(v) for k, v in category_clusters.items()}}
+    if date_from:
+        conditions.append("ca.analyzed_at >= CAST(:date_from AS timestamptz)")
+        params["date_from"] = f"{date_from}T00:00:00Z"
+    if date_to:
+        conditions.append("ca.analyzed_at <= CAST(:date_to AS timestamptz)")
+        params["date_to"] = f"{date_to}T23:59:59Z"
+
+    rows = await execute_read(f"""
+        SELECT m.value::bigint AS cluster, COUNT(DISTINCT ca.thread_id) AS thread_count
+        FROM conversation_analytics ca
+        JOIN jsonb_each_text(CAST(:mapping AS jsonb)) AS m ON m.key = ca.use_case_category
+        WHERE {' AND '.join(conditions)}
+        GROUP BY m.value
+    """, params)
+    return {int(row['cluster']): int(row['thread_count']) for row in rows}
+
+
+async def get_use_case_embeddings(texts: List[str]) -> np.ndarray:
+    """
+    Embeddings for normalized texts as a float32 matrix (one row per text).
+
+    Cached rows are read from use_case_embeddings; the rest are embedded in
+    batches and written back.
+    """
+    from core.services.db import execute_read, execute_mutate
+    from core.memory.embedding_service import embedding_service
+
+    model = embedding_service.model_id
+    hashes = [_text_hash(text) for text in texts]
+
+    cached: Dict[str, np.ndarray] = {}
+    if hashes:
+        rows = await execute_read("""
+            SELECT text_hash, embedding
+            FROM use_case_embeddings
+            WHERE model = :model AND text_hash = ANY(:hashes)
+        """, {"model": model, "hashes": hashes})
+        cached = {row['text_hash']: np.frombuffer(bytes(row['embedding']), dtype='<f4') for row in rows}
+
+    missing = [i for i, text_hash in enumerate(hashes) if text_hash not in cached]
+    if missing:
+        logger.info(f"[CLUSTERING] Embedding {len(missing)} new use cases ({len(cached)} cached)")
+        for start in range(0, len(missing), EMBED_BATCH_SIZE):
+            batch = missing[start:start + EMBED_BATCH_SIZE]
+            embeddings = await embedding_service.embed_texts([texts[i] for i in batch])
+            vectors = [np.asarray(embedding, dtype='<f4') for embedding in embeddings]
+            for i, vector in zip(batch, vectors):
+                cached[hashes[i]] = vector
+
+            await execute_mutate("""
+                INSERT INTO use_case_embeddings (text_hash, model, text, dims, embedding)
+                SELECT h, :model, t, d, e
+                FROM unnest(CAST(:hashes AS text[]), CAST(:texts AS text[]),
+                            CAST(:dims AS int[]), CAST(:embeddings AS bytea[])) AS u(h, t, d, e)
+                ON CONFLICT (model, text_hash) DO NOTHING
+            """, {
+                "model": model,
+                "hashes": [hashes[i] for i in batch],
+                "texts": [texts[i] for i in batch],
+                "dims": [len(vector) for vector in vectors],
+                "embeddings": [vector.tobytes() for vector in vectors],
+            })
+
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    return np.stack([cached[text_hash] for text_hash in hashes]).astype(np.float32, copy=False)
+
 
 async def get_clustered_use_cases(
     date_from: Optional[str] = None,
     date_to: Optional[str] = None,
-    distance_threshold: float = 0.3,  # Kept for API compatibility, not used
+    distance_threshold: float = 0.3,
     min_cluster_size: int = 1
 ) -> List[Dict[str, Any]]:
     """
-    Get use cases grouped by category.
+    Get use cases grouped by semantic similarity of their categories.
 
-    The LLM already assigns use_case_category during analysis,
-    so we just GROUP BY that field and count unique threads.
+    Each cluster is labeled with its most common category and counts the
+    unique threads across all of its member categories.
     """
     try:
-        db = DBConnection()
-        client = await db.client
-
-        # Simple query - group by category, count unique threads
-        # Filter out both NULL and empty strings
-        query = client.from_('conversation_analytics')\
-            .select('use_case_category, thread_id, account_id')\
-            .not_.is_('use_case_category', None)\
-            .neq('use_case_category', '')
-
-        if date_from:
-            query = query.gte('analyzed_at', f"{date_from}T00:00:00Z")
-        if date_to:
-            query = query.lte('analyzed_at', f"{date_to}T23:59:59Z")
-
-        result = await query.execute()
-        records = result.data or []
-
-        # Debug: log actual category values
-        categories_found = [r.get('use_case_category') for r in records]
-        logger.info(f"[CLUSTERING] Categories in records: {categories_found}")
-
-        # Group by category
-        from collections import defaultdict
-        groups = defaultdict(lambda: {'threads': set(), 'examples': []})
-
-        for r in records:
-            cat = r.get('use_case_category')
-            if cat:
-                groups[cat]['threads'].add(r.get('thread_id'))
-                if len(groups[cat]['examples']) < 5:
-                    groups[cat]['examples'].append({
-                        'thread_id': r.get('thread_id'),
-                        'account_id': r.get('account_id')
-                    })
-
-        # Debug: log group counts before filtering
-        logger.info(f"[CLUSTERING] Groups before min_size filter: {[(k, len(v['threads'])) for k, v in groups.items()]}")
-
-        # Build result
+        rows = await _load_category_counts(date_from, date_to)
+        if not rows:
+            return []
+
+        # Merge case/whitespace variants before embedding
+        groups: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            key = normalize_use_case(row['category'])
+            if not key:
+                continue
+            group = groups.setdefault(key, {'categories': [], 'count': 0, 'examples': []})
+            group['categories'].append((row['category'], int(row['thread_count'])))
+            group['count'] += int(row['thread_count'])
+            group['examples'].extend(row['examples'] or [])
+
+        texts = list(groups.keys())
+        weights = np.array([groups[text]['count'] for text in texts], dtype=np.float64)
+        vectors = await get_use_case_embeddings(texts)
+        labels = cluster_vectors(vectors, weights, distance_threshold)
+
+        members: Dict[int, List[str]] = {}
+        for text, label in zip(texts, labels):
+            members.setdefault(int(label), []).append(text)
+
         clusters = []
-        for cat, data in groups.items():
-            count = len(data['threads'])
-            if count >= min_cluster_size:
-                clusters.append({
-                    'cluster_id': hash(cat) % 10000,
-                    'label': cat,
-                    'count': count,
-                    'examples': data['examples']
-                })
-
-        clusters.sort(key=lambda x: x['count'], reverse=True)
-
-        logger.info(f"[CLUSTERING] Found {len(clusters)} categories from {len(records)} records")
+        category_clusters: Dict[str, int] = {}
+        for member_texts in members.values():
+            categories = [cat for text in member_texts for cat in groups[text]['categories']]
+            label = max(categories, key=lambda c: (c[1], c[0]))[0].strip()
+            cluster_id = cluster_id_for(label)
+            for category, _ in categories:
+                category_clusters[category] = cluster_id
+
+            examples = [ex for text in sorted(member_texts, key=lambda t: -groups[t]['count'])
+                        for ex in groups[text]['examples']][:MAX_EXAMPLES]
+            clusters.append({
+                'cluster_id': cluster_id,
+                'label': label,
+                'count': sum(groups[text]['count'] for text in member_texts),
+                'categories': sorted({cat for cat, _ in categories}),
+                'examples': examples,
+            })
+
+        # Per-category counts can include the same thread twice within a merged cluster
+        if any(len(c['categories']) > 1 for c in clusters):
+            thread_counts = await _count_cluster_threads(category_clusters, date_from, date_to)
+            for cluster in clusters:
+                cluster['count'] = thread_counts.get(cluster['cluster_id'], cluster['count'])
+
+        clusters = [c for c in clusters if c['count'] >= min_cluster_size]
+        clusters.sort(key=lambda x: (-x['count'], x['label']))
+
+        logger.info(f"[CLUSTERING] {len(rows)} categories -> {len(clusters)} clusters (threshold={distance_threshold})")
         return clusters
 
     except Exception as e:
@@ -0,0 +1,374 @@
+"""
+Per-run credit escrow.
+
+Instead of one atomic_use_credits RPC per LLM response, a run opens an escrow in
+Redis when it starts, accrues the cost of each response there, and settles the
+net amount to the credit ledger in one deduction - when the run ends, or early
+once the accrued amount passes the run's reservation.
+
+Redis layout (amounts are integer micro-dollars):
+    credit_escrow:{run_id}          hash: account_id, thread_id, reserved, accrued,
+                                    settled, pending_responses, settling_* fields
+    credit_escrow:{run_id}:seen     set of billed message ids (accrual is idempotent)
+    credit_escrow:account:<id>      hash run_id -> unsettled amount, used by balance checks
+    credit_escrow:open              zset run_id -> last activity, swept by recovery
+
+A settlement is written to the escrow hash (settling_id/settling) before the
+ledger call and cleared after it. If the worker dies in between, the settlement
+is in doubt: reconciliation looks the settling_id up in the ledger and either
+completes it or re-issues the deduction under the same id.
+"""
+
+import asyncio
+import time
+import uuid
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, List, Optional
+
+from core.utils.logger import logger
+
+MICROS = Decimal(1_000_000)
+# Ledger amounts are numeric(10,2); intermediate settlements are whole cents
+CENT_MICROS = 10_000
+
+ESCROW_TTL_SECONDS = 7 * 24 * 3600
+MIN_RESERVE = Decimal("0.10")
+MAX_RESERVE = Decimal("2.00")
+# An in-flight settlement younger than this belongs to a live worker; don't touch it
+SETTLE_TIMEOUT_SECONDS = 60
+# Escrows idle for this long are handed to reconciliation
+STALE_ESCROW_SECONDS = 900
+
+OPEN_INDEX_KEY = "credit_escrow:open"
+
+
+def _escrow_key(run_id: str) -> str:
+    return f"credit_escrow:{{{run_id}}}"
+
+
+def _seen_key(run_id: str) -> str:
+    return f"credit_escrow:{{{run_id}}}:seen"
+
+
+def _account_key(account_id: str) -> str:
+    return f"credit_escrow:account:{account_id}"
+
+
+def to_micros(amount: Decimal) -> int:
+    return int((Decimal(str(amount)) * MICROS).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_micros(micros: int) -> Decimal:
+    return Decimal(int(micros)) / MICROS
+
+
+_OPEN_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('HSET', KEYS[1], 'updated_at', ARGV[4])
+    return 0
+end
+redis.call('HSET', KEYS[1],
+    'account_id', ARGV[1], 'thread_id', ARGV[2], 'reserved', ARGV[3],
+    'accrued', 0, 'settled', 0, 'pending_responses', 0,
+    'opened_at', ARGV[4], 'updated_at', ARGV[4])
+redis.call('EXPIRE', KEYS[1], ARGV[5])
+return 1
+"""
+
+# ARGV: ttl, now, then (message_id, micros) pairs
+_ACCRUE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return -1
+end
+local added = 0
+for i = 3, #ARGV, 2 do
+    if redis.call('SADD', KEYS[2], ARGV[i]) == 1 then
+        redis.call('HINCRBY', KEYS[1], 'accrued', ARGV[i + 1])
+        redis.call('HINCRBY', KEYS[1], 'pending_responses', 1)
+        added = added + 1
+    end
+end
+redis.call('HSET', KEYS[1], 'updated_at', ARGV[2])
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return {
+    added,
+    tonumber(redis.call('HGET', KEYS[1], 'accrued') or '0'),
+    tonumber(redis.call('HGET', KEYS[1], 'reserved') or '0'),
+    tonumber(redis.call('HGET', KEYS[1], 'settling') or '0')
+}
+"""
+
+# ARGV: settlement_id, final (0/1), now. Returns {id, micros, responses, started_at, resumed}
+_BEGIN_SETTLE_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return {'', 0, 0, 0, 0}
+end
+local current = redis.call('HGET', KEYS[1], 'settling_id')
+if current and current ~= '' then
+    return {
+        current,
+        tonumber(redis.call('HGET', KEYS[1], 'settling') or '0'),
+        tonumber(redis.call('HGET', KEYS[1], 'settling_responses') or '0'),
+        tonumber(redis.call('HGET', KEYS[1], 'settling_at') or '0'),
+        1
+    }
+end
+local accrued = tonumber(redis.call('HGET', KEYS[1], 'accrued') or '0')
+local amount = accrued
+if ARGV[2] ~= '1' then
+    amount = accrued - (accrued % 10000)
+end
+if amount <= 0 then
+    return {'', 0, 0, 0, 0}
+end
+local responses = tonumber(redis.call('HGET', KEYS[1], 'pending_responses') or '0')
+redis.call('HSET', KEYS[1], 'settling_id', ARGV[1], 'settling', amount,
+    'settling_responses', responses, 'settling_at', ARGV[3], 'pending_responses', 0)
+redis.call('HINCRBY', KEYS[1], 'accrued', -amount)
+return {ARGV[1], amount, responses, tonumber(ARGV[3]), 0}
+"""
+
+_FINISH_SETTLE_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'settling_id') ~= ARGV[1] then
+    return -1
+end
+redis.call('HINCRBY', KEYS[1], 'settled', redis.call('HGET', KEYS[1], 'settling'))
+redis.call('HDEL', KEYS[1], 'settling_id', 'settling', 'settling_responses', 'settling_at')
+return tonumber(redis.call('HGET', KEYS[1], 'accrued') or '0')
+"""
+
+
+class CreditEscrow:
+    def __init__(self):
+        self._scripts: Dict[str, Any] = {}
+        self._scripts_client = None
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._settle_tasks: set = set()
+        self._stats = {"opened": 0, "accrued": 0, "settlements": 0, "in_doubt_resolved": 0, "settle_failures": 0}
+
+    async def _script(self, name: str, source: str):
+        from core.services import redis
+
+        client = await redis.get_client()
+        if self._scripts_client is not client:
+            self._scripts = {}
+            self._scripts_client = client
+        if name not in self._scripts:
+            self._scripts[name] = client.register_script(source)
+        return self._scripts[name], client
+
+    def _lock(self, run_id: str) -> asyncio.Lock:
+        return self._locks.setdefault(run_id, asyncio.Lock())
+
+    async def open(self, run_id: str, account_id: str, thread_id: Optional[str]) -> Optional[Decimal]:
+        """Open (or re-attach to) the escrow for a run. Returns the reservation, or None if unavailable."""
+        from core.billing.credits.manager import credit_manager
+
+        try:
+            balance_info = await credit_manager.get_balance(account_id, use_cache=True)
+            balance = Decimal(str(balance_info.get('total', 0) if isinstance(balance_info, dict) else balance_info or 0))
+            reserved = min(MAX_RESERVE, max(MIN_RESERVE, balance))
+
+            script, client = await self._script("open", _OPEN_SCRIPT)
+            now = time.time()
+            created = await script(
+                keys=[_escrow_key(run_id)],
+                args=[account_id, thread_id or "", to_micros(reserved), now, ESCROW_TTL_SECONDS],
+                client=client,
+            )
+            await client.zadd(OPEN_INDEX_KEY, {run_id: now})
+            self._stats["opened"] += 1
+            logger.debug(f"[ESCROW] {'Opened' if created else 'Re-attached'} escrow for run {run_id}: reserved ${reserved}")
+            return reserved
+        except Exception as e:
+            logger.warning(f"[ESCROW] Failed to open escrow for run {run_id}, billing per response: {e}")
+            return None
+
+    async def accrue(self, run_id: str, account_id: str, charges: List[Dict[str, Any]]) -> Optional[Decimal]:
+        """Record response costs against the run's escrow.
+
+        charges: [{"message_id": str, "cost": Decimal}]. Returns the unsettled amount,
+        or None if the run has no open escrow and the caller must bill directly.
+        Raises if the outcome is unknown (the script may have run); callers retry,
+        which is safe because accrual is idempotent per message id.
+        """
+        if not charges:
+            return Decimal("0")
+
+        args: List[Any] = [ESCROW_TTL_SECONDS, time.time()]
+        for charge in charges:
+            args.extend([str(charge["message_id"]), to_micros(charge["cost"])])
+
+        try:
+            script, client = await self._script("accrue", _ACCRUE_SCRIPT)
+            result = await script(keys=[_escrow_key(run_id), _seen_key(run_id)], args=args, client=client)
+        except Exception as e:
+            logger.warning(f"[ESCROW] Accrue failed for run {run_id}, leaving it for retry: {e}")
+            raise
+
+        if result == -1:
+            return None
+
+        added, accrued, reserved, settling = (int(v) for v in result)
+        self._stats["accrued"] += added
+        await self._publish_outstanding(client, run_id, account_id, accrued + settling)
+
+        if not settling and accrued >= reserved:
+            # Past the reservation: settle in the background so the flush isn't held up by the ledger
+            task = asyncio.create_task(self.settle(run_id))
+            self._settle_tasks.add(task)
+            task.add_done_callback(self._settle_tasks.discard)
+
+        return from_micros(accrued)
+
+    async def _publish_outstanding(self, client, run_id: str, account_id: str, unsettled_micros: int) -> None:
+        try:
+            pipe = client.pipeline(transaction=False)
+            if unsettled_micros > 0:
+                pipe.hset(_account_key(account_id), run_id, unsettled_micros)
+                pipe.expire(_account_key(account_id), ESCROW_TTL_SECONDS)
+            else:
+                pipe.hdel(_account_key(account_id), run_id)
+            pipe.zadd(OPEN_INDEX_KEY, {run_id: time.time()})
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"[ESCROW] Failed to publish outstanding amount for {run_id}: {e}")
+
+    async def get_outstanding(self, account_id: str) -> Decimal:
+        """Usage accrued in open escrows but not yet on the ledger, across the account's runs."""
+        from core.services import redis
+
+        try:
+            client = await redis.get_client()
+            values = await client.hvals(_account_key(account_id))
+            return from_micros(sum(int(v) for v in values))
+        except Exception as e:
+            logger.debug(f"[ESCROW] Failed to read outstanding usage for {account_id}: {e}")
+            return Decimal("0")
+
+    async def get_escrow(self, run_id: str) -> Optional[Dict[str, str]]:
+        from core.services import redis
+
+        client = await redis.get_client()
+        raw = await client.hgetall(_escrow_key(run_id))
+        if not raw:
+            return None
+        return {
+            (k.decode() if isinstance(k, bytes) else k): (v.decode() if isinstance(v, bytes) else v)
+            for k, v in raw.items()
+        }
+
+    async def settle(self, run_id: str, final: bool = False) -> Decimal:
+        """Move accrued usage to the ledger. Returns the amount settled by this call."""
+        async with self._lock(run_id):
+            settled = Decimal("0")
+            # At most: resolve one in-doubt settlement, then settle what accrued since
+            for _ in range(2):
+                escrow = await self.get_escrow(run_id)
+                if not escrow:
+                    return settled
+
+                script, client = await self._script("begin", _BEGIN_SETTLE_SCRIPT)
+                settlement_id, micros, responses, started_at, resumed = await script(
+                    keys=[_escrow_key(run_id)],
+                    args=[str(uuid.uuid4()), "1" if final else "0", time.time()],
+                    client=client,
+                )
+                settlement_id = settlement_id.decode() if isinstance(settlement_id, bytes) else settlement_id
+                if not settlement_id:
+                    return settled
+
+                if resumed:
+                    if time.time() - float(started_at) < SETTLE_TIMEOUT_SECONDS:
+                        logger.debug(f"[ESCROW] Settlement {settlement_id} for run {run_id} is in flight elsewhere")
+                        return settled
+                    if not await self._already_booked(escrow["account_id"], settlement_id):
+                        booked = await self._deduct(escrow, settlement_id, int(micros), int(responses))
+                        if not booked:
+                            return settled
+                    self._stats["in_doubt_resolved"] += 1
+                elif not await self._deduct(escrow, settlement_id, int(micros), int(responses)):
+                    return settled
+
+                finish, client = await self._script("finish", _FINISH_SETTLE_SCRIPT)
+                remaining = await finish(keys=[_escrow_key(run_id)], args=[settlement_id], client=client)
+                await self._publish_outstanding(client, run_id, escrow["account_id"], max(int(remaining), 0))
+                settled += from_micros(int(micros))
+                self._stats["settlements"] += 1
+
+                if not resumed:
+                    return settled
+            return settled
+
+    async def _already_booked(self, account_id: str, settlement_id: str) -> bool:
+        from core.billing import repo as billing_repo
+        return await billing_repo.get_usage_ledger_by_message_id(account_id, settlement_id) is not None
+
+    async def _deduct(self, escrow: Dict[str, str], settlement_id: str, micros: int, responses: int) -> bool:
+        from core.billing.credits.manager import credit_manager
+        from core.billing.shared.cache_utils import invalidate_account_state_cache
+
+        account_id = escrow["account_id"]
+        amount = from_micros(micros).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        if amount <= 0:
+            # Sub-cent remainder at the end of a run; the ledger can't represent it
+            return True
+
+        try:
+            result = await credit_manager.deduct_credits(
+                account_id=account_id,
+                amount=amount,
+                description=f"Agent run usage ({responses} responses)",
+                type='usage',
+                message_id=settlement_id,
+                thread_id=escrow.get("thread_id") or None,
+            )
+        except Exception as e:
+            result = {'success': False, 'error': str(e)}
+
+        if not result.get('success'):
+            self._stats["settle_failures"] += 1
+            logger.error(f"[ESCROW] Settlement {settlement_id} of ${amount} for {account_id} failed: {result.get('error')}")
+            return False
+
+        logger.info(f"💰 [ESCROW] Settled ${amount} for {responses} responses ({account_id}), new balance ${result.get('new_total', 0)}")
+        await invalidate_account_state_cache(account_id)
+        return True
+
+    async def close(self, run_id: str) -> bool:
+        """Final settlement at run end. Returns False if anything is left for reconciliation."""
+        await self.settle(run_id, final=True)
+
+        escrow = await self.get_escrow(run_id)
+        if escrow and (int(escrow.get("accrued", 0)) > 0 or escrow.get("settling_id")):
+            logger.warning(f"[ESCROW] Run {run_id} closed with unsettled usage, leaving it for reconciliation")
+            return False
+
+        from core.services import redis
+        client = await redis.get_client()
+        pipe = client.pipeline(transaction=False)
+        pipe.delete(_escrow_key(run_id), _seen_key(run_id))
+        if escrow:
+            pipe.hdel(_account_key(escrow["account_id"]), run_id)
+        pipe.zrem(OPEN_INDEX_KEY, run_id)
+        await pipe.execute()
+        self._locks.pop(run_id, None)
+        return True
+
+    async def find_stale(self, older_than: float = STALE_ESCROW_SECONDS) -> List[str]:
+        from core.services import redis
+
+        try:
+            client = await redis.get_client()
+            run_ids = await client.zrangebyscore(OPEN_INDEX_KEY, "-inf", time.time() - older_than)
+            return [r.decode() if isinstance(r, bytes) else r for r in run_ids]
+        except Exception as e:
+            logger.warning(f"[ESCROW] Failed to list stale escrows: {e}")
+            return []
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {**self._stats, "settle_tasks": len(self._settle_tasks)}
+
+
+credit_escrow = CreditEscrow()
@@ -70,6 +70,10 @@ class BillingIntegration:
         else:
             balance = Decimal(str(balance_info or 0))
         
+        # Usage accrued by in-flight runs hasn't reached the ledger yet
+        from core.billing.credits.escrow import credit_escrow
+        balance -= await credit_escrow.get_outstanding(account_id)
+        
         if balance < 0:
             return False, f"Insufficient credits. Your balance is {int(balance * 100)} credits. Please add credits to continue.", None
         
@@ -122,19 +126,13 @@ class BillingIntegration:
             return False, f"Error checking access: {str(e)}", {"error_type": "system_error"}
     
     @staticmethod
-    async def deduct_usage(
-        account_id: str,
+    def calculate_usage_cost(
         prompt_tokens: int,
         completion_tokens: int,
         model: str,
-        message_id: Optional[str] = None,
-        thread_id: Optional[str] = None,
         cache_read_tokens: int = 0,
         cache_creation_tokens: int = 0
-    ) -> Dict:
-        if config.ENV_MODE == EnvMode.LOCAL:
-            return {'success': True, 'cost': 0, 'new_balance': 999999}
-
+    ) -> Decimal:
         # Handle cache reads and writes separately with actual pricing
         if cache_read_tokens > 0 or cache_creation_tokens > 0:
             non_cached_prompt_tokens = prompt_tokens - cache_read_tokens - cache_creation_tokens
@@ -161,6 +159,26 @@ class BillingIntegration:
         else:
             cost = calculate_token_cost(prompt_tokens, completion_tokens, model)
         
+        return cost
+    
+    @staticmethod
+    async def deduct_usage(
+        account_id: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        model: str,
+        message_id: Optional[str] = None,
+        thread_id: Optional[str] = None,
+        cache_read_tokens: int = 0,
+        cache_creation_tokens: int = 0
+    ) -> Dict:
+        if config.ENV_MODE == EnvMode.LOCAL:
+            return {'success': True, 'cost': 0, 'new_balance': 999999}
+
+        cost = BillingIntegration.calculate_usage_cost(
+            prompt_tokens, completion_tokens, model, cache_read_tokens, cache_creation_tokens
+        )
+        
         if cost <= 0:
             logger.warning(f"Zero cost calculated for {model} with {prompt_tokens}+{completion_tokens} tokens")
             balance_info = await credit_manager.get_balance(account_id)
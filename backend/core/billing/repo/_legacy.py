@@ -528,6 +528,20 @@ async def atomic_use_credits(
     return row.get('result') if row else None
 
 
+async def get_usage_ledger_by_message_id(account_id: str, message_id: str) -> Optional[Dict[str, Any]]:
+    """Find a usage ledger row by the message_id recorded with the deduction."""
+    sql = """
+    SELECT id, amount, balance_after, created_at
+    FROM credit_ledger
+    WHERE account_id = CAST(:account_id AS uuid)
+      AND type = 'usage'
+      AND metadata->>'message_id' = :message_id
+    LIMIT 1
+    """
+    row = await execute_one(sql, {"account_id": account_id, "message_id": message_id})
+    return serialize_row(row) if row else None
+
+
 async def atomic_grant_renewal_credits(
     account_id: str,
     period_start: int,
@@ -588,35 +588,166 @@ async def invalidate_user_context_cache(user_id: str) -> None:
         logger.warning(f"Failed to invalidate user context cache: {e}")
 
 
+PROMPT_SEGMENTS_TTL = 3600
+
+def _get_prompt_segments_key(segments_key: str) -> str:
+    return f"prompt_segments:{segments_key}"
+
+
+async def get_cached_prompt_segments(segments_key: str) -> Optional[Dict[str, str]]:
+    try:
+        from core.services import redis as redis_service
+        
+        cached = await redis_service.get(_get_prompt_segments_key(segments_key))
+        if cached:
+            logger.debug(f"⚡ Redis cache hit for prompt segments: {segments_key}")
+            return _json_loads(cached)
+    except Exception as e:
+        logger.warning(f"Failed to get prompt segments from cache: {e}")
+    
+    return None
+
+
+async def set_cached_prompt_segments(segments_key: str, segments: Dict[str, str]) -> None:
+    try:
+        from core.services import redis as redis_service
+        await redis_service.set(_get_prompt_segments_key(segments_key), _json_dumps(segments), ex=PROMPT_SEGMENTS_TTL)
+        logger.debug(f"✅ Cached prompt segments in Redis: {segments_key}")
+    except Exception as e:
+        logger.warning(f"Failed to cache prompt segments: {e}")
+
 MESSAGE_HISTORY_TTL = 60
 
+# Message history is a Redis list with one JSON entry per message, plus a meta
+# hash holding `version` (number of messages ever written to the list) and
+# `last_message_id`. Appends are RPUSH via a Lua script so they're atomic and
+# only land on an already-populated cache; readers compare `version` with the
+# list length and `last_message_id` with the newest entry to detect gaps
+# (partial writes, eviction, out-of-band writes) and treat them as misses.
+
+_APPEND_MESSAGE_HISTORY_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 0 then
+    return -1
+end
+for i = 3, #ARGV do
+    redis.call('RPUSH', KEYS[1], ARGV[i])
+end
+local version = redis.call('HINCRBY', KEYS[2], 'version', #ARGV - 2)
+if ARGV[2] ~= '' then
+    redis.call('HSET', KEYS[2], 'last_message_id', ARGV[2])
+end
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+redis.call('EXPIRE', KEYS[2], ARGV[1])
+return version
+"""
+
+_append_message_history_script = None
+
+def _get_append_message_history_script(client):
+    # register_script runs EVALSHA and reloads the script on NOSCRIPT
+    global _append_message_history_script
+    if _append_message_history_script is None or _append_message_history_script.registered_client is not client:
+        _append_message_history_script = client.register_script(_APPEND_MESSAGE_HISTORY_SCRIPT)
+    return _append_message_history_script
+
+
 def _get_message_history_key(thread_id: str) -> str:
-    return f"message_history:{thread_id}"
+    return f"message_log:{thread_id}"
 
 
-async def get_cached_message_history(thread_id: str) -> Optional[list]:
+def _get_message_history_meta_key(thread_id: str) -> str:
+    return f"message_log_meta:{thread_id}"
+
+
+def _last_message_id(messages: list) -> str:
+    for message in reversed(messages):
+        if isinstance(message, dict) and message.get("message_id"):
+            return str(message["message_id"])
+    return ""
+
+
+async def get_cached_message_history(thread_id: str, tail: Optional[int] = None) -> Optional[list]:
+    """Read cached message history, optionally only the last `tail` messages.
+    
+    Returns None on a miss or when the list disagrees with its version or
+    last-message-id guard.
+    """
     cache_key = _get_message_history_key(thread_id)
+    meta_key = _get_message_history_meta_key(thread_id)
     
     try:
         from core.services import redis as redis_service
         
-        cached = await redis_service.get(cache_key)
-        if cached:
-            data = _json_loads(cached) if isinstance(cached, (str, bytes)) else cached
-            logger.debug(f"⚡ Redis cache hit for message history: {thread_id} ({len(data)} messages)")
-            return data
+        client = await redis_service.get_client()
+        pipe = client.pipeline(transaction=True)
+        pipe.hgetall(meta_key)
+        pipe.llen(cache_key)
+        pipe.lrange(cache_key, -tail if tail else 0, -1)
+        meta, length, raw_messages = await pipe.execute()
+        
+        if not meta:
+            return None
+        
+        version = int(meta.get("version", 0))
+        if version != length:
+            logger.warning(f"Message history cache gap for {thread_id} (version={version}, length={length}), dropping")
+            await invalidate_message_history_cache(thread_id)
+            return None
+        
+        data = [_json_loads(m) for m in raw_messages]
+        
+        expected_last_id = meta.get("last_message_id")
+        last_id = _last_message_id(data)
+        if expected_last_id and last_id and last_id != expected_last_id:
+            logger.warning(f"Message history cache gap for {thread_id} (last_message_id={expected_last_id}, newest={last_id}), dropping")
+            await invalidate_message_history_cache(thread_id)
+            return None
+        
+        logger.debug(f"⚡ Redis cache hit for message history: {thread_id} ({len(data)}/{length} messages)")
+        return data
     except Exception as e:
         logger.warning(f"Failed to get message history from cache: {e}")
     
     return None
 
 
+async def get_cached_message_history_version(thread_id: str) -> Optional[Dict[str, Any]]:
+    """Return {"version", "last_message_id"} for the cached history, or None if not cached."""
+    try:
+        from core.services import redis as redis_service
+        
+        client = await redis_service.get_client()
+        meta = await client.hgetall(_get_message_history_meta_key(thread_id))
+        if meta:
+            return {
+                "version": int(meta.get("version", 0)),
+                "last_message_id": meta.get("last_message_id") or None,
+            }
+    except Exception as e:
+        logger.warning(f"Failed to get message history cache version: {e}")
+    
+    return None
+
+
 async def set_cached_message_history(thread_id: str, messages: list) -> None:
     cache_key = _get_message_history_key(thread_id)
+    meta_key = _get_message_history_meta_key(thread_id)
     
     try:
         from core.services import redis as redis_service
-        await redis_service.set(cache_key, _json_dumps(messages), ex=MESSAGE_HISTORY_TTL)
+        
+        client = await redis_service.get_client()
+        pipe = client.pipeline(transaction=True)
+        pipe.delete(cache_key, meta_key)
+        if messages:
+            pipe.rpush(cache_key, *[_json_dumps(m) for m in messages])
+            pipe.expire(cache_key, MESSAGE_HISTORY_TTL)
+        pipe.hset(meta_key, mapping={
+            "version": len(messages),
+            "last_message_id": _last_message_id(messages),
+        })
+        pipe.expire(meta_key, MESSAGE_HISTORY_TTL)
+        await pipe.execute()
         logger.debug(f"✅ Cached message history in Redis: {thread_id} ({len(messages)} messages)")
     except Exception as e:
         logger.warning(f"Failed to cache message history: {e}")
@@ -625,24 +756,35 @@ async def set_cached_message_history(thread_id: str, messages: list) -> None:
 async def invalidate_message_history_cache(thread_id: str) -> None:
     try:
         from core.services import redis as redis_service
-        await redis_service.delete(_get_message_history_key(thread_id))
+        await redis_service.delete_multiple([
+            _get_message_history_key(thread_id),
+            _get_message_history_meta_key(thread_id),
+        ])
         logger.debug(f"🗑️ Invalidated message history cache: {thread_id}")
     except Exception as e:
         logger.warning(f"Failed to invalidate message history cache: {e}")
 
 
 async def append_to_cached_message_history(thread_id: str, message: dict) -> bool:
-    cache_key = _get_message_history_key(thread_id)
+    return await append_many_to_cached_message_history(thread_id, [message])
+
+
+async def append_many_to_cached_message_history(thread_id: str, messages: list) -> bool:
+    """RPUSH messages onto an existing cached history. No-op (False) if the thread isn't cached."""
+    if not messages:
+        return False
     
     try:
         from core.services import redis as redis_service
         
-        cached = await redis_service.get(cache_key)
-        if cached:
-            messages = _json_loads(cached) if isinstance(cached, (str, bytes)) else cached
-            messages.append(message)
-            await redis_service.set(cache_key, _json_dumps(messages), ex=MESSAGE_HISTORY_TTL)
-            logger.debug(f"✅ Appended message to cached history: {thread_id} ({len(messages)} messages)")
+        client = await redis_service.get_client()
+        script = _get_append_message_history_script(client)
+        version = await script(
+            keys=[_get_message_history_key(thread_id), _get_message_history_meta_key(thread_id)],
+            args=[MESSAGE_HISTORY_TTL, _last_message_id(messages), *[_json_dumps(m) for m in messages]],
+        )
+        if version is not None and int(version) >= 0:
+            logger.debug(f"✅ Appended {len(messages)} message(s) to cached history: {thread_id} ({version} messages)")
             return True
     except Exception as e:
         logger.warning(f"Failed to append to message history cache: {e}")
@@ -731,6 +873,7 @@ async def set_agent_run_stream_data(
             "metadata": metadata or {},
         }
         await redis_service.set(cache_key, _json_dumps(stream_data), ex=AGENT_RUN_STREAM_TTL)
+        await redis_service.notify_run_registered(agent_run_id)
         logger.debug(f"✅ Cached agent run stream data: {agent_run_id}")
     except Exception as e:
         logger.warning(f"Failed to cache agent run stream data: {e}")
@@ -5,10 +5,21 @@ _function_to_tool_map: Optional[Dict[str, str]] = None
 
 
 def build_function_map() -> Dict[str, str]:
+    from core.tools.tool_manifest import get_manifest
     from core.tools.tool_registry import ALL_TOOLS, get_tool_class
     
     function_map = {}
     
+    manifest = get_manifest()
+    if manifest is not None:
+        for tool_name, _, _ in ALL_TOOLS:
+            entry = manifest["tools"].get(tool_name)
+            if entry:
+                for method_name in entry["schemas"]:
+                    function_map[method_name] = tool_name
+        logger.info(f"⚡ [JIT MAP] Built function map from tool manifest: {len(function_map)} functions mapped")
+        return function_map
+    
     for tool_name, module_path, class_name in ALL_TOOLS:
         try:
             tool_class = get_tool_class(module_path, class_name)
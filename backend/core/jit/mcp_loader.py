@@ -225,33 +225,16 @@ class MCPJITLoader:
             logger.error("❌ [MCP JIT] Missing 'url' in SSE MCP config")
             return []
         
-        from mcp.client.sse import sse_client
-        from mcp import ClientSession
+        from core.tools.utils.mcp_session_pool import mcp_session_pool
         
         headers = config.get('headers', {})
         
         try:
-            try:
-                async with sse_client(url, headers=headers) as (read_stream, write_stream):
-                    async with ClientSession(read_stream, write_stream) as session:
-                        await session.initialize()
-                        tools_result = await session.list_tools()
-                        tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
-                        tool_names = [tool.name for tool in tools]
-                        logger.debug(f"⚡ [MCP JIT] Discovered {len(tool_names)} SSE tools")
-                        return tool_names
-            except TypeError as e:
-                if "unexpected keyword argument" in str(e):
-                    async with sse_client(url) as (read_stream, write_stream):
-                        async with ClientSession(read_stream, write_stream) as session:
-                            await session.initialize()
-                            tools_result = await session.list_tools()
-                            tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
-                            tool_names = [tool.name for tool in tools]
-                            logger.debug(f"⚡ [MCP JIT] Discovered {len(tool_names)} SSE tools (no headers)")
-                            return tool_names
-                else:
-                    raise
+            tools_result = await mcp_session_pool.list_tools("sse", url, headers=headers)
+            tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
+            tool_names = [tool.name for tool in tools]
+            logger.debug(f"⚡ [MCP JIT] Discovered {len(tool_names)} SSE tools")
+            return tool_names
         except Exception as e:
             logger.error(f"❌ [MCP JIT] Failed to discover SSE tools: {e}")
             return []
@@ -262,18 +245,14 @@ class MCPJITLoader:
             logger.error("❌ [MCP JIT] Missing 'url' in HTTP MCP config")
             return []
         
-        from mcp.client.streamable_http import streamablehttp_client
-        from mcp import ClientSession
+        from core.tools.utils.mcp_session_pool import mcp_session_pool
         
         try:
-            async with streamablehttp_client(url) as (read_stream, write_stream, _):
-                async with ClientSession(read_stream, write_stream) as session:
-                    await session.initialize()
-                    tools_result = await session.list_tools()
-                    tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
-                    tool_names = [tool.name for tool in tools]
-                    logger.debug(f"⚡ [MCP JIT] Discovered {len(tool_names)} HTTP tools")
-                    return tool_names
+            tools_result = await mcp_session_pool.list_tools("http", url)
+            tools = tools_result.tools if hasattr(tools_result, 'tools') else tools_result
+            tool_names = [tool.name for tool in tools]
+            logger.debug(f"⚡ [MCP JIT] Discovered {len(tool_names)} HTTP tools")
+            return tool_names
         except Exception as e:
             logger.error(f"❌ [MCP JIT] Failed to discover HTTP tools: {e}")
             return []
@@ -0,0 +1,156 @@
+"""
+Knowledge Base Text Extraction
+
+Extracts text from uploaded KB files with the fast_parse parsers, in a bounded
+process pool so large PDFs and Office files never run on the event loop.
+
+Results are cached by the file's content hash (plus extension, which picks the
+parser), in Redis across workers and per process while an extraction is in
+flight, so re-uploads and the same file added to several folders are parsed once.
+"""
+
+import asyncio
+import base64
+import hashlib
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.utils.logger import logger
+
+EXTRACTION_CACHE_VERSION = 1
+EXTRACTION_CACHE_TTL = 7 * 24 * 3600
+# Summaries see at most ~1M tokens; stop parsing well before that
+EXTRACTION_MAX_CHARS = 4_000_000
+EXTRACTION_WORKERS = int(os.getenv("KB_EXTRACTION_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Jobs waiting on the pool hold a copy of the file, so cap how many are queued
+EXTRACTION_MAX_PENDING = EXTRACTION_WORKERS * 2
+
+
+def _extract_text(file_content: bytes, filename: str, mime_type: str, max_chars: int) -> str:
+    """Runs in a pool worker: parse page/sheet/slide at a time up to max_chars.
+
+    Parse errors propagate to the caller, so only successful extractions are cached.
+    """
+    from core.utils.fast_parse import iter_parse
+
+    return "\n\n".join(
+        segment.text
+        for segment in iter_parse(file_content, filename, mime_type, max_chars=max_chars)
+        if segment.text
+    )
+
+
+class ExtractionService:
+    def __init__(self, max_workers: int = EXTRACTION_WORKERS, max_pending: int = EXTRACTION_MAX_PENDING):
+        self.max_workers = max_workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._slots = asyncio.Semaphore(max_pending)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.extractions = 0
+        self.cache_hits = 0
+        self.deduplicated = 0
+
+    @staticmethod
+    def key(content_hash: str, filename: str) -> str:
+        return f"kb_extract:v{EXTRACTION_CACHE_VERSION}:{content_hash}:{Path(filename).suffix.lower()}"
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    async def extract(
+        self,
+        file_content: bytes,
+        filename: str,
+        mime_type: str,
+        content_hash: Optional[str] = None,
+    ) -> str:
+        """Extracted text of a file, parsed at most once per content hash."""
+        content_hash = content_hash or hashlib.sha256(file_content).hexdigest()
+        key = self.key(content_hash, filename)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.deduplicated += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            text = await self._get_cached(key)
+            if text is None:
+                text = await self._run(file_content, filename, mime_type)
+                await self._set_cached(key, text)
+            else:
+                self.cache_hits += 1
+            future.set_result(text)
+            return text
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Mark retrieved so an exception nobody else awaited isn't logged
+            future.exception()
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _run(self, file_content: bytes, filename: str, mime_type: str) -> str:
+        async with self._slots:
+            loop = asyncio.get_running_loop()
+            self.extractions += 1
+            try:
+                return await loop.run_in_executor(
+                    self._get_executor(), _extract_text, file_content, filename, mime_type, EXTRACTION_MAX_CHARS
+                )
+            except BrokenProcessPool:
+                # A worker died (e.g. OOM on a hostile file); start a fresh pool next time
+                logger.error(f"[KB_EXTRACT] Extraction pool broke while parsing {filename}")
+                self._executor = None
+                raise
+
+    async def _get_cached(self, key: str) -> Optional[str]:
+        try:
+            from core.services import redis
+            value = await redis.get(key)
+        except Exception as e:
+            logger.debug(f"[KB_EXTRACT] Cache read failed: {e}")
+            return None
+        if not value:
+            return None
+        try:
+            return zlib.decompress(base64.b64decode(value)).decode("utf-8")
+        except Exception as e:
+            logger.warning(f"[KB_EXTRACT] Dropping unreadable cache entry {key}: {e}")
+            return None
+
+    async def _set_cached(self, key: str, text: str) -> None:
+        try:
+            from core.services import redis
+            packed = base64.b64encode(zlib.compress(text.encode("utf-8"))).decode("ascii")
+            await redis.set(key, packed, ex=EXTRACTION_CACHE_TTL)
+        except Exception as e:
+            logger.debug(f"[KB_EXTRACT] Cache write failed: {e}")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "workers": self.max_workers,
+            "inflight": len(self._inflight),
+            "extractions": self.extractions,
+            "cache_hits": self.cache_hits,
+            "deduplicated": self.deduplicated,
+        }
+
+
+extraction_service = ExtractionService()
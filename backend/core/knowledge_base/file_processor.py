@@ -1,18 +1,15 @@
 import os
-import io
 import uuid
+import hashlib
 import re
 from typing import Dict, Any
 from pathlib import Path
-import mimetypes
 import chardet
 
-import PyPDF2
-import docx
-
 from core.utils.logger import logger
 from core.services.supabase import DBConnection
 from core.services.llm import make_llm_api_call
+from core.knowledge_base.extraction import extraction_service
 
 
 async def _invalidate_kb_cache_for_entry(client, entry_id: str) -> None:
@@ -108,6 +105,7 @@ class FileProcessor:
             
             # Generate unique entry ID
             entry_id = str(uuid.uuid4())
+            content_hash = hashlib.sha256(file_content).hexdigest()
             
             # Sanitize filename for S3 storage
             sanitized_filename = self.sanitize_filename(filename)
@@ -130,6 +128,7 @@ class FileProcessor:
                 'filename': filename,
                 'file_path': s3_path,
                 'file_size': len(file_content),
+                'content_hash': content_hash,
                 'mime_type': mime_type,
                 'summary': 'Processing...',
                 'is_active': True
@@ -146,7 +145,8 @@ class FileProcessor:
                 entry_id,
                 file_content,
                 filename,
-                mime_type
+                mime_type,
+                content_hash
             )
             logger.info(f"[PROCESSOR] Background task scheduled in: {time.time() - t3:.2f}s")
             logger.info(f"[PROCESSOR] Total fast processing time: {time.time() - start:.2f}s")
@@ -162,17 +162,25 @@ class FileProcessor:
             logger.error(f"Error processing file {filename}: {str(e)}")
             return {'success': False, 'error': str(e)}
     
+    async def _extract_content(self, file_content: bytes, filename: str, mime_type: str, content_hash: str = None) -> str:
+        try:
+            return await extraction_service.extract(file_content, filename, mime_type, content_hash)
+        except Exception as e:
+            logger.warning(f"Content extraction failed for {filename}: {e}")
+            return f"[Error extracting content from {filename}] - File is stored but content extraction failed: {e}"
+    
     async def _generate_and_update_summary(
         self,
         entry_id: str,
         file_content: bytes,
         filename: str,
-        mime_type: str
+        mime_type: str,
+        content_hash: str = None
     ):
         """Background task to generate and update file summary."""
         try:
-            # Extract content
-            content = self._extract_content(file_content, filename, mime_type)
+            # Extract content (parsed off the event loop, once per content hash)
+            content = await self._extract_content(file_content, filename, mime_type, content_hash)
             if not content:
                 content = f"File: {filename} ({len(file_content)} bytes, {mime_type})"
             
@@ -228,6 +236,7 @@ class FileProcessor:
             
             # Generate unique entry ID
             entry_id = str(uuid.uuid4())
+            content_hash = hashlib.sha256(file_content).hexdigest()
             
             # Sanitize filename for S3 storage
             sanitized_filename = self.sanitize_filename(filename)
@@ -241,7 +250,7 @@ class FileProcessor:
             )
             
             # Extract content for summary
-            content = self._extract_content(file_content, filename, mime_type)
+            content = await self._extract_content(file_content, filename, mime_type, content_hash)
             if not content:
                 # If no content could be extracted, create a basic file info summary
                 content = f"File: {filename} ({len(file_content)} bytes, {mime_type})"
@@ -257,6 +266,7 @@ class FileProcessor:
                 'filename': filename,
                 'file_path': s3_path,
                 'file_size': len(file_content),
+                'content_hash': content_hash,
                 'mime_type': mime_type,
                 'summary': summary,
                 'is_active': True
@@ -422,47 +432,3 @@ Keep it under 200 words and make it actionable for context injection."""
         
         # Generate intelligent fallback
         return f"This {content_type} '{filename}' contains {len(content):,} characters across {len(non_empty_lines)} lines. Preview: {preview[:200]}{'...' if len(preview) > 200 else ''} This file would be useful for understanding the specific content and context it provides."
-    
-    def _extract_content(self, file_content: bytes, filename: str, mime_type: str) -> str:
-        """Extract text content from file bytes."""
-        file_extension = Path(filename).suffix.lower()
-        
-        try:
-            # Handle text-based files (including JSON, XML, CSV, etc.)
-            if (file_extension in ['.txt', '.json', '.xml', '.csv', '.yml', '.yaml', '.md', '.log', '.ini', '.cfg', '.conf'] 
-                or mime_type.startswith('text/') 
-                or mime_type in ['application/json', 'application/xml', 'text/xml']):
-                
-                detected = chardet.detect(file_content)
-                encoding = detected.get('encoding', 'utf-8')
-                try:
-                    return file_content.decode(encoding)
-                except UnicodeDecodeError:
-                    return file_content.decode('utf-8', errors='replace')
-            
-            elif file_extension == '.pdf':
-                pdf_reader = PyPDF2.PdfReader(io.BytesIO(file_content))
-                return '\n\n'.join(page.extract_text() for page in pdf_reader.pages)
-            
-            elif file_extension == '.docx':
-                doc = docx.Document(io.BytesIO(file_content))
-                return '\n'.join(paragraph.text for paragraph in doc.paragraphs)
-            
-            # For any other file type, try to decode as text (fallback)
-            else:
-                try:
-                    detected = chardet.detect(file_content)
-                    encoding = detected.get('encoding', 'utf-8')
-                    content = file_content.decode(encoding)
-                    # Only return if it seems to be mostly text content
-                    if len([c for c in content[:1000] if c.isprintable() or c.isspace()]) > 800:
-                        return content
-                except:
-                    pass
-                
-                # If we can't extract text content, return a placeholder
-                return f"[Binary file: {filename}] - Content cannot be extracted as text, but file is stored and available for download."
-            
-        except Exception as e:
-            logger.error(f"Error extracting content from {filename}: {str(e)}")
-            return f"[Error extracting content from {filename}] - File is stored but content extraction failed: {str(e)}" 
\ No newline at end of file
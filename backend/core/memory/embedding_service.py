@@ -1,9 +1,129 @@
 import asyncio
+import base64
+import hashlib
+import unicodedata
+from array import array
+from collections import OrderedDict
 from typing import List, Optional, Dict, Any
 from abc import ABC, abstractmethod
 from core.utils.logger import logger
 from core.utils.config import config
 
+EMBEDDING_CACHE_VERSION = 1
+EMBEDDING_CACHE_TTL = 7 * 24 * 3600
+EMBEDDING_CACHE_LOCAL_SIZE = 2048
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used both as the cache key and as the text sent to the provider."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def text_digest(text: str, namespace: str = "") -> str:
+    """Stable digest of normalized text (builtin hash() is salted per process)."""
+    payload = f"{namespace}\0{normalize_text(text)}".encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()
+
+
+def _pack(embedding: List[float]) -> bytes:
+    return array("f", embedding).tobytes()
+
+
+def _unpack(data: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(data)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """
+    Two-level embedding cache keyed by model and normalized text.
+
+    A per-process LRU sits in front of Redis, shared by all workers. Vectors are
+    stored as float32 bytes (base64 in Redis, whose client decodes responses),
+    roughly a quarter of the size of a JSON float list.
+    """
+
+    def __init__(self, max_local: int = EMBEDDING_CACHE_LOCAL_SIZE, ttl: int = EMBEDDING_CACHE_TTL):
+        self.max_local = max_local
+        self.ttl = ttl
+        self._local: "OrderedDict[str, bytes]" = OrderedDict()
+        self.hits_local = 0
+        self.hits_redis = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_id: str, text: str) -> str:
+        return f"emb:v{EMBEDDING_CACHE_VERSION}:{text_digest(text, model_id)}"
+
+    def _remember(self, key: str, data: bytes) -> None:
+        self._local[key] = data
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_local:
+            self._local.popitem(last=False)
+
+    async def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found: Dict[str, List[float]] = {}
+        remote_keys = []
+        for key in keys:
+            data = self._local.get(key)
+            if data is None:
+                remote_keys.append(key)
+                continue
+            self._local.move_to_end(key)
+            found[key] = _unpack(data)
+            self.hits_local += 1
+
+        if remote_keys:
+            try:
+                from core.services import redis
+                client = await redis.get_client()
+                pipe = client.pipeline(transaction=False)
+                for key in remote_keys:
+                    pipe.get(key)
+                values = await pipe.execute()
+            except Exception as e:
+                logger.debug(f"Embedding cache read failed: {e}")
+                values = [None] * len(remote_keys)
+
+            for key, value in zip(remote_keys, values):
+                if not value:
+                    self.misses += 1
+                    continue
+                data = base64.b64decode(value)
+                self._remember(key, data)
+                found[key] = _unpack(data)
+                self.hits_redis += 1
+
+        return found
+
+    async def set_many(self, items: Dict[str, List[float]]) -> None:
+        if not items:
+            return
+        packed = {key: _pack(embedding) for key, embedding in items.items()}
+        for key, data in packed.items():
+            self._remember(key, data)
+        try:
+            from core.services import redis
+            client = await redis.get_client()
+            pipe = client.pipeline(transaction=False)
+            for key, data in packed.items():
+                pipe.set(key, base64.b64encode(data).decode("ascii"), ex=self.ttl)
+            await pipe.execute()
+        except Exception as e:
+            logger.debug(f"Embedding cache write failed: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "local_entries": len(self._local),
+            "hits_local": self.hits_local,
+            "hits_redis": self.hits_redis,
+            "misses": self.misses,
+        }
+
+
+embedding_cache = EmbeddingCache()
+
 class EmbeddingProvider(ABC):
     @abstractmethod
     async def embed(self, texts: List[str]) -> List[List[float]]:
@@ -144,11 +264,35 @@ class EmbeddingService:
             logger.warning(f"Unknown embedding provider: {provider_name}, falling back to OpenAI")
             return OpenAIEmbeddingProvider()
     
+    @property
+    def model_id(self) -> str:
+        return f"{self.provider_name.lower()}:{getattr(self.provider, 'model', '')}"
+    
+    async def _embed_cached(self, texts: List[str]) -> List[List[float]]:
+        normalized = [normalize_text(t) for t in texts]
+        keys = [embedding_cache.key(self.model_id, t) for t in normalized]
+        found = await embedding_cache.get_many(list(dict.fromkeys(keys)))
+        
+        # Each distinct missing text is sent to the provider once
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, normalized):
+            if key not in found and key not in missing:
+                missing[key] = text
+        
+        if missing:
+            embeddings = await self.provider.embed(list(missing.values()))
+            fresh = dict(zip(missing.keys(), embeddings))
+            await embedding_cache.set_many(fresh)
+            found.update(fresh)
+        
+        return [found[key] for key in keys]
+    
     async def embed_text(self, text: str) -> List[float]:
         if not text or not text.strip():
             raise ValueError("Text cannot be empty")
         
-        return await self.provider.embed_single(text)
+        embeddings = await self._embed_cached([text])
+        return embeddings[0]
     
     async def embed_texts(self, texts: List[str]) -> List[List[float]]:
         if not texts:
@@ -158,7 +302,7 @@ class EmbeddingService:
         if not valid_texts:
             raise ValueError("All texts are empty")
         
-        return await self.provider.embed(valid_texts)
+        return await self._embed_cached(valid_texts)
     
     async def embed_batch(self, texts: List[str], batch_size: int = 100) -> List[List[float]]:
         if not texts:
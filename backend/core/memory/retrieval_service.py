@@ -4,7 +4,7 @@ from core.utils.cache import Cache
 from core.services.supabase import DBConnection
 from core.billing.shared.config import get_memory_config, is_memory_enabled
 from core.utils.config import config
-from .embedding_service import EmbeddingService
+from .embedding_service import EmbeddingService, text_digest
 from .models import MemoryItem, MemoryType
 
 class MemoryRetrievalService:
@@ -37,7 +37,7 @@ class MemoryRetrievalService:
                 logger.debug(f"Memory retrieval limit is 0 for tier: {tier_name}")
                 return []
             
-            cache_key = f"memories:retrieved:{account_id}:{hash(query_text)}"
+            cache_key = f"memories:retrieved:{account_id}:{text_digest(query_text)}"
             cached = await Cache.get(cache_key)
             if cached:
                 logger.debug(f"Retrieved memories from cache for {account_id}")
@@ -34,6 +34,28 @@ from typing import Set
 import builtins
 _builtin_set = builtins.set  # Save reference before module-level 'set' function shadows it
 
+def _stream_id_key(entry_id: str) -> tuple:
+    try:
+        ms, seq = entry_id.split('-')
+        return int(ms), int(seq)
+    except (ValueError, AttributeError):
+        return 0, 0
+
+
+class _SubscriberQueue(asyncio.Queue):
+    """Subscriber queue that remembers the last entry it was given.
+
+    When it fills up the pump stops feeding it (instead of dropping entries) and
+    marks it lagging; once the consumer drains it, iter_queue re-reads the gap
+    from the stream with XRANGE starting after `last_id`.
+    """
+    def __init__(self, stream_key: str, maxsize: int):
+        super().__init__(maxsize=maxsize)
+        self.stream_key = stream_key
+        self.last_id = "0"
+        self.lagging = False
+
+
 class _HubSubscription:
     """Context manager for safe subscribe/unsubscribe."""
     def __init__(self, hub: "StreamHub", stream_key: str, last_id: str):
@@ -56,31 +78,48 @@ class StreamHub:
     """
     Multiplexes stream reads: 1 XREAD per stream key, fan-out to N clients.
 
+    The pump's XREAD count adapts to the backlog (doubling while reads come back
+    full, halving when they don't), subscribers are snapshotted once per batch,
+    and slow subscribers catch up from the stream instead of losing entries.
+
     Usage in SSE endpoint:
         async with redis.hub.subscription(stream_key) as queue:
             async for msg in redis.hub.iter_queue(queue):
                 yield format_sse(msg)
     """
 
+    MIN_READ_COUNT = 10
+    MAX_READ_COUNT = 500
+
     def __init__(self, redis_client: Redis, queue_maxsize: int = 256):
         self._redis = redis_client
         self._queue_maxsize = queue_maxsize
         self._pumps: Dict[str, asyncio.Task] = {}
-        self._subs: Dict[str, Set[asyncio.Queue]] = defaultdict(_builtin_set)
+        self._subs: Dict[str, Set[_SubscriberQueue]] = defaultdict(_builtin_set)
+        self._positions: Dict[str, str] = {}
+        self._stream_stats: Dict[str, Dict[str, Any]] = {}
         self._lock = asyncio.Lock()
         # Metrics
         self.streams_active = 0
         self.subscribers_total = 0
         self.messages_delivered = 0
-        self.messages_dropped = 0
+        self.messages_deferred = 0
+        self.catchup_reads = 0
 
     async def subscribe(self, stream_key: str, last_id: str = "0") -> asyncio.Queue:
         """Subscribe to stream. Returns bounded queue for messages."""
-        queue = asyncio.Queue(maxsize=self._queue_maxsize)
+        queue = _SubscriberQueue(stream_key, maxsize=self._queue_maxsize)
         async with self._lock:
             self._subs[stream_key].add(queue)
             self.subscribers_total += 1
             if stream_key not in self._pumps:
+                self._stream_stats[stream_key] = {
+                    "read_count": self.MIN_READ_COUNT,
+                    "last_batch": 0,
+                    "lagging_subscribers": 0,
+                    "deferred": 0,
+                    "catchups": 0,
+                }
                 self._pumps[stream_key] = asyncio.create_task(self._pump(stream_key, last_id))
                 self.streams_active += 1
                 logger.info(f"[HUB] Started pump for {stream_key}, last_id={last_id}")
@@ -104,26 +143,31 @@ class StreamHub:
                     self.streams_active -= 1
                     logger.debug(f"Hub: Stopped pump for {stream_key}")
                 self._subs.pop(stream_key, None)
+                self._positions.pop(stream_key, None)
+                self._stream_stats.pop(stream_key, None)
 
     async def _pump(self, stream_key: str, last_id: str):
+        count = self.MIN_READ_COUNT
         try:
             while True:
                 try:
-                    result = await self._redis.xread({stream_key: last_id}, block=500, count=10)
+                    result = await self._redis.xread({stream_key: last_id}, block=500, count=count)
                     if not result:
                         continue
-                    for stream_name, entries in result:
-                        for msg_id, fields in entries:
-                            last_id = msg_id
-                            async with self._lock:
-                                subs = list(self._subs.get(stream_key, []))
-                            for queue in subs:
-                                try:
-                                    queue.put_nowait((msg_id, fields))
-                                    self.messages_delivered += 1
-                                    # logger.info(f"[HUB] Delivered msg {msg_id} to queue for {stream_key}")
-                                except asyncio.QueueFull:
-                                    self.messages_dropped += 1
+                    entries = [entry for _, stream_entries in result for entry in stream_entries]
+                    if not entries:
+                        continue
+                    last_id = entries[-1][0]
+                    self._deliver(stream_key, entries)
+
+                    if len(entries) >= count:
+                        count = min(count * 2, self.MAX_READ_COUNT)
+                    else:
+                        count = max(count // 2, self.MIN_READ_COUNT)
+                    stats = self._stream_stats.get(stream_key)
+                    if stats is not None:
+                        stats["read_count"] = count
+                        stats["last_batch"] = len(entries)
                 except (ConnectionError, RedisConnectionError, OSError) as e:
                     logger.warning(f"Hub pump connection error for {stream_key}: {e}")
                     await asyncio.sleep(0.5)
@@ -134,9 +178,69 @@ class StreamHub:
             logger.debug(f"Hub pump cancelled for {stream_key}")
             raise
 
+    def _deliver(self, stream_key: str, entries: List[tuple]) -> None:
+        # No awaits in here, so the subscriber snapshot and the position update are
+        # atomic with respect to _catch_up's "has the pump moved past me" check.
+        subs = list(self._subs.get(stream_key, ()))
+        stats = self._stream_stats.get(stream_key)
+        for queue in subs:
+            if queue.lagging:
+                self.messages_deferred += len(entries)
+                if stats is not None:
+                    stats["deferred"] += len(entries)
+                continue
+            floor = _stream_id_key(queue.last_id)
+            for msg_id, fields in entries:
+                if _stream_id_key(msg_id) <= floor:
+                    continue
+                try:
+                    queue.put_nowait((msg_id, fields))
+                    queue.last_id = msg_id
+                    self.messages_delivered += 1
+                except asyncio.QueueFull:
+                    queue.lagging = True
+                    skipped = sum(1 for e_id, _ in entries if _stream_id_key(e_id) > _stream_id_key(queue.last_id))
+                    self.messages_deferred += skipped
+                    if stats is not None:
+                        stats["deferred"] += skipped
+                    break
+        self._positions[stream_key] = entries[-1][0]
+        if stats is not None:
+            stats["lagging_subscribers"] = sum(1 for q in subs if q.lagging)
+
+    async def _catch_up(self, queue: _SubscriberQueue) -> None:
+        """Refill a drained lagging queue from the stream, clearing `lagging` once it reaches the pump."""
+        stream_key = queue.stream_key
+        stats = self._stream_stats.get(stream_key)
+        if stats is not None:
+            stats["catchups"] += 1
+        while queue.lagging:
+            room = queue.maxsize - queue.qsize()
+            if room <= 0:
+                return
+            self.catchup_reads += 1
+            entries = await self._redis.xrange(stream_key, min=f"({queue.last_id}", max="+", count=room)
+            for msg_id, fields in entries or []:
+                queue.put_nowait((msg_id, fields))
+                queue.last_id = msg_id
+                self.messages_delivered += 1
+
+            if queue.full():
+                return
+            pump_id = self._positions.get(stream_key)
+            if not entries or pump_id is None or _stream_id_key(pump_id) <= _stream_id_key(queue.last_id):
+                queue.lagging = False
+                if stats is not None:
+                    stats["lagging_subscribers"] = sum(1 for q in self._subs.get(stream_key, ()) if q.lagging)
+
     async def iter_queue(self, queue: asyncio.Queue, timeout: float = 1.0):
         """Async iterator for queue. Yields (msg_id, fields) or None on timeout."""
         while True:
+            if getattr(queue, "lagging", False) and queue.empty():
+                try:
+                    await self._catch_up(queue)
+                except Exception as e:
+                    logger.warning(f"Hub catch-up error for {queue.stream_key}: {e}")
             try:
                 msg = await asyncio.wait_for(queue.get(), timeout=timeout)
                 yield msg
@@ -153,6 +257,8 @@ class StreamHub:
             tasks = list(self._pumps.values())
             self._pumps.clear()
             self._subs.clear()
+            self._positions.clear()
+            self._stream_stats.clear()
         for t in tasks:
             t.cancel()
         for t in tasks:
@@ -162,16 +268,161 @@ class StreamHub:
                 pass
         logger.debug(f"Hub: Closed, cancelled {len(tasks)} pumps")
 
+    def get_stream_stats(self, stream_key: str) -> Optional[Dict[str, Any]]:
+        """Per-stream lag metrics: adaptive read size, lagging subscribers, max queue depth."""
+        stats = self._stream_stats.get(stream_key)
+        if stats is None:
+            return None
+        subs = self._subs.get(stream_key, ())
+        return {
+            **stats,
+            "subscribers": len(subs),
+            "max_queue_depth": max((q.qsize() for q in subs), default=0),
+            "position": self._positions.get(stream_key),
+        }
+
     def get_stats(self) -> Dict[str, Any]:
         return {
             "streams_active": self.streams_active,
             "subscribers_total": self.subscribers_total,
             "messages_delivered": self.messages_delivered,
-            "messages_dropped": self.messages_dropped,
+            "messages_deferred": self.messages_deferred,
+            "catchup_reads": self.catchup_reads,
+            "lagging_subscribers": sum(s["lagging_subscribers"] for s in self._stream_stats.values()),
         }
 
 
 
+# =============================================================================
+# RunRegistrations: 1 pub/sub subscription per process, fan-out to N waiters
+# Lets SSE handlers that attach before a run exists wake on its registration
+# instead of polling the cache and DB.
+# =============================================================================
+
+RUN_REGISTERED_CHANNEL = "agent_run:registered"
+
+
+class _RunWatch:
+    """Context manager for safe watch/unwatch of one agent run."""
+    def __init__(self, listener: "RunRegistrations", agent_run_id: str):
+        self._listener = listener
+        self._agent_run_id = agent_run_id
+        self._event: Optional[asyncio.Event] = None
+
+    async def __aenter__(self) -> asyncio.Event:
+        self._event = await self._listener.watch(self._agent_run_id)
+        return self._event
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        if self._event:
+            self._listener.unwatch(self._agent_run_id, self._event)
+        return False
+
+
+class RunRegistrations:
+    """
+    Wakes waiters when an agent run is registered.
+
+    Publishers send the run id on RUN_REGISTERED_CHANNEL; a single listener task
+    per process holds the subscription and sets the event of every waiter for
+    that id. Pub/sub is fire-and-forget, so waiters should still re-check on a
+    slow interval and give up after a bounded timeout.
+
+    Usage:
+        async with redis.run_registrations.waiting(agent_run_id) as registered:
+            if not await lookup():
+                await asyncio.wait_for(registered.wait(), timeout)
+    """
+
+    READY_TIMEOUT = 1.0
+
+    def __init__(self, redis_client: Redis):
+        self._redis = redis_client
+        self._waiters: Dict[str, Set[asyncio.Event]] = defaultdict(_builtin_set)
+        self._task: Optional[asyncio.Task] = None
+        self._ready = asyncio.Event()
+        # Metrics
+        self.notifications_received = 0
+        self.waiters_woken = 0
+
+    async def watch(self, agent_run_id: str) -> asyncio.Event:
+        """Register a waiter; returns once the subscription is live (or READY_TIMEOUT passes)."""
+        event = asyncio.Event()
+        self._waiters[agent_run_id].add(event)
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._listen())
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=self.READY_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.warning("[RUN_REGISTRATIONS] Subscription not ready, waiters fall back to re-checks")
+        return event
+
+    def unwatch(self, agent_run_id: str, event: asyncio.Event) -> None:
+        waiters = self._waiters.get(agent_run_id)
+        if not waiters:
+            return
+        waiters.discard(event)
+        if not waiters:
+            self._waiters.pop(agent_run_id, None)
+
+    def waiting(self, agent_run_id: str):
+        """Context manager for safe watch/unwatch."""
+        return _RunWatch(self, agent_run_id)
+
+    def _notify(self, agent_run_id: str) -> None:
+        self.notifications_received += 1
+        for event in self._waiters.get(agent_run_id, ()):
+            event.set()
+            self.waiters_woken += 1
+
+    async def _listen(self):
+        try:
+            while True:
+                pubsub = self._redis.pubsub()
+                try:
+                    await pubsub.subscribe(RUN_REGISTERED_CHANNEL)
+                    self._ready.set()
+                    while True:
+                        msg = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                        if msg and msg.get("type") == "message":
+                            self._notify(msg["data"])
+                except (ConnectionError, RedisConnectionError, OSError) as e:
+                    logger.warning(f"[RUN_REGISTRATIONS] Connection error: {e}")
+                    await asyncio.sleep(0.5)
+                except Exception as e:
+                    logger.warning(f"[RUN_REGISTRATIONS] Listener error: {e}")
+                    await asyncio.sleep(0.1)
+                finally:
+                    self._ready.clear()
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+        except asyncio.CancelledError:
+            logger.debug("[RUN_REGISTRATIONS] Listener cancelled")
+            raise
+
+    async def close(self):
+        """Cancel the listener on shutdown."""
+        task, self._task = self._task, None
+        self._waiters.clear()
+        if task:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "listening": self._ready.is_set(),
+            "runs_watched": len(self._waiters),
+            "notifications_received": self.notifications_received,
+            "waiters_woken": self.waiters_woken,
+        }
+
+
 class RedisClient:
     def __init__(self):
         # General pool - for GET/SET/XADD (non-blocking ops)
@@ -182,6 +433,8 @@ class RedisClient:
         self._stream_client: Optional[Redis] = None
         # Hub for SSE fan-out (1 reader per stream, N clients)
         self._hub: Optional[StreamHub] = None
+        # Run registration notifications (1 pub/sub subscription, N waiters)
+        self._run_registrations: Optional[RunRegistrations] = None
 
         self._init_lock: Optional[asyncio.Lock] = None
         self._initialized = False
@@ -240,6 +493,7 @@ class RedisClient:
                 "timeout_count": self._timeout_count,
                 "error_count": self._error_count,
                 "hub": self._hub.get_stats() if self._hub else None,
+                "run_registrations": self._run_registrations.get_stats() if self._run_registrations else None,
             }
         return {"status": "pool_not_initialized"}
 
@@ -304,6 +558,7 @@ class RedisClient:
                 await asyncio.wait_for(self._stream_client.ping(), timeout=5.0)
                 # Initialize hub for SSE fan-out
                 self._hub = StreamHub(self._stream_client)
+                self._run_registrations = RunRegistrations(self._stream_client)
                 self._initialized = True
                 self._init_time = time.time()
                 logger.info(f"Successfully connected to Redis (general_pool={GENERAL_POOL_SIZE}, stream_pool={STREAM_POOL_SIZE})")
@@ -368,6 +623,14 @@ class RedisClient:
                 finally:
                     self._hub = None
 
+            if self._run_registrations:
+                try:
+                    await self._run_registrations.close()
+                except Exception as e:
+                    logger.warning(f"Error closing RunRegistrations: {e}")
+                finally:
+                    self._run_registrations = None
+
             self._initialized = False
             logger.info("Redis connections and pools closed")
     
@@ -407,6 +670,13 @@ class RedisClient:
             raise RuntimeError("Redis not initialized. Call get_client() first.")
         return self._hub
 
+    @property
+    def run_registrations(self) -> RunRegistrations:
+        """Get RunRegistrations for waiting on runs that are not registered yet."""
+        if not self._run_registrations:
+            raise RuntimeError("Redis not initialized. Call get_client() first.")
+        return self._run_registrations
+
     async def _with_timeout(self, coro, timeout_seconds: float, operation_name: str, default=None):
         """Execute a Redis operation with timeout. Let Redis handle connection errors naturally."""
         self._op_count += 1
@@ -746,6 +1016,51 @@ class RedisClient:
                 return None
             raise
     
+    async def stream_add_batch(self, stream_key: str, fields_list: List[Dict[str, str]], 
+                               maxlen: int = None, approximate: bool = True, 
+                               expire_seconds: Optional[int] = None, 
+                               timeout: Optional[float] = None) -> List[Optional[str]]:
+        """Add many entries to a stream in a single pipelined round trip.
+        
+        Sends every XADD plus an optional EXPIRE in one non-transactional pipeline.
+        Returns the stream ID for each entry in order, or None for entries that failed.
+        """
+        if not fields_list:
+            return []
+        
+        if self._initialized and self._client:
+            client = self._client
+        else:
+            client = await self.get_client()
+        kwargs = {}
+        if maxlen is not None:
+            kwargs['maxlen'] = maxlen
+            kwargs['approximate'] = approximate
+        
+        if timeout is None:
+            env_timeout = os.getenv("REDIS_STREAM_ADD_TIMEOUT")
+            timeout = float(env_timeout) if env_timeout else 5.0
+        
+        pipe = client.pipeline(transaction=False)
+        for fields in fields_list:
+            pipe.xadd(stream_key, fields, **kwargs)
+        if expire_seconds:
+            pipe.expire(stream_key, expire_seconds)
+        
+        results = await self._with_timeout(
+            pipe.execute(raise_on_error=False),
+            timeout_seconds=timeout,
+            operation_name=f"stream_add_batch({stream_key}, {len(fields_list)} entries)",
+            default=None
+        )
+        if not results:
+            return [None] * len(fields_list)
+        
+        return [
+            None if isinstance(r, Exception) or not r else r
+            for r in results[:len(fields_list)]
+        ]
+    
     async def stream_read(self, stream_key: str, last_id: str = "0", block_ms: int = None,
                           count: int = None, timeout: Optional[float] = None) -> List[tuple]:
         """Read from stream with timeout protection. Uses STREAM_POOL if blocking."""
@@ -915,6 +1230,19 @@ class RedisClient:
         await self.delete(key, timeout=2.0)
         logger.debug(f"Cleared stop signal for agent run {agent_run_id}")
     
+    async def notify_run_registered(self, agent_run_id: str) -> None:
+        """Wake stream handlers waiting for this run to be registered."""
+        if self._initialized and self._client:
+            client = self._client
+        else:
+            client = await self.get_client()
+        await self._with_timeout(
+            client.publish(RUN_REGISTERED_CHANNEL, agent_run_id),
+            timeout_seconds=2.0,
+            operation_name=f"publish run registration {agent_run_id}",
+            default=0
+        )
+    
     # ========== Consumer Group Operations ==========
     
     async def xreadgroup(self, groupname: str, consumername: str, streams: Dict[str, str],
@@ -1084,6 +1412,12 @@ async def stream_add(stream_key: str, fields: dict, maxlen: int = None, approxim
     return await redis.stream_add(stream_key, fields, maxlen=maxlen, approximate=approximate, 
                                   timeout=timeout, fail_silently=fail_silently)
 
+async def stream_add_batch(stream_key: str, fields_list: List[dict], maxlen: int = None, 
+                           approximate: bool = True, expire_seconds: Optional[int] = None, 
+                           timeout: Optional[float] = None) -> List[Optional[str]]:
+    return await redis.stream_add_batch(stream_key, fields_list, maxlen=maxlen, approximate=approximate, 
+                                        expire_seconds=expire_seconds, timeout=timeout)
+
 async def stream_read(stream_key: str, last_id: str = "0", block_ms: int = None, 
                       count: int = None, timeout: Optional[float] = None):
     return await redis.stream_read(stream_key, last_id, block_ms=block_ms, count=count, timeout=timeout)
@@ -1122,6 +1456,9 @@ async def check_stop_signal(agent_run_id: str) -> bool:
 async def clear_stop_signal(agent_run_id: str):
     await redis.clear_stop_signal(agent_run_id)
 
+async def notify_run_registered(agent_run_id: str):
+    await redis.notify_run_registered(agent_run_id)
+
 async def xreadgroup(groupname: str, consumername: str, streams: Dict[str, str], 
                      block: int = None, count: int = None, timeout: Optional[float] = None):
     return await redis.xreadgroup(groupname=groupname, consumername=consumername, 
@@ -1140,6 +1477,7 @@ def get_pool_info() -> Dict[str, Any]:
 __all__ = [
     'redis',
     'RedisClient',
+    'RUN_REGISTERED_CHANNEL',
     'REDIS_KEY_TTL',
     'get_redis_config',
     'get_client',
@@ -1174,6 +1512,7 @@ __all__ = [
     'set_stop_signal',
     'check_stop_signal',
     'clear_stop_signal',
+    'notify_run_registered',
     'health_check',
     'get_pool_info',
 ]
@@ -1397,6 +1397,16 @@ async def insert_thread(
     return result["thread_id"] if result else None
 
 
+def _normalize_created_at(created_at: Optional[Any] = None) -> Any:
+    from datetime import datetime, timezone
+
+    if created_at is None:
+        return datetime.now(timezone.utc)
+    if isinstance(created_at, (int, float)):
+        return datetime.fromtimestamp(created_at, tz=timezone.utc)
+    return created_at
+
+
 async def insert_message(
     thread_id: str,
     message_type: str,
@@ -1408,18 +1418,12 @@ async def insert_message(
     message_id: Optional[str] = None,
     created_at: Optional[Any] = None
 ) -> Optional[Dict[str, Any]]:
-    from datetime import datetime, timezone
     import uuid
     
     if message_id is None:
         message_id = str(uuid.uuid4())
     
-    if created_at is None:
-        now = datetime.now(timezone.utc)
-    elif isinstance(created_at, (int, float)):
-        now = datetime.fromtimestamp(created_at, tz=timezone.utc)
-    else:
-        now = created_at
+    now = _normalize_created_at(created_at)
     
     sql = """
     INSERT INTO messages (
@@ -1465,6 +1469,121 @@ async def insert_message(
     return dict(result) if result else {"message_id": message_id, "thread_id": thread_id}
 
 
+async def insert_messages_batch(
+    messages: List[Dict[str, Any]],
+    batch_size: int = 200
+) -> Tuple[List[str], List[Tuple[str, str]]]:
+    """Insert many messages with a single multi-row INSERT per chunk.
+    
+    Each message dict takes the same fields as insert_message (thread_id, type,
+    content, is_llm_message, metadata, agent_id, agent_version_id, message_id,
+    created_at). Conflicts on message_id upsert exactly like insert_message, so
+    replaying a flush is idempotent.
+    
+    If a chunk's statement fails, its rows are retried one by one so a single
+    bad row doesn't fail the rest of the chunk.
+    
+    Args:
+        messages: Message dicts to insert (message_id is generated when missing)
+        batch_size: Max rows per INSERT statement
+        
+    Returns:
+        Tuple of (inserted message_ids, list of (message_id, error) for failed rows)
+    """
+    from core.services.db import execute_mutate
+    import uuid
+    
+    if not messages:
+        return [], []
+    
+    rows = []
+    for m in messages:
+        row = dict(m)
+        if not row.get("message_id"):
+            row["message_id"] = str(uuid.uuid4())
+        rows.append(row)
+    
+    succeeded: List[str] = []
+    failed: List[Tuple[str, str]] = []
+    
+    for batch_start in range(0, len(rows), batch_size):
+        batch = rows[batch_start:batch_start + batch_size]
+        
+        # ON CONFLICT DO UPDATE can't touch the same row twice in one statement,
+        # so keep only the last write per message_id (same outcome as sequential upserts)
+        deduped: Dict[str, Dict[str, Any]] = {}
+        for row in batch:
+            deduped.pop(str(row["message_id"]), None)
+            deduped[str(row["message_id"])] = row
+        
+        values_parts = []
+        params = {}
+        for i, row in enumerate(deduped.values()):
+            values_parts.append(
+                f"(:message_id_{i}, :thread_id_{i}, :type_{i}, :content_{i}, :is_llm_message_{i}, "
+                f":metadata_{i}, :agent_id_{i}, :agent_version_id_{i}, :created_at_{i})"
+            )
+            params[f'message_id_{i}'] = row["message_id"]
+            params[f'thread_id_{i}'] = row["thread_id"]
+            params[f'type_{i}'] = row["type"]
+            params[f'content_{i}'] = _sanitize_null_bytes(row.get("content"))
+            params[f'is_llm_message_{i}'] = row.get("is_llm_message", False)
+            params[f'metadata_{i}'] = _sanitize_null_bytes(row.get("metadata") or {})
+            params[f'agent_id_{i}'] = row.get("agent_id")
+            params[f'agent_version_id_{i}'] = row.get("agent_version_id")
+            params[f'created_at_{i}'] = _normalize_created_at(row.get("created_at"))
+        
+        sql = f"""
+        INSERT INTO messages (
+            message_id, thread_id, type, content, is_llm_message, 
+            metadata, agent_id, agent_version_id, created_at
+        )
+        VALUES {', '.join(values_parts)}
+        ON CONFLICT (message_id) DO UPDATE SET
+            content = EXCLUDED.content,
+            metadata = EXCLUDED.metadata,
+            agent_id = EXCLUDED.agent_id,
+            agent_version_id = EXCLUDED.agent_version_id
+        """
+        
+        try:
+            await execute_mutate(sql, params)
+        except Exception as e:
+            logger.warning(f"Bulk insert of {len(deduped)} messages failed, falling back to per-row inserts: {e}")
+            for row in batch:
+                try:
+                    await insert_message(
+                        thread_id=row["thread_id"],
+                        message_type=row["type"],
+                        content=row.get("content"),
+                        is_llm_message=row.get("is_llm_message", False),
+                        metadata=row.get("metadata"),
+                        agent_id=row.get("agent_id"),
+                        agent_version_id=row.get("agent_version_id"),
+                        message_id=row["message_id"],
+                        created_at=row.get("created_at"),
+                    )
+                    succeeded.append(row["message_id"])
+                except Exception as row_error:
+                    failed.append((row["message_id"], str(row_error)))
+            continue
+        
+        for row in batch:
+            succeeded.append(row["message_id"])
+            content_str = str(row.get("content")) if row.get("content") else ""
+            llm_debug.log_db_write(
+                operation="INSERT",
+                table="messages",
+                record_id=row["message_id"],
+                thread_id=row["thread_id"],
+                message_type=row["type"],
+                content_preview=content_str[:500] if content_str else None,
+                is_llm_message=row.get("is_llm_message", False),
+            )
+    
+    return succeeded, failed
+
+
 async def get_latest_message_type(thread_id: str) -> Optional[str]:
     sql = """
     SELECT type FROM messages 
@@ -6,8 +6,8 @@ Provides vector-based semantic search for threads using OpenAI embeddings and Su
 
 import os
 import json
-import uuid
-from typing import List, Optional, Tuple
+import asyncio
+from typing import Dict, Iterable, List, Optional, Set, Tuple
 
 from dotenv import load_dotenv
 
@@ -20,6 +20,12 @@ from core.utils.logger import logger
 CHUNK_SIZE = 1200
 CHUNK_OVERLAP = 100
 
+# Embedding pipeline configuration
+EMBED_BATCH_SIZE = 256  # Chunks per embeddings request (~1200 chars each)
+EMBED_CONCURRENCY = 4  # Embeddings requests in flight
+THREAD_BATCH_SIZE = 100  # Threads loaded, diffed and written per round
+EMBED_LOCK_TTL = 600
+
 
 class RecursiveCharacterTextSplitter:
     """
@@ -124,6 +130,83 @@ text_splitter = RecursiveCharacterTextSplitter(
 )
 
 
+def chunk_hash(chunk: str) -> str:
+    """Content hash of a chunk; whitespace-only edits keep the same hash."""
+    from core.memory.embedding_service import text_digest
+    return text_digest(chunk)
+
+
+def split_into_chunks(text: str) -> Dict[str, str]:
+    """Split text into chunks keyed by content hash (duplicate chunks collapse)."""
+    chunks: Dict[str, str] = {}
+    for chunk in text_splitter.split_text(text):
+        chunks.setdefault(chunk_hash(chunk), chunk)
+    return chunks
+
+
+def compose_thread_text(content: str, project_name: str = "", thread_name: str = "") -> str:
+    """Prefix the conversation with its project/thread context."""
+    header = ""
+    if project_name:
+        header = f"Project: {project_name}"
+    if thread_name and thread_name != project_name:
+        header += f" | Thread: {thread_name}" if header else f"Thread: {thread_name}"
+
+    if header and content:
+        return f"{header}\n\n{content}"
+    if content:
+        return content
+    return header or ""
+
+
+# Deletes chunks that are no longer part of their thread, refreshes the ones
+# that are, and inserts the newly embedded ones
+_SYNC_CHUNKS_SQL = """
+WITH current_chunks AS (
+    SELECT *
+    FROM unnest(CAST(:current_threads AS uuid[]), CAST(:current_hashes AS text[]))
+        AS c(thread_id, content_hash)
+),
+removed AS (
+    DELETE FROM public.documents d
+    WHERE d.account_id = CAST(:account_id AS uuid)
+      AND d.thread_id = ANY(CAST(:thread_ids AS uuid[]))
+      AND NOT EXISTS (
+          SELECT 1 FROM current_chunks c
+          WHERE c.thread_id = d.thread_id AND c.content_hash = d.content_hash
+      )
+    RETURNING 1
+),
+kept AS (
+    UPDATE public.documents d
+    SET last_updated_at = NOW()
+    FROM current_chunks c
+    WHERE d.account_id = CAST(:account_id AS uuid)
+      AND d.thread_id = c.thread_id
+      AND d.content_hash = c.content_hash
+    RETURNING 1
+),
+inserted AS (
+    INSERT INTO public.documents (account_id, thread_id, chunk_content, content_hash, embedding, last_updated_at)
+    SELECT CAST(:account_id AS uuid), n.thread_id, n.chunk_content, n.content_hash, CAST(n.embedding AS vector), NOW()
+    FROM unnest(
+        CAST(:new_threads AS uuid[]),
+        CAST(:new_contents AS text[]),
+        CAST(:new_hashes AS text[]),
+        CAST(:new_embeddings AS text[])
+    ) AS n(thread_id, chunk_content, content_hash, embedding)
+    ON CONFLICT (account_id, thread_id, content_hash) DO UPDATE SET
+        chunk_content = EXCLUDED.chunk_content,
+        embedding = EXCLUDED.embedding,
+        last_updated_at = NOW()
+    RETURNING 1
+)
+SELECT
+    (SELECT COUNT(*) FROM inserted) AS inserted,
+    (SELECT COUNT(*) FROM removed) AS removed
+"""
+
+
 class SearchResult:
     """A single search result with thread_id, relevance score, and text preview."""
 
@@ -156,7 +239,7 @@ class ThreadSearchService:
         if self._initialized:
             return
 
-        self._openai_client = None
+        self._embedding_service = None
         self._is_configured = False
 
         # Check if OpenAI API key is available
@@ -175,22 +258,17 @@ class ThreadSearchService:
         """Check if the service is properly configured."""
         return self._is_configured
 
-    def _get_openai_client(self):
-        """Lazily initialize AsyncOpenAI client."""
-        if self._openai_client is None and self._is_configured:
-            try:
-                from openai import AsyncOpenAI
-                self._openai_client = AsyncOpenAI(api_key=self._openai_api_key)
-                logger.debug("[ThreadSearch] AsyncOpenAI client initialized")
-            except Exception as e:
-                logger.error(f"[ThreadSearch] Failed to initialize OpenAI client: {e}")
-                self._openai_client = None
-        return self._openai_client
+    def _get_embedding_service(self):
+        """Lazily create the shared, cached embedding service for the search model."""
+        if self._embedding_service is None and self._is_configured:
+            from core.memory.embedding_service import EmbeddingService
+            self._embedding_service = EmbeddingService(provider="openai", model=self.EMBEDDING_MODEL)
+        return self._embedding_service
 
     async def _create_embedding(self, text: str) -> Optional[List[float]]:
-        """Create an embedding vector for the given text (async, non-blocking)."""
-        openai = self._get_openai_client()
-        if not openai:
+        """Create an embedding vector for the given text (cached by content across workers)."""
+        embedding_service = self._get_embedding_service()
+        if not embedding_service:
             logger.error("[ThreadSearch] _create_embedding: No OpenAI client available")
             return None
 
@@ -199,11 +277,7 @@ class ThreadSearchService:
             if len(text) > max_chars:
                 text = text[:max_chars]
 
-            response = await openai.embeddings.create(
-                input=text,
-                model=self.EMBEDDING_MODEL
-            )
-            return response.data[0].embedding
+            return await embedding_service.embed_text(text)
         except Exception as e:
             logger.error(f"[ThreadSearch] Failed to create embedding: {type(e).__name__}: {e}")
             return None
@@ -295,7 +369,8 @@ class ThreadSearchService:
     ) -> bool:
         """
         Create or update embeddings for a thread in Supabase.
-        Uses recursive character splitting to create multiple chunks.
+        Uses recursive character splitting to create multiple chunks; only
+        chunks that are new since the last embedding are sent to OpenAI.
 
         Args:
             thread_id: The thread's unique identifier
@@ -305,69 +380,134 @@ class ThreadSearchService:
             thread_name: Name of the thread (for context)
 
         Returns:
-            True if at least one embedding was created successfully, False otherwise
+            True if the thread's chunks are up to date, False otherwise
         """
         if not self._is_configured:
             logger.debug("[ThreadSearch] Service not configured, skipping embedding")
             return False
 
-        # Build header with project/thread context
-        header = ""
-        if project_name:
-            header = f"Project: {project_name}"
-        if thread_name and thread_name != project_name:
-            header += f" | Thread: {thread_name}" if header else f"Thread: {thread_name}"
-
-        if header and content:
-            text_to_embed = f"{header}\n\n{content}"
-        elif content:
-            text_to_embed = content
-        else:
-            text_to_embed = header or ""
-
+        text_to_embed = compose_thread_text(content, project_name, thread_name)
         if not text_to_embed.strip():
             logger.warning(f"[ThreadSearch] No content to embed for thread {thread_id}")
             return False
 
-        # Split into chunks using recursive splitter
-        chunks = text_splitter.split_text(text_to_embed)
+        synced = await self.sync_thread_chunks(account_id, {thread_id: text_to_embed})
+        return thread_id in synced
 
-        try:
-            from core.services.db import execute_mutate
+    async def _embed_chunks(self, chunks: Dict[str, str]) -> Dict[str, List[float]]:
+        """
+        Embed chunks keyed by hash in max-size batches, a few requests at a time.
 
-            # Delete existing chunks for this thread first
-            await execute_mutate(
-                "DELETE FROM public.documents WHERE account_id = :account_id AND thread_id = :thread_id",
-                {"account_id": account_id, "thread_id": thread_id}
-            )
-
-            # Insert each chunk
-            success_count = 0
-            for chunk_content in chunks:
-                embedding = await self._create_embedding(chunk_content)
-                if not embedding:
-                    continue
-
-                embedding_str = json.dumps(embedding)
-                sql = """
-                INSERT INTO public.documents (chunk_id, account_id, thread_id, chunk_content, embedding, last_updated_at)
-                VALUES (:chunk_id, :account_id, :thread_id, :chunk_content, CAST(:embedding AS vector), NOW())
-                """
-
-                await execute_mutate(sql, {
-                    "chunk_id": str(uuid.uuid4()),
-                    "account_id": account_id,
-                    "thread_id": thread_id,
-                    "chunk_content": chunk_content[:1200],
-                    "embedding": embedding_str,
-                })
-                success_count += 1
-
-            return success_count > 0
+        Batches that fail are left out of the result.
+        """
+        embedding_service = self._get_embedding_service()
+        if not embedding_service or not chunks:
+            return {}
+
+        items = list(chunks.items())
+        batches = [items[i:i + EMBED_BATCH_SIZE] for i in range(0, len(items), EMBED_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(EMBED_CONCURRENCY)
 
+        async def embed_batch(batch: List[Tuple[str, str]]) -> Dict[str, List[float]]:
+            async with semaphore:
+                try:
+                    embeddings = await embedding_service.embed_texts([text for _, text in batch])
+                except Exception as e:
+                    logger.error(f"[ThreadSearch] Embedding batch of {len(batch)} chunks failed: {type(e).__name__}: {e}")
+                    return {}
+                return {key: embedding for (key, _), embedding in zip(batch, embeddings)}
+
+        embedded: Dict[str, List[float]] = {}
+        for result in await asyncio.gather(*[embed_batch(b) for b in batches]):
+            embedded.update(result)
+        return embedded
+
+    async def sync_thread_chunks(self, account_id: str, texts: Dict[str, str]) -> Set[str]:
+        """
+        Bring the stored chunks of several threads in line with their current text.
+
+        Chunks whose hash is already stored are kept, missing ones are embedded
+        across all threads in shared batches, and chunks no longer present are
+        deleted. All writes happen in one statement.
+
+        Args:
+            account_id: The account that owns the threads
+            texts: thread_id -> full text to embed (see compose_thread_text)
+
+        Returns:
+            Set of thread_ids whose chunks are now up to date
+        """
+        if not self._is_configured or not texts:
+            return set()
+
+        from core.services.db import execute, execute_mutate
+
+        thread_chunks = {thread_id: split_into_chunks(text) for thread_id, text in texts.items()}
+        thread_ids = list(thread_chunks)
+
+        rows = await execute(
+            """
+            SELECT thread_id, content_hash
+            FROM public.documents
+            WHERE account_id = CAST(:account_id AS uuid)
+              AND thread_id = ANY(CAST(:thread_ids AS uuid[]))
+              AND content_hash IS NOT NULL
+            """,
+            {"account_id": account_id, "thread_ids": thread_ids},
+        )
+        stored = {(str(row["thread_id"]), row["content_hash"]) for row in rows or []}
+
+        # The same chunk text in several threads is embedded once
+        pending: Dict[str, str] = {}
+        for thread_id, chunks in thread_chunks.items():
+            for key, chunk in chunks.items():
+                if (thread_id, key) not in stored:
+                    pending.setdefault(key, chunk)
+
+        embedded = await self._embed_chunks(pending)
+
+        # Threads with a failed chunk are left untouched and retried next time
+        synced = [
+            thread_id for thread_id, chunks in thread_chunks.items()
+            if all((thread_id, key) in stored or key in embedded for key in chunks)
+        ]
+        if not synced:
+            return set()
+
+        current_threads, current_hashes = [], []
+        new_threads, new_contents, new_hashes, new_embeddings = [], [], [], []
+        for thread_id in synced:
+            for key, chunk in thread_chunks[thread_id].items():
+                current_threads.append(thread_id)
+                current_hashes.append(key)
+                if (thread_id, key) not in stored:
+                    new_threads.append(thread_id)
+                    new_contents.append(chunk[:CHUNK_SIZE])
+                    new_hashes.append(key)
+                    new_embeddings.append(json.dumps(embedded[key]))
+
+        try:
+            result = await execute_mutate(_SYNC_CHUNKS_SQL, {
+                "account_id": account_id,
+                "thread_ids": synced,
+                "current_threads": current_threads,
+                "current_hashes": current_hashes,
+                "new_threads": new_threads,
+                "new_contents": new_contents,
+                "new_hashes": new_hashes,
+                "new_embeddings": new_embeddings,
+            })
         except Exception as e:
-            logger.error(f"[ThreadSearch] Embedding FAILED for thread {thread_id}: {e}")
-            return False
+            logger.error(f"[ThreadSearch] Writing chunks FAILED for {len(synced)} threads: {e}")
+            return set()
+
+        counts = result[0] if result else {}
+        logger.info(
+            f"[ThreadSearch] Synced {len(synced)}/{len(thread_ids)} threads: "
+            f"{counts.get('inserted', 0)} new chunks, {len(current_hashes) - len(new_hashes)} unchanged, "
+            f"{counts.get('removed', 0)} removed"
+        )
+        return set(synced)
 
     async def search(
         self,
@@ -603,144 +743,179 @@ async def get_threads_needing_embedding(account_id: str, thread_ids: List[str])
         return set(thread_ids)
 
 
-async def embed_thread_with_messages(thread_id: str, account_id: str) -> bool:
+async def load_thread_texts(account_id: str, thread_ids: List[str]) -> Dict[str, str]:
     """
-    Fetch all thread messages and embed the full conversation.
+    Build the text to embed for several threads with two queries.
 
     Args:
-        thread_id: The thread's unique identifier
-        account_id: The account that owns the thread
+        account_id: The account that owns the threads
+        thread_ids: Threads to load
 
     Returns:
-        True if embedding was successful, False otherwise
+        thread_id -> text for threads that exist and have something to embed
     """
-    service = get_thread_search_service()
-    if not service.is_configured:
-        return False
+    if not thread_ids:
+        return {}
 
-    try:
-        from core.services.db import execute
+    from core.services.db import execute
 
-        # Fetch thread info
-        thread_sql = """
+    thread_rows = await execute(
+        """
         SELECT
             t.thread_id,
             t.name as thread_name,
             p.name as project_name
         FROM threads t
         LEFT JOIN projects p ON t.project_id = p.project_id
-        WHERE t.thread_id = :thread_id
+        WHERE t.thread_id = ANY(CAST(:thread_ids AS uuid[]))
+          AND t.account_id = CAST(:account_id AS uuid)
+        """,
+        {"thread_ids": thread_ids, "account_id": account_id},
+    )
+    if not thread_rows:
+        return {}
+
+    # Fetch ALL messages in the threads (user and assistant only)
+    message_rows = await execute(
         """
-
-        thread_rows = await execute(thread_sql, {"thread_id": thread_id})
-        if not thread_rows:
-            logger.warning(f"[ThreadSearch] Thread {thread_id} not found for embedding")
-            return False
-
-        thread = thread_rows[0]
-        project_name = thread.get("project_name") or ""
-        thread_name = thread.get("thread_name") or ""
-
-        # Fetch ALL messages in the thread (user and assistant only)
-        messages_sql = """
         SELECT
+            thread_id,
             type,
             content->>'content' as text_content
         FROM messages
-        WHERE thread_id = :thread_id
+        WHERE thread_id = ANY(CAST(:thread_ids AS uuid[]))
           AND type IN ('user', 'assistant')
           AND content->>'content' IS NOT NULL
           AND content->>'content' != ''
-        ORDER BY created_at ASC
-        """
-
-        message_rows = await execute(messages_sql, {"thread_id": thread_id})
-
-        # Build conversation content
-        conversation_parts = []
-        for msg in message_rows or []:
-            msg_type = msg.get("type", "")
-            text = msg.get("text_content", "")
-            if text:
-                if msg_type == "user":
-                    conversation_parts.append(f"User: {text}")
-                elif msg_type == "assistant":
-                    conversation_parts.append(f"Assistant: {text}")
-
-        full_content = "\n\n".join(conversation_parts)
-
-        # Skip if no content to embed
-        if not full_content and not project_name and not thread_name:
-            logger.debug(f"[ThreadSearch] Thread {thread_id} has no content to embed")
-            return True  # Not an error, just nothing to embed
-
-        success = await embed_thread(
-            thread_id=thread_id,
-            account_id=account_id,
-            content=full_content,
-            project_name=project_name,
-            thread_name=thread_name
+        ORDER BY thread_id, created_at ASC
+        """,
+        {"thread_ids": [str(row["thread_id"]) for row in thread_rows]},
+    )
+
+    conversation_parts: Dict[str, List[str]] = {}
+    for msg in message_rows or []:
+        msg_type = msg.get("type", "")
+        text = msg.get("text_content", "")
+        if text:
+            parts = conversation_parts.setdefault(str(msg["thread_id"]), [])
+            if msg_type == "user":
+                parts.append(f"User: {text}")
+            elif msg_type == "assistant":
+                parts.append(f"Assistant: {text}")
+
+    texts = {}
+    for thread in thread_rows:
+        thread_id = str(thread["thread_id"])
+        text = compose_thread_text(
+            "\n\n".join(conversation_parts.get(thread_id, [])),
+            project_name=thread.get("project_name") or "",
+            thread_name=thread.get("thread_name") or "",
         )
+        if text.strip():
+            texts[thread_id] = text
+    return texts
 
-        return success
 
-    except Exception as e:
-        logger.error(f"[ThreadSearch] Failed to embed thread {thread_id}: {e}")
-        return False
+async def embed_threads_with_messages(account_id: str, thread_ids: Iterable[str]) -> Set[str]:
+    """
+    Embed the full conversations of many threads.
+
+    Threads are processed THREAD_BATCH_SIZE at a time so chunks from many
+    threads share embedding requests while memory stays bounded.
+
+    Args:
+        account_id: The account that owns the threads
+        thread_ids: Threads to (re-)embed
+
+    Returns:
+        Set of thread_ids that are up to date, including threads with nothing to embed
+    """
+    service = get_thread_search_service()
+    if not service.is_configured:
+        return set()
+
+    thread_ids = list(dict.fromkeys(str(t) for t in thread_ids))
+    done: Set[str] = set()
+
+    for i in range(0, len(thread_ids), THREAD_BATCH_SIZE):
+        batch = thread_ids[i:i + THREAD_BATCH_SIZE]
+        try:
+            texts = await load_thread_texts(account_id, batch)
+            # Threads with no content are not an error, just nothing to embed
+            done.update(t for t in batch if t not in texts)
+            done.update(await service.sync_thread_chunks(account_id, texts))
+        except Exception as e:
+            logger.error(f"[ThreadSearch] Failed to embed {len(batch)} threads: {e}")
+
+    return done
+
+
+async def embed_thread_with_messages(thread_id: str, account_id: str) -> bool:
+    """
+    Fetch all thread messages and embed the full conversation.
+
+    Args:
+        thread_id: The thread's unique identifier
+        account_id: The account that owns the thread
+
+    Returns:
+        True if embedding was successful, False otherwise
+    """
+    done = await embed_threads_with_messages(account_id, [thread_id])
+    return str(thread_id) in done
 
 
 async def embed_unembedded_threads(account_id: str, threads: List[dict]):
     """
-    Check which threads need embedding and embed them in parallel.
+    Check which threads need embedding and embed them in shared batches.
     Runs in background, doesn't block the response.
 
     A thread needs embedding if:
     1. It has never been embedded, OR
     2. It has new messages since the last embedding
 
+    Only one background pass runs per account at a time.
+
     Args:
         account_id: The account that owns the threads
         threads: List of thread dicts (must have 'thread_id' key)
     """
-    import asyncio
-
     service = get_thread_search_service()
     if not service.is_configured:
         logger.debug("[ThreadSearch] Service not configured, skipping background embedding")
         return
 
+    # Get thread_ids from the list (str() to handle UUID objects from DB)
+    thread_ids = [str(t.get('thread_id')) for t in threads if t.get('thread_id')]
+    if not thread_ids:
+        return
+
+    from core.services import redis
+
+    lock_key = f"thread_search:embed_lock:{account_id}"
     try:
-        # Get thread_ids from the list (str() to handle UUID objects from DB)
-        thread_ids = [str(t.get('thread_id')) for t in threads if t.get('thread_id')]
-        if not thread_ids:
+        if not await redis.set(lock_key, "1", nx=True, ex=EMBED_LOCK_TTL):
+            logger.debug(f"[ThreadSearch] Embedding already running for account {account_id[:8]}...")
             return
+    except Exception as e:
+        logger.debug(f"[ThreadSearch] Could not take embedding lock: {e}")
 
+    try:
         # Check which threads need embedding (no embedding or stale)
         needs_embedding_ids = await get_threads_needing_embedding(account_id, thread_ids)
 
         if not needs_embedding_ids:
             return
 
-        # Filter to threads needing embedding (str() to handle UUID objects)
-        to_embed = [t for t in threads if str(t.get('thread_id')) in needs_embedding_ids]
-
-        # Embed in parallel with semaphore to limit concurrency
-        semaphore = asyncio.Semaphore(5)
-
-        async def embed_one(thread: dict):
-            async with semaphore:
-                await embed_thread_with_messages(
-                    thread_id=str(thread['thread_id']),
-                    account_id=account_id
-                )
-
-        # Use gather with return_exceptions to not fail on individual errors
-        await asyncio.gather(
-            *[embed_one(t) for t in to_embed],
-            return_exceptions=True
-        )
+        to_embed = [t for t in thread_ids if t in needs_embedding_ids]
+        done = await embed_threads_with_messages(account_id, to_embed)
 
-        logger.info(f"[ThreadSearch] Background embedding complete for {len(to_embed)} threads")
+        logger.info(f"[ThreadSearch] Background embedding complete for {len(done)}/{len(to_embed)} threads")
 
     except Exception as e:
         logger.error(f"[ThreadSearch] Background embedding failed: {e}")
+    finally:
+        try:
+            await redis.delete(lock_key)
+        except Exception:
+            pass
@@ -15,7 +15,7 @@ except ImportError:
     CreateWebsetParameters = None
     CreateEnrichmentParameters = None
 
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, parallel_safe
 from core.utils.config import config, EnvMode
 from core.utils.logger import logger
 from core.agentpress.thread_manager import ThreadManager
@@ -122,6 +122,7 @@ class CompanySearchTool(Tool):
             logger.error(f"Error deducting credits: {e}")
             return False
 
+    @parallel_safe
     @openapi_schema({
         "type": "function",
         "function": {
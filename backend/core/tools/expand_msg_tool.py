@@ -102,6 +102,9 @@ class ExpandMessageTool(Tool):
             message = await client.table('messages').select('*').eq('message_id', message_id).eq('thread_id', self.thread_id).execute()
 
             if not message.data or len(message.data) == 0:
+                archived = await self._read_archived_message(message_id)
+                if archived is not None:
+                    return self.success_response({"status": "Message expanded from context archive.", "message": archived})
                 return self.fail_response(f"Message with ID {message_id} not found in thread {self.thread_id}")
 
             message_data = message.data[0]
@@ -121,6 +124,30 @@ class ExpandMessageTool(Tool):
         except Exception as e:
             return self.fail_response(f"Error expanding message: {str(e)}")
 
+    async def _read_archived_message(self, message_id: str) -> Optional[str]:
+        project_id = getattr(self.thread_manager, 'project_id', None)
+        if not project_id:
+            return None
+        try:
+            from core.sandbox.resolver import resolve_sandbox
+            from core.agents.pipeline.stateless.context.archiver import ContextArchiver
+
+            account_id = getattr(self.thread_manager, 'account_id', None)
+            client = await self.thread_manager.db.client
+            sandbox_info = await resolve_sandbox(
+                project_id=project_id,
+                account_id=str(account_id) if account_id else None,
+                db_client=client,
+            )
+            if not sandbox_info:
+                return None
+            archiver = ContextArchiver(project_id, account_id, self.thread_id)
+            return await archiver.read_archived_message(sandbox_info.sandbox, message_id)
+        except Exception as e:
+            from core.utils.logger import logger
+            logger.warning(f"[ExpandMessage] Failed to read archived message {message_id}: {e}")
+            return None
+
     @openapi_schema({
         "type": "function", 
         "function": {
@@ -1,5 +1,5 @@
 from dotenv import load_dotenv
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, parallel_safe
 from core.utils.config import config
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
@@ -59,6 +59,7 @@ class SandboxImageSearchTool(SandboxToolsBase):
             from core.utils.logger import logger
             logger.warning("SERPER_API_KEY not configured - Image Search Tool will not be available")
 
+    @parallel_safe
     @openapi_schema({
         "type": "function",
         "function": {
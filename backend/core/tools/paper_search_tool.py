@@ -3,7 +3,7 @@ import asyncio
 import json
 import aiohttp
 import time
-from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import Tool, ToolResult, openapi_schema, tool_metadata, parallel_safe
 from core.utils.config import config
 from core.utils.logger import logger
 from core.agentpress.thread_manager import ThreadManager
@@ -126,6 +126,7 @@ class PaperSearchTool(Tool):
             
             raise Exception(f"Failed after {max_retries} attempts")
     
+    @parallel_safe
     @openapi_schema({
         "type": "function",
         "function": {
@@ -426,6 +427,7 @@ class PaperSearchTool(Tool):
             logger.error(f"Get paper details failed: {repr(e)}", exc_info=True)
             return self.fail_response(f"An error occurred while fetching paper details: {str(e)}")
     
+    @parallel_safe
     @openapi_schema({
         "type": "function",
         "function": {
@@ -3,7 +3,7 @@ import shlex
 import json
 import asyncio
 from typing import Optional, List
-from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
+from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata, parallel_safe
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
 from core.utils.config import config
@@ -146,6 +146,36 @@ class SandboxFileReaderTool(SandboxToolsBase):
         ext = os.path.splitext(file_path)[1].lower()
         return ext in ['.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.bmp', '.ico']
 
+    async def _read_archived_file(self, cleaned_path: str) -> Optional[dict]:
+        from core.agents.pipeline.stateless.context.archiver import ContextArchiver
+
+        archived = ContextArchiver.parse_archive_path(cleaned_path)
+        if not archived:
+            return None
+        content = await ContextArchiver.read_archived_file(self.sandbox, *archived)
+        if content is None:
+            return None
+
+        size_bytes = len(content.encode('utf-8'))
+        truncated = False
+        if len(content) > MAX_OUTPUT_CHARS:
+            content = content[:MAX_OUTPUT_CHARS]
+            truncated = True
+            content += f"\n\n[Content truncated at {MAX_OUTPUT_CHARS} characters]"
+
+        logger.info(f"[ReadFile] Read '{cleaned_path}' from context archive pack, {len(content)} chars")
+
+        return {
+            "file_path": cleaned_path,
+            "success": True,
+            "file_type": "text",
+            "extraction_method": "archive_pack",
+            "size_bytes": size_bytes,
+            "content_length": len(content),
+            "truncated": truncated,
+            "content": content
+        }
+
     async def _read_single_file(self, file_path: str) -> dict:
         try:
             cleaned_path = self.clean_path(file_path)
@@ -158,6 +188,10 @@ class SandboxFileReaderTool(SandboxToolsBase):
                     "error": f"'{cleaned_path}' is an image file. Use load_image instead of read_file for images."
                 }
 
+            archived = await self._read_archived_file(cleaned_path)
+            if archived is not None:
+                return archived
+
             try:
                 file_info = await self.sandbox.fs.get_file_info(full_path)
                 if file_info.is_dir:
@@ -367,6 +401,7 @@ class SandboxFileReaderTool(SandboxToolsBase):
                 "error": str(e)
             }
 
+    @parallel_safe
     @openapi_schema({
         "type": "function",
         "function": {
@@ -453,6 +488,7 @@ Usage:
             logger.error(f"[ReadFile] Error: {e}", exc_info=True)
             return self.fail_response(f"Error reading files: {str(e)}")
 
+    @parallel_safe
     @openapi_schema({
         "type": "function",
         "function": {
@@ -1,5 +1,10 @@
 import asyncio
-from typing import Optional, List
+import hashlib
+import io
+import json
+import shlex
+import tarfile
+from typing import Optional, List, Dict, Tuple
 from core.agentpress.tool import ToolResult, openapi_schema, tool_metadata
 from core.sandbox.tool_base import SandboxToolsBase
 from core.agentpress.thread_manager import ThreadManager
@@ -7,6 +12,53 @@ from core.utils.config import config
 from core.knowledge_base.validation import FileNameValidator, ValidationError
 from core.utils.logger import logger
 
+# Sandbox KB sync keeps a manifest of {relative path: {entry_id, hash, size}} next to the files
+KB_MANIFEST_NAME = ".kb_manifest.json"
+KB_SYNC_ARCHIVE_NAME = ".kb_sync.tar.gz"
+KB_SYNC_DOWNLOAD_CONCURRENCY = 8
+
+
+def _kb_entry_fingerprint(entry: dict) -> str:
+    """Content hash of a KB entry; entries uploaded before hashing use their storage version."""
+    if entry.get('content_hash'):
+        return entry['content_hash']
+    version = f"{entry.get('file_path')}:{entry.get('file_size')}:{entry.get('updated_at')}"
+    return "v:" + hashlib.sha256(version.encode('utf-8')).hexdigest()
+
+
+def _plan_kb_sync(
+    desired: Dict[str, dict], manifest: Dict[str, dict], present: Dict[str, int]
+) -> Tuple[List[str], List[str]]:
+    """Paths to remove from and to transfer into the sandbox KB directory.
+
+    desired maps relative path -> {"hash": ...}, present maps the files actually in
+    the directory to their size. A manifest entry only counts while its file is still
+    there at the recorded size, so files the agent deleted or edited are restored.
+    """
+    intact = {
+        path: item for path, item in manifest.items()
+        if path in present and item.get("size", present[path]) == present[path]
+    }
+    # The manifest lives in the agent's sandbox; only ever remove paths inside the KB dir
+    to_remove = [
+        path for path in manifest
+        if path not in desired and not path.startswith('/') and '..' not in path.split('/')
+    ]
+    to_fetch = [path for path, item in desired.items() if intact.get(path, {}).get("hash") != item["hash"]]
+    return to_remove, to_fetch
+
+
+def _build_kb_archive(files: Dict[str, bytes]) -> bytes:
+    """Gzipped tar of relative path -> bytes."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w:gz") as tar:
+        for path, content in files.items():
+            info = tarfile.TarInfo(name=path)
+            info.size = len(content)
+            info.mode = 0o644
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
 @tool_metadata(
     display_name="Knowledge Base",
     description="Store and retrieve information from your personal knowledge library",
@@ -368,6 +420,29 @@ class SandboxKbTool(SandboxToolsBase):
         # Ensure non-empty
         return safe_name if safe_name else 'file'
 
+    async def _read_kb_manifest(self, kb_dir: str) -> Optional[Dict[str, dict]]:
+        """Manifest of files already synced into the sandbox, or None if missing or unreadable."""
+        try:
+            content = await self.sandbox.fs.download_file(f"{kb_dir}/{KB_MANIFEST_NAME}")
+            manifest = json.loads(content)
+        except Exception as e:
+            logger.debug(f"[KB_SYNC] No usable manifest in {kb_dir}: {e}")
+            return None
+        return manifest if isinstance(manifest, dict) else None
+
+    async def _list_kb_files(self, kb_dir: str) -> Dict[str, int]:
+        """Relative path -> size of the files in the KB directory; empty if it can't be listed."""
+        listing = await self.sandbox.process.exec(f"find {shlex.quote(kb_dir)} -type f -printf '%P\\t%s\\n'")
+        if listing.exit_code != 0:
+            logger.debug(f"[KB_SYNC] Could not list {kb_dir}: {listing.result}")
+            return {}
+        present = {}
+        for line in (listing.result or "").splitlines():
+            path, _, size = line.rpartition("\t")
+            if path and size.isdigit():
+                present[path] = int(size)
+        return present
+
     async def _download_with_retry(self, client, file_path: str, max_retries: int = 3) -> Optional[bytes]:
         """Download file from S3 with retry logic."""
         last_error = None
@@ -450,7 +525,7 @@ class SandboxKbTool(SandboxToolsBase):
         "type": "function",
         "function": {
             "name": "global_kb_sync",
-            "description": "Sync agent's knowledge base files to /workspace/downloads/global-knowledge/. Downloads all assigned knowledge base files and creates a local copy with proper folder structure. Files are automatically searchable via semantic_search and readable with standard file tools. **🚨 PARAMETER NAMES**: This function takes no parameters.",
+            "description": "Sync agent's knowledge base files to /workspace/downloads/global-knowledge/. Keeps a local copy of all assigned knowledge base files with proper folder structure, transferring only files that were added or changed since the last sync. Files are automatically searchable via semantic_search and readable with standard file tools. **🚨 PARAMETER NAMES**: This function takes no parameters.",
             "parameters": {
                 "type": "object",
                 "properties": {},
@@ -483,6 +558,8 @@ class SandboxKbTool(SandboxToolsBase):
                     file_path,
                     file_size,
                     mime_type,
+                    content_hash,
+                    updated_at,
                     knowledge_base_folders (
                         name
                     )
@@ -540,24 +617,14 @@ class SandboxKbTool(SandboxToolsBase):
             except Exception:
                 pass  # May already exist
 
-            # Clear existing files using shell (SDK doesn't have delete recursive)
-            await self.sandbox.process.exec(f"rm -rf {kb_dir}/*")
-            logger.info(f"[KB_SYNC] KB directory prepared: {kb_dir}")
-
-            synced_files = 0
-            failed_files = []
-            folder_structure = {}
-            file_paths = {}  # Map entry_id to local path for easy reference
-
+            # Desired state: relative path -> entry, plus its fingerprint
+            desired = {}
             for assignment in result.data:
-                if not assignment.get('knowledge_base_entries'):
+                entry = assignment.get('knowledge_base_entries')
+                if not entry:
                     continue
-
-                entry = assignment['knowledge_base_entries']
                 folder_name = entry['knowledge_base_folders']['name']
                 filename = entry['filename']
-                file_path = entry['file_path']  # S3 path
-                entry_id = entry['entry_id']
 
                 # Sanitize names for filesystem
                 safe_folder_name = self._sanitize_for_filesystem(folder_name)
@@ -568,81 +635,71 @@ class SandboxKbTool(SandboxToolsBase):
                     if not safe_filename.endswith(f'.{ext}'):
                         safe_filename = f"{safe_filename}.{ext}"
 
-                try:
-                    # Download file from S3 with retry
-                    logger.info(f"[KB_SYNC] Downloading {file_path} from S3...")
-                    file_response = await self._download_with_retry(client, file_path)
-
-                    if not file_response:
-                        failed_files.append({
-                            "filename": filename,
-                            "folder": folder_name,
-                            "error": "Failed to download from storage after retries"
-                        })
-                        continue
-
-                    logger.info(f"[KB_SYNC] Downloaded {len(file_response)} bytes for {filename}")
-
-                    # Create folder structure in sandbox using SDK method
-                    folder_path = f"{kb_dir}/{safe_folder_name}"
-                    try:
-                        await self.sandbox.fs.create_folder(folder_path, "755")
-                        logger.debug(f"[KB_SYNC] Created folder: {folder_path}")
-                    except Exception as folder_err:
-                        # Folder might already exist, try to verify
-                        try:
-                            folder_info = await self.sandbox.fs.get_file_info(folder_path)
-                            if not folder_info.is_dir:
-                                failed_files.append({
-                                    "filename": filename,
-                                    "folder": folder_name,
-                                    "error": f"Path exists but is not a directory: {folder_path}"
-                                })
-                                continue
-                        except Exception:
-                            failed_files.append({
-                                "filename": filename,
-                                "folder": folder_name,
-                                "error": f"Failed to create folder: {folder_err}"
-                            })
-                            continue
-
-                    # Upload file to sandbox with retry and verification
-                    file_destination = f"{kb_dir}/{safe_folder_name}/{safe_filename}"
-                    logger.info(f"[KB_SYNC] Uploading {len(file_response)} bytes to: {file_destination}")
-
-                    upload_success = await self._upload_file_with_retry(file_response, file_destination)
-                    if not upload_success:
-                        failed_files.append({
-                            "filename": filename,
-                            "folder": folder_name,
-                            "error": "Failed to upload file to sandbox after retries"
-                        })
-                        continue
-
-                    synced_files += 1
-                    logger.info(f"[KB_SYNC] Successfully synced: {safe_folder_name}/{safe_filename}")
-
-                    # Track file paths
-                    file_paths[entry_id] = file_destination
-
-                    # Use original folder name for output structure
-                    if folder_name not in folder_structure:
-                        folder_structure[folder_name] = []
-                    folder_structure[folder_name].append({
-                        "original": filename,
-                        "synced_as": safe_filename,
-                        "path": file_destination
-                    })
+                desired[f"{safe_folder_name}/{safe_filename}"] = {
+                    "entry": entry,
+                    "folder_name": folder_name,
+                    "filename": filename,
+                    "safe_filename": safe_filename,
+                    "hash": _kb_entry_fingerprint(entry),
+                }
 
-                except Exception as e:
-                    logger.error(f"[KB_SYNC] Error syncing {folder_name}/{filename}: {e}", exc_info=True)
+            # Compare with what the sandbox already holds. Without a manifest the
+            # directory contents are unknown, so start from an empty directory.
+            manifest = await self._read_kb_manifest(kb_dir)
+            if manifest is None:
+                await self.sandbox.process.exec(f"rm -rf {kb_dir}/* {kb_dir}/.kb_*")
+                manifest, present = {}, {}
+            else:
+                present = await self._list_kb_files(kb_dir)
+
+            to_remove, to_fetch = _plan_kb_sync(desired, manifest, present)
+            logger.info(
+                f"[KB_SYNC] Delta for {kb_dir}: {len(to_fetch)} to transfer, {len(to_remove)} to remove, "
+                f"{len(desired) - len(to_fetch)} unchanged"
+            )
+
+            failed_files = []
+            fetched = {}
+            semaphore = asyncio.Semaphore(KB_SYNC_DOWNLOAD_CONCURRENCY)
+
+            async def fetch(path: str):
+                item = desired[path]
+                async with semaphore:
+                    logger.info(f"[KB_SYNC] Downloading {item['entry']['file_path']} from S3...")
+                    content = await self._download_with_retry(client, item['entry']['file_path'])
+                if content:
+                    fetched[path] = content
+                else:
                     failed_files.append({
-                        "filename": filename,
-                        "folder": folder_name,
-                        "error": str(e)
+                        "filename": item["filename"],
+                        "folder": item["folder_name"],
+                        "error": "Failed to download from storage after retries"
                     })
+
+            await asyncio.gather(*(fetch(path) for path in to_fetch))
+
+            # A changed file that failed to download keeps its old copy but leaves
+            # the manifest, so the next sync retries it
+            new_manifest = {
+                path: {
+                    "entry_id": item["entry"]["entry_id"],
+                    "hash": item["hash"],
+                    "size": len(fetched[path]) if path in fetched else present[path],
+                }
+                for path, item in desired.items()
+                if path in fetched or path not in to_fetch
+            }
+
+            folder_structure = {}
+            for path, item in desired.items():
+                if path not in new_manifest:
                     continue
+                folder_structure.setdefault(item["folder_name"], []).append({
+                    "original": item["filename"],
+                    "synced_as": item["safe_filename"],
+                    "path": f"{kb_dir}/{path}"
+                })
+            synced_files = len(new_manifest)
 
             # Create README with file paths
             readme_content = f"""# Global Knowledge Base
@@ -654,7 +711,6 @@ This directory contains your agent's knowledge base files, synced from the cloud
 ## Synced Files:
 """
             for folder_name, files in folder_structure.items():
-                safe_folder = self._sanitize_for_filesystem(folder_name)
                 readme_content += f"\n### {folder_name}/\n"
                 for file_info in files:
                     readme_content += f"- `{file_info['synced_as']}` (original: {file_info['original']})\n"
@@ -677,9 +733,26 @@ This directory contains your agent's knowledge base files, synced from the cloud
 - Agent ID: {agent_id}
 """
 
-            # Upload README with retry
-            readme_path = f"{kb_dir}/README.md"
-            await self._upload_file_with_retry(readme_content.encode('utf-8'), readme_path)
+            # Changed files, README and manifest go up as one archive, extracted in place
+            archive_files = dict(fetched)
+            archive_files["README.md"] = readme_content.encode('utf-8')
+            archive_files[KB_MANIFEST_NAME] = json.dumps(new_manifest, sort_keys=True).encode('utf-8')
+            archive_path = f"{kb_dir}/{KB_SYNC_ARCHIVE_NAME}"
+
+            if not await self._upload_file_with_retry(_build_kb_archive(archive_files), archive_path):
+                return self.fail_response("Failed to upload knowledge base archive to sandbox after retries")
+
+            remove_cmd = ""
+            if to_remove:
+                remove_cmd = "rm -f -- " + " ".join(shlex.quote(path) for path in to_remove) + " && "
+            apply = await self.sandbox.process.exec(
+                f"cd {shlex.quote(kb_dir)} && {remove_cmd}"
+                f"tar -xzf {KB_SYNC_ARCHIVE_NAME} && rm -f {KB_SYNC_ARCHIVE_NAME} && "
+                f"find . -mindepth 1 -type d -empty -delete"
+            )
+            if apply.exit_code != 0:
+                return self.fail_response(f"Failed to apply knowledge base sync: {apply.result}")
+            logger.info(f"[KB_SYNC] Applied delta: {len(fetched)} transferred, {len(to_remove)} removed")
 
             # Build a flat list of all synced file paths for easy access
             all_file_paths = []
@@ -692,12 +765,13 @@ This directory contains your agent's knowledge base files, synced from the cloud
             verified_files = []
             if verify_ls.exit_code == 0 and verify_ls.result.strip():
                 verified_files = [f.strip() for f in verify_ls.result.strip().split('\n') if f.strip()]
-                logger.info(f"[KB_SYNC] Final verification - files in KB directory: {verified_files}")
+                logger.debug(f"[KB_SYNC] Final verification - {len(verified_files)} files in KB directory")
 
             # Check if any expected files are missing
+            verified = set(verified_files)
             missing_files = []
             for expected_path in all_file_paths:
-                if expected_path not in verified_files:
+                if expected_path not in verified:
                     missing_files.append(expected_path)
                     logger.warning(f"[KB_SYNC] Expected file not found in verification: {expected_path}")
 
@@ -710,6 +784,9 @@ This directory contains your agent's knowledge base files, synced from the cloud
             response = {
                 "message": f"Synced {synced_files} files to knowledge base" + (f" ({len(failed_files)} failed)" if failed_files else ""),
                 "synced_files": synced_files,
+                "transferred_files": len(fetched),
+                "removed_files": len(to_remove),
+                "unchanged_files": synced_files - len(fetched),
                 "failed_files": len(failed_files),
                 "kb_directory": kb_dir,
                 "files": files_summary,  # Simple string list for frontend
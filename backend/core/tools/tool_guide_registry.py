@@ -30,14 +30,30 @@ class ToolGuideRegistry:
             ToolGuideRegistry._initialized = True
     
     def initialize(self) -> None:
+        from core.tools.tool_manifest import get_manifest
         from core.tools.tool_registry import ALL_TOOLS, get_tool_class
         from core.utils.logger import logger
         
         logger.info(f"🔧 [DYNAMIC TOOLS] Initializing Tool Guide Registry...")
         loaded_count = 0
         with_guides_count = 0
+        manifest = get_manifest()
         
         for tool_name, module_path, class_name in ALL_TOOLS:
+            if manifest is not None:
+                entry = manifest["tools"].get(tool_name)
+                if entry and entry["has_metadata"]:
+                    self._guides[tool_name] = ToolGuideEntry(
+                        tool_name=tool_name,
+                        display_name=entry["ui"]["display_name"],
+                        description=entry["ui"]["description"],
+                        usage_guide=entry["usage_guide"]
+                    )
+                    loaded_count += 1
+                    if entry["usage_guide"]:
+                        with_guides_count += 1
+                continue
+
             try:
                 tool_class = get_tool_class(module_path, class_name)
                 if hasattr(tool_class, '__tool_metadata__'):
@@ -0,0 +1,200 @@
+"""
+Build-time tool manifest.
+
+Importing every module in ALL_TOOLS at boot pulls in heavy optional stacks
+(presentations, Apify, Vapi, ...) just to read decorator metadata. The manifest
+captures that metadata once - tool names, groups, UI metadata, usage guides and
+OpenAPI schemas per method - so startup, JIT function lookups and the tools API
+can work without importing tool code. Tool classes are then imported lazily the
+first time a tool is actually activated.
+
+Generate it (done in the Docker build):
+    python -m core.tools.tool_manifest
+
+Check that it matches the code:
+    python -m core.tools.tool_manifest --check
+
+A manifest is only used when its format version, the ALL_TOOLS registry and the
+hashed tool sources all match the running code; otherwise callers fall back to
+importing and introspecting tool classes as before.
+"""
+
+import hashlib
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from core.tools.tool_registry import ALL_TOOLS, get_tools_by_category
+
+MANIFEST_VERSION = 1
+MANIFEST_PATH = Path(__file__).with_name("tool_manifest.json")
+
+_BACKEND_ROOT = Path(__file__).resolve().parents[2]
+# Decorators and base classes whose behaviour is baked into the manifest
+_SHARED_SOURCES = (
+    "core/agentpress/tool.py",
+    "core/sandbox/tool_base.py",
+)
+
+_manifest: Optional[Dict[str, Any]] = None
+_manifest_loaded = False
+
+
+def _registry_hash() -> str:
+    groups = {
+        group: [list(entry) for entry in entries]
+        for group, entries in get_tools_by_category().items()
+    }
+    return hashlib.sha256(json.dumps(groups, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def _source_files() -> List[str]:
+    modules = sorted({module_path for _, module_path, _ in ALL_TOOLS})
+    return list(_SHARED_SOURCES) + [module.replace('.', '/') + '.py' for module in modules]
+
+
+def _source_hash() -> str:
+    digest = hashlib.sha256()
+    for relative in _source_files():
+        digest.update(relative.encode('utf-8'))
+        try:
+            digest.update((_BACKEND_ROOT / relative).read_bytes())
+        except OSError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()
+
+
+def build_manifest() -> Dict[str, Any]:
+    """Import every registered tool and capture its metadata and schemas."""
+    from core.tools.tool_registry import get_tool_class
+    from core.utils.tool_discovery import _extract_tool_metadata, _precompute_schemas_for_class
+
+    groups: Dict[str, List[str]] = {}
+    for group, entries in get_tools_by_category().items():
+        for tool_name, _, _ in entries:
+            groups.setdefault(tool_name, []).append(group)
+
+    tools: Dict[str, Any] = {}
+    skipped: Dict[str, str] = {}
+    for tool_name, module_path, class_name in ALL_TOOLS:
+        if tool_name in tools or tool_name in skipped:
+            continue
+        try:
+            tool_class = get_tool_class(module_path, class_name)
+        except Exception as e:
+            # Import-time initializers (SDK clients, config) can raise anything
+            skipped[tool_name] = f"{type(e).__name__}: {e}"
+            continue
+
+        metadata = getattr(tool_class, '__tool_metadata__', None)
+        schemas = _precompute_schemas_for_class(tool_class)
+        tools[tool_name] = {
+            "module": module_path,
+            "class": class_name,
+            "groups": groups.get(tool_name, []),
+            "has_metadata": metadata is not None,
+            "usage_guide": metadata.usage_guide if metadata else None,
+            "ui": _extract_tool_metadata(tool_name, tool_class),
+            "schemas": {
+                method_name: [schema.schema for schema in schema_list]
+                for method_name, schema_list in sorted(schemas.items())
+            },
+        }
+
+    return {
+        "version": MANIFEST_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "registry_hash": _registry_hash(),
+        "source_hash": _source_hash(),
+        "tools": tools,
+        "skipped": skipped,
+    }
+
+
+def check_manifest(manifest: Optional[Dict[str, Any]] = None, path: Path = MANIFEST_PATH) -> List[str]:
+    """Return the reasons a manifest is unusable; an empty list means it is current."""
+    if manifest is None:
+        try:
+            manifest = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return [f"{path.name} not found"]
+        except (OSError, json.JSONDecodeError) as e:
+            return [f"{path.name} unreadable: {e}"]
+
+    problems = []
+    if manifest.get("version") != MANIFEST_VERSION:
+        problems.append(f"format version {manifest.get('version')} != {MANIFEST_VERSION}")
+    if manifest.get("registry_hash") != _registry_hash():
+        problems.append("ALL_TOOLS registry changed since the manifest was generated")
+    if manifest.get("source_hash") != _source_hash():
+        problems.append("tool sources changed since the manifest was generated")
+    return problems
+
+
+def get_manifest() -> Optional[Dict[str, Any]]:
+    """The current manifest, or None if it is missing or stale. Loaded once per process."""
+    global _manifest, _manifest_loaded
+    if _manifest_loaded:
+        return _manifest
+
+    from core.utils.logger import logger
+
+    _manifest_loaded = True
+    try:
+        manifest = json.loads(MANIFEST_PATH.read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        logger.debug("Tool manifest not found, tools will be imported at startup")
+        return None
+    except (OSError, json.JSONDecodeError) as e:
+        logger.warning(f"Tool manifest unreadable, ignoring: {e}")
+        return None
+
+    problems = check_manifest(manifest)
+    if problems:
+        logger.warning(f"Tool manifest is stale, ignoring ({'; '.join(problems)}). Regenerate with: python -m core.tools.tool_manifest")
+        return None
+
+    _manifest = manifest
+    return _manifest
+
+
+def get_manifest_tool(tool_name: str) -> Optional[Dict[str, Any]]:
+    manifest = get_manifest()
+    if manifest is None:
+        return None
+    return manifest["tools"].get(tool_name)
+
+
+def main() -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate or check the tool manifest")
+    parser.add_argument("--check", action="store_true", help="exit non-zero if the manifest is missing or stale")
+    parser.add_argument("--allow-skipped", action="store_true", help="write the manifest even if some tools failed to import")
+    args = parser.parse_args()
+
+    if args.check:
+        problems = check_manifest()
+        for problem in problems:
+            print(f"stale: {problem}")
+        if not problems:
+            print(f"{MANIFEST_PATH.name} is up to date")
+        return 1 if problems else 0
+
+    manifest = build_manifest()
+    for tool_name, error in manifest["skipped"].items():
+        print(f"skipped {tool_name}: {error}")
+    if manifest["skipped"] and not args.allow_skipped:
+        # A tool that fails to import here may still import at runtime; don't hide it
+        print(f"Not writing {MANIFEST_PATH.name}: {len(manifest['skipped'])} tool(s) failed to import")
+        return 1
+
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, sort_keys=True), encoding='utf-8')
+    method_count = sum(len(tool["schemas"]) for tool in manifest["tools"].values())
+    print(f"Wrote {MANIFEST_PATH.name}: {len(manifest['tools'])} tools, {method_count} methods")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
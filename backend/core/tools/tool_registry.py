@@ -85,11 +85,21 @@ def get_tools_by_category() -> Dict[str, List[Tuple[str, str, str]]]:
     }
 
 
+def _manifest_entry(tool_name: str) -> Optional[Dict]:
+    from core.tools.tool_manifest import get_manifest_tool
+    entry = get_manifest_tool(tool_name)
+    return entry if entry and entry["has_metadata"] else None
+
+
 def get_tool_usage_guide(tool_name: str) -> Optional[str]:
     info = get_tool_info(tool_name)
     if not info:
         return None
     
+    entry = _manifest_entry(tool_name)
+    if entry:
+        return entry["usage_guide"] or None
+    
     _, module_path, class_name = info
     try:
         tool_class = get_tool_class(module_path, class_name)
@@ -106,6 +116,13 @@ def get_tool_metadata_summary(tool_name: str) -> Optional[Dict[str, str]]:
     if not info:
         return None
     
+    entry = _manifest_entry(tool_name)
+    if entry:
+        return {
+            'display_name': entry["ui"]["display_name"],
+            'description': entry["ui"]["description"]
+        }
+    
     _, module_path, class_name = info
     try:
         tool_class = get_tool_class(module_path, class_name)
@@ -124,6 +141,13 @@ def get_tool_metadata_summary(tool_name: str) -> Optional[Dict[str, str]]:
 def get_all_tool_summaries() -> Dict[str, Dict[str, str]]:
     summaries = {}
     for tool_name, module_path, class_name in ALL_TOOLS:
+        entry = _manifest_entry(tool_name)
+        if entry:
+            summaries[tool_name] = {
+                'display_name': entry["ui"]["display_name"],
+                'description': entry["ui"]["description"]
+            }
+            continue
         try:
             tool_class = get_tool_class(module_path, class_name)
             if hasattr(tool_class, '__tool_metadata__'):
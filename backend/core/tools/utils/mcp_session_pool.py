@@ -0,0 +1,297 @@
+"""
+MCP Session Pool - persistent client sessions for custom SSE/HTTP MCP servers.
+
+Opening an MCP connection costs a transport connect plus an `initialize`
+handshake, which used to be paid on every tool call and every discovery.
+The pool keeps one initialized ClientSession per (transport, URL, headers)
+for the lifetime of the worker and shares it between callers.
+
+The mcp transports are anyio context managers that must be entered and exited
+by the same task, so every pooled session is owned by a small background task
+that opens the connection, publishes the session, and holds it open until the
+pool closes it. Callers on any task talk to the session through its streams.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Optional
+
+import anyio
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+from mcp.shared.exceptions import McpError
+from core.utils.logger import logger
+
+# Sessions unused for this long are closed by the reaper
+IDLE_TTL_SECONDS = 300
+# A reused session idle for longer than this is pinged before it is handed out
+HEALTH_CHECK_AFTER_SECONDS = 30
+HEALTH_CHECK_TIMEOUT_SECONDS = 5
+CONNECT_TIMEOUT_SECONDS = 15
+# In-flight requests allowed per server session
+MAX_CONCURRENCY_PER_SERVER = 4
+MAX_POOLED_SESSIONS = 64
+REAPER_INTERVAL_SECONDS = 30
+# JSON-RPC error code the mcp client raises when the transport goes away mid-request
+_CONNECTION_CLOSED = -32000
+
+
+def session_key(transport: str, url: str, headers: Optional[Dict[str, Any]] = None) -> str:
+    """Pool key: transport + URL + a hash of the credentials carried in headers."""
+    headers_hash = hashlib.sha256(
+        json.dumps(headers or {}, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()[:16]
+    return f"{transport}:{url}:{headers_hash}"
+
+
+# Transport-level errors that mean the session's streams are gone. Anything else
+# (tool errors, validation, timeouts) may have reached the server, so a call_tool
+# that raised it must not be retried on a fresh session.
+_TRANSPORT_ERRORS = (
+    ConnectionError,
+    OSError,
+    anyio.ClosedResourceError,
+    anyio.BrokenResourceError,
+    anyio.EndOfStream,
+)
+
+
+def _is_connection_failure(exc: BaseException) -> bool:
+    """True if the error means the session is unusable, as opposed to a tool/protocol error."""
+    if isinstance(exc, (asyncio.CancelledError, TimeoutError)):
+        return False
+    if isinstance(exc, McpError):
+        return getattr(getattr(exc, "error", None), "code", None) == _CONNECTION_CLOSED
+    return isinstance(exc, _TRANSPORT_ERRORS)
+
+
+class _PooledSession:
+    def __init__(self, key: str, transport: str, url: str, headers: Dict[str, Any]):
+        self.key = key
+        self.transport = transport
+        self.url = url
+        self.headers = headers
+        self.session: Optional[ClientSession] = None
+        self.semaphore = asyncio.Semaphore(MAX_CONCURRENCY_PER_SERVER)
+        self.in_flight = 0
+        self.last_used = time.monotonic()
+        self.last_checked = self.last_used
+
+        self._ready = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return (
+            self.session is not None
+            and self._task is not None
+            and not self._task.done()
+            and not self._closing.is_set()
+        )
+
+    def _open_transport(self, use_headers: bool = True):
+        if self.transport == "sse":
+            if use_headers and self.headers:
+                return sse_client(self.url, headers=self.headers)
+            return sse_client(self.url)
+        if self.headers:
+            return streamablehttp_client(self.url, headers=self.headers)
+        return streamablehttp_client(self.url)
+
+    async def _run(self) -> None:
+        try:
+            try:
+                transport_cm = self._open_transport()
+            except TypeError as e:
+                # Older sse_client versions don't accept headers
+                if "unexpected keyword argument" not in str(e):
+                    raise
+                transport_cm = self._open_transport(use_headers=False)
+
+            async with transport_cm as streams:
+                read_stream, write_stream = streams[0], streams[1]
+                async with ClientSession(read_stream, write_stream) as session:
+                    await session.initialize()
+                    self.session = session
+                    self._ready.set()
+                    await self._closing.wait()
+        except BaseException as e:
+            self._error = e
+            if not isinstance(e, asyncio.CancelledError):
+                logger.debug(f"[MCP POOL] Session {self.key} ended: {e}")
+        finally:
+            self.session = None
+            self._ready.set()
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session:{self.key}")
+        try:
+            async with asyncio.timeout(CONNECT_TIMEOUT_SECONDS):
+                await self._ready.wait()
+        except TimeoutError:
+            await self.close()
+            raise
+        if self.session is None:
+            raise ConnectionError(f"Failed to open MCP session to {self.url}: {self._error}")
+
+    async def ping(self) -> bool:
+        try:
+            async with asyncio.timeout(HEALTH_CHECK_TIMEOUT_SECONDS):
+                await self.session.send_ping()
+            self.last_checked = time.monotonic()
+            return True
+        except Exception as e:
+            logger.debug(f"[MCP POOL] Health check failed for {self.key}: {e}")
+            return False
+
+    async def close(self) -> None:
+        self._closing.set()
+        if self._task is None or self._task.done():
+            return
+        try:
+            async with asyncio.timeout(5):
+                await asyncio.shield(self._task)
+        except (TimeoutError, asyncio.CancelledError):
+            self._task.cancel()
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    """Per-worker pool of initialized MCP client sessions."""
+
+    def __init__(self):
+        self._sessions: Dict[str, _PooledSession] = {}
+        self._open_locks: Dict[str, asyncio.Lock] = {}
+        self._reaper: Optional[asyncio.Task] = None
+        self._stats = {"opened": 0, "reused": 0, "reconnects": 0, "evicted": 0}
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self._stats,
+            "sessions": len(self._sessions),
+            "in_flight": sum(s.in_flight for s in self._sessions.values()),
+        }
+
+    async def _acquire(self, transport: str, url: str, headers: Dict[str, Any]) -> tuple[_PooledSession, bool]:
+        """Return (entry, reused) with a live, initialized session."""
+        key = session_key(transport, url, headers)
+        lock = self._open_locks.setdefault(key, asyncio.Lock())
+
+        async with lock:
+            entry = self._sessions.get(key)
+            if entry is not None:
+                idle_for = time.monotonic() - entry.last_checked
+                if entry.alive and (idle_for < HEALTH_CHECK_AFTER_SECONDS or await entry.ping()):
+                    self._stats["reused"] += 1
+                    return entry, True
+                await self._discard(entry)
+
+            await self._make_room()
+            entry = _PooledSession(key, transport, url, headers)
+            await entry.start()
+            self._sessions[key] = entry
+            self._stats["opened"] += 1
+            self._ensure_reaper()
+            return entry, False
+
+    async def _discard(self, entry: _PooledSession) -> None:
+        if self._sessions.get(entry.key) is entry:
+            del self._sessions[entry.key]
+        await entry.close()
+
+    async def _make_room(self) -> None:
+        if len(self._sessions) < MAX_POOLED_SESSIONS:
+            return
+        idle = [s for s in self._sessions.values() if s.in_flight == 0]
+        if idle:
+            oldest = min(idle, key=lambda s: s.last_used)
+            self._stats["evicted"] += 1
+            await self._discard(oldest)
+
+    @asynccontextmanager
+    async def session(
+        self,
+        transport: str,
+        url: str,
+        headers: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[ClientSession]:
+        """Borrow a pooled session. Connection-level failures drop it from the pool."""
+        entry, _ = await self._acquire(transport, url, headers or {})
+        async with self._borrow(entry) as session:
+            yield session
+
+    @asynccontextmanager
+    async def _borrow(self, entry: _PooledSession) -> AsyncIterator[ClientSession]:
+        async with entry.semaphore:
+            entry.in_flight += 1
+            try:
+                yield entry.session
+            except BaseException as e:
+                if _is_connection_failure(e):
+                    await self._discard(entry)
+                raise
+            else:
+                # A completed request proves the session is healthy as well as a ping would
+                entry.last_checked = time.monotonic()
+            finally:
+                entry.in_flight -= 1
+                entry.last_used = time.monotonic()
+
+    async def _run(self, transport: str, url: str, headers: Optional[Dict[str, Any]], op):
+        entry, reused = await self._acquire(transport, url, headers or {})
+        try:
+            async with self._borrow(entry) as session:
+                return await op(session)
+        except Exception as e:
+            if not reused or not _is_connection_failure(e):
+                raise
+            # A reused session went stale between calls: reconnect once
+            logger.debug(f"[MCP POOL] Reconnecting to {url} after failure on pooled session: {e}")
+            self._stats["reconnects"] += 1
+            entry, _ = await self._acquire(transport, url, headers or {})
+            async with self._borrow(entry) as session:
+                return await op(session)
+
+    async def call_tool(
+        self,
+        transport: str,
+        url: str,
+        tool_name: str,
+        arguments: Dict[str, Any],
+        headers: Optional[Dict[str, Any]] = None,
+    ):
+        return await self._run(transport, url, headers, lambda s: s.call_tool(tool_name, arguments))
+
+    async def list_tools(self, transport: str, url: str, headers: Optional[Dict[str, Any]] = None):
+        return await self._run(transport, url, headers, lambda s: s.list_tools())
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is None or self._reaper.done():
+            self._reaper = asyncio.create_task(self._reap_idle(), name="mcp-session-reaper")
+
+    async def _reap_idle(self) -> None:
+        while self._sessions:
+            await asyncio.sleep(REAPER_INTERVAL_SECONDS)
+            now = time.monotonic()
+            for entry in list(self._sessions.values()):
+                if not entry.alive or (entry.in_flight == 0 and now - entry.last_used > IDLE_TTL_SECONDS):
+                    self._stats["evicted"] += 1
+                    await self._discard(entry)
+
+    async def close_all(self) -> None:
+        if self._reaper is not None:
+            self._reaper.cancel()
+            self._reaper = None
+        entries = list(self._sessions.values())
+        self._sessions.clear()
+        await asyncio.gather(*(entry.close() for entry in entries), return_exceptions=True)
+
+
+mcp_session_pool = MCPSessionPool()
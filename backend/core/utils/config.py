@@ -49,6 +49,7 @@ class Configuration:
     AGENT_NATIVE_TOOL_CALLING: bool = True  # Enable OpenAI-style native function calling
     AGENT_EXECUTE_ON_STREAM: bool = True     # Execute tools as they stream (vs. at end)
     AGENT_TOOL_EXECUTION_STRATEGY: str = "parallel"  # "parallel" or "sequential"
+    AGENT_MAX_PARALLEL_TOOLS: int = 6  # Cap on concurrently running parallel-safe tools per run
     
     # Model selection
     # Options: "bedrock", "anthropic", "minimax", "grok", "openai"
@@ -1,10 +1,13 @@
 from .parser import (
     FastParse,
     ParseResult,
+    ParseSegment,
     ParseError,
     FileType,
     parse,
     parse_file,
+    iter_parse,
+    iter_parse_file,
     get_parser,
 )
 from .config import FastParseConfig, DEFAULT_CONFIG
@@ -49,12 +52,15 @@ from .exceptions import (
 __all__ = [
     "FastParse",
     "ParseResult",
+    "ParseSegment",
     "ParseError",
     "FileType",
     "FastParseConfig",
     "DEFAULT_CONFIG",
     "parse",
     "parse_file",
+    "iter_parse",
+    "iter_parse_file",
     "get_parser",
     "AsyncFastParse",
     "ImageAnalysisResult",
@@ -9,6 +9,8 @@ class FastParseConfig:
     max_excel_sheets: int = 50
     max_text_chars: int = 10_000_000
     chunk_size: int = 65536
+    stream_row_block: int = 500
+    chars_per_token: int = 4
     enable_script_detection: bool = True
     enable_image_analysis: bool = True
     image_analysis_timeout: float = 30.0
@@ -2,11 +2,13 @@ from __future__ import annotations
 import io
 import os
 import re
+import codecs
+import mmap
 import mimetypes
 from dataclasses import dataclass, field
 from enum import Enum, auto
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Union, BinaryIO
+from typing import Any, Dict, Iterator, List, Optional, Union, BinaryIO
 import chardet
 
 from .config import FastParseConfig, DEFAULT_CONFIG
@@ -71,6 +73,62 @@ class ParseResult:
         }
 
 
+@dataclass
+class ParseSegment:
+    """One page, slide or block of rows from a streaming parse."""
+    index: int
+    text: str
+    label: str = ""
+    warnings: List[str] = field(default_factory=list)
+    truncated: bool = False
+    
+    @property
+    def char_count(self) -> int:
+        return len(self.text)
+
+
+class _BufferReader(io.RawIOBase):
+    """Seekable read-only file over a buffer (e.g. an mmap) without copying it."""
+    
+    def __init__(self, buffer: Union[mmap.mmap, memoryview, bytearray]):
+        super().__init__()
+        self._view = memoryview(buffer)
+        self._pos = 0
+    
+    def readable(self) -> bool:
+        return True
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def tell(self) -> int:
+        return self._pos
+    
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        if whence == os.SEEK_CUR:
+            offset += self._pos
+        elif whence == os.SEEK_END:
+            offset += len(self._view)
+        self._pos = max(0, offset)
+        return self._pos
+    
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        data = bytes(self._view[self._pos:end])
+        self._pos = max(self._pos, end)
+        return data
+    
+    def readinto(self, buffer) -> int:
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+    
+    def close(self) -> None:
+        if not self.closed:
+            self._view.release()
+        super().close()
+
+
 class FastParse:
     __slots__ = ("_config", "_extension_map")
     
@@ -218,6 +276,292 @@ class FastParse:
         
         return self.parse(content, path.name)
     
+    def iter_parse(
+        self,
+        content: Union[bytes, BinaryIO, str, mmap.mmap, memoryview],
+        filename: str,
+        mime_type: Optional[str] = None,
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Iterator[ParseSegment]:
+        """
+        Parse incrementally, yielding one segment per PDF page, slide, block of
+        spreadsheet rows or chunk of text.
+        
+        Input is read through a seekable stream (an mmap works as-is), so the
+        file is never copied into memory as a whole. Parsing stops once
+        max_chars (default: max_text_chars) or max_tokens is reached; the last
+        segment is cut to fit and marked truncated. Formats without a streaming
+        reader are parsed in one go and yielded as a single segment.
+        
+        Raises ParseError for oversized, corrupt or unsupported input.
+        """
+        stream = self._open_stream(content)
+        try:
+            file_size = self._stream_size(stream)
+            if file_size > self._config.max_file_size_bytes:
+                raise ParseError(
+                    f"File exceeds maximum size limit of {self._config.max_file_size_bytes / (1024*1024):.1f}MB",
+                    "FILE_TOO_LARGE",
+                    {"file_size": file_size},
+                )
+            
+            if not mime_type:
+                mime_type, _ = mimetypes.guess_type(filename)
+                mime_type = mime_type or "application/octet-stream"
+            
+            file_type = self.detect_file_type(filename, mime_type)
+            ext = Path(filename).suffix.lower()
+            
+            if file_type == FileType.PDF:
+                segments = self._iter_pdf(stream)
+            elif file_type == FileType.EXCEL and ext in (".xlsx", ".xlsm"):
+                segments = self._iter_xlsx(stream)
+            elif file_type == FileType.EXCEL and ext == ".csv":
+                segments = self._iter_csv(stream)
+            elif file_type == FileType.PRESENTATION and ext == ".pptx":
+                segments = self._iter_pptx(stream)
+            elif file_type == FileType.TEXT:
+                segments = self._iter_text(stream)
+            else:
+                segments = self._iter_whole(stream, filename, mime_type)
+            
+            budget = self._config.max_text_chars if max_chars is None else max_chars
+            if max_tokens is not None:
+                budget = min(budget, max_tokens * self._config.chars_per_token)
+            
+            yield from self._budgeted(segments, budget)
+        finally:
+            if stream is not content:
+                stream.close()
+    
+    def iter_parse_file(
+        self,
+        file_path: Union[str, Path],
+        max_chars: Optional[int] = None,
+        max_tokens: Optional[int] = None,
+    ) -> Iterator[ParseSegment]:
+        """Stream-parse a file on disk through a read-only memory map."""
+        path = Path(file_path)
+        if not path.exists():
+            raise ParseError(f"File not found: {file_path}", "FILE_NOT_FOUND")
+        
+        with open(path, "rb") as f:
+            if path.stat().st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from self.iter_parse(mapped, path.name, max_chars=max_chars, max_tokens=max_tokens)
+    
+    def _open_stream(self, content: Union[bytes, BinaryIO, str, mmap.mmap, memoryview]) -> BinaryIO:
+        if isinstance(content, str):
+            return io.BytesIO(content.encode("utf-8"))
+        if isinstance(content, bytes):
+            return io.BytesIO(content)
+        if isinstance(content, (mmap.mmap, memoryview, bytearray)):
+            return _BufferReader(content)
+        return content
+    
+    def _stream_size(self, stream: BinaryIO) -> int:
+        position = stream.tell()
+        size = stream.seek(0, os.SEEK_END)
+        stream.seek(position)
+        return size
+    
+    def _budgeted(self, segments: Iterator[ParseSegment], budget: int) -> Iterator[ParseSegment]:
+        remaining = budget
+        try:
+            for segment in segments:
+                if len(segment.text) >= remaining:
+                    segment.text = segment.text[:remaining]
+                    segment.truncated = True
+                    segment.warnings.append(f"Content truncated to {budget:,} characters")
+                    yield segment
+                    return
+                remaining -= len(segment.text)
+                yield segment
+        finally:
+            # Release workbooks and readers as soon as the budget is hit
+            segments.close()
+    
+    def _segment(self, index: int, text: str, label: str = "") -> ParseSegment:
+        return ParseSegment(
+            index=index,
+            text=text,
+            label=label,
+            warnings=self._check_script_injection(text),
+        )
+    
+    @staticmethod
+    def _detect_stream_encoding(sample: bytes) -> str:
+        try:
+            # Valid UTF-8 (including plain ASCII) is taken as UTF-8: the sample is only
+            # the head of the file, and chardet would call an ASCII head "ascii"
+            codecs.getincrementaldecoder("utf-8")().decode(sample)
+            return "utf-8"
+        except UnicodeDecodeError:
+            pass
+        try:
+            encoding = chardet.detect(sample).get("encoding") or "utf-8"
+            codecs.lookup(encoding)
+        except Exception:
+            return "utf-8"
+        return "utf-8" if encoding.lower() == "ascii" else encoding
+    
+    def _iter_decoded(self, stream: BinaryIO) -> Iterator[str]:
+        sample = stream.read(10000)
+        decoder = codecs.getincrementaldecoder(self._detect_stream_encoding(sample))()
+        
+        def decode(data: bytes, final: bool = False) -> str:
+            nonlocal decoder
+            try:
+                return decoder.decode(data, final)
+            except UnicodeDecodeError:
+                # The sample didn't represent the rest of the file; finish as UTF-8 like _parse_text
+                decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+                return decoder.decode(data, final)
+        
+        data = sample
+        while data:
+            text = decode(data)
+            if text:
+                yield text
+            data = stream.read(self._config.chunk_size)
+        tail = decode(b"", final=True)
+        if tail:
+            yield tail
+    
+    def _iter_text(self, stream: BinaryIO) -> Iterator[ParseSegment]:
+        for i, text in enumerate(self._iter_decoded(stream)):
+            yield self._segment(i, text)
+    
+    def _iter_csv(self, stream: BinaryIO) -> Iterator[ParseSegment]:
+        block_size = self._config.stream_row_block
+        rows: List[str] = []
+        partial = ""
+        total_rows = 0
+        index = 0
+        
+        def flush() -> ParseSegment:
+            start = total_rows - len(rows) + 1
+            return self._segment(index, "\n".join(rows), f"Rows {start}-{total_rows}")
+        
+        for text in self._iter_decoded(stream):
+            lines = (partial + text).splitlines()
+            partial = lines.pop() if lines and not text.endswith(("\n", "\r")) else ""
+            for line in lines:
+                if total_rows >= self._config.max_excel_rows:
+                    break
+                rows.append(line)
+                total_rows += 1
+                if len(rows) >= block_size:
+                    yield flush()
+                    rows, index = [], index + 1
+            if total_rows >= self._config.max_excel_rows:
+                partial = ""
+                break
+        
+        if partial and total_rows < self._config.max_excel_rows:
+            rows.append(partial)
+            total_rows += 1
+        if rows:
+            yield flush()
+    
+    def _iter_pdf(self, stream: BinaryIO) -> Iterator[ParseSegment]:
+        try:
+            import PyPDF2
+        except ImportError:
+            raise ParseError("PyPDF2 not installed", "MISSING_DEPENDENCY")
+        
+        try:
+            reader = PyPDF2.PdfReader(stream)
+        except Exception as e:
+            raise ParseError(f"Invalid or corrupted PDF: {str(e)}", "INVALID_PDF")
+        
+        pages_to_process = min(len(reader.pages), self._config.max_pdf_pages)
+        for i in range(pages_to_process):
+            try:
+                page_text = reader.pages[i].extract_text() or ""
+            except Exception:
+                page_text = "[Error extracting text from this page]"
+            if page_text.strip():
+                yield self._segment(i, f"--- Page {i + 1} ---\n{page_text}", f"Page {i + 1}")
+    
+    def _iter_xlsx(self, stream: BinaryIO) -> Iterator[ParseSegment]:
+        try:
+            import openpyxl
+        except ImportError:
+            raise ParseError("openpyxl not installed", "MISSING_DEPENDENCY")
+        
+        try:
+            wb = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+        except Exception as e:
+            raise ParseError(f"Invalid or corrupted Excel file: {str(e)}", "INVALID_EXCEL")
+        
+        block_size = self._config.stream_row_block
+        total_rows = 0
+        index = 0
+        try:
+            for sheet_name in wb.sheetnames[:self._config.max_excel_sheets]:
+                header = f"=== Sheet: {sheet_name} ==="
+                rows: List[str] = []
+                first_row = 1
+                sheet_rows = 0
+                
+                for row in wb[sheet_name].iter_rows(values_only=True):
+                    if total_rows >= self._config.max_excel_rows:
+                        break
+                    cells = [str(cell) if cell is not None else "" for cell in row]
+                    if not any(c.strip() for c in cells):
+                        continue
+                    rows.append(" | ".join(cells))
+                    sheet_rows += 1
+                    total_rows += 1
+                    if len(rows) >= block_size:
+                        label = f"{sheet_name} rows {first_row}-{sheet_rows}"
+                        yield self._segment(index, "\n".join([header] + rows), label)
+                        index += 1
+                        rows, first_row = [], sheet_rows + 1
+                
+                if rows:
+                    label = f"{sheet_name} rows {first_row}-{sheet_rows}"
+                    yield self._segment(index, "\n".join([header] + rows), label)
+                    index += 1
+        finally:
+            wb.close()
+    
+    def _iter_pptx(self, stream: BinaryIO) -> Iterator[ParseSegment]:
+        try:
+            from pptx import Presentation
+        except ImportError:
+            raise ParseError("python-pptx not installed", "MISSING_DEPENDENCY")
+        
+        try:
+            prs = Presentation(stream)
+        except Exception as e:
+            raise ParseError(f"Invalid or corrupted PPTX: {str(e)}", "INVALID_PPTX")
+        
+        for i, slide in enumerate(prs.slides):
+            slide_text: List[str] = [f"--- Slide {i + 1} ---"]
+            
+            for shape in slide.shapes:
+                if hasattr(shape, "text") and shape.text.strip():
+                    slide_text.append(shape.text.strip())
+                
+                if shape.has_table:
+                    table_rows = [" | ".join(cell.text.strip() for cell in row.cells) for row in shape.table.rows]
+                    if table_rows:
+                        slide_text.append("[Table]\n" + "\n".join(table_rows))
+            
+            if len(slide_text) > 1:
+                yield self._segment(i, "\n".join(slide_text), f"Slide {i + 1}")
+    
+    def _iter_whole(self, stream: BinaryIO, filename: str, mime_type: str) -> Iterator[ParseSegment]:
+        result = self.parse(stream, filename, mime_type)
+        if not result.success:
+            raise ParseError(result.error or "Parsing failed", "PARSE_ERROR")
+        if result.content:
+            yield ParseSegment(index=0, text=result.content, warnings=list(result.warnings))
+    
     def _check_script_injection(self, content: str) -> List[str]:
         if not self._config.enable_script_detection:
             return []
@@ -889,3 +1233,23 @@ def parse_file(
 ) -> ParseResult:
     return get_parser(config).parse_file(file_path)
 
+
+def iter_parse(
+    content: Union[bytes, BinaryIO, str, mmap.mmap, memoryview],
+    filename: str,
+    mime_type: Optional[str] = None,
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    config: Optional[FastParseConfig] = None,
+) -> Iterator[ParseSegment]:
+    return get_parser(config).iter_parse(content, filename, mime_type, max_chars, max_tokens)
+
+
+def iter_parse_file(
+    file_path: Union[str, Path],
+    max_chars: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    config: Optional[FastParseConfig] = None,
+) -> Iterator[ParseSegment]:
+    return get_parser(config).iter_parse_file(file_path, max_chars, max_tokens)
+
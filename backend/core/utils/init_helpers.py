@@ -28,6 +28,10 @@ async def initialize() -> str:
     
     await retry(lambda: redis.initialize_async())
     await redis.verify_connection()
+    
+    from core.agents.pipeline.slot_manager import load_slot_scripts
+    await load_slot_scripts()
+
     await _db.initialize()
     
     warm_up_tools_cache()
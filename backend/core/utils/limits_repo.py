@@ -30,6 +30,23 @@ async def count_running_agent_runs(account_id: str) -> Dict[str, Any]:
     }
 
 
+async def count_running_agent_runs_by_account() -> Dict[str, int]:
+    sql = """
+    SELECT t.account_id, COUNT(*) as running_count
+    FROM agent_runs ar
+    INNER JOIN threads t ON ar.thread_id = t.thread_id
+    WHERE ar.status = 'running'
+    GROUP BY t.account_id
+    """
+    
+    rows = await execute(sql, {})
+    return {
+        str(row["account_id"]): int(row["running_count"] or 0)
+        for row in rows or []
+        if row.get("account_id")
+    }
+
+
 async def count_agent_runs_24h(account_id: str) -> int:
     twenty_four_hours_ago = datetime.now(timezone.utc) - timedelta(hours=24)
     
@@ -5,17 +5,21 @@ Uses Python's class inheritance to discover all Tool subclasses and extract thei
 Tools are discovered via Tool.__subclasses__() rather than filesystem scanning.
 
 PERFORMANCE OPTIMIZATION:
-- Tool classes are pre-imported at startup via warm_up_tools_cache()
+- With a current build-time manifest (core.tools.tool_manifest), metadata and
+  schemas come from the manifest and tool modules are only imported on activation
+- Without one, tool classes are pre-imported at startup via warm_up_tools_cache()
 - Tool schemas are pre-computed and cached globally to avoid per-request overhead
 - The schema cache uses tool class identity as key for O(1) lookups
 """
 
+import copy
 import importlib
 import inspect
 from typing import Dict, List, Any, Optional, Type
 from pathlib import Path
 
-from core.agentpress.tool import Tool, ToolMetadata, MethodMetadata, ToolSchema
+from core.agentpress.tool import Tool, ToolMetadata, MethodMetadata, ToolSchema, SchemaType
+from core.tools.tool_manifest import get_manifest, get_manifest_tool
 from core.utils.logger import logger
 
 
@@ -66,22 +70,62 @@ def _precompute_schemas_for_class(tool_class: Type[Tool]) -> Dict[str, List[Tool
     return schemas
 
 
+def _registry_name_for_class(tool_class: Type[Tool]) -> Optional[str]:
+    from core.tools.tool_registry import ALL_TOOLS
+
+    for tool_name, module_path, class_name in ALL_TOOLS:
+        if module_path == tool_class.__module__ and class_name == tool_class.__name__:
+            return tool_name
+    return None
+
+
 def get_cached_schemas(tool_class: Type[Tool]) -> Optional[Dict[str, List[ToolSchema]]]:
     """Get pre-computed schemas for a tool class from the global cache.
     
+    Falls back to the tool manifest for classes that were imported lazily.
+    
     Args:
         tool_class: The tool class to get schemas for
         
     Returns:
         Dict mapping method names to schema definitions, or None if not cached
     """
-    return _SCHEMA_CACHE.get(tool_class)
+    schemas = _SCHEMA_CACHE.get(tool_class)
+    if schemas is not None:
+        return schemas
+
+    tool_name = _registry_name_for_class(tool_class)
+    entry = get_manifest_tool(tool_name) if tool_name else None
+    if entry is None:
+        return None
+
+    schemas = {
+        method_name: [ToolSchema(schema_type=SchemaType.OPENAPI, schema=schema) for schema in schema_list]
+        for method_name, schema_list in entry["schemas"].items()
+    }
+    _SCHEMA_CACHE[tool_class] = schemas
+    return schemas
+
+
+def _instantiate_stateless(tool_name: str, tool_class: Type[Tool]) -> Optional[Tool]:
+    """Instantiate a stateless tool if its constructor takes no required args."""
+    sig = inspect.signature(tool_class.__init__)
+    required_params = [
+        p for p in sig.parameters.values()
+        if p.name != 'self' and p.default == inspect.Parameter.empty
+    ]
+    if required_params:
+        return None
+    instance = tool_class()
+    _STATELESS_TOOL_INSTANCES[tool_class] = instance
+    return instance
 
 
 def get_cached_tool_instance(tool_class: Type[Tool]) -> Optional[Tool]:
     """Get a pre-instantiated tool instance if available.
     
     Only works for stateless tools that don't require constructor arguments.
+    When warm-up came from the manifest, the instance is created on first use.
     
     Args:
         tool_class: The tool class to get an instance of
@@ -89,7 +133,18 @@ def get_cached_tool_instance(tool_class: Type[Tool]) -> Optional[Tool]:
     Returns:
         Pre-instantiated tool instance, or None if not cached
     """
-    return _STATELESS_TOOL_INSTANCES.get(tool_class)
+    instance = _STATELESS_TOOL_INSTANCES.get(tool_class)
+    if instance is not None or not _WARMUP_FROM_MANIFEST:
+        return instance
+
+    tool_name = _registry_name_for_class(tool_class)
+    if tool_name not in STATELESS_TOOLS:
+        return None
+    try:
+        return _instantiate_stateless(tool_name, tool_class)
+    except Exception as e:
+        logger.debug(f"Could not instantiate {tool_name}: {e}")
+        return None
 
 
 def _get_all_tool_subclasses(base_class: Type[Tool] = None) -> List[Type[Tool]]:
@@ -142,6 +197,7 @@ def _generate_display_name(name: str) -> str:
 # Cache for discovered tools to avoid repeated expensive imports
 _TOOLS_CACHE = None
 _WARMUP_COMPLETE = False
+_WARMUP_FROM_MANIFEST = False
 
 
 def warm_up_tools_cache():
@@ -156,15 +212,26 @@ def warm_up_tools_cache():
     After warm-up, tool registration is nearly instant as it uses cached schemas
     and can reuse pre-instantiated stateless tools.
     """
-    global _WARMUP_COMPLETE
+    global _WARMUP_COMPLETE, _WARMUP_FROM_MANIFEST
     
     if _WARMUP_COMPLETE:
         logger.debug("Tools already warmed up, skipping")
         return
         
-    logger.info("🔥 Warming up: loading tool classes, schemas, and stateless instances...")
     import time
     start = time.time()
+
+    manifest = get_manifest()
+    if manifest is not None:
+        # Metadata and schemas are served from the manifest; tool modules are
+        # imported (and stateless tools instantiated) on first activation instead
+        _WARMUP_COMPLETE = True
+        _WARMUP_FROM_MANIFEST = True
+        method_count = sum(len(tool["schemas"]) for tool in manifest["tools"].values())
+        logger.info(f"✅ Ready: {len(manifest['tools'])} tools, {method_count} methods from tool manifest in {time.time() - start:.2f}s")
+        return
+
+    logger.info("🔥 Warming up: loading tool classes, schemas, and stateless instances...")
     
     # Step 1: Discover and cache all tool classes
     tools_map = discover_tools()
@@ -186,15 +253,7 @@ def warm_up_tools_cache():
         # Pre-instantiate stateless tools (no constructor args)
         if tool_name in STATELESS_TOOLS and tool_class not in _STATELESS_TOOL_INSTANCES:
             try:
-                # Only instantiate if constructor has no required args (except self)
-                import inspect
-                sig = inspect.signature(tool_class.__init__)
-                required_params = [
-                    p for p in sig.parameters.values() 
-                    if p.name != 'self' and p.default == inspect.Parameter.empty
-                ]
-                if not required_params:
-                    _STATELESS_TOOL_INSTANCES[tool_class] = tool_class()
+                if _instantiate_stateless(tool_name, tool_class) is not None:
                     instance_count += 1
             except Exception as e:
                 logger.debug(f"Could not pre-instantiate {tool_name}: {e}")
@@ -325,6 +384,10 @@ def get_tools_metadata() -> List[Dict[str, Any]]:
     Returns:
         List of tool metadata dicts
     """
+    manifest = get_manifest()
+    if manifest is not None:
+        return [copy.deepcopy(tool["ui"]) for tool in manifest["tools"].values()]
+
     tools_map = discover_tools()
     metadata_list = []
     
@@ -347,6 +410,10 @@ def get_tool_group(tool_name: str) -> Optional[Dict[str, Any]]:
     Returns:
         Tool metadata dict or None
     """
+    if get_manifest() is not None:
+        entry = get_manifest_tool(tool_name)
+        return copy.deepcopy(entry["ui"]) if entry else None
+
     tools_map = discover_tools()
     tool_class = tools_map.get(tool_name)
     
@@ -7,17 +7,21 @@ Provides context for streaming tool outputs back to the frontend in real-time.
 import json
 import asyncio
 from contextvars import ContextVar
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from dataclasses import dataclass
 
 from core.utils.logger import logger
 
+if TYPE_CHECKING:
+    from core.agents.runner.services.stream_writer import ResponseStreamWriter
+
 
 @dataclass
 class ToolOutputStreamingContext:
     agent_run_id: str
     stream_key: str
     tool_call_id: Optional[str] = None
+    stream_writer: Optional["ResponseStreamWriter"] = None
 
 
 _tool_output_streaming_context: ContextVar[Optional[ToolOutputStreamingContext]] = ContextVar(
@@ -29,12 +33,14 @@ _tool_output_streaming_context: ContextVar[Optional[ToolOutputStreamingContext]]
 def set_tool_output_streaming_context(
     agent_run_id: str,
     stream_key: str,
-    tool_call_id: Optional[str] = None
+    tool_call_id: Optional[str] = None,
+    stream_writer: Optional["ResponseStreamWriter"] = None
 ) -> None:
     ctx = ToolOutputStreamingContext(
         agent_run_id=agent_run_id,
         stream_key=stream_key,
-        tool_call_id=tool_call_id
+        tool_call_id=tool_call_id,
+        stream_writer=stream_writer
     )
     _tool_output_streaming_context.set(ctx)
 
@@ -85,6 +91,11 @@ async def stream_tool_output(
         
         logger.debug(f"[TOOL OUTPUT] Writing to stream {ctx.stream_key}: tool_call_id={tool_call_id}, chunk_len={len(output_chunk)}, is_final={is_final}")
         
+        # Go through the run's writer so output stays ordered with the response chunks
+        if ctx.stream_writer:
+            await ctx.stream_writer.publish(message_json, urgent=is_final)
+            return
+        
         await redis.stream_add(
             ctx.stream_key,
             {"data": message_json},
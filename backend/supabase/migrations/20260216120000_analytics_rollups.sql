@@ -0,0 +1,71 @@
+-- Incremental analytics rollups
+-- Per-day counters maintained as agent runs finish, so admin dashboards read a
+-- few thousand rollup rows instead of scanning agent_runs and messages.
+--
+-- Runs are added by the stateless pipeline when they finalize and by a
+-- watermark-driven backfill over agent_runs.completed_at. analytics_rollup_runs
+-- records every run already counted, so the two paths never double count.
+
+-- ============================================================================
+-- TABLES
+-- ============================================================================
+
+-- One row per (UTC day of run start, account)
+CREATE TABLE IF NOT EXISTS analytics_daily_account_rollup (
+    day DATE NOT NULL,
+    account_id UUID NOT NULL,
+    runs INTEGER NOT NULL DEFAULT 0,
+    completed_runs INTEGER NOT NULL DEFAULT 0,
+    failed_runs INTEGER NOT NULL DEFAULT 0,
+    stopped_runs INTEGER NOT NULL DEFAULT 0,
+    tool_calls INTEGER NOT NULL DEFAULT 0,
+    last_run_at TIMESTAMP WITH TIME ZONE,
+    PRIMARY KEY (day, account_id)
+);
+
+-- One row per (day, tool, thread) so distinct-thread counts stay exact
+CREATE TABLE IF NOT EXISTS analytics_daily_tool_rollup (
+    day DATE NOT NULL,
+    tool_name TEXT NOT NULL,
+    thread_id UUID NOT NULL,
+    account_id UUID NOT NULL,
+    calls INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, tool_name, thread_id)
+);
+
+-- Runs already folded into the rollups (pruned once the backfill watermark passes them)
+CREATE TABLE IF NOT EXISTS analytics_rollup_runs (
+    run_id UUID PRIMARY KEY,
+    recorded_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+-- Backfill position: (completed_at, id) of the last agent run scanned
+CREATE TABLE IF NOT EXISTS analytics_rollup_watermarks (
+    name TEXT PRIMARY KEY,
+    watermark TIMESTAMP WITH TIME ZONE NOT NULL,
+    watermark_id UUID NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT NOW()
+);
+
+
+-- ============================================================================
+-- INDEXES
+-- ============================================================================
+
+CREATE INDEX IF NOT EXISTS idx_analytics_account_rollup_account
+    ON analytics_daily_account_rollup(account_id, day DESC);
+CREATE INDEX IF NOT EXISTS idx_analytics_rollup_runs_recorded
+    ON analytics_rollup_runs(recorded_at);
+-- Backfill scan: WHERE (completed_at, id) > watermark ORDER BY completed_at, id
+CREATE INDEX IF NOT EXISTS idx_agent_runs_completed_at_id
+    ON agent_runs(completed_at, id) WHERE completed_at IS NOT NULL;
+
+
+-- ============================================================================
+-- ROW LEVEL SECURITY
+-- ============================================================================
+
+ALTER TABLE analytics_daily_account_rollup ENABLE ROW LEVEL SECURITY;
+ALTER TABLE analytics_daily_tool_rollup ENABLE ROW LEVEL SECURITY;
+ALTER TABLE analytics_rollup_runs ENABLE ROW LEVEL SECURITY;
+ALTER TABLE analytics_rollup_watermarks ENABLE ROW LEVEL SECURITY;
@@ -0,0 +1,22 @@
+-- Use case embedding cache
+-- Embeddings of the normalized use_case_category text used by the admin
+-- use-case clustering. Analyzed conversations repeat a small set of category
+-- strings, so the cache is keyed by text hash and shared across rows.
+-- Vectors are stored as little-endian float32 bytes and loaded straight into NumPy.
+
+CREATE TABLE IF NOT EXISTS use_case_embeddings (
+    text_hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    text TEXT NOT NULL,
+    dims INTEGER NOT NULL,
+    embedding BYTEA NOT NULL,
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
+    PRIMARY KEY (model, text_hash)
+);
+
+-- Clustering aggregates categories over an analyzed_at window
+CREATE INDEX IF NOT EXISTS idx_conv_analytics_analyzed_category
+    ON conversation_analytics(analyzed_at, use_case_category)
+    WHERE use_case_category IS NOT NULL AND use_case_category <> '';
+
+ALTER TABLE use_case_embeddings ENABLE ROW LEVEL SECURITY;
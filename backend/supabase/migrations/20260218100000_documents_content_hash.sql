@@ -0,0 +1,13 @@
+-- Incremental thread chunk embeddings
+-- Each chunk in documents records a hash of its normalized text. Re-embedding a
+-- thread only embeds chunks whose hash is new, deletes chunks that disappeared
+-- and keeps the rest. Rows from before this migration have no hash and are
+-- replaced the next time their thread is embedded.
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+-- Upsert target for the bulk writer; also serves the per-thread hash lookup
+CREATE UNIQUE INDEX IF NOT EXISTS idx_documents_account_thread_hash
+    ON documents(account_id, thread_id, content_hash);
+
+COMMENT ON COLUMN documents.content_hash IS 'sha256 of the normalized chunk text; unchanged chunks are not re-embedded';
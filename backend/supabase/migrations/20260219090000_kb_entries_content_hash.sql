@@ -0,0 +1,9 @@
+-- Knowledge base entry content hashes
+-- Sandboxes keep a manifest of the KB files they hold, keyed by path and
+-- content hash, so global_kb_sync only transfers files that were added or
+-- changed. Entries from before this migration have no hash; the sync falls back
+-- to their storage path, size and updated_at.
+
+ALTER TABLE knowledge_base_entries ADD COLUMN IF NOT EXISTS content_hash TEXT;
+
+COMMENT ON COLUMN knowledge_base_entries.content_hash IS 'sha256 of the uploaded file bytes; sandbox KB sync skips files whose hash is unchanged';
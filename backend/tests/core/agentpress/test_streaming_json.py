@@ -0,0 +1,84 @@
+"""
+Incremental JSON parser tests
+
+Verify that IncrementalJSONParser tracks completion and top-level values
+correctly when tool-call arguments arrive in arbitrary deltas.
+
+Run with: pytest tests/core/agentpress/test_streaming_json.py -v
+"""
+
+import sys
+import os
+import json
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+from core.agentpress.streaming_json import IncrementalJSONParser
+from core.agentpress.native_tool_parser import is_tool_call_complete
+
+
+def _feed(text: str, step: int) -> IncrementalJSONParser:
+    parser = IncrementalJSONParser()
+    for i in range(0, len(text), step):
+        parser.feed(text[i:i + step])
+    return parser
+
+
+def test_completes_only_when_root_object_closes():
+    args = json.dumps({"path": "a.txt", "content": "x {\"}\" \\ y" * 50, "nested": {"a": [1, {"b": "}"}]}})
+    for step in (1, 3, 7, 64):
+        parser = IncrementalJSONParser()
+        for i in range(0, len(args), step):
+            assert not parser.complete
+            parser.feed(args[i:i + step])
+        assert parser.complete
+        assert parser.value == json.loads(args)
+        assert parser.text == args
+
+
+def test_partial_keys_and_values():
+    args = json.dumps({"tool_name": "search", "args": {"query": "a, b"}})
+    cut = args.index('"query"') + 5
+    parser = _feed(args[:cut], 2)
+
+    assert parser.partial_keys == ["tool_name", "args"]
+    assert parser.string_value("tool_name") == "search"
+    assert parser.value_text("args") == args[args.index('{"query'):cut]
+    assert not parser.complete
+
+    parser.feed(args[cut:])
+    assert parser.complete
+    assert json.loads(parser.value_text("args")) == {"query": "a, b"}
+
+
+def test_non_object_and_trailing_garbage_never_complete():
+    assert not _feed('["a", "b"]', 2).complete
+    assert not _feed('"text"', 1).complete
+    assert not _feed('{"a": 1} x', 3).complete
+    assert _feed(' {"a": 1}  ', 3).complete
+    assert not _feed('{"a": tru}', 3).complete
+
+
+def test_text_from_returns_only_the_unsent_tail():
+    args = json.dumps({"path": "a.txt", "content": "é" * 40})
+    for step in (1, 5, 16):
+        parser = IncrementalJSONParser()
+        sent = 0
+        streamed = []
+        for i in range(0, len(args), step):
+            parser.feed(args[i:i + step])
+            streamed.append(parser.text_from(sent))
+            sent = len(parser)
+        assert "".join(streamed) == args
+        assert parser.text_from(3) == args[3:]
+        assert parser.text_from(len(args)) == ""
+
+
+def test_tool_call_completion_reads_the_parser_not_the_buffer():
+    entry = {"id": "call_1", "function": {"name": "create_file", "arguments": ""}}
+    parser = _feed('{"path": "a.txt"', 4)
+
+    assert not is_tool_call_complete(entry, parser)
+    parser.feed("}")
+    assert is_tool_call_complete(entry, parser)
+    assert not is_tool_call_complete({**entry, "id": ""}, parser)
@@ -0,0 +1,216 @@
+"""
+Token accounting tests
+
+Verify that TokenAccountant's incremental counts match a full recount
+(ContextManager.count_tokens vs count_tokens_exact), that edited or removed
+messages are never served from a stale cache entry, and that provider
+calibration runs in the background and scales later counts.
+
+Run with: pytest tests/core/agentpress/test_token_accounting.py -v
+"""
+
+import sys
+import os
+import asyncio
+import pytest
+import litellm
+from unittest.mock import AsyncMock, MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.agentpress.token_accounting import TokenAccountant
+
+# Model to use for token counting (gpt-4 uses cl100k_base tokenizer)
+TOKEN_COUNT_MODEL = "gpt-4"
+
+SYSTEM_PROMPT = {"role": "system", "content": "You are a helpful assistant."}
+
+
+def _conversation():
+    return [
+        {"message_id": "m1", "role": "user", "content": "Summarise the attached report, please."},
+        {
+            "message_id": "m2",
+            "role": "assistant",
+            "content": "",
+            "tool_calls": [{
+                "id": "call_1",
+                "type": "function",
+                "function": {"name": "read_file", "arguments": "{\"path\": \"report.md\"}"},
+            }],
+        },
+        {"message_id": "m3", "role": "tool", "tool_call_id": "call_1", "content": "Quarterly revenue grew 12% — détails inclus. " * 20},
+        {"message_id": "m4", "role": "assistant", "content": "Revenue grew 12% quarter over quarter."},
+    ]
+
+
+def _full_count(messages):
+    return litellm.token_counter(model=TOKEN_COUNT_MODEL, messages=messages)
+
+
+@pytest.fixture
+def accountant():
+    return TokenAccountant()
+
+
+@pytest.fixture
+def context_manager(accountant):
+    # We need to import here to avoid import issues before path setup
+    from core.agentpress.context_manager import ContextManager
+
+    with patch("core.agentpress.context_manager.token_accountant", accountant):
+        yield ContextManager(token_threshold=120000, db=MagicMock())
+
+
+class TestIncrementalCounts:
+
+    @pytest.mark.asyncio
+    async def test_matches_exact_count(self, context_manager, accountant):
+        messages = _conversation()
+
+        incremental = await context_manager.count_tokens(TOKEN_COUNT_MODEL, messages, SYSTEM_PROMPT)
+        exact = await context_manager.count_tokens_exact(TOKEN_COUNT_MODEL, messages, SYSTEM_PROMPT)
+        assert incremental == exact
+
+        messages.append({"message_id": "m5", "role": "user", "content": "And the margins?"})
+        misses = accountant.misses
+        incremental = await context_manager.count_tokens(TOKEN_COUNT_MODEL, messages, SYSTEM_PROMPT)
+        exact = await context_manager.count_tokens_exact(TOKEN_COUNT_MODEL, messages, SYSTEM_PROMPT)
+        assert incremental == exact
+        assert accountant.misses == misses + 1
+
+    @pytest.mark.asyncio
+    async def test_matches_full_recount(self, accountant):
+        messages = _conversation()
+
+        assert await accountant.count(TOKEN_COUNT_MODEL, messages, SYSTEM_PROMPT) == _full_count([SYSTEM_PROMPT] + messages)
+        assert await accountant.count(TOKEN_COUNT_MODEL, messages) == _full_count(messages)
+
+    @pytest.mark.asyncio
+    async def test_only_new_messages_are_tokenized(self, accountant):
+        messages = _conversation()
+        await accountant.count(TOKEN_COUNT_MODEL, messages)
+
+        messages.append({"message_id": "m5", "role": "user", "content": "Thanks!"})
+        with patch.object(TokenAccountant, "_tokenize_message", wraps=TokenAccountant._tokenize_message) as tokenize:
+            total = await accountant.count(TOKEN_COUNT_MODEL, messages)
+
+        assert tokenize.call_count == 1
+        assert tokenize.call_args.args[1]["message_id"] == "m5"
+        assert total == _full_count(messages)
+        assert accountant.get_stats()["hits"] == len(messages) - 1
+
+    def test_message_tokens_is_cached(self, accountant):
+        message = _conversation()[2]
+        tokens = accountant.message_tokens(TOKEN_COUNT_MODEL, message)
+
+        assert tokens == _full_count([message]) - _full_count([])
+        assert accountant.message_tokens(TOKEN_COUNT_MODEL, message) == tokens
+        assert (accountant.hits, accountant.misses) == (1, 1)
+
+
+class TestCacheInvalidation:
+
+    @pytest.mark.asyncio
+    async def test_edited_message_is_recounted(self, accountant):
+        messages = _conversation()
+        before = await accountant.count(TOKEN_COUNT_MODEL, messages)
+
+        # Same message_id, compressed content
+        messages[2] = {**messages[2], "content": "Quarterly revenue grew 12%."}
+        after = await accountant.count(TOKEN_COUNT_MODEL, messages)
+
+        assert after < before
+        assert after == _full_count(messages)
+
+    @pytest.mark.asyncio
+    async def test_removed_message_drops_out_of_total(self, accountant):
+        messages = _conversation()
+        await accountant.count(TOKEN_COUNT_MODEL, messages)
+
+        del messages[2:]
+        misses = accountant.misses
+        assert await accountant.count(TOKEN_COUNT_MODEL, messages) == _full_count(messages)
+        assert accountant.misses == misses
+
+    @pytest.mark.asyncio
+    async def test_counts_stay_exact_past_cache_capacity(self, accountant):
+        messages = _conversation()
+        accountant.MAX_CACHED_MESSAGES = 2
+
+        assert await accountant.count(TOKEN_COUNT_MODEL, messages) == _full_count(messages)
+        assert accountant.get_stats()["cached_messages"] == 2
+
+    def test_counts_are_per_model(self, accountant):
+        message = _conversation()[0]
+        accountant.message_tokens(TOKEN_COUNT_MODEL, message)
+        accountant.message_tokens("gpt-3.5-turbo", message)
+
+        assert accountant.misses == 2
+
+
+class TestCalibration:
+
+    @pytest.mark.asyncio
+    async def test_runs_in_background_and_scales_later_counts(self, accountant):
+        messages = _conversation()
+        local = _full_count(messages)
+        release = asyncio.Event()
+
+        async def provider_count():
+            await release.wait()
+            return int(local * 1.5)
+
+        # Returns the local count without waiting for the provider
+        assert await accountant.count(TOKEN_COUNT_MODEL, messages, calibrate=provider_count) == local
+
+        release.set()
+        await accountant._calibration_tasks[TOKEN_COUNT_MODEL]
+        assert accountant.get_stats()["calibration"][TOKEN_COUNT_MODEL] == pytest.approx(1.5, abs=0.01)
+        assert await accountant.count(TOKEN_COUNT_MODEL, messages) == round(local * accountant._calibration[TOKEN_COUNT_MODEL])
+
+    @pytest.mark.asyncio
+    async def test_scheduled_at_most_once_per_interval(self, accountant):
+        messages = _conversation()
+        calibrate = AsyncMock(return_value=_full_count(messages))
+
+        await accountant.count(TOKEN_COUNT_MODEL, messages, calibrate=calibrate)
+        await accountant._calibration_tasks[TOKEN_COUNT_MODEL]
+        await accountant.count(TOKEN_COUNT_MODEL, messages, calibrate=calibrate)
+
+        assert calibrate.await_count == 1
+
+    @pytest.mark.asyncio
+    async def test_factor_is_smoothed_and_clamped(self, accountant):
+        messages = _conversation()
+        local = _full_count(messages)
+
+        async def calibrate_with(remote):
+            accountant._last_calibrated_at.clear()
+            await accountant.count(TOKEN_COUNT_MODEL, messages, calibrate=AsyncMock(return_value=remote))
+            await accountant._calibration_tasks[TOKEN_COUNT_MODEL]
+            return accountant._calibration[TOKEN_COUNT_MODEL]
+
+        assert await calibrate_with(local * 10) == TokenAccountant.MAX_CALIBRATION_FACTOR
+        assert await calibrate_with(local) == pytest.approx(1.5)
+
+    @pytest.mark.asyncio
+    async def test_failed_calibration_keeps_local_count(self, accountant):
+        messages = _conversation()
+        calibrate = AsyncMock(side_effect=RuntimeError("count_tokens unavailable"))
+
+        await accountant.count(TOKEN_COUNT_MODEL, messages, calibrate=calibrate)
+        await accountant._calibration_tasks[TOKEN_COUNT_MODEL]
+
+        assert accountant.get_stats()["calibration"] == {}
+        assert await accountant.count(TOKEN_COUNT_MODEL, messages) == _full_count(messages)
@@ -0,0 +1,155 @@
+"""
+Agent run stream resume tests
+
+Drive stream_agent_run against a fakeredis stream and verify that every event
+carries its stream entry id, that resuming from `last_id` or `Last-Event-ID`
+replays exactly the later entries once (catch-up and hub queue overlap), that
+malformed ids fall back to a full replay, and that relay mode forwards the
+stored payloads unchanged.
+
+Run with: pytest tests/core/test_agent_run_stream.py -v
+"""
+
+import sys
+import os
+import json
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from core.services import redis as redis_module
+from core.services.redis import StreamHub
+from core.agents import api as agents_api
+
+RUN_ID = "run-1"
+STREAM = f"agent_run:{RUN_ID}:stream"
+TERMINAL = json.dumps({"type": "status", "status": "completed"})
+
+
+class _Request:
+    def __init__(self, headers=None):
+        self.headers = headers or {}
+
+
+@pytest.fixture
+async def fake_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    hub = StreamHub(client)
+    run_data = {"thread_id": "thread-1", "thread_account_id": "user-1", "status": "running"}
+    with patch.object(redis_module.redis, "_client", client), \
+            patch.object(redis_module.redis, "_initialized", True), \
+            patch.object(redis_module.redis, "_hub", hub), \
+            patch.object(agents_api, "get_user_id_from_stream_auth", AsyncMock(return_value="user-1")), \
+            patch("core.cache.runtime_cache.get_agent_run_stream_data", AsyncMock(return_value=run_data)):
+        yield client
+    await hub.close()
+
+
+async def _append(client, payloads):
+    return [await client.xadd(STREAM, {"data": payload}) for payload in payloads]
+
+
+def _chunk(i):
+    return json.dumps({"type": "assistant", "content": f"chunk {i}"})
+
+
+def _parse(frame):
+    fields = dict(line.split(": ", 1) for line in frame.strip().split("\n"))
+    return fields.get("id"), fields["data"]
+
+
+async def _read(response, count=None):
+    """Collect (id, data) frames; stop after `count` frames or when the stream ends."""
+    frames = []
+    iterator = response.body_iterator
+    while count is None or len(frames) < count:
+        try:
+            frame = await asyncio.wait_for(iterator.__anext__(), timeout=5)
+        except StopAsyncIteration:
+            break
+        frames.append(_parse(frame))
+    return frames
+
+
+@pytest.mark.asyncio
+async def test_events_carry_stream_ids(fake_client):
+    ids = await _append(fake_client, [_chunk(0), _chunk(1), TERMINAL])
+
+    frames = await _read(await agents_api.stream_agent_run(RUN_ID, request=_Request()))
+
+    assert [frame_id for frame_id, _ in frames] == ids
+    assert [json.loads(data)["_event_id"] for _, data in frames] == ids
+
+
+@pytest.mark.asyncio
+async def test_resume_replays_later_entries_exactly_once(fake_client):
+    ids = await _append(fake_client, [_chunk(i) for i in range(5)])
+
+    response = await agents_api.stream_agent_run(RUN_ID, last_id=ids[1], request=_Request())
+    frames = await _read(response, count=3)
+    # Written after catch-up: reaches the client through the hub queue, which
+    # also re-delivers the catch-up entries that must be skipped
+    ids += await _append(fake_client, [_chunk(5), TERMINAL])
+    frames += await _read(response)
+
+    assert [frame_id for frame_id, _ in frames] == ids[2:]
+
+
+@pytest.mark.asyncio
+async def test_last_event_id_header_resumes(fake_client):
+    ids = await _append(fake_client, [_chunk(0), _chunk(1), _chunk(2), TERMINAL])
+
+    request = _Request({"last-event-id": ids[0]})
+    frames = await _read(await agents_api.stream_agent_run(RUN_ID, request=request))
+
+    assert [frame_id for frame_id, _ in frames] == ids[1:]
+
+
+@pytest.mark.asyncio
+async def test_query_last_id_wins_over_header(fake_client):
+    ids = await _append(fake_client, [_chunk(0), _chunk(1), _chunk(2), TERMINAL])
+
+    request = _Request({"last-event-id": ids[0]})
+    frames = await _read(await agents_api.stream_agent_run(RUN_ID, last_id=ids[2], request=request))
+
+    assert [frame_id for frame_id, _ in frames] == ids[3:]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("bad_id", ["not-an-id", "$", "1-2-3", "(0-1"])
+async def test_malformed_last_id_replays_from_start(fake_client, bad_id):
+    ids = await _append(fake_client, [_chunk(0), _chunk(1), TERMINAL])
+
+    frames = await _read(await agents_api.stream_agent_run(RUN_ID, last_id=bad_id, request=_Request()))
+
+    assert [frame_id for frame_id, _ in frames] == ids
+
+
+@pytest.mark.asyncio
+async def test_relay_forwards_stored_payloads_unchanged(fake_client):
+    # Odd spacing, key order and escapes that a json round trip would normalise
+    stored = [
+        '{"content":  "caf\\u00e9",   "type": "assistant"}',
+        '{"type": "tool", "content": "{\\"a\\": 1}", "metadata": {}}',
+        TERMINAL,
+    ]
+    ids = await _append(fake_client, stored)
+
+    response = await agents_api.stream_agent_run(RUN_ID, relay=True, request=_Request())
+    frames = await _read(response)
+
+    assert frames == list(zip(ids, stored))
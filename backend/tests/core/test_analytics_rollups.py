@@ -0,0 +1,58 @@
+"""
+Analytics rollup tests
+
+Verify status bucketing and that a pipeline run is recorded against the UTC day
+of its start with its tool counts.
+
+Run with: pytest tests/core/test_analytics_rollups.py -v
+"""
+
+import sys
+import os
+import asyncio
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.analytics import rollups
+
+
+def test_status_bucket():
+    assert rollups.status_bucket("completed") == "completed"
+    assert rollups.status_bucket("stopped") == "stopped"
+    assert rollups.status_bucket("cancelled") == "stopped"
+    assert rollups.status_bucket("error") == "failed"
+    assert rollups.status_bucket(None) == "failed"
+
+
+def test_record_run_uses_utc_day_and_tool_counts():
+    # 00:30 in Berlin is still the previous day in UTC
+    started_at = datetime(2026, 2, 10, 0, 30, tzinfo=timezone(timedelta(hours=1)))
+    execute_mutate = AsyncMock(return_value=[{"claimed": 1}])
+
+    with patch("core.services.db.execute_mutate", execute_mutate):
+        claimed = asyncio.run(rollups.record_run(
+            run_id="r1",
+            account_id="a1",
+            thread_id="t1",
+            status="completed",
+            started_at=started_at,
+            tool_counts={"web_search": 2, "create_file": 1, "": 4, "noop": 0},
+        ))
+
+    assert claimed is True
+    params = execute_mutate.call_args.args[1]
+    assert params["day"] == "2026-02-09"
+    assert params["tools"] == {"web_search": 2, "create_file": 1}
+    assert params["tool_calls"] == 3
+    assert (params["completed"], params["failed"], params["stopped"]) == (1, 0, 0)
+
+
+def test_record_run_reports_already_counted():
+    execute_mutate = AsyncMock(return_value=[{"claimed": 0}])
+    with patch("core.services.db.execute_mutate", execute_mutate):
+        claimed = asyncio.run(rollups.record_run(
+            "r1", "a1", "t1", "failed", datetime.now(timezone.utc),
+        ))
+    assert claimed is False
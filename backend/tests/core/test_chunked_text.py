@@ -0,0 +1,154 @@
+"""
+Chunked content buffer tests
+
+Verify ChunkedText truncation at max_length, getvalue compaction and tail
+reads across fragment boundaries, and that a generation which runs out of
+tokens while repeating itself (seen through the content tail) stops
+auto-continue.
+
+Run with: pytest tests/core/test_chunked_text.py -v
+"""
+
+import sys
+import os
+import pytest
+from unittest.mock import MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.agents.pipeline.stateless.state import ChunkedText, RunState
+from core.agents.pipeline.stateless.coordinator.auto_continue import AutoContinueChecker
+from core.agents.pipeline.stateless.coordinator.message_builder import MessageBuilder
+from core.agents.pipeline.stateless.coordinator.response_processor import (
+    LENGTH_LOOP_TAIL_CHARS,
+    ResponseProcessor,
+    _is_looping,
+)
+
+
+def _buffer(*fragments):
+    buffer = ChunkedText()
+    for fragment in fragments:
+        assert buffer.append(fragment)
+    return buffer
+
+
+class TestAppend:
+
+    def test_tracks_length_without_joining(self):
+        buffer = _buffer("héllo ", "", "wörld")
+
+        assert len(buffer) == 11
+        assert buffer._chunks == ["héllo ", "wörld"]
+        assert buffer
+
+    def test_truncates_at_max_length(self):
+        buffer = _buffer("abcd")
+
+        assert not buffer.append("efgh", max_length=6)
+        assert buffer.getvalue() == "abcdef"
+        assert len(buffer) == 6
+
+    def test_full_buffer_drops_further_text(self):
+        buffer = _buffer("abcdef")
+
+        assert not buffer.append("g", max_length=6)
+        assert buffer.append("", max_length=6)
+        assert buffer.getvalue() == "abcdef"
+
+    def test_exact_fit_is_not_truncated(self):
+        buffer = _buffer("abc")
+
+        assert buffer.append("def", max_length=6)
+        assert buffer.getvalue() == "abcdef"
+
+    def test_clear(self):
+        buffer = _buffer("abc", "def")
+        buffer.clear()
+
+        assert not buffer
+        assert buffer.getvalue() == ""
+        assert buffer.tail(3) == ""
+
+
+class TestGetvalue:
+
+    def test_compacts_fragments(self):
+        buffer = _buffer("a", "b", "c")
+
+        assert buffer.getvalue() == "abc"
+        assert buffer._chunks == ["abc"]
+        assert buffer.getvalue() == "abc"
+
+    def test_appends_after_compaction(self):
+        buffer = _buffer("a", "b")
+        buffer.getvalue()
+        buffer.append("c")
+
+        assert buffer._chunks == ["ab", "c"]
+        assert buffer.getvalue() == "abc"
+        assert len(buffer) == 3
+
+
+class TestTail:
+
+    @pytest.mark.parametrize("n", range(1, 12))
+    def test_matches_suffix_of_full_value(self, n):
+        buffer = _buffer("abc", "de", "f", "ghij")
+
+        assert buffer.tail(n) == "abcdefghij"[-n:]
+
+    def test_only_joins_the_fragments_it_needs(self):
+        buffer = _buffer("x" * 1000, "ab", "cd")
+
+        assert buffer.tail(3) == "bcd"
+        # Reading the tail doesn't compact the buffer
+        assert buffer._chunks == ["x" * 1000, "ab", "cd"]
+
+    def test_longer_than_buffer(self):
+        assert _buffer("ab", "c").tail(10) == "abc"
+
+    def test_zero_or_negative_is_empty(self):
+        assert _buffer("abc").tail(0) == ""
+        assert _buffer("abc").tail(-1) == ""
+
+
+class TestLengthLoopGuard:
+
+    def test_detects_repeated_unit(self):
+        assert _is_looping(("I will now check the file. " * 200)[-LENGTH_LOOP_TAIL_CHARS:])
+        assert _is_looping("\n" * LENGTH_LOOP_TAIL_CHARS)
+
+    def test_ignores_ordinary_text(self):
+        text = " ".join(f"line {i}" for i in range(1000))[-LENGTH_LOOP_TAIL_CHARS:]
+
+        assert not _is_looping(text)
+        assert not _is_looping("ab" * 10)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("content, terminates", [
+        ("Let me think about this again. " * 200, True),
+        (" ".join(f"step {i} done." for i in range(1000)), False),
+    ])
+    async def test_length_finish_stops_auto_continue_on_loop(self, content, terminates):
+        state = RunState("run-1", "thread-1", "project-1", "account-1")
+        for i in range(0, len(content), 7):
+            state.append_content(content[i:i + 7])
+        # Keep the WAL flush out of this test
+        state.trigger_flush = MagicMock()
+        builder = MessageBuilder(lambda: 0, lambda: "thread-1", lambda: "thread-run-1")
+        processor = ResponseProcessor(state, builder, tool_executor=None)
+
+        messages = [msg async for msg in processor._handle_finish_reason("length", [], {}, "", "response-1")]
+
+        assert AutoContinueChecker.check(messages[-1], count=0, max_continues=5) == (not terminates, terminates)
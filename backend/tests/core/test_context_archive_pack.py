@@ -0,0 +1,160 @@
+"""
+Context archive pack tests
+
+Verify that a batch pack round-trips individual files through its offset index,
+that archived reads pull a single member out inside the sandbox, and that
+manifest.jsonl deltas fold on top of a legacy manifest.json.
+
+Run with: pytest tests/core/test_context_archive_pack.py -v
+"""
+
+import sys
+import os
+import json
+import subprocess
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.agents.pipeline.stateless.context.archiver import (
+    ContextArchiver,
+    pack_batch,
+    read_pack_index,
+    read_pack_member,
+)
+
+
+class _FakeFS:
+    def __init__(self, files):
+        self.files = files
+
+    async def download_file(self, path):
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return self.files[path]
+
+
+class _FakeProcess:
+    """Runs commands locally with /workspace mapped to a temp directory."""
+
+    def __init__(self, root):
+        self.root = root
+        self.commands = []
+
+    async def exec(self, command, timeout=None):
+        self.commands.append(command)
+        result = subprocess.run(
+            command.replace("/workspace/", f"{self.root}/"), shell=True, capture_output=True, text=True
+        )
+        return type("Result", (), {"exit_code": result.returncode, "result": result.stdout})()
+
+
+class _FakeSandbox:
+    id = "sandbox-1"
+
+    def __init__(self, files, root=None):
+        self.fs = _FakeFS(files)
+        self.process = _FakeProcess(root)
+
+
+def _write_pack(root, batch_number, blob):
+    path = root / ".kortix" / "context" / "messages" / f"batch_{batch_number:03d}.pack"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(blob)
+
+
+def test_pack_round_trips_single_members():
+    files = {
+        "MSG-001_user.md": b"hello",
+        "MSG-002_tool.md": b"x" * 50_000,
+        "index.md": b"# File Index",
+    }
+    blob = pack_batch(files, {"m1": "MSG-001_user.md"}, batch_number=3)
+
+    index = read_pack_index(blob)
+    assert index["batch"] == 3
+    assert index["messages"] == {"m1": "MSG-001_user.md"}
+    for name, data in files.items():
+        assert read_pack_member(blob, name, index) == data
+    assert read_pack_member(blob, "missing.md", index) is None
+
+
+def test_parse_archive_path():
+    assert ContextArchiver.parse_archive_path(
+        "/workspace/.kortix/context/messages/batch_012/MSG-040_tool.md"
+    ) == (12, "MSG-040_tool.md")
+    assert ContextArchiver.parse_archive_path("src/main.py") is None
+
+
+@pytest.mark.asyncio
+async def test_manifest_folds_legacy_and_deltas():
+    base = "/workspace/.kortix/context"
+    legacy = {
+        "thread_id": "t1",
+        "total_archived": 2,
+        "batches": [{"batch": 1, "message_count": 2, "message_ids": ["a", "b"]}],
+        "key_facts": {"lang": "python"},
+    }
+    deltas = [
+        {"batch": 1, "message_count": 2, "message_ids": ["a", "b"]},
+        {"batch": 2, "message_count": 3, "message_ids": ["c", "d", "e"], "key_facts": {"db": "postgres"}},
+    ]
+    sandbox = _FakeSandbox({
+        f"{base}/manifest.json": json.dumps(legacy).encode(),
+        f"{base}/manifest.jsonl": ("\n".join(json.dumps(d) for d in deltas) + "\n{\"batch\": 3").encode(),
+    })
+
+    manifest = await ContextArchiver("p1", "a1", "t1")._get_manifest(sandbox)
+
+    assert [b["batch"] for b in manifest["batches"]] == [1, 2]
+    assert manifest["total_archived"] == 5
+    assert manifest["key_facts"] == {"lang": "python", "db": "postgres"}
+
+
+@pytest.mark.asyncio
+async def test_read_archived_message_extracts_member_in_sandbox(tmp_path):
+    base = "/workspace/.kortix/context"
+    blob = pack_batch(
+        {"MSG-001_user.md": "archived text ✓".encode(), "MSG-002_tool.md": b"x" * 50_000},
+        {"m1": "MSG-001_user.md"},
+        batch_number=1,
+    )
+    _write_pack(tmp_path, 1, blob)
+    sandbox = _FakeSandbox({
+        f"{base}/manifest.jsonl": json.dumps({"batch": 1, "message_count": 1, "message_ids": ["m1", "m2"]}).encode(),
+    }, root=tmp_path)
+
+    archiver = ContextArchiver("p1", "a1", "t1")
+    assert await archiver.read_archived_message(sandbox, "m1") == "archived text ✓"
+    # Listed in the manifest but missing from the pack index, and never archived
+    assert await archiver.read_archived_message(sandbox, "m2") is None
+    assert await archiver.read_archived_message(sandbox, "m3") is None
+
+
+@pytest.mark.asyncio
+async def test_read_archived_file_prefers_expanded_copy(tmp_path):
+    expanded = "/workspace/.kortix/context/messages/batch_002/MSG-004_tool.md"
+    sandbox = _FakeSandbox({expanded: b"expanded copy"}, root=tmp_path)
+
+    assert await ContextArchiver.read_archived_file(sandbox, 2, "MSG-004_tool.md") == "expanded copy"
+    assert sandbox.process.commands == []
+
+
+@pytest.mark.asyncio
+async def test_read_archived_file_falls_back_to_pack(tmp_path):
+    _write_pack(tmp_path, 2, pack_batch({"MSG-004_tool.md": b"from pack"}, {}, batch_number=2))
+    sandbox = _FakeSandbox({}, root=tmp_path)
+
+    assert await ContextArchiver.read_archived_file(sandbox, 2, "MSG-004_tool.md") == "from pack"
+    assert await ContextArchiver.read_archived_file(sandbox, 2, "missing.md") is None
+    assert await ContextArchiver.read_archived_file(sandbox, 9, "MSG-004_tool.md") is None
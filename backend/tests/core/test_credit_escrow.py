@@ -0,0 +1,195 @@
+"""
+Credit escrow tests
+
+Verify micro-dollar conversion, that a run's escrow keys share a hash slot, and
+(against fakeredis) idempotent accrual, early settlement at the reservation,
+recovery of an in-doubt settlement and close() keeping a failed settlement.
+
+Run with: pytest tests/core/test_credit_escrow.py -v
+"""
+
+import sys
+import os
+import asyncio
+import time
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.billing.credits import escrow
+from core.services import redis as redis_module
+
+
+def test_micros_round_trip():
+    assert escrow.to_micros(Decimal("0.123456")) == 123456
+    assert escrow.to_micros(Decimal("0.0000005")) == 1
+    assert escrow.to_micros(0.2) == 200000
+    assert escrow.from_micros(253456) == Decimal("0.253456")
+
+
+def test_cent_quantum_matches_ledger_precision():
+    assert escrow.from_micros(escrow.CENT_MICROS) == Decimal("0.01")
+
+
+def test_run_keys_share_hash_tag():
+    assert escrow._escrow_key("r1") == "credit_escrow:{r1}"
+    assert escrow._seen_key("r1") == "credit_escrow:{r1}:seen"
+
+
+@pytest.fixture
+def fake_client():
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch.object(redis_module.redis, "_client", client), \
+            patch.object(redis_module.redis, "_initialized", True):
+        yield client
+
+
+async def _open(credit_escrow: escrow.CreditEscrow, run_id: str, balance: str = "1.00") -> Decimal:
+    with patch("core.billing.credits.manager.credit_manager.get_balance", AsyncMock(return_value={"total": balance})):
+        return await credit_escrow.open(run_id, "acct-1", "thread-1")
+
+
+@pytest.mark.asyncio
+async def test_accrue_is_idempotent_per_message(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    await _open(credit_escrow, "r1")
+
+    charges = [{"message_id": "m1", "cost": Decimal("0.05")}, {"message_id": "m2", "cost": Decimal("0.02")}]
+    assert await credit_escrow.accrue("r1", "acct-1", charges) == Decimal("0.07")
+    # A WAL retry of the same responses must not bill them again
+    assert await credit_escrow.accrue("r1", "acct-1", charges) == Decimal("0.07")
+
+    state = await credit_escrow.get_escrow("r1")
+    assert int(state["accrued"]) == 70_000
+    assert int(state["pending_responses"]) == 2
+    assert await credit_escrow.get_outstanding("acct-1") == Decimal("0.07")
+
+
+@pytest.mark.asyncio
+async def test_accrue_without_escrow_returns_none(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    assert await credit_escrow.accrue("missing", "acct-1", [{"message_id": "m1", "cost": Decimal("0.01")}]) is None
+
+
+@pytest.mark.asyncio
+async def test_accrue_raises_when_outcome_unknown(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    with patch.object(credit_escrow, "_script", AsyncMock(side_effect=ConnectionError("reset"))):
+        with pytest.raises(ConnectionError):
+            await credit_escrow.accrue("r1", "acct-1", [{"message_id": "m1", "cost": Decimal("0.01")}])
+
+
+@pytest.mark.asyncio
+async def test_reaching_reservation_settles_early(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    assert await _open(credit_escrow, "r1", balance="0.05") == escrow.MIN_RESERVE
+
+    deduct = AsyncMock(return_value=True)
+    with patch.object(credit_escrow, "_deduct", deduct):
+        await credit_escrow.accrue("r1", "acct-1", [{"message_id": "m1", "cost": Decimal("0.123456")}])
+        await asyncio.gather(*credit_escrow._settle_tasks)
+
+    # Intermediate settlements are whole cents; the remainder stays accrued
+    (_, settlement_id, micros, responses), _ = deduct.call_args
+    assert (micros, responses) == (120_000, 1)
+    state = await credit_escrow.get_escrow("r1")
+    assert int(state["settled"]) == 120_000
+    assert int(state["accrued"]) == 3_456
+    assert "settling_id" not in state
+
+
+async def _crash_mid_settlement(fake_client, run_id: str) -> str:
+    """Leave the escrow as a worker dying between begin-settle and the ledger ack would."""
+    await fake_client.hset(escrow._escrow_key(run_id), mapping={
+        "settling_id": "settle-1",
+        "settling": 50_000,
+        "settling_responses": 2,
+        "settling_at": time.time() - escrow.SETTLE_TIMEOUT_SECONDS - 1,
+    })
+    return "settle-1"
+
+
+@pytest.mark.asyncio
+async def test_in_doubt_settlement_already_booked_is_completed(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    await _open(credit_escrow, "r1")
+    settlement_id = await _crash_mid_settlement(fake_client, "r1")
+
+    deduct = AsyncMock(return_value=True)
+    with patch.object(credit_escrow, "_already_booked", AsyncMock(return_value=True)) as booked, \
+            patch.object(credit_escrow, "_deduct", deduct):
+        assert await credit_escrow.settle("r1") == Decimal("0.05")
+
+    booked.assert_awaited_once_with("acct-1", settlement_id)
+    deduct.assert_not_awaited()
+    state = await credit_escrow.get_escrow("r1")
+    assert int(state["settled"]) == 50_000
+    assert "settling_id" not in state
+
+
+@pytest.mark.asyncio
+async def test_in_doubt_settlement_not_booked_is_reissued_under_same_id(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    await _open(credit_escrow, "r1")
+    settlement_id = await _crash_mid_settlement(fake_client, "r1")
+
+    deduct = AsyncMock(return_value=True)
+    with patch.object(credit_escrow, "_already_booked", AsyncMock(return_value=False)), \
+            patch.object(credit_escrow, "_deduct", deduct):
+        assert await credit_escrow.settle("r1") == Decimal("0.05")
+
+    (_, reissued_id, micros, responses), _ = deduct.call_args
+    assert (reissued_id, micros, responses) == (settlement_id, 50_000, 2)
+    assert credit_escrow.get_stats()["in_doubt_resolved"] == 1
+
+
+@pytest.mark.asyncio
+async def test_in_flight_settlement_is_left_alone(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    await _open(credit_escrow, "r1")
+    await _crash_mid_settlement(fake_client, "r1")
+    await fake_client.hset(escrow._escrow_key("r1"), "settling_at", time.time())
+
+    deduct = AsyncMock(return_value=True)
+    with patch.object(credit_escrow, "_deduct", deduct):
+        assert await credit_escrow.settle("r1") == Decimal("0")
+    deduct.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_close_keeps_escrow_when_settlement_fails(fake_client):
+    credit_escrow = escrow.CreditEscrow()
+    await _open(credit_escrow, "r1")
+    await credit_escrow.accrue("r1", "acct-1", [{"message_id": "m1", "cost": Decimal("0.03")}])
+
+    with patch.object(credit_escrow, "_deduct", AsyncMock(return_value=False)):
+        assert await credit_escrow.close("r1") is False
+
+    state = await credit_escrow.get_escrow("r1")
+    assert state["settling_id"]
+    assert int(state["settling"]) == 30_000
+    assert await fake_client.exists(escrow._seen_key("r1"))
+    assert "r1" in await fake_client.zrange(escrow.OPEN_INDEX_KEY, 0, -1)
+
+    with patch.object(credit_escrow, "_deduct", AsyncMock(return_value=True)):
+        await fake_client.hset(escrow._escrow_key("r1"), "settling_at", 0)
+        with patch.object(credit_escrow, "_already_booked", AsyncMock(return_value=False)):
+            assert await credit_escrow.close("r1") is True
+
+    assert await credit_escrow.get_escrow("r1") is None
+    assert await credit_escrow.get_outstanding("acct-1") == Decimal("0")
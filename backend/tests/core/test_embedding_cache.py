@@ -0,0 +1,66 @@
+"""
+Embedding cache tests
+
+Verify that cache keys are stable across whitespace and Unicode forms, that
+vectors survive the Redis encoding, and that repeated texts reach the provider once.
+
+Run with: pytest tests/core/test_embedding_cache.py -v
+"""
+
+import sys
+import os
+import asyncio
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.memory.embedding_service import (
+    EmbeddingCache,
+    EmbeddingService,
+    _pack,
+    _unpack,
+    text_digest,
+)
+
+
+class _CountingProvider:
+    model = "test-model"
+
+    def __init__(self):
+        self.calls = []
+
+    async def embed(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 0.5, -1.25] for t in texts]
+
+
+def test_digest_ignores_whitespace_and_unicode_form():
+    assert text_digest("hello   world") == text_digest(" hello world\n")
+    assert text_digest("café") == text_digest("café")
+    assert text_digest("hello", namespace="a") != text_digest("hello", namespace="b")
+
+
+def test_pack_round_trip():
+    vector = [0.25, -1.5, 3.0]
+    assert _unpack(_pack(vector)) == vector
+
+
+def test_duplicate_texts_embedded_once(monkeypatch):
+    import core.memory.embedding_service as module
+    from core.services import redis
+
+    async def _unavailable():
+        raise ConnectionError("redis unavailable")
+
+    # Without Redis the per-process cache still dedupes
+    monkeypatch.setattr(redis, "get_client", _unavailable)
+    monkeypatch.setattr(module, "embedding_cache", EmbeddingCache())
+    provider = _CountingProvider()
+    service = EmbeddingService(provider="openai")
+    service._provider = provider
+
+    first = asyncio.run(service.embed_texts(["a b", "a  b", "c"]))
+    second = asyncio.run(service.embed_texts(["c", " a b "]))
+
+    assert first[0] == first[1]
+    assert second == [first[2], first[0]]
+    assert provider.calls == [["a b", "c"]]
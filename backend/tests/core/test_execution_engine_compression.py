@@ -243,6 +243,7 @@ class TestOrphanToolDontCrashAgent:
         state.stream_key = "test-stream"
         state.tool_schemas = [{"type": "function", "function": {"name": "test", "parameters": {}}}]
         state.system_prompt = {"role": "system", "content": "You are helpful."}
+        state.system_prompt_stable_chars = 0
 
         # Orphan tool result — its matching assistant was archived
         orphan_messages = [
@@ -312,6 +313,7 @@ class TestContextWindowRetry:
         state.stream_key = "test-stream"
         state.tool_schemas = [{"type": "function", "function": {"name": "web_search", "parameters": {}}}]
         state.system_prompt = {"role": "system", "content": "You are helpful."}
+        state.system_prompt_stable_chars = 0
 
         messages = [
             make_user("Find companies"),
@@ -0,0 +1,86 @@
+"""
+fast_parse streaming tests
+
+Verify that iter_parse yields bounded segments, stops at the character/token
+budget, and reads files through a memory map.
+
+Run with: pytest tests/core/test_fast_parse_streaming.py -v
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.utils.fast_parse import FastParse, FastParseConfig, ParseError
+
+
+def test_csv_streams_in_row_blocks():
+    parser = FastParse(FastParseConfig(stream_row_block=100))
+    data = "\n".join(f"{i},value {i}" for i in range(250)).encode()
+
+    segments = list(parser.iter_parse(data, "rows.csv"))
+
+    assert [s.label for s in segments] == ["Rows 1-100", "Rows 101-200", "Rows 201-250"]
+    assert "\n".join(s.text for s in segments) == parser.parse(data, "rows.csv").content
+
+
+def test_stops_at_char_budget():
+    parser = FastParse(FastParseConfig(chunk_size=1024))
+    data = b"abcdefghij\n" * 10_000
+
+    segments = list(parser.iter_parse(data, "notes.txt", max_chars=5000))
+
+    assert sum(s.char_count for s in segments) == 5000
+    assert segments[-1].truncated
+    assert not any(s.truncated for s in segments[:-1])
+
+
+def test_token_budget_uses_chars_per_token():
+    parser = FastParse(FastParseConfig(chars_per_token=4))
+    segments = list(parser.iter_parse(b"x" * 1000, "notes.txt", max_tokens=50))
+    assert sum(s.char_count for s in segments) == 200
+
+
+def test_iter_parse_file_matches_parse_file(tmp_path):
+    path = tmp_path / "notes.txt"
+    path.write_text("héllo wörld\n" * 20_000, encoding="utf-8")
+    parser = FastParse(FastParseConfig(chunk_size=4096))
+
+    streamed = "".join(s.text for s in parser.iter_parse_file(path))
+
+    assert streamed == parser.parse_file(path).content
+
+
+def test_utf8_after_ascii_prefix_is_not_mangled():
+    # The encoding sample is all ASCII; the multi-byte text only starts past it
+    data = ("a" * 20000 + "héllo wörld ✓").encode("utf-8")
+    parser = FastParse(FastParseConfig(chunk_size=1024))
+
+    streamed = "".join(s.text for s in parser.iter_parse(data, "notes.txt"))
+
+    assert streamed.endswith("héllo wörld ✓")
+    assert "\ufffd" not in streamed
+
+
+def test_non_utf8_text_still_decodes():
+    data = ("Café crème brûlée, déjà vu. " * 50).encode("latin-1")
+    streamed = "".join(s.text for s in FastParse().iter_parse(data, "notes.txt"))
+    assert "\ufffd" not in streamed
+    assert len(streamed) == len(data)
+
+
+def test_empty_file_yields_nothing(tmp_path):
+    path = tmp_path / "empty.txt"
+    path.touch()
+    assert list(FastParse().iter_parse_file(path)) == []
+
+
+def test_corrupt_pdf_raises():
+    parser = FastParse()
+    try:
+        list(parser.iter_parse(b"not a pdf", "report.pdf"))
+    except ParseError as e:
+        assert e.error_code == "INVALID_PDF"
+    else:
+        raise AssertionError("expected ParseError")
@@ -0,0 +1,101 @@
+"""
+KB extraction service tests
+
+Verify that knowledge base files are parsed with fast_parse in the process
+pool, that the result is cached by content hash, that failed extractions are
+raised and never cached, and that concurrent uploads of the same file share one
+extraction.
+
+Run with: pytest tests/core/test_kb_extraction.py -v
+"""
+
+import sys
+import os
+import asyncio
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from core.services import redis as redis_module
+from core.knowledge_base.extraction import ExtractionService
+from core.utils.fast_parse import ParseError
+
+
+@pytest.fixture
+def fake_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch.object(redis_module.redis, "_client", client), \
+            patch.object(redis_module.redis, "_initialized", True):
+        yield client
+
+
+@pytest.fixture
+def service():
+    service = ExtractionService(max_workers=1)
+    yield service
+    service.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_extracts_with_fast_parse(fake_client, service):
+    data = "\n".join(f"{i},value {i}" for i in range(10)).encode()
+
+    text = await service.extract(data, "rows.csv", "text/csv")
+
+    assert "9,value 9" in text
+    assert service.extractions == 1
+
+
+@pytest.mark.asyncio
+async def test_utf8_past_ascii_head_survives(fake_client, service):
+    data = ("a" * 20000 + "héllo wörld ✓").encode("utf-8")
+
+    text = await service.extract(data, "notes.txt", "text/plain")
+
+    assert text.endswith("héllo wörld ✓")
+
+
+@pytest.mark.asyncio
+async def test_failed_extraction_raises_and_is_not_cached(fake_client, service):
+    with pytest.raises(ParseError):
+        await service.extract(b"not a pdf", "report.pdf", "application/pdf")
+
+    assert await fake_client.keys("kb_extract:*") == []
+
+
+@pytest.mark.asyncio
+async def test_reupload_hits_cache(fake_client, service):
+    data = b"quarterly report\n" * 100
+
+    first = await service.extract(data, "report.txt", "text/plain")
+    # Same bytes under another name and in a fresh process: served from Redis
+    other = ExtractionService(max_workers=1)
+    second = await other.extract(data, "copy.txt", "text/plain")
+
+    assert first == second
+    assert other.extractions == 0
+    assert other.cache_hits == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_duplicates_parse_once(fake_client, service):
+    data = b"shared file\n" * 1000
+
+    results = await asyncio.gather(*(service.extract(data, "shared.txt", "text/plain") for _ in range(5)))
+
+    assert len(set(results)) == 1
+    assert service.extractions == 1
+    assert service.deduplicated == 4
@@ -0,0 +1,87 @@
+"""
+Sandbox KB sync tests
+
+Verify the manifest diff behind global_kb_sync (unchanged files stay put,
+changed, deleted or edited files are transferred again, stale ones removed)
+and the archive the delta is uploaded in.
+
+Run with: pytest tests/core/test_kb_sync.py -v
+"""
+
+import sys
+import os
+import io
+import tarfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.tools.sb_kb_tool import _build_kb_archive, _kb_entry_fingerprint, _plan_kb_sync
+
+
+def test_unchanged_files_are_not_transferred():
+    desired = {"docs/a.md": {"hash": "h1"}, "docs/b.md": {"hash": "h2"}}
+    manifest = {"docs/a.md": {"hash": "h1", "size": 10}, "docs/b.md": {"hash": "h2", "size": 20}}
+
+    to_remove, to_fetch = _plan_kb_sync(desired, manifest, {"docs/a.md": 10, "docs/b.md": 20})
+
+    assert (to_remove, to_fetch) == ([], [])
+
+
+def test_changed_new_and_stale_entries():
+    desired = {"docs/a.md": {"hash": "h1-new"}, "docs/c.md": {"hash": "h3"}}
+    manifest = {"docs/a.md": {"hash": "h1", "size": 10}, "docs/b.md": {"hash": "h2", "size": 20}}
+
+    to_remove, to_fetch = _plan_kb_sync(desired, manifest, {"docs/a.md": 10, "docs/b.md": 20})
+
+    assert to_remove == ["docs/b.md"]
+    assert sorted(to_fetch) == ["docs/a.md", "docs/c.md"]
+
+
+def test_files_deleted_or_edited_in_sandbox_are_restored():
+    desired = {"docs/a.md": {"hash": "h1"}, "docs/b.md": {"hash": "h2"}, "docs/c.md": {"hash": "h3"}}
+    manifest = {
+        "docs/a.md": {"hash": "h1", "size": 10},
+        "docs/b.md": {"hash": "h2", "size": 20},
+        "docs/c.md": {"hash": "h3", "size": 30},
+    }
+
+    # a.md deleted by the agent, b.md rewritten with a different size
+    _, to_fetch = _plan_kb_sync(desired, manifest, {"docs/b.md": 25, "docs/c.md": 30})
+
+    assert sorted(to_fetch) == ["docs/a.md", "docs/b.md"]
+
+
+def test_manifest_paths_outside_kb_dir_are_never_removed():
+    manifest = {"/etc/passwd": {"hash": "x"}, "../../home/x": {"hash": "y"}, "docs/old.md": {"hash": "z"}}
+
+    to_remove, _ = _plan_kb_sync({}, manifest, {})
+
+    assert to_remove == ["docs/old.md"]
+
+
+def test_entries_without_content_hash_fingerprint_storage_version():
+    entry = {"file_path": "kb/1/a.md", "file_size": 10, "updated_at": "2026-01-01"}
+
+    assert _kb_entry_fingerprint({**entry, "content_hash": "abc"}) == "abc"
+    assert _kb_entry_fingerprint(entry).startswith("v:")
+    assert _kb_entry_fingerprint(entry) != _kb_entry_fingerprint({**entry, "updated_at": "2026-01-02"})
+
+
+def test_archive_round_trips_nested_paths():
+    files = {"docs/a.md": b"alpha", "Folder_2/b.bin": bytes(range(256)), ".kb_manifest.json": b"{}"}
+
+    with tarfile.open(fileobj=io.BytesIO(_build_kb_archive(files)), mode="r:gz") as tar:
+        members = {member.name: member for member in tar.getmembers()}
+        assert set(members) == set(files)
+        assert all(member.mode == 0o644 and member.isfile() for member in members.values())
+        assert {name: tar.extractfile(name).read() for name in members} == files
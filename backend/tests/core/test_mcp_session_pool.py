@@ -0,0 +1,80 @@
+"""
+MCP session pool tests
+
+Verify that only transport-level failures count as a dead session, and that a
+tool call failing for any other reason on a reused session is not re-sent.
+
+Run with: pytest tests/core/test_mcp_session_pool.py -v
+"""
+
+import sys
+import os
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+pytest.importorskip("mcp")
+import anyio
+from mcp.shared.exceptions import McpError
+from mcp.types import ErrorData
+
+from core.tools.utils import mcp_session_pool
+from core.tools.utils.mcp_session_pool import MCPSessionPool, _is_connection_failure
+
+
+@pytest.mark.parametrize("exc", [
+    ConnectionResetError("reset"),
+    OSError("broken pipe"),
+    anyio.ClosedResourceError(),
+    anyio.BrokenResourceError(),
+    anyio.EndOfStream(),
+    McpError(ErrorData(code=mcp_session_pool._CONNECTION_CLOSED, message="Connection closed")),
+])
+def test_transport_errors_are_connection_failures(exc):
+    assert _is_connection_failure(exc)
+
+
+@pytest.mark.parametrize("exc", [
+    ValueError("bad arguments"),
+    RuntimeError("tool crashed"),
+    TimeoutError(),
+    asyncio.CancelledError(),
+    McpError(ErrorData(code=-32602, message="Invalid params")),
+])
+def test_other_errors_are_not_connection_failures(exc):
+    assert not _is_connection_failure(exc)
+
+
+def _pool_with_session(session) -> MCPSessionPool:
+    pool = MCPSessionPool()
+    entry = mcp_session_pool._PooledSession("key", "http", "http://mcp", {})
+    entry.session = session
+    pool._acquire = AsyncMock(return_value=(entry, True))
+    pool._discard = AsyncMock()
+    return pool
+
+
+@pytest.mark.asyncio
+async def test_tool_error_on_reused_session_is_not_retried():
+    session = MagicMock()
+    session.call_tool = AsyncMock(side_effect=RuntimeError("tool crashed"))
+    pool = _pool_with_session(session)
+
+    with pytest.raises(RuntimeError):
+        await pool.call_tool("http", "http://mcp", "search", {"q": "x"})
+
+    assert session.call_tool.await_count == 1
+    pool._discard.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_closed_stream_on_reused_session_reconnects_once():
+    session = MagicMock()
+    session.call_tool = AsyncMock(side_effect=[anyio.ClosedResourceError(), "ok"])
+    pool = _pool_with_session(session)
+
+    assert await pool.call_tool("http", "http://mcp", "search", {"q": "x"}) == "ok"
+    assert session.call_tool.await_count == 2
+    pool._discard.assert_awaited_once()
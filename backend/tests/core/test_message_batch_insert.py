@@ -0,0 +1,222 @@
+"""
+Batched message insert tests
+
+Verify that insert_messages_batch sends one upsert per chunk, that a failing
+chunk falls back to per-row inserts and only reports the rows that really
+failed, and that BatchWriter._flush_messages only retries and fails those
+rows.
+
+Run with: pytest tests/core/test_message_batch_insert.py -v
+"""
+
+import sys
+import os
+import pytest
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.threads import repo as threads_repo
+from core.agents.pipeline.stateless.persistence.batch import BatchWriter
+from core.agents.pipeline.stateless.persistence.wal import WALEntry, WriteType
+
+
+def _row(message_id, content="hello"):
+    return {
+        "message_id": message_id,
+        "thread_id": "thread-1",
+        "type": "assistant",
+        "content": {"role": "assistant", "content": content},
+        "is_llm_message": True,
+        "metadata": {},
+        "created_at": 1700000000.0,
+    }
+
+
+def _entry(message_id):
+    return WALEntry(
+        entry_id=f"entry-{message_id}",
+        run_id="run-1",
+        write_type=WriteType.MESSAGE,
+        data=_row(message_id),
+    )
+
+
+def _failing_insert(*bad_ids):
+    async def insert_message(**kwargs):
+        if kwargs["message_id"] in bad_ids:
+            raise ValueError(f"bad row {kwargs['message_id']}")
+        return {"message_id": kwargs["message_id"]}
+    return AsyncMock(side_effect=insert_message)
+
+
+def _inserted_ids(call):
+    params = call.args[1]
+    return [params[f"message_id_{i}"] for i in range(len(params) // 9)]
+
+
+class TestInsertMessagesBatch:
+
+    @pytest.mark.asyncio
+    async def test_rows_are_chunked(self):
+        execute_mutate = AsyncMock(return_value=[])
+        rows = [_row(f"m{i}") for i in range(5)]
+
+        with patch("core.services.db.execute_mutate", execute_mutate):
+            succeeded, failed = await threads_repo.insert_messages_batch(rows, batch_size=2)
+
+        assert succeeded == [f"m{i}" for i in range(5)]
+        assert failed == []
+        assert [_inserted_ids(call) for call in execute_mutate.call_args_list] == [
+            ["m0", "m1"], ["m2", "m3"], ["m4"],
+        ]
+
+    @pytest.mark.asyncio
+    async def test_upsert_is_idempotent(self):
+        execute_mutate = AsyncMock(return_value=[])
+        rows = [_row("m1"), _row("m2")]
+
+        with patch("core.services.db.execute_mutate", execute_mutate):
+            await threads_repo.insert_messages_batch(rows)
+            # Replaying the same flush
+            succeeded, failed = await threads_repo.insert_messages_batch(rows)
+
+        assert (succeeded, failed) == (["m1", "m2"], [])
+        first, replay = execute_mutate.call_args_list
+        assert "ON CONFLICT (message_id) DO UPDATE" in first.args[0]
+        assert replay.args == first.args
+
+    @pytest.mark.asyncio
+    async def test_duplicate_ids_in_a_chunk_keep_the_last_write(self):
+        execute_mutate = AsyncMock(return_value=[])
+        rows = [_row("m1", "draft"), _row("m2"), _row("m1", "final")]
+
+        with patch("core.services.db.execute_mutate", execute_mutate):
+            await threads_repo.insert_messages_batch(rows)
+
+        params = execute_mutate.call_args.args[1]
+        assert _inserted_ids(execute_mutate.call_args) == ["m2", "m1"]
+        assert params["content_1"]["content"] == "final"
+
+    @pytest.mark.asyncio
+    async def test_missing_message_ids_are_generated(self):
+        execute_mutate = AsyncMock(return_value=[])
+        row = _row(None)
+
+        with patch("core.services.db.execute_mutate", execute_mutate):
+            succeeded, _ = await threads_repo.insert_messages_batch([row])
+
+        assert succeeded[0]
+        assert _inserted_ids(execute_mutate.call_args) == succeeded
+        assert row["message_id"] is None
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_falls_back_to_per_row_inserts(self):
+        execute_mutate = AsyncMock(side_effect=[[], RuntimeError("invalid byte sequence"), []])
+        insert_message = _failing_insert("m3")
+        rows = [_row(f"m{i}") for i in range(6)]
+
+        with patch("core.services.db.execute_mutate", execute_mutate), \
+                patch.object(threads_repo, "insert_message", insert_message):
+            succeeded, failed = await threads_repo.insert_messages_batch(rows, batch_size=2)
+
+        # Only the failing chunk (m2, m3) is retried row by row
+        assert [call.kwargs["message_id"] for call in insert_message.call_args_list] == ["m2", "m3"]
+        assert sorted(succeeded) == ["m0", "m1", "m2", "m4", "m5"]
+        assert failed == [("m3", "bad row m3")]
+
+    @pytest.mark.asyncio
+    async def test_empty_input_skips_the_database(self):
+        execute_mutate = AsyncMock()
+
+        with patch("core.services.db.execute_mutate", execute_mutate):
+            assert await threads_repo.insert_messages_batch([]) == ([], [])
+
+        execute_mutate.assert_not_awaited()
+
+
+class TestFlushMessages:
+
+    @pytest.fixture(autouse=True)
+    def message_cache(self):
+        with patch("core.cache.runtime_cache.append_many_to_cached_message_history", AsyncMock(return_value=True)) as append:
+            yield append
+
+    @pytest.mark.asyncio
+    async def test_one_bulk_insert_for_all_entries(self):
+        insert_batch = AsyncMock(return_value=(["m1", "m2"], []))
+        insert_message = AsyncMock()
+        entries = [_entry("m1"), _entry("m2")]
+
+        with patch.object(threads_repo, "insert_messages_batch", insert_batch), \
+                patch.object(threads_repo, "insert_message", insert_message):
+            succeeded, failed = await BatchWriter()._flush_messages(entries, "account-1")
+
+        assert (succeeded, failed) == (["entry-m1", "entry-m2"], [])
+        insert_batch.assert_awaited_once()
+        assert [row["message_id"] for row in insert_batch.call_args.args[0]] == ["m1", "m2"]
+        insert_message.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_only_rows_the_bulk_insert_rejected_are_retried(self, message_cache):
+        insert_batch = AsyncMock(return_value=(["m1", "m3"], [("m2", "bad row m2")]))
+        insert_message = _failing_insert("m2")
+        entries = [_entry("m1"), _entry("m2"), _entry("m3")]
+
+        with patch.object(threads_repo, "insert_messages_batch", insert_batch), \
+                patch.object(threads_repo, "insert_message", insert_message):
+            succeeded, failed = await BatchWriter()._flush_messages(entries, "account-1")
+
+        assert {call.kwargs["message_id"] for call in insert_message.call_args_list} == {"m2"}
+        assert succeeded == ["entry-m1", "entry-m3"]
+        assert failed == [("entry-m2", "bad row m2")]
+        cached = message_cache.call_args.args[1]
+        assert [payload["message_id"] for payload in cached] == ["m1", "m3"]
+
+    @pytest.mark.asyncio
+    async def test_retried_row_that_succeeds_is_not_reported(self):
+        insert_batch = AsyncMock(return_value=(["m1"], [("m2", "deadlock detected")]))
+        insert_message = _failing_insert()
+        entries = [_entry("m1"), _entry("m2")]
+
+        with patch.object(threads_repo, "insert_messages_batch", insert_batch), \
+                patch.object(threads_repo, "insert_message", insert_message):
+            succeeded, failed = await BatchWriter()._flush_messages(entries, "account-1")
+
+        assert (succeeded, failed) == (["entry-m1", "entry-m2"], [])
+
+    @pytest.mark.asyncio
+    async def test_bulk_insert_error_retries_every_row(self):
+        insert_batch = AsyncMock(side_effect=ConnectionError("pool exhausted"))
+        insert_message = _failing_insert()
+        entries = [_entry("m1"), _entry("m2")]
+
+        with patch.object(threads_repo, "insert_messages_batch", insert_batch), \
+                patch.object(threads_repo, "insert_message", insert_message):
+            succeeded, failed = await BatchWriter()._flush_messages(entries, "account-1")
+
+        assert sorted(call.kwargs["message_id"] for call in insert_message.call_args_list) == ["m1", "m2"]
+        assert (succeeded, failed) == (["entry-m1", "entry-m2"], [])
+
+    @pytest.mark.asyncio
+    async def test_failed_chunk_reports_only_the_bad_row(self):
+        execute_mutate = AsyncMock(side_effect=RuntimeError("invalid byte sequence"))
+        insert_message = _failing_insert("m2")
+        entries = [_entry("m1"), _entry("m2"), _entry("m3")]
+
+        with patch("core.services.db.execute_mutate", execute_mutate), \
+                patch.object(threads_repo, "insert_message", insert_message):
+            succeeded, failed = await BatchWriter()._flush_messages(entries, "account-1")
+
+        assert succeeded == ["entry-m1", "entry-m3"]
+        assert failed == [("entry-m2", "bad row m2")]
@@ -0,0 +1,191 @@
+"""
+Message history cache tests
+
+Run the message-history cache against fakeredis and verify the list + meta
+layout, tail reads, that the Lua append only extends an already-populated
+cache, and that a list disagreeing with its version or last-message-id
+guard is treated as a miss.
+
+Run with: pytest tests/core/test_message_history_cache.py -v
+"""
+
+import sys
+import os
+import json
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from core.services import redis as redis_module
+from core.cache.runtime_cache import (
+    MESSAGE_HISTORY_TTL,
+    append_many_to_cached_message_history,
+    append_to_cached_message_history,
+    get_cached_message_history,
+    get_cached_message_history_version,
+    invalidate_message_history_cache,
+    set_cached_message_history,
+)
+
+LIST_KEY = "message_log:thread-1"
+META_KEY = "message_log_meta:thread-1"
+
+
+@pytest.fixture
+def fake_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch.object(redis_module.redis, "_client", client), \
+            patch.object(redis_module.redis, "_initialized", True):
+        yield client
+
+
+def _messages(*ids):
+    return [{"message_id": i, "role": "user", "content": f"message {i} — ✓"} for i in ids]
+
+
+@pytest.mark.asyncio
+async def test_set_stores_one_list_entry_per_message(fake_client):
+    messages = _messages("m1", "m2", "m3")
+    await set_cached_message_history("thread-1", messages)
+
+    assert [json.loads(entry) for entry in await fake_client.lrange(LIST_KEY, 0, -1)] == messages
+    assert await fake_client.hgetall(META_KEY) == {"version": "3", "last_message_id": "m3"}
+    assert 0 < await fake_client.ttl(LIST_KEY) <= MESSAGE_HISTORY_TTL
+    assert 0 < await fake_client.ttl(META_KEY) <= MESSAGE_HISTORY_TTL
+    assert await get_cached_message_history("thread-1") == messages
+
+
+@pytest.mark.asyncio
+async def test_set_replaces_previous_history(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1", "m2", "m3"))
+    await set_cached_message_history("thread-1", _messages("m9"))
+
+    assert await get_cached_message_history("thread-1") == _messages("m9")
+    assert await fake_client.hget(META_KEY, "version") == "1"
+
+
+@pytest.mark.asyncio
+async def test_empty_history_is_a_hit(fake_client):
+    await set_cached_message_history("thread-1", [])
+
+    assert await get_cached_message_history("thread-1") == []
+    assert await append_to_cached_message_history("thread-1", _messages("m1")[0])
+    assert await get_cached_message_history("thread-1") == _messages("m1")
+
+
+@pytest.mark.asyncio
+async def test_append_extends_list_and_version(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1"))
+
+    assert await append_many_to_cached_message_history("thread-1", _messages("m2", "m3"))
+    assert await append_to_cached_message_history("thread-1", _messages("m4")[0])
+
+    assert await get_cached_message_history("thread-1") == _messages("m1", "m2", "m3", "m4")
+    assert await get_cached_message_history_version("thread-1") == {"version": 4, "last_message_id": "m4"}
+    assert await fake_client.ttl(LIST_KEY) > 0
+
+
+@pytest.mark.asyncio
+async def test_append_without_message_id_keeps_last_id(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1"))
+    assert await append_to_cached_message_history("thread-1", {"role": "assistant", "content": "streamed"})
+
+    assert await get_cached_message_history_version("thread-1") == {"version": 2, "last_message_id": "m1"}
+    assert (await get_cached_message_history("thread-1"))[-1] == {"role": "assistant", "content": "streamed"}
+
+
+@pytest.mark.asyncio
+async def test_tail_reads_only_the_newest_messages(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1", "m2", "m3", "m4"))
+
+    assert await get_cached_message_history("thread-1", tail=2) == _messages("m3", "m4")
+    assert await get_cached_message_history("thread-1", tail=10) == _messages("m1", "m2", "m3", "m4")
+
+    await append_to_cached_message_history("thread-1", _messages("m5")[0])
+    assert await get_cached_message_history("thread-1", tail=1) == _messages("m5")
+
+
+@pytest.mark.asyncio
+async def test_tail_read_still_checks_version(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1", "m2", "m3"))
+    await fake_client.lpop(LIST_KEY)
+
+    assert await get_cached_message_history("thread-1", tail=1) is None
+    assert not await fake_client.exists(LIST_KEY, META_KEY)
+
+
+@pytest.mark.asyncio
+async def test_version_of_uncached_thread_is_none(fake_client):
+    assert await get_cached_message_history_version("thread-1") is None
+
+
+@pytest.mark.asyncio
+async def test_append_to_uncached_thread_is_a_no_op(fake_client):
+    assert not await append_many_to_cached_message_history("thread-1", _messages("m1"))
+    assert not await append_many_to_cached_message_history("thread-1", [])
+
+    assert not await fake_client.exists(LIST_KEY, META_KEY)
+    assert await get_cached_message_history("thread-1") is None
+
+
+@pytest.mark.asyncio
+async def test_append_reloads_script_after_flush(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1"))
+    await append_to_cached_message_history("thread-1", _messages("m2")[0])
+
+    await fake_client.script_flush()
+    await set_cached_message_history("thread-1", _messages("m1"))
+    assert await append_to_cached_message_history("thread-1", _messages("m2")[0])
+    assert await get_cached_message_history("thread-1") == _messages("m1", "m2")
+
+
+@pytest.mark.asyncio
+async def test_length_version_mismatch_drops_cache(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1", "m2"))
+    # A write that bypassed the append script
+    await fake_client.rpush(LIST_KEY, json.dumps(_messages("m3")[0]))
+
+    assert await get_cached_message_history("thread-1") is None
+    assert not await fake_client.exists(LIST_KEY, META_KEY)
+
+
+@pytest.mark.asyncio
+async def test_last_message_id_mismatch_drops_cache(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1", "m2"))
+    # Same length, but the newest entry isn't the one the guard recorded
+    await fake_client.lset(LIST_KEY, -1, json.dumps(_messages("m9")[0]))
+
+    assert await get_cached_message_history("thread-1", tail=1) is None
+    assert not await fake_client.exists(LIST_KEY, META_KEY)
+
+
+@pytest.mark.asyncio
+async def test_evicted_list_is_a_miss(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1", "m2"))
+    await fake_client.delete(LIST_KEY)
+
+    assert await get_cached_message_history("thread-1") is None
+    assert not await fake_client.exists(META_KEY)
+
+
+@pytest.mark.asyncio
+async def test_invalidate_removes_list_and_meta(fake_client):
+    await set_cached_message_history("thread-1", _messages("m1"))
+    await invalidate_message_history_cache("thread-1")
+
+    assert not await fake_client.exists(LIST_KEY, META_KEY)
+    assert not await append_to_cached_message_history("thread-1", _messages("m2")[0])
@@ -0,0 +1,85 @@
+"""
+System prompt segment tests
+
+Verify that segments assemble with stable prefix hashes, that the cache split
+lands on the stable prefix boundary, and that the memo key ignores inputs that
+don't change the rendered text.
+
+Run with: pytest tests/core/test_prompt_segments.py -v
+"""
+
+import sys
+import os
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.agents.runner import prompt_manager
+from core.agents.runner.prompt_manager import assemble_segments
+from core.agentpress.prompt_caching import add_prefix_cache_control
+
+
+def _segments(now: str, user: str = "alice"):
+    return [
+        ("core", "You are an agent."),
+        ("mcp", ""),
+        ("xml", ""),
+        ("kb", "\n\nKB summary"),
+        ("user_context", f"\n\n<user_info>{user}</user_info>"),
+        ("promo", ""),
+        ("datetime", f"\n\n<current_datetime>{now}</current_datetime>"),
+    ]
+
+
+def test_stable_prefix_survives_datetime_change():
+    first = assemble_segments(_segments("10:00:00"))
+    second = assemble_segments(_segments("10:00:05"))
+
+    assert first.stable_prefix_hash == second.stable_prefix_hash
+    assert first.prefix_hashes["datetime"] != second.prefix_hashes["datetime"]
+    content = first.system_message["content"]
+    assert content[:first.stable_prefix_chars].endswith("</user_info>")
+    assert content[first.stable_prefix_chars:].startswith("\n\n<current_datetime>")
+
+
+def test_prefix_hashes_split_by_user():
+    alice = assemble_segments(_segments("10:00:00", "alice"))
+    bob = assemble_segments(_segments("10:00:00", "bob"))
+
+    assert alice.prefix_hashes["kb"] == bob.prefix_hashes["kb"]
+    assert alice.prefix_hashes["user_context"] != bob.prefix_hashes["user_context"]
+
+
+def test_prefix_cache_control_splits_at_boundary():
+    build = assemble_segments(_segments("10:00:00"))
+    cached = add_prefix_cache_control(build.system_message, build.stable_prefix_chars)
+
+    blocks = cached["content"]
+    assert len(blocks) == 2
+    assert all(block["cache_control"] == {"type": "ephemeral"} for block in blocks)
+    assert "".join(block["text"] for block in blocks) == build.system_message["content"]
+
+    # No usable boundary: fall back to a single cached block
+    single = add_prefix_cache_control(build.system_message, len(build.system_message["content"]))
+    assert len(single["content"]) == 1
+
+
+def test_memo_key_ignores_account_and_tool_order():
+    agent = {"agent_id": "a1", "current_version_id": "v3", "system_prompt": "Be helpful."}
+    mcp = {"custom_mcp": [{"name": "x"}], "configured_mcps": []}
+
+    with patch.object(prompt_manager, "_static_fingerprint", "fp"):
+        key = prompt_manager._segments_memo_key(agent, ["b", "a"], {**mcp, "account_id": "u1"})
+        assert key == prompt_manager._segments_memo_key(agent, ["a", "b"], {**mcp, "account_id": "u2"})
+        assert key != prompt_manager._segments_memo_key({**agent, "current_version_id": "v4"}, ["a", "b"], mcp)
+        assert key != prompt_manager._segments_memo_key(agent, ["a", "b"], None)
@@ -0,0 +1,126 @@
+"""
+Response stream writer tests
+
+Drive the per-run writer with the mock LLM against fakeredis and verify that
+chunks are coalesced into few pipelined batches, arrive in order, that urgent
+events are published without waiting for the coalescing window, and that UX
+events emitted during a run go through the run's writer.
+
+Run with: pytest tests/core/test_response_stream_writer.py -v
+"""
+
+import sys
+import os
+import json
+import asyncio
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from core.services import redis as redis_module
+from core.agents.runner.services.stream_writer import ResponseStreamWriter
+from core.agents.pipeline import ux_streaming
+from core.test_harness.mock_llm import MockLLMProvider
+from core.utils.tool_output_streaming import (
+    clear_tool_output_streaming_context,
+    set_tool_output_streaming_context,
+)
+
+STREAM_KEY = "agent_run:test-run:stream"
+
+
+@pytest.fixture
+def fake_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch.object(redis_module.redis, "_client", client), \
+            patch.object(redis_module.redis, "_initialized", True):
+        yield client
+
+
+async def _entries(client):
+    return [json.loads(fields["data"]) for _, fields in await client.xrange(STREAM_KEY)]
+
+
+@pytest.mark.asyncio
+async def test_mock_llm_run_is_coalesced_in_order(fake_client):
+    writer = ResponseStreamWriter(STREAM_KEY, flush_interval=0.05, maxlen=None).start()
+    provider = MockLLMProvider(delay_ms=1)
+    messages = [{"role": "user", "content": "write a long answer about streaming"}]
+
+    published = 0
+    async for chunk in provider.acompletion(messages):
+        choices = getattr(chunk, "choices", None)
+        content = getattr(choices[0].delta, "content", None) if choices else None
+        if content:
+            await writer.publish({"type": "assistant", "sequence": published, "content": content})
+            published += 1
+    writer.publish_nowait({"type": "status", "status": "completed"}, urgent=True)
+    await writer.close()
+
+    entries = await _entries(fake_client)
+    stats = writer.get_stats()
+    assert [e.get("sequence") for e in entries[:-1]] == list(range(published))
+    assert entries[-1] == {"type": "status", "status": "completed"}
+    assert stats["entries_published"] == published + 1
+    assert stats["batches"] < published
+    assert stats["queue_depth"] == 0
+    assert await fake_client.ttl(STREAM_KEY) > 0
+
+
+@pytest.mark.asyncio
+async def test_urgent_entry_skips_window(fake_client):
+    writer = ResponseStreamWriter(STREAM_KEY, flush_interval=10.0).start()
+    writer.publish_nowait({"type": "assistant", "content": "partial"})
+    writer.publish_nowait({"type": "status", "status": "failed"}, urgent=True)
+
+    assert await writer.flush(timeout=1.0)
+    assert [e["type"] for e in await _entries(fake_client)] == ["assistant", "status"]
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_full_batch_flushes_early(fake_client):
+    writer = ResponseStreamWriter(STREAM_KEY, flush_interval=10.0, max_batch=8).start()
+    for i in range(8):
+        writer.publish_nowait({"i": i})
+
+    for _ in range(50):
+        if writer.queue_depth == 0 and writer.get_stats()["batches"]:
+            break
+        await asyncio.sleep(0.01)
+
+    assert len(await _entries(fake_client)) == 8
+    await writer.close()
+
+
+@pytest.mark.asyncio
+async def test_ux_events_go_through_run_writer(fake_client):
+    writer = ResponseStreamWriter(STREAM_KEY, flush_interval=10.0).start()
+    set_tool_output_streaming_context("test-run", STREAM_KEY, stream_writer=writer)
+    try:
+        writer.publish_nowait({"type": "assistant", "content": "partial"})
+        assert await ux_streaming.stream_thinking(STREAM_KEY)
+        assert await ux_streaming.stream_context_usage(STREAM_KEY, current_tokens=1200, message_count=4)
+        assert await ux_streaming.stream_summarizing(STREAM_KEY, status="started")
+        assert await ux_streaming.stream_user_error(STREAM_KEY, "Out of credits", "BILLING")
+        assert await writer.flush(timeout=1.0)
+    finally:
+        clear_tool_output_streaming_context()
+
+    entries = await _entries(fake_client)
+    assert [e["type"] for e in entries] == ["assistant", "thinking", "context_usage", "summarizing context", "error"]
+    assert writer.get_stats()["entries_published"] == 5
+    await writer.close()
@@ -0,0 +1,58 @@
+"""
+Run registration notification tests
+
+Verify that stream handlers waiting on an unregistered agent run are woken by
+the registration published on the shared pub/sub channel, and that waiters for
+other runs are left alone.
+
+Run with: pytest tests/core/test_run_registrations.py -v
+"""
+
+import sys
+import os
+import asyncio
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from core.services import redis as redis_module
+from core.services.redis import RunRegistrations
+
+
+@pytest.fixture
+def fake_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch.object(redis_module.redis, "_client", client), \
+            patch.object(redis_module.redis, "_initialized", True):
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_waiter_wakes_on_registration(fake_client):
+    registrations = RunRegistrations(fake_client)
+    try:
+        async with registrations.waiting("run-1") as registered:
+            assert registrations.get_stats()["listening"]
+            await redis_module.notify_run_registered("run-1")
+            await asyncio.wait_for(registered.wait(), timeout=2.0)
+
+        assert registrations.get_stats()["runs_watched"] == 0
+    finally:
+        await registrations.close()
+
+
+@pytest.mark.asyncio
+async def test_other_runs_do_not_wake_waiter(fake_client):
+    registrations = RunRegistrations(fake_client)
+    try:
+        async with registrations.waiting("run-1") as registered:
+            await redis_module.notify_run_registered("run-2")
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(registered.wait(), timeout=0.3)
+
+        assert registrations.get_stats()["waiters_woken"] == 0
+    finally:
+        await registrations.close()
@@ -0,0 +1,177 @@
+"""
+Slot manager tests
+
+Run the reserve/release Lua scripts against fakeredis (limit, idempotent
+reserve, release tombstones, legacy release) and verify that the bulk
+reconcile reports drift, writes in batches and leaves counters that moved
+since they were read alone.
+
+Run with: pytest tests/core/test_slot_manager.py -v
+"""
+
+import sys
+import os
+import pytest
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+fakeredis = pytest.importorskip("fakeredis")
+pytest.importorskip("lupa")
+
+from core.services import redis as redis_module
+from core.agents.pipeline import slot_manager
+from core.utils.config import EnvMode
+
+
+@pytest.fixture
+def fake_client():
+    client = fakeredis.aioredis.FakeRedis(decode_responses=True)
+    with patch.object(redis_module.redis, "_client", client), \
+            patch.object(redis_module.redis, "_initialized", True), \
+            patch.object(slot_manager.config._config, "ENV_MODE", EnvMode.PRODUCTION):
+        yield client
+
+
+def _running(counts):
+    return patch(
+        "core.utils.limits_repo.count_running_agent_runs_by_account",
+        AsyncMock(return_value=counts),
+    )
+
+
+@pytest.mark.asyncio
+async def test_reserve_respects_limit_and_is_idempotent(fake_client):
+    assert await slot_manager._try_reserve_slot_once("acct", "run-1", 2) == (True, 1, "ok")
+    assert await slot_manager._try_reserve_slot_once("acct", "run-1", 2) == (True, 1, "already_reserved")
+    assert await slot_manager._try_reserve_slot_once("acct", "run-2", 2) == (True, 2, "ok")
+
+    assert await slot_manager._try_reserve_slot_once("acct", "run-3", 2) == (False, 2, "limit")
+    assert await fake_client.get("slots:acct") == "2"
+    assert await fake_client.get("slot_reservation:run-3") is None
+    assert await fake_client.get("slot_reservation:run-1") == "acct"
+
+
+@pytest.mark.asyncio
+async def test_release_decrements_once(fake_client):
+    await slot_manager._try_reserve_slot_once("acct", "run-1", 5)
+    await slot_manager._try_reserve_slot_once("acct", "run-2", 5)
+
+    assert await slot_manager.release_slot("acct", "run-1")
+    assert await fake_client.get("slots:acct") == "1"
+    assert await fake_client.get("slot_reservation:run-1") is None
+    assert await fake_client.exists("slot_release_done:run-1")
+
+    # A second release of the same run hits the tombstone and changes nothing
+    assert await slot_manager.release_slot("acct", "run-1")
+    assert await fake_client.get("slots:acct") == "1"
+
+
+@pytest.mark.asyncio
+async def test_release_without_marker_falls_back_to_legacy_decrement(fake_client):
+    await fake_client.set("slots:acct", 1)
+
+    assert await slot_manager.release_slot("acct", "old-run")
+    assert await slot_manager.release_slot("acct", "other-old-run")
+
+    # Never goes below zero
+    assert await fake_client.get("slots:acct") == "0"
+
+
+@pytest.mark.asyncio
+async def test_release_for_wrong_account_leaves_counters(fake_client):
+    await slot_manager._try_reserve_slot_once("acct-a", "run-1", 5)
+
+    assert not await slot_manager.release_slot("acct-b", "run-1")
+    assert await fake_client.get("slots:acct-a") == "1"
+    assert await fake_client.get("slot_reservation:run-1") == "acct-a"
+    assert not await fake_client.exists("slots:acct-b")
+
+
+@pytest.mark.asyncio
+async def test_reserve_after_release_clears_tombstone(fake_client):
+    await slot_manager._try_reserve_slot_once("acct", "run-1", 5)
+    await slot_manager.release_slot("acct", "run-1")
+
+    assert await slot_manager._try_reserve_slot_once("acct", "run-1", 5) == (True, 1, "ok")
+    assert not await fake_client.exists("slot_release_done:run-1")
+
+
+@pytest.mark.asyncio
+async def test_reconcile_reports_drift(fake_client):
+    await fake_client.set("slots:over", 5)
+    await fake_client.set("slots:under", 1)
+    await fake_client.set("slots:exact", 2)
+    await fake_client.set("slots:idle", 0)
+
+    with _running({"over": 2, "under": 4, "exact": 2, "missing": 1}):
+        result = await slot_manager.reconcile_all_active()
+
+    assert result["reconciled"] == 3
+    assert result["skipped_changed"] == 0
+    assert result["total"] == 4
+    assert result["drift"] == {"over": 1, "under": 2, "total_abs": 3 + 3 + 1, "max_abs": 3}
+    assert await fake_client.mget("slots:over", "slots:under", "slots:exact", "slots:missing") == ["2", "4", "2", "1"]
+    assert await fake_client.ttl("slots:missing") > 0
+
+
+@pytest.mark.asyncio
+async def test_reconcile_writes_in_batches(fake_client):
+    for i in range(7):
+        await fake_client.set(f"slots:acct-{i}", 3)
+
+    executed = []
+    original_pipeline = fake_client.pipeline
+
+    def counting_pipeline(*args, **kwargs):
+        pipe = original_pipeline(*args, **kwargs)
+        original_execute = pipe.execute
+
+        async def execute(*a, **k):
+            results = await original_execute(*a, **k)
+            executed.append(len(results))
+            return results
+
+        pipe.execute = execute
+        return pipe
+
+    with _running({}), \
+            patch.object(slot_manager, "RECONCILE_BATCH_SIZE", 3), \
+            patch.object(fake_client, "pipeline", counting_pipeline):
+        result = await slot_manager.reconcile_all_active()
+
+    assert result["reconciled"] == 7
+    assert executed == [3, 3, 1]
+    assert all(value == "0" for value in await fake_client.mget(*[f"slots:acct-{i}" for i in range(7)]))
+
+
+@pytest.mark.asyncio
+async def test_reconcile_skips_counters_changed_after_read(fake_client):
+    await fake_client.set("slots:busy", 3)
+    await fake_client.set("slots:quiet", 3)
+
+    original_mget = fake_client.mget
+
+    async def mget_then_reserve(*args, **kwargs):
+        values = await original_mget(*args, **kwargs)
+        # A run starts between the read and the correction
+        await slot_manager._try_reserve_slot_once("busy", "run-new", 10)
+        return values
+
+    with _running({"busy": 1, "quiet": 1}), patch.object(fake_client, "mget", mget_then_reserve):
+        result = await slot_manager.reconcile_all_active()
+
+    assert result["reconciled"] == 1
+    assert result["skipped_changed"] == 1
+    assert await fake_client.get("slots:busy") == "4"
+    assert await fake_client.get("slots:quiet") == "1"
@@ -0,0 +1,131 @@
+"""
+StreamHub tests
+
+Run the hub pump against fakeredis and verify that a subscriber whose queue
+fills is refilled from the stream with XRANGE (no gaps, no duplicates) and
+that the XREAD count grows while reads come back full and shrinks after.
+
+Run with: pytest tests/core/test_stream_hub.py -v
+"""
+
+import sys
+import os
+import asyncio
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+fakeredis = pytest.importorskip("fakeredis")
+
+from core.services.redis import StreamHub
+
+STREAM = "agent_run:run-1:stream"
+
+
+@pytest.fixture
+def fake_client():
+    return fakeredis.aioredis.FakeRedis(decode_responses=True)
+
+
+async def _append(client, count):
+    return [await client.xadd(STREAM, {"n": str(i)}) for i in range(count)]
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+async def _collect(hub, queue, count):
+    received = []
+    async for msg in hub.iter_queue(queue, timeout=0.05):
+        if msg is not None:
+            received.append(msg[0])
+            if len(received) == count:
+                return received
+
+
+@pytest.mark.asyncio
+async def test_lagging_subscriber_catches_up_without_gaps_or_duplicates(fake_client):
+    hub = StreamHub(fake_client, queue_maxsize=4)
+    expected = await _append(fake_client, 10)
+
+    async with hub.subscription(STREAM) as queue:
+        await _wait_for(lambda: queue.lagging)
+        # Written while the subscriber is lagging: the pump defers them
+        expected += await _append(fake_client, 5)
+        await _wait_for(lambda: hub.get_stream_stats(STREAM)["position"] == expected[-1])
+
+        received = await asyncio.wait_for(_collect(hub, queue, len(expected)), timeout=5)
+        assert received == expected
+        assert not queue.lagging
+
+        # Back on the live feed
+        expected += await _append(fake_client, 3)
+        received += await asyncio.wait_for(_collect(hub, queue, 3), timeout=5)
+        assert received == expected
+
+        stats = hub.get_stats()
+        assert stats["catchup_reads"] >= 2
+        assert stats["messages_deferred"] > 0
+        assert stats["messages_delivered"] == len(expected)
+        assert hub.get_stream_stats(STREAM)["lagging_subscribers"] == 0
+
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_read_count_grows_with_backlog_and_shrinks_after(fake_client):
+    hub = StreamHub(fake_client, queue_maxsize=1000)
+    reads = []
+    original_xread = fake_client.xread
+
+    async def recording_xread(streams, count=None, block=None):
+        result = await original_xread(streams, count=count, block=block)
+        if result:
+            reads.append((count, sum(len(entries) for _, entries in result)))
+        return result
+
+    fake_client.xread = recording_xread
+    await _append(fake_client, 100)
+
+    async with hub.subscription(STREAM) as queue:
+        await _wait_for(lambda: queue.qsize() == 100)
+        # Full reads double the count; the short tail read halves it
+        assert reads == [(10, 10), (20, 20), (40, 40), (80, 30)]
+        assert hub.get_stream_stats(STREAM)["read_count"] == 40
+
+        await _append(fake_client, 1)
+        await _wait_for(lambda: queue.qsize() == 101)
+        assert reads[-1] == (40, 1)
+        assert hub.get_stream_stats(STREAM)["read_count"] == 20
+
+    await hub.close()
+
+
+@pytest.mark.asyncio
+async def test_read_count_is_capped(fake_client, monkeypatch):
+    monkeypatch.setattr(StreamHub, "MAX_READ_COUNT", 20)
+    hub = StreamHub(fake_client, queue_maxsize=1000)
+    # 10 + 5 * 20: every read comes back full
+    await _append(fake_client, 110)
+
+    async with hub.subscription(STREAM) as queue:
+        await _wait_for(lambda: queue.qsize() == 110)
+        assert hub.get_stream_stats(STREAM)["read_count"] == 20
+        assert hub.get_stream_stats(STREAM)["last_batch"] == 20
+
+    await hub.close()
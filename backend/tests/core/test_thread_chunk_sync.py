@@ -0,0 +1,55 @@
+"""
+Thread chunk sync tests
+
+Verify that chunk hashes are stable across re-splits, ignore whitespace-only
+edits, and that appending to a conversation leaves earlier chunks unchanged.
+
+Run with: pytest tests/core/test_thread_chunk_sync.py -v
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.threads.thread_search import (
+    chunk_hash,
+    compose_thread_text,
+    split_into_chunks,
+    text_splitter,
+)
+
+
+def _conversation(turns: int) -> str:
+    parts = []
+    for i in range(turns):
+        parts.append(f"User: question {i} " + "about the quarterly report " * 20)
+        parts.append(f"Assistant: answer {i} " + "with figures and a summary " * 20)
+    return "\n\n".join(parts)
+
+
+def test_whitespace_edits_keep_hash():
+    assert chunk_hash("User: hello  there") == chunk_hash("User: hello there\n")
+    assert chunk_hash("User: hello") != chunk_hash("User: goodbye")
+
+
+def test_appending_keeps_earlier_chunks():
+    before = split_into_chunks(compose_thread_text(_conversation(6), "Reports", "Q3"))
+    after = split_into_chunks(compose_thread_text(_conversation(7), "Reports", "Q3"))
+
+    unchanged = set(before) & set(after)
+    assert len(before) > 3
+    assert len(unchanged) >= len(before) - 1
+    assert len(after) > len(unchanged)
+
+
+def test_duplicate_chunks_collapse():
+    text = "\n\n".join(["User: " + "same text " * 100] * 6)
+    chunks = split_into_chunks(text)
+    assert len(chunks) < len(text_splitter.split_text(text))
+    assert all(chunk_hash(chunk) == key for key, chunk in chunks.items())
+
+
+def test_header_only_thread():
+    assert compose_thread_text("", "Proj", "Proj") == "Project: Proj"
+    assert compose_thread_text("hi", "", "Chat") == "Thread: Chat\n\nhi"
@@ -0,0 +1,98 @@
+"""
+Parallel tool execution tests
+
+Verify that consecutive parallel-safe tool calls in one turn run concurrently,
+while results are still emitted in the original index order.
+
+Run with: pytest tests/core/test_tool_executor_parallel.py -v
+"""
+
+import sys
+import os
+import json
+import asyncio
+import pytest
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.agentpress.tool import ToolResult, parallel_safe
+from core.agents.pipeline.stateless.coordinator.message_builder import MessageBuilder
+from core.agents.pipeline.stateless.coordinator import tool_executor
+from core.agents.pipeline.stateless.coordinator.tool_executor import ToolExecutor
+
+
+class _Tools:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+        self.order = []
+
+    async def _run(self, name, delay):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(delay)
+        self.running -= 1
+        self.order.append(name)
+        return ToolResult(success=True, output=name)
+
+    @parallel_safe
+    async def web_search(self, query: str):
+        return await self._run(f"search:{query}", 0.05 if query == "slow" else 0.01)
+
+    async def create_file(self, path: str):
+        return await self._run(f"write:{path}", 0.01)
+
+
+def _executor(pending):
+    tools = _Tools()
+    state = MagicMock()
+    state.account_id = None
+    state.take_pending_tools.return_value = pending
+    registry = MagicMock()
+    registry.get_available_functions.return_value = {
+        "web_search": tools.web_search,
+        "create_file": tools.create_file,
+    }
+    seq = iter(range(1000))
+    builder = MessageBuilder(lambda: next(seq), lambda: "thread-1", lambda: "run-1")
+    return ToolExecutor(state, registry, builder), tools
+
+
+def _call(idx, name, **args):
+    return {"id": f"call_{idx}", "function": {"name": name, "arguments": json.dumps(args)}}
+
+
+@pytest.mark.asyncio
+async def test_parallel_safe_tools_run_concurrently_in_index_order():
+    pending = [
+        _call(0, "web_search", query="slow"),
+        _call(1, "web_search", query="fast"),
+        _call(2, "create_file", path="a.txt"),
+        _call(3, "web_search", query="after"),
+    ]
+    executor, tools = _executor(pending)
+
+    with patch.object(tool_executor.config._config, "AGENT_TOOL_EXECUTION_STRATEGY", "parallel"), \
+            patch.object(tool_executor.config._config, "AGENT_MAX_PARALLEL_TOOLS", 4):
+        messages = [msg async for msg in executor.execute_tools("2026-01-01T00:00:00Z", "assistant-1")]
+
+    results = [json.loads(m["content"])["tool_call_id"] for m in messages if m["type"] == "tool"]
+    assert results == ["call_0", "call_1", "call_2", "call_3"]
+    # The two leading searches overlapped; the write ran alone, before the last search
+    assert tools.max_running == 2
+    assert tools.order == ["search:fast", "search:slow", "write:a.txt", "search:after"]
+
+    started = [json.loads(m["content"])["tool_call_id"] for m in messages
+               if m["type"] == "status" and json.loads(m["content"])["status_type"] == "tool_started"]
+    assert started == ["call_0", "call_1", "call_2", "call_3"]
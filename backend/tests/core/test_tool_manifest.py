@@ -0,0 +1,83 @@
+"""
+Tool manifest tests
+
+Verify the staleness checks, that tools failing to import are reported as
+skipped whatever they raise, and that JIT function lookups are served from a
+current manifest without importing tool modules.
+
+Run with: pytest tests/core/test_tool_manifest.py -v
+"""
+
+import sys
+import os
+import pytest
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.tools import tool_manifest
+from core.tools.tool_registry import ALL_TOOLS
+
+
+def _current_manifest(tools=None):
+    return {
+        "version": tool_manifest.MANIFEST_VERSION,
+        "registry_hash": tool_manifest._registry_hash(),
+        "source_hash": tool_manifest._source_hash(),
+        "tools": tools or {},
+        "skipped": {},
+    }
+
+
+def test_current_manifest_has_no_problems():
+    assert tool_manifest.check_manifest(_current_manifest()) == []
+
+
+@pytest.mark.parametrize("field", ["version", "registry_hash", "source_hash"])
+def test_stale_fields_are_reported(field):
+    manifest = _current_manifest()
+    manifest[field] = "stale"
+    assert len(tool_manifest.check_manifest(manifest)) == 1
+
+
+def test_missing_manifest_is_reported(tmp_path):
+    problems = tool_manifest.check_manifest(path=tmp_path / "tool_manifest.json")
+    assert problems == ["tool_manifest.json not found"]
+
+
+def test_function_map_uses_manifest_without_importing_tools():
+    from core.jit.function_map import build_function_map
+
+    tool_name = ALL_TOOLS[0][0]
+    manifest = _current_manifest({
+        tool_name: {"schemas": {"do_thing": [{}], "other_thing": [{}]}},
+    })
+
+    with patch("core.tools.tool_manifest.get_manifest", return_value=manifest), \
+         patch("core.tools.tool_registry.get_tool_class") as get_tool_class:
+        function_map = build_function_map()
+
+    assert function_map == {"do_thing": tool_name, "other_thing": tool_name}
+    get_tool_class.assert_not_called()
+
+
+def test_import_time_errors_are_reported_as_skipped():
+    class DaytonaAuthenticationError(Exception):
+        pass
+
+    with patch("core.tools.tool_registry.get_tool_class", side_effect=DaytonaAuthenticationError("bad key")):
+        manifest = tool_manifest.build_manifest()
+
+    assert manifest["tools"] == {}
+    assert set(manifest["skipped"]) == {tool_name for tool_name, _, _ in ALL_TOOLS}
+    assert all(error == "DaytonaAuthenticationError: bad key" for error in manifest["skipped"].values())
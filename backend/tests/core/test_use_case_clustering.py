@@ -0,0 +1,49 @@
+"""
+Use case clustering tests
+
+Verify that near-duplicate vectors merge under the distance threshold, that
+unrelated ones stay apart, and that cluster IDs are stable.
+
+Run with: pytest tests/core/test_use_case_clustering.py -v
+"""
+
+import sys
+import os
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+from core.analytics.use_case_clustering import cluster_vectors, cluster_id_for
+
+
+def _topics(count: int, per_topic: int, noise: float, dims: int = 256):
+    rng = np.random.default_rng(7)
+    centers = rng.standard_normal((count, dims))
+    truth = np.repeat(np.arange(count), per_topic)
+    vectors = centers[truth] + noise * rng.standard_normal((len(truth), dims))
+    return vectors.astype(np.float32), truth
+
+
+def test_near_duplicates_merge_per_topic():
+    vectors, truth = _topics(count=20, per_topic=30, noise=0.01)
+    labels = cluster_vectors(vectors, np.ones(len(vectors)), distance_threshold=0.3)
+
+    assert len(set(labels)) == 20
+    for label in set(labels):
+        assert len(set(truth[labels == label])) == 1
+
+
+def test_tight_threshold_keeps_vectors_apart():
+    vectors, _ = _topics(count=5, per_topic=4, noise=0.5)
+    labels = cluster_vectors(vectors, np.ones(len(vectors)), distance_threshold=0.01)
+    assert len(set(labels)) == len(vectors)
+
+
+def test_empty_input():
+    assert len(cluster_vectors(np.zeros((0, 8)), np.zeros(0), 0.3)) == 0
+
+
+def test_cluster_id_is_stable_and_normalized():
+    assert cluster_id_for("Presentations") == cluster_id_for("  presentations ")
+    assert cluster_id_for("Presentations") != cluster_id_for("Web Development")
+    assert cluster_id_for("Presentations") == 2571992431
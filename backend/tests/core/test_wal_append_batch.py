@@ -0,0 +1,78 @@
+"""
+WAL batched append tests
+
+Verify that append_batch sends all entries in one pipelined call and only
+falls back to the local buffer for entries Redis rejected.
+
+Run with: pytest tests/core/test_wal_append_batch.py -v
+"""
+
+import sys
+import os
+import json
+import pytest
+from unittest.mock import AsyncMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Set dummy env vars so module-level initializers don't crash in CI.
+os.environ.setdefault("DAYTONA_API_KEY", "test-key")
+os.environ.setdefault("DAYTONA_SERVER_URL", "http://localhost")
+os.environ.setdefault("DAYTONA_TARGET", "local")
+os.environ.setdefault("MCP_CREDENTIAL_ENCRYPTION_KEY", "KEp9Zg9R1XO8EOcHoUH58dEkIQVJHIFKzKWKlpuQ6tY=")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_ANON_KEY", "test-anon-key")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-key")
+os.environ.setdefault("SUPABASE_JWT_SECRET", "test-jwt-secret")
+
+from core.agents.pipeline.stateless.persistence.wal import WriteAheadLog, WriteType
+
+
+@pytest.mark.asyncio
+async def test_append_batch_single_round_trip():
+    wal = WriteAheadLog()
+    add_batch = AsyncMock(return_value=["1-0", "1-1", "1-2"])
+
+    with patch("core.services.redis.stream_add_batch", add_batch):
+        entry_ids = await wal.append_batch("run-1", [
+            (WriteType.MESSAGE, {"message_id": "a"}),
+            (WriteType.MESSAGE, {"message_id": "b"}),
+            (WriteType.CREDIT, {"amount": 1}),
+        ])
+
+    assert len(entry_ids) == 3
+    assert len(set(entry_ids)) == 3
+    add_batch.assert_awaited_once()
+    args, kwargs = add_batch.call_args
+    assert args[0] == "wal:run:run-1"
+    assert [json.loads(f["payload"])["entry_id"] for f in args[1]] == entry_ids
+    assert kwargs["expire_seconds"] == WriteAheadLog.ENTRY_TTL_SECONDS
+    assert "run-1" not in wal._local_buffer
+
+
+@pytest.mark.asyncio
+async def test_append_batch_partial_failure_buffers_only_failed_entries():
+    wal = WriteAheadLog()
+    add_batch = AsyncMock(return_value=["1-0", None, "1-2"])
+
+    with patch("core.services.redis.stream_add_batch", add_batch):
+        entry_ids = await wal.append_batch("run-1", [
+            (WriteType.MESSAGE, {"message_id": "a"}),
+            (WriteType.MESSAGE, {"message_id": "b"}),
+            (WriteType.MESSAGE, {"message_id": "c"}),
+        ])
+
+    buffered = list(wal._local_buffer["run-1"])
+    assert [e.entry_id for e in buffered] == [entry_ids[1]]
+    assert buffered[0].data == {"message_id": "b"}
+
+
+@pytest.mark.asyncio
+async def test_append_falls_back_to_local_buffer_when_redis_raises():
+    wal = WriteAheadLog()
+    add_batch = AsyncMock(side_effect=ConnectionError("down"))
+
+    with patch("core.services.redis.stream_add_batch", add_batch):
+        entry_id = await wal.append("run-1", WriteType.MESSAGE, {"message_id": "a"})
+
+    assert [e.entry_id for e in wal._local_buffer["run-1"]] == [entry_id]